@@ -0,0 +1,11 @@
+"""处理流程基准测试
+
+无界面驱动数据生成、引擎处理、网格化、滤波器组、分析算法与导出，在不同波束数、网格尺寸
+和数据包速率下测量吞吐量与峰值内存，结果写为JSON，可与基线对比以发现性能回退。
+
+用法::
+
+    python -m benchmarks -o bench.json              # 快速参数集
+    python -m benchmarks --full -o bench.json       # 完整参数集（波束32~1024，网格50²~4000²）
+    python -m benchmarks -k filters --compare baseline.json
+"""
@@ -0,0 +1,350 @@
+"""基准测试用例
+
+参数取值为 (快速, 完整) 两组：快速参数集用于日常回归检查，完整参数集覆盖
+波束数 32~1024、网格 50²~4000²。
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from sonar_engine import analysis, crs, filters
+from sonar_engine.container import Container
+from sonar_engine.coverage import plan_coverage
+from sonar_engine.export import grid_batches, stream_export
+from sonar_engine.georef import georeference, georeference_ping
+from sonar_engine.gridding import DepthGrid, grid_soundings
+from sonar_engine.mesh import export_mesh
+from sonar_engine.mosaic import MosaicStore
+from sonar_engine.network import decode_ping, encode_ping
+from sonar_engine.parallel import ParallelGrid
+from sonar_engine.planning import DepthSurface, plan_lines
+from sonar_engine.report import build_report, report_data
+from sonar_engine.scenario import Scenario
+from sonar_engine.survey_io import load_survey, save_survey
+from sonar_engine.terrain import TerrainLayers
+
+from .harness import case
+
+BEAM_COUNTS = ([32, 256, 1024], [32, 64, 128, 256, 512, 1024])
+GRID_SIZES = ([50, 500], [50, 200, 1000, 2000, 4000])
+PING_RATES = ([2, 20], [1, 2, 5, 10, 20, 50])
+FILTER_NAMES = ([name for name in filters.FILTERS if name != "无过滤"],) * 2
+
+PINGS_PER_RUN = 50
+
+
+def synthetic_grid(size, nan_fraction=0.1, seed=0):
+    """带起伏地形、噪声和未探测区域(NaN)的水深网格"""
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.linspace(0, 10, size), np.linspace(0, 10, size))
+    values = 20 + 3 * np.sin(x) * np.cos(y) + 0.5 * rng.standard_normal((size, size))
+    values[rng.random((size, size)) < nan_fraction] = np.nan
+    return values
+
+
+def _utilization(result):
+    """按给定数据包速率，单个数据包处理耗时占数据包间隔的比例"""
+    per_ping = result["median_s"] / result["items"]
+    utilization = per_ping * result["params"]["rate"]
+    return {"per_ping_ms": per_ping * 1000, "utilization": utilization, "realtime": utilization < 1.0}
+
+
+# ---------------------------------------------------------------- 数据生成与处理流程
+@case("simulator.next_ping", "ping", beams=BEAM_COUNTS)
+def bench_next_ping(seed, beams):
+    simulator = Scenario(seed=seed, beams=beams).simulator()
+
+    def run():
+        for _ in range(PINGS_PER_RUN):
+            simulator.next_ping()
+    return run, PINGS_PER_RUN
+
+
+@case("engine.ingest", "ping", beams=BEAM_COUNTS, grid=([100], [100, 1000]))
+def bench_ingest(seed, beams, grid):
+    scenario = Scenario(seed=seed, beams=beams)
+    simulator = scenario.simulator()
+    pings = [simulator.next_ping() for _ in range(PINGS_PER_RUN)]
+    engine = scenario.engine(grid_size=grid, extent=20.0)
+
+    def run():
+        for package in pings:
+            engine.ingest(package)
+    return run, PINGS_PER_RUN
+
+
+@case("engine.ingest_many", "ping", sources=([1, 2], [1, 2, 4]), beams=([256], [64, 256, 1024]))
+def bench_ingest_many(seed, sources, beams):
+    # 多探头/多船：各数据源的数据包交替到达，按界面的方式整批处理
+    scenario = Scenario(seed=seed, beams=beams, sources=sources)
+    simulators = scenario.simulators()
+    pings = [simulator.next_ping() for _ in range(PINGS_PER_RUN) for simulator in simulators]
+    engine = scenario.engine(grid_size=100, extent=20.0)
+
+    def run():
+        engine.ingest_many(pings)
+    return run, len(pings)
+
+
+@case("network.decode", "ping", op=(["decode"], ["encode", "decode"]), beams=BEAM_COUNTS)
+def bench_network_decode(seed, op, beams):
+    # 网络接收端逐个报文解析（np.frombuffer），决定单线程接收能跟上的数据包速率
+    simulator = Scenario(seed=seed, beams=beams).simulator()
+    pings = [simulator.next_ping() for _ in range(PINGS_PER_RUN)]
+    if op == "encode":
+        def run():
+            for sequence, package in enumerate(pings):
+                encode_ping(package, sequence)
+        return run, PINGS_PER_RUN
+
+    messages = [bytes(encode_ping(package, sequence)) for sequence, package in enumerate(pings)]
+
+    def run():
+        for message in messages:
+            decode_ping(message)
+    return run, PINGS_PER_RUN
+
+
+@case("pipeline.realtime", "ping", metrics=_utilization, beams=BEAM_COUNTS, rate=PING_RATES)
+def bench_realtime(seed, beams, rate):
+    # 取数+处理的完整一步，按数据包速率换算处理负载（>=1 表示跟不上实时数据）
+    scenario = Scenario(seed=seed, beams=beams, rate=rate)
+    simulator = scenario.simulator()
+    engine = scenario.engine(grid_size=100, extent=20.0)
+
+    def run():
+        for _ in range(PINGS_PER_RUN):
+            engine.step(simulator)
+    return run, PINGS_PER_RUN
+
+
+@case("georef.georeference", "ping", beams=BEAM_COUNTS, batch=([1, 50], [1, 10, 50]))
+def bench_georeference(seed, beams, batch):
+    # batch=1 为逐个数据包归位（实时处理），batch>1 为多个数据包一次归位（后处理）
+    simulator = Scenario(seed=seed, beams=beams).simulator()
+    pings = [simulator.next_ping() for _ in range(PINGS_PER_RUN)]
+    if batch == 1:
+        def run():
+            for package in pings:
+                georeference_ping(package)
+        return run, PINGS_PER_RUN
+
+    fields = {key: np.array([package[key] for package in pings])
+              for key in ('position_x', 'position_y', 'heading', 'pitch', 'roll', 'beam_angles', 'beam_data')}
+
+    def run():
+        for start in range(0, PINGS_PER_RUN, batch):
+            chunk = {key: values[start:start + batch] for key, values in fields.items()}
+            georeference(chunk['position_x'], chunk['position_y'], chunk['heading'], chunk['beam_angles'],
+                         chunk['beam_data'], pitch=chunk['pitch'], roll=chunk['roll'])
+    return run, PINGS_PER_RUN
+
+
+PROJECTIONS = {
+    "utm": lambda: crs.utm(51),
+    "enu": lambda: crs.LocalTangentPlane(30.0, 120.0),
+}
+
+
+@case("crs.transform", "fix", projection=(list(PROJECTIONS),) * 2, direction=(["forward", "inverse"],) * 2,
+      count=([100000], [10000, 1000000]))
+def bench_crs(seed, projection, direction, count):
+    # 批量导入定位数据时的投影正算/反算吞吐量
+    rng = np.random.default_rng(seed)
+    projection = PROJECTIONS[projection]()
+    lat = 30.0 + rng.random(count) * 0.5
+    lon = 120.0 + rng.random(count) * 0.5
+    if direction == "forward":
+        def run():
+            projection.forward(lat, lon)
+    else:
+        x, y = projection.forward(lat, lon)
+
+        def run():
+            projection.inverse(x, y)
+    return run, count
+
+
+# ---------------------------------------------------------------- 网格化与滤波
+@case("gridding.grid_soundings", "sounding", grid=GRID_SIZES)
+def bench_grid_soundings(seed, grid):
+    rng = np.random.default_rng(seed)
+    count = grid * grid * 2
+    x, y = rng.random(count) * 1000, rng.random(count) * 1000
+    depth = 20 + rng.standard_normal(count)
+
+    def run():
+        grid_soundings(x, y, depth, size=grid)
+    return run, count
+
+
+@case("gridding.add_pings", "sounding", workers=([0, 1, 2], [0, 1, 2, 4, 8]), beams=([1024], [256, 1024]))
+def bench_add_pings(seed, workers, beams):
+    # 一批数据包的归位与实时网格化：workers=0 为单进程 DepthGrid，否则为共享内存多进程网格化（在工作进程中归位）
+    simulator = Scenario(seed=seed, beams=beams).simulator()
+    pings = [simulator.next_ping() for _ in range(PINGS_PER_RUN * 4)]
+    grid = ParallelGrid(1000, 20.0, workers=workers) if workers else DepthGrid(1000, 20.0)
+    grid.add_pings([dict(pings[0])])  # 等待工作进程启动
+
+    def run():
+        # ParallelGrid 把落点写回数据包，每次传入副本使各次都包含归位
+        grid.add_pings([dict(package) for package in pings])
+    return run, PINGS_PER_RUN * 4 * beams, grid.close
+
+
+@case("filters.apply_filter", "cell", filter=FILTER_NAMES, grid=GRID_SIZES)
+def bench_filter(seed, filter, grid):
+    values = synthetic_grid(grid, seed=seed)
+
+    def run():
+        filters.apply_filter(values, filter, 5)
+    return run, values.size
+
+
+# ---------------------------------------------------------------- 分析
+ANALYSES = {
+    "slope": lambda values: analysis.slope(values, 0.2),
+    "histogram": lambda values: analysis.depth_histogram(values),
+    "laplacian_features": analysis.feature_map,
+    "quality": analysis.quality_map,
+}
+
+
+@case("analysis", "cell", routine=(list(ANALYSES),) * 2, grid=GRID_SIZES)
+def bench_analysis(seed, routine, grid):
+    values = synthetic_grid(grid, seed=seed)
+    func = ANALYSES[routine]
+
+    def run():
+        func(values)
+    return run, values.size
+
+
+@case("terrain.refresh", "cell", mode=(["full", "incremental"],) * 2, grid=([1000], [1000, 2000, 4000]))
+def bench_terrain(seed, mode, grid):
+    # 地形图层刷新：整幅计算与一次刷新内 PINGS_PER_RUN 个数据包更新网格后的瓦片增量计算
+    values = synthetic_grid(grid, seed=seed)
+    terrain = TerrainLayers(DepthGrid(grid, extent=float(grid), initial=values))
+    rng = np.random.default_rng(seed)
+    row = grid // 2 + np.arange(PINGS_PER_RUN)
+    cells = (row[:, None] * grid + rng.integers(0, grid, (PINGS_PER_RUN, 64))).ravel()
+
+    def run():
+        if mode == "full":
+            terrain.invalidate()
+        else:
+            terrain.mark(cells)
+        terrain.refresh()
+    return run, values.size
+# ---------------------------------------------------------------- 测线覆盖
+@case("coverage.plan_coverage", "line set", cells=([100, 400], [100, 200, 400, 1000]), overlap=([False, True],) * 2)
+def bench_plan_coverage(seed, cells, overlap):
+    surface = DepthSurface.plane(cells=cells)
+    plan = plan_lines(surface, heading=90)
+
+    def run():
+        plan_coverage(surface, plan, overlap=overlap)
+    return run, 1
+
+
+# ---------------------------------------------------------------- 导入导出
+@case("export.save_survey", "cell", layout=(["csv", "svy"],) * 2, grid=GRID_SIZES)
+def bench_save(seed, layout, grid):
+    # csv: 航迹CSV + 水深 .npy；svy: 压缩容器
+    values = synthetic_grid(grid, seed=seed)
+    track = np.cumsum(np.random.default_rng(seed).random(1000))
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    filename = os.path.join(directory, f"survey.{layout}")
+
+    def run():
+        save_survey(filename, track, track, values, timestamps=track)
+    return run, values.size, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+@case("export.stream_export", "cell", fmt=(["csv", "npy"],) * 2, grid=([500, 2000], [500, 2000, 4000]))
+def bench_stream_export(seed, fmt, grid):
+    # 网格有效单元分批导出为 x,y,depth 列，内存占用与网格大小无关
+    values = synthetic_grid(grid, seed=seed)
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    filename = os.path.join(directory, "soundings.csv" if fmt == "csv" else "soundings")
+
+    def run():
+        stream_export(grid_batches(values), filename, fmt)
+    return run, values.size, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+@case("export.load_survey", "cell", layout=(["csv", "svy"],) * 2, grid=GRID_SIZES)
+def bench_load(seed, layout, grid):
+    values = synthetic_grid(grid, seed=seed)
+    track = np.cumsum(np.random.default_rng(seed).random(1000))
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    filename = os.path.join(directory, f"survey.{layout}")
+    save_survey(filename, track, track, values, timestamps=track)
+
+    def run():
+        load_survey(filename)
+    return run, values.size, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+@case("container.read_area", "cell", grid=([2000], [2000, 4000]), window=([256], [64, 256, 1024]))
+def bench_container_area(seed, grid, window):
+    # 从压缩容器中按区域读取网格窗口，只解压相交的瓦片
+    values = synthetic_grid(grid, seed=seed)
+    track = np.cumsum(np.random.default_rng(seed).random(1000))
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    filename = os.path.join(directory, "survey.svy")
+    save_survey(filename, track, track, values, timestamps=track)
+    container = Container(filename)
+
+    def run():
+        container.read_area("grid/depth", grid / 3, grid / 3, grid / 3 + window, grid / 3 + window)
+    return run, window * window, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+@case("report.build", "cell", fmt=(["pdf"], ["pdf", "html"]), grid=([500], [500, 2000, 4000]))
+def bench_report(seed, fmt, grid):
+    # 渲染水深图、坡度图、直方图与航迹图并组装报告（界面中在工作进程内执行）
+    values = synthetic_grid(grid, seed=seed)
+    track = np.cumsum(np.random.default_rng(seed).random(1000))
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    filename = os.path.join(directory, f"report.{fmt}")
+    data = report_data(values, 1.0, track, track)
+
+    def run():
+        build_report(filename, data)
+    return run, values.size, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+@case("mosaic.merge_soundings", "sounding", soundings=([1000000], [100000, 1000000, 10000000]),
+      tile=([256], [256, 1024]))
+def bench_mosaic_merge(seed, soundings, tile):
+    # 多次测量流式合并到磁盘镶嵌图，每次运行都在已有瓦片上做加权平均
+    rng = np.random.default_rng(seed)
+    x = rng.random(soundings) * 2000
+    y = rng.random(soundings) * 2000
+    depth = 20 + 0.01 * x + rng.standard_normal(soundings) * 0.1
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    store = MosaicStore(directory, cell_size=1.0, tile_size=tile)
+
+    def run():
+        store.merge_soundings(x, y, depth)
+        store.flush()
+
+    def cleanup():
+        store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return run, soundings, cleanup
+
+
+@case("mesh.export", "cell", fmt=(["PLY", "glTF"], ["OBJ", "PLY", "STL", "glTF"]), grid=([500], [500, 2000, 4000]))
+def bench_mesh_export(seed, fmt, grid):
+    values = synthetic_grid(grid, seed=seed)
+    directory = tempfile.mkdtemp(prefix="sonar_bench_")
+    filename = os.path.join(directory, "model")
+
+    def run():
+        export_mesh(filename, values, fmt=fmt)
+    return run, values.size, lambda: shutil.rmtree(directory, ignore_errors=True)
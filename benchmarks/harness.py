@@ -0,0 +1,97 @@
+"""基准测试框架：用例注册、计时与峰值内存测量"""
+
+import itertools
+import statistics
+import time
+import tracemalloc
+
+CASES = []
+
+
+class Case:
+    """一个基准测试用例
+
+    setup(seed=种子, **params) 返回 (run, items) 或 (run, items, cleanup)：run() 为被测操作，items 为每次
+    调用处理的数量（数据包、测点或网格单元数），用于换算吞吐量，cleanup() 在测量结束后
+    释放临时文件等资源。params 为 {参数名: (快速取值, 完整取值)}。
+    """
+
+    def __init__(self, name, setup, unit, params, metrics=None):
+        self.name = name
+        self.setup = setup
+        self.unit = unit
+        self.params = params
+        self.metrics = metrics
+
+    def combinations(self, full=False):
+        names = list(self.params)
+        values = [self.params[name][1 if full else 0] for name in names]
+        for combination in itertools.product(*values):
+            yield dict(zip(names, combination))
+
+
+def case(name, unit, metrics=None, **params):
+    """注册基准测试用例的装饰器"""
+    def decorator(setup):
+        CASES.append(Case(name, setup, unit, params, metrics))
+        return setup
+    return decorator
+
+
+def measure(run, repeat=5, min_time=0.2, max_time=10.0):
+    """重复运行 run()，返回每次耗时(s)列表
+
+    先预热一次，然后至少运行 repeat 次且累计不少于 min_time 秒，累计超过 max_time 后停止。
+    """
+    run()
+    times = []
+    total = 0.0
+    while len(times) < repeat or total < min_time:
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        times.append(elapsed)
+        total += elapsed
+        if total >= max_time:
+            break
+    return times
+
+
+def peak_memory(run):
+    """运行一次 run()，返回期间的Python/NumPy分配峰值(字节)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case, params, seed=0, repeat=5, min_time=0.2, max_time=10.0):
+    """运行一个用例的一组参数，返回结果字典"""
+    # 输入数据全部由种子派生（Scenario 与 np.random.Generator），不同运行之间逐位一致
+    run, items, *cleanup = case.setup(seed=seed, **params)
+    try:
+        times = measure(run, repeat=repeat, min_time=min_time, max_time=max_time)
+        peak = peak_memory(run)
+    finally:
+        for func in cleanup:
+            func()
+    median = statistics.median(times)
+    result = {
+        "case": case.name,
+        "params": params,
+        "unit": case.unit,
+        "items": items,
+        "repeats": len(times),
+        "best_s": min(times),
+        "median_s": median,
+        "mean_s": statistics.fmean(times),
+        "throughput": items / median if median > 0 else float("inf"),
+        "peak_memory_mb": peak / 1e6,
+    }
+    if case.metrics is not None:
+        result.update(case.metrics(result))
+    return result
@@ -0,0 +1,111 @@
+"""基准测试命令行入口：运行用例、写出JSON结果并与基线对比"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from . import cases  # noqa: F401  注册用例
+from .harness import CASES, run_case
+
+
+def environment():
+    """记录运行环境，便于比较不同机器/版本的结果"""
+    info = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    try:
+        import scipy
+        info["scipy"] = scipy.__version__
+    except ImportError:
+        pass
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        info["commit"] = None
+    return info
+
+
+def result_key(result):
+    return result["case"], json.dumps(result["params"], sort_keys=True, ensure_ascii=False)
+
+
+def compare(results, baseline, threshold=0.2):
+    """与基线结果对比，返回耗时或峰值内存增长超过 threshold 的回退列表"""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        for metric in ("median_s", "peak_memory_mb"):
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + threshold):
+                regressions.append({"case": result["case"], "params": result["params"], "metric": metric,
+                                    "baseline": old[metric], "current": result[metric],
+                                    "ratio": result[metric] / old[metric]})
+    return regressions
+
+
+def format_params(params):
+    return " ".join(f"{name}={value}" for name, value in params.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="多波束处理流程基准测试")
+    parser.add_argument("-o", "--output", default=None, help="结果JSON文件")
+    parser.add_argument("--full", action="store_true", help="使用完整参数集（波束32~1024，网格50²~4000²）")
+    parser.add_argument("-k", "--select", action="append", default=[], help="只运行名称包含该字符串的用例，可多次指定")
+    parser.add_argument("--repeat", type=int, default=5, help="每组参数最少重复次数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每组参数最少累计运行时间(s)")
+    parser.add_argument("--max-time", type=float, default=10.0, help="每组参数最多累计运行时间(s)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--compare", default=None, help="基线结果JSON文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为回退的增长比例")
+    parser.add_argument("--list", action="store_true", help="只列出用例")
+    args = parser.parse_args(argv)
+
+    selected = [c for c in CASES if not args.select or any(s in c.name for s in args.select)]
+    if args.list:
+        for c in selected:
+            for params in c.combinations(args.full):
+                print(f"{c.name} {format_params(params)}")
+        return 0
+
+    results = []
+    for c in selected:
+        for params in c.combinations(args.full):
+            result = run_case(c, params, seed=args.seed, repeat=args.repeat,
+                              min_time=args.min_time, max_time=args.max_time)
+            results.append(result)
+            print(f"{c.name:<26} {format_params(params):<28} {result['median_s'] * 1000:10.3f} ms "
+                  f"{result['throughput']:14.0f} {c.unit}/s {result['peak_memory_mb']:9.1f} MB")
+
+    report = {"environment": environment(), "full": args.full, "results": results}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report["regressions"] = compare(results, json.load(f), args.threshold)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    regressions = report.get("regressions", [])
+    for regression in regressions:
+        print(f"回退: {regression['case']} {format_params(regression['params'])} {regression['metric']} "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})",
+              file=sys.stderr)
+    return 1 if regressions else 0
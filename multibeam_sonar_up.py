@@ -1,22 +1,43 @@
 import sys
-import os
-import numpy as np
 import time
+
+_startup_begin = time.perf_counter()
+
+import os
+from collections import deque
 from datetime import datetime
-import pandas as pd
-import pyqtgraph as pg
+from sonar_engine.profiling import StartupProfiler
+
+# 以 --profile-startup 启动时打印各子系统的导入与初始化耗时
+PROFILER = StartupProfiler(enabled="--profile-startup" in sys.argv, origin=_startup_begin)
+
+import numpy as np
+PROFILER.mark("导入 numpy")
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QVBoxLayout, QHBoxLayout,
                              QWidget, QPushButton, QLabel, QGridLayout, QFileDialog, QSplitter,
                              QComboBox, QCheckBox, QGroupBox, QSlider, QStatusBar, QToolBar,
                              QAction, QLineEdit, QMessageBox, QTableWidget, QTableWidgetItem,
-                             QProgressBar, QDockWidget, QFrame, QSizePolicy)
+                             QProgressBar, QDockWidget, QFrame, QSizePolicy, QHeaderView, QProgressDialog)
 from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal, QSize
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor, QLinearGradient, QPalette, QBrush, QImage
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.cm as cm
+PROFILER.mark("导入 PyQt5")
+
+import pyqtgraph as pg
+PROFILER.mark("导入 pyqtgraph")
+
+# pandas、scipy 和 matplotlib 在首次使用时才导入（3D视图、数据分析选项卡首次显示时）
+from sonar_engine import PingSimulator
+from sonar_engine import analysis
+from sonar_engine.coverage import plan_infill
+from sonar_engine.eventlog import EventLog
+from sonar_engine.instrumentation import StageTimers, timed
+from sonar_engine.network import QUEUE_LIMIT, PingServer
+from sonar_engine.report import report_data, start_report
+from sonar_engine.scenario import Scenario
+from sonar_engine.telemetry import TelemetrySampler
+from sonar_gui import BackgroundTask, DepthRaster, DiagnosticsPanel, LazyPage, LogTableModel, LogView
+PROFILER.mark("导入 sonar_engine / sonar_gui")
 
 # 自定义样式表
 STYLE_SHEET = """
@@ -116,12 +137,12 @@ QProgressBar {
 QProgressBar::chunk {
     background-color: #007ACC;
 }
-QTableWidget {
+QTableView {
     background-color: #252526;
     color: #CCCCCC;
     gridline-color: #3F3F46;
 }
-QTableWidget QHeaderView::section {
+QTableView QHeaderView::section {
     background-color: #3F3F46;
     color: white;
     padding: 4px;
@@ -136,120 +157,52 @@ QLineEdit {
 }
 """
 
+# 界面批量处理数据包的间隔(ms)：各数据源的数据包先进入共用队列，每个间隔处理一次并刷新一次显示
+INGEST_INTERVAL_MS = 50
+# 网络接收模式下超过该时间(s)未收到数据包时数据链路状态为警告
+LINK_TIMEOUT_S = 2.0
+
+# 各数据源航迹与当前位置的颜色（主数据源使用原有的绿色航迹、红色位置标记）
+SOURCE_COLORS = ['#FFD700', '#00BFFF', '#FF69B4', '#ADFF2F', '#FFA500']
+
 
 # 数据采集线程 - 模拟数据生成
 class DataGeneratorThread(QThread):
-    dataReady = pyqtSignal(object)
-    statusUpdate = pyqtSignal(str, str)
+    # (设备, 状态, 数据源名称)，主数据源的名称为 None
+    statusUpdate = pyqtSignal(str, str, object)
 
-    def __init__(self):
+    def __init__(self, timers=None, simulator=None, interval=0.5, queue=None, device_status=None):
         super().__init__()
         self.running = True
-        self.interval = 0.5  # 默认0.5秒更新一次
-        self.noise_level = 0.2  # 噪声水平
-        self.beam_count = 64  # 默认64个波束
-        self.data_quality = "高精度"  # 数据质量模式
+        self.interval = interval  # 默认0.5秒更新一次
+        self.timers = timers if timers is not None else StageTimers()
+        if simulator is None:
+            simulator = PingSimulator(beam_count=64, noise_level=0.2, data_quality="高精度")
+        self.simulator = simulator
+        # 数据包放入与其他数据源共用的队列（deque 的追加与取出是线程安全的），不再逐包发送信号
+        self.queue = queue if queue is not None else deque()
+        # 数据源当前的设备状态（处理引擎中的字典，只读），模拟的状态变化据此产生
+        self.device_status = device_status if device_status is not None else {}
 
     def set_params(self, interval=None, noise=None, beams=None, quality=None):
         if interval is not None:
             self.interval = interval
-        if noise is not None:
-            self.noise_level = noise
-        if beams is not None:
-            self.beam_count = beams
-        if quality is not None:
-            self.data_quality = quality
+        self.simulator.set_params(noise=noise, beams=beams, quality=quality)
 
     def run(self):
-        position_x = 0
-        position_y = 0
-
-        # 模拟海底特征 - 添加一些有趣的地形特征
-        terrain_features = [
-            {"type": "ridge", "x": 3.5, "y": 5.0, "height": 8, "width": 1.5},
-            {"type": "crater", "x": 7.0, "y": 3.0, "depth": 5, "radius": 1.0},
-            {"type": "seamount", "x": 2.0, "y": 8.0, "height": 10, "radius": 0.8}
-        ]
-
         while self.running:
-            # 模拟声呐移动
-            position_x += 0.1
-            position_y += 0.05 * np.sin(position_x * 0.8)
-
-            # 根据数据质量模式调整噪声
-            actual_noise = self.noise_level
-            if self.data_quality == "高精度":
-                actual_noise *= 0.5
-            elif self.data_quality == "标准":
-                actual_noise *= 1.0
-            elif self.data_quality == "快速扫描":
-                actual_noise *= 2.0
-
-            # 模拟波束数据
-            beam_angles = np.linspace(-75, 75, self.beam_count)
-            base_depth = 20 + 5 * np.sin(position_x * 0.5) + 3 * np.cos(position_y * 0.4)
-            beam_data = np.zeros(self.beam_count)
-
-            # 生成基础波束数据
-            for i, angle in enumerate(beam_angles):
-                # 计算该波束在海底的x,y位置
-                angle_rad = np.deg2rad(angle)
-                beam_x = position_x + base_depth * np.tan(angle_rad) * np.cos(angle_rad)
-                beam_y = position_y + base_depth * np.tan(angle_rad) * np.sin(angle_rad)
-
-                # 基础水深
-                depth = base_depth
-
-                # 添加地形特征的影响
-                for feature in terrain_features:
-                    dx = beam_x - feature["x"]
-                    dy = beam_y - feature["y"]
-                    distance = np.sqrt(dx ** 2 + dy ** 2)
-
-                    if feature["type"] == "ridge":
-                        width = feature["width"]
-                        if abs(dx) < width:
-                            # 山脊形状
-                            depth -= feature["height"] * np.exp(-(dx / width) ** 2)
-
-                    elif feature["type"] == "crater":
-                        if distance < feature["radius"]:
-                            # 环形坑
-                            depth += feature["depth"] * (1 - distance / feature["radius"])
-
-                    elif feature["type"] == "seamount":
-                        if distance < feature["radius"]:
-                            # 海底山
-                            depth -= feature["height"] * (1 - distance / feature["radius"]) ** 2
-
-                # 添加噪声
-                depth += np.random.normal(0, actual_noise)
-
-                # 限制最小深度
-                depth = max(depth, 5)
-
-                beam_data[i] = depth
-
-            # 随机产生设备状态变化
-            if np.random.rand() > 0.97:
-                devices = ["电源", "传感器", "数据链路", "存储系统", "GPS"]
-                device = np.random.choice(devices)
-                status = np.random.choice(["正常", "警告", "错误"], p=[0.7, 0.2, 0.1])
-                self.statusUpdate.emit(device, status)
-
-            # 创建数据包
-            data_package = {
-                'timestamp': time.time(),
-                'position_x': position_x,
-                'position_y': position_y,
-                'beam_angles': beam_angles,
-                'beam_data': beam_data,
-                'quality': self.data_quality,
-                'noise_level': actual_noise
-            }
-
-            # 发送数据
-            self.dataReady.emit(data_package)
+            # 每次循环的耗时（不含暂停）
+            with self.timers.stage("DataGeneratorThread.run"):
+                # 生成数据包
+                data_package = self.simulator.next_ping()
+
+                # 随机产生设备状态变化
+                change = self.simulator.poll_status_change(self.device_status)
+                if change is not None:
+                    self.statusUpdate.emit(*change, self.simulator.source)
+
+                # 放入数据包队列
+                self.queue.append(data_package)
 
             # 暂停
             time.sleep(self.interval)
@@ -260,9 +213,16 @@ class DataGeneratorThread(QThread):
 
 # 主窗口类
 class MultibeamSonarSystem(QMainWindow):
-    def __init__(self):
+    def __init__(self, scenario=None, grid_workers=0, listen_port=None):
         super().__init__()
 
+        # 模拟场景（种子、波束数、数据包速率），同一种子的模拟数据逐位相同
+        self.scenario = scenario if scenario is not None else Scenario()
+        # 多进程网格化的工作进程数，0 为在界面进程内网格化
+        self.grid_workers = grid_workers
+        # 网络接收端口：设置时从本机网络接收数据包（模拟声呐或实际设备），不启动模拟数据线程
+        self.listen_port = listen_port
+
         # 应用样式
         self.setStyleSheet(STYLE_SHEET)
 
@@ -271,18 +231,54 @@ class MultibeamSonarSystem(QMainWindow):
 
         # 初始化数据
         self.init_data()
+        PROFILER.mark("初始化 数据/处理引擎")
 
         # 创建UI
         self.init_ui()
 
-        # 启动数据生成线程
-        self.data_thread = DataGeneratorThread()
-        self.data_thread.dataReady.connect(self.process_data)
-        self.data_thread.statusUpdate.connect(self.update_device_status)
-        self.data_thread.start()
+        # 订阅处理引擎的结果
+        self.engine.subscribe("ping", self.on_ping_processed)
+        self.engine.subscribe("grid", self.on_grid_replaced)
+        self.engine.subscribe("status", self.update_device_status)
+        self.engine.subscribe("coverage", self.on_coverage)
+        self.engine.subscribe("ping", self.telemetry.on_ping)
+
+        # 启动数据生成线程：每个数据源（探头/测量船）一个线程，数据包进入共用队列；data_thread 为主数据源。
+        # 网络接收模式下数据包只来自 PingServer，不创建模拟数据生成线程（data_thread 为 None）
+        self.ping_queue = deque(maxlen=QUEUE_LIMIT)
+        self.data_threads = []
+        self.ping_server = None
+        self.dropped_packets = 0
+        if listen_port is None:
+            for simulator in self.scenario.simulators(wall_clock=True):
+                # 与 SonarEngine.step 相同，主数据源使用引擎的设备状态，其他数据源使用各自的设备状态
+                if simulator.source is None:
+                    device_status = self.engine.device_status
+                else:
+                    device_status = self.engine.add_source(simulator.source).device_status
+                thread = DataGeneratorThread(self.timers, simulator, interval=self.scenario.interval,
+                                             queue=self.ping_queue, device_status=device_status)
+                thread.statusUpdate.connect(self.engine.set_device_status)
+                thread.start()
+                self.data_threads.append(thread)
+        else:
+            self.ping_server = PingServer(port=listen_port, queue=self.ping_queue).start()
+            self.link_timer = QTimer()
+            self.link_timer.timeout.connect(self.check_network_link)
+            self.link_timer.start(1000)
+        self.data_thread = self.data_threads[0] if self.data_threads else None
+        # 定时批量处理队列中的数据包，显示刷新频率与数据源数量无关
+        self.ingest_timer = QTimer()
+        self.ingest_timer.timeout.connect(self.poll_pending)
+        self.ingest_timer.start(INGEST_INTERVAL_MS)
+        self.telemetry.start()
+        PROFILER.mark("启动 数据生成线程")
 
         # 状态栏初始化
-        self.statusBar().showMessage("系统就绪 | 数据模拟模式")
+        if listen_port is None:
+            self.statusBar().showMessage("系统就绪 | 数据模拟模式")
+        else:
+            self.statusBar().showMessage(f"系统就绪 | 网络接收模式 (端口 {listen_port})")
         self.progress_bar = QProgressBar()
         self.progress_bar.setFixedWidth(150)
         self.progress_bar.setMaximum(100)
@@ -301,31 +297,32 @@ class MultibeamSonarSystem(QMainWindow):
         self.update_timer.timeout.connect(self.update_runtime)
         self.update_timer.start(1000)  # 每秒更新一次
 
+        # 覆盖漏洞检查（连通区域标记较扫测带累积耗时，按固定间隔执行）
+        self.gap_timer = QTimer()
+        self.gap_timer.timeout.connect(self.check_coverage_gaps)
+        self.gap_timer.start(2000)
+
     def init_data(self):
         """初始化数据结构"""
-        # 航迹数据
-        self.track_x = []
-        self.track_y = []
-
-        # 水深数据矩阵
-        self.grid_size = 100
-        self.depth_data = np.zeros((self.grid_size, self.grid_size))
-        # 初始化为NaN表示未探测区域
-        self.depth_data[:] = np.nan
-
-        # 波束数据
-        self.beam_count = 64
-        self.beam_data = np.zeros(self.beam_count)
-        self.beam_angles = np.linspace(-75, 75, self.beam_count)
-
-        # 设备状态
-        self.device_status = {
-            "电源": "正常",
-            "传感器": "正常",
-            "数据链路": "正常",
-            "存储系统": "正常",
-            "GPS": "正常",
-        }
+        # 航迹、波束、水深网格和设备状态由处理引擎持有
+        self.engine = self.scenario.engine(grid_size=100, extent=20.0, track_limit=1000,
+                                           grid_workers=self.grid_workers)
+        # 界面显示中的随机效果使用独立随机流，不影响模拟数据
+        self.display_rng = self.scenario.display_rng()
+        # 水深图渲染缓存；depth_cells 为上次刷新后被更新的网格索引，None 表示网格被整体替换
+        self.depth_raster = DepthRaster()
+        self.depth_cells = None
+        # 主数据源以外各数据源的 (仪表盘航迹, 实时航迹, 位置标记)
+        self.source_items = {}
+        # 水深图显示的图层：None 为水深，否则为处理引擎地形图层名（坡度/阴影浮雕/曲率）
+        self.depth_layer = None
+        self.device_status = self.engine.device_status
+
+        # 各处理阶段的耗时直方图，与处理引擎共用（引擎记录清洗/网格化/统计阶段）
+        self.timers = self.engine.timers
+
+        # 主机与处理流程遥测（后台线程采样，性能图表只读取其缓冲区）
+        self.telemetry = TelemetrySampler(interval=1.0, history=100)
 
         # 数据统计
         self.data_stats = {
@@ -352,6 +349,56 @@ class MultibeamSonarSystem(QMainWindow):
         # 警告日志
         self.alert_log = []
 
+        # 覆盖漏洞：当前检出的漏洞（按补测顺序）及已发出警告的漏洞质心
+        self.coverage_gaps = []
+        self.alerted_gaps = []
+        self.gap_min_area = 0.2  # 最小漏洞面积(m²)
+        self.coverage_changed = False  # 上次检查漏洞后覆盖栅格是否有变化
+
+        # 系统日志与警告日志保存在定长缓冲区中，表格按批刷新
+        self.log_model = LogTableModel(EventLog(capacity=5000), columns=[("时间", "time_text"), ("事件", "message")],
+                                       parent=self)
+        self.alert_model = LogTableModel(EventLog(capacity=500), columns=[("时间", "time_text"), ("警告信息", "message")],
+                                         parent=self)
+
+        # 3D视图参数
+        self.view_mode = "彩色高程图"
+        self.color_scheme = "深度渐变"
+        self.elevation_factor = 2.0
+
+    # 以下属性将界面中原有的数据成员映射到处理引擎的状态
+    @property
+    def track_x(self):
+        return self.engine.track_x
+
+    @property
+    def track_y(self):
+        return self.engine.track_y
+
+    @property
+    def depth_data(self):
+        return self.engine.grid.values
+
+    @depth_data.setter
+    def depth_data(self, values):
+        self.engine.load_grid(values)
+
+    @property
+    def grid_size(self):
+        return self.engine.grid.size
+
+    @property
+    def beam_angles(self):
+        return self.engine.beam_angles
+
+    @property
+    def beam_data(self):
+        return self.engine.beam_data
+
+    @property
+    def beam_count(self):
+        return len(self.engine.beam_angles)
+
     def init_ui(self):
         """初始化用户界面"""
         # 创建工具栏
@@ -364,13 +411,19 @@ class MultibeamSonarSystem(QMainWindow):
         # 创建选项卡
         self.tabs = QTabWidget()
 
-        # 创建各个选项卡页面
+        # 创建各个选项卡页面，3D视图和数据分析页在首次显示时构建
+        PROFILER.mark("构建 工具栏")
         self.create_dashboard_tab()
+        PROFILER.mark("构建 仪表盘选项卡")
         self.create_realtime_tab()
+        PROFILER.mark("构建 实时显示选项卡")
         self.create_3d_view_tab()
         self.create_device_monitor_tab()
+        PROFILER.mark("构建 设备监控选项卡")
         self.create_data_analysis_tab()
         self.create_settings_tab()
+        PROFILER.mark("构建 设置选项卡")
+        self.create_diagnostics_tab()
 
         # 设置主布局
         main_layout = QVBoxLayout()
@@ -497,7 +550,6 @@ class MultibeamSonarSystem(QMainWindow):
         depth_layout = QVBoxLayout()
         self.depth_image = pg.ImageView()
         self.depth_image.ui.graphicsView.setBackground("#252526")
-        self.depth_image.setColorMap(pg.colormap.get('viridis'))
         depth_layout.addWidget(self.depth_image)
         depth_group.setLayout(depth_layout)
         grid_layout.addWidget(depth_group, 1, 0)
@@ -524,9 +576,7 @@ class MultibeamSonarSystem(QMainWindow):
         system_layout.addWidget(self.status_table)
 
         # 添加警告日志
-        self.alert_list = QTableWidget(0, 2)
-        self.alert_list.setHorizontalHeaderLabels(["时间", "警告信息"])
-        self.alert_list.horizontalHeader().setStretchLastSection(True)
+        self.alert_list = LogView(self.alert_model, show_filter=False)
         system_layout.addWidget(QLabel("警告日志:"))
         system_layout.addWidget(self.alert_list)
 
@@ -538,13 +588,8 @@ class MultibeamSonarSystem(QMainWindow):
 
         self.tabs.addTab(tab, "仪表盘")
 
-        # 更新深度图
-
-        empty_data = np.zeros((self.grid_size, self.grid_size))
-        empty_data[:] = 20.0
-        mask = np.random.rand(self.grid_size, self.grid_size) > 0.2
-        empty_data[mask] = np.nan
-        self.depth_image.setImage(empty_data, levels=(0, 40))
+        # 水深图显示共用的 RGBA 缓冲区
+        self.depth_raster.attach(self.depth_image)
 
     def create_realtime_tab(self):
         """创建实时显示选项卡"""
@@ -651,30 +696,38 @@ class MultibeamSonarSystem(QMainWindow):
         self.realtime_depth_image.ui.graphicsView.setBackground("#252526")
         self.realtime_depth_image.ui.roiBtn.hide()
         self.realtime_depth_image.ui.menuBtn.hide()
-        viridis_cm = pg.colormap.get('viridis')
-        self.realtime_depth_image.setColorMap(viridis_cm)
-
-        # 初始化深度图
-        # 替换为
-        empty_data = np.zeros((self.grid_size, self.grid_size))
-        # 添加一些默认值而不是全部设为NaN
-        empty_data[:] = 20.0  # 设置默认水深为20米
-        # 只将部分区域设为NaN，保留一些有效数据
-        mask = np.random.rand(self.grid_size, self.grid_size) > 0.2
-        empty_data[mask] = np.nan
-        # 设置图像并指定级别范围
-        self.realtime_depth_image.setImage(empty_data, levels=(0, 40))
+        # 与仪表盘水深图共用同一个 RGBA 缓冲区
+        self.depth_raster.attach(self.realtime_depth_image)
         # 水深图标题和颜色条
         depth_title = QLabel("海底地形热力图")
         depth_title.setAlignment(Qt.AlignCenter)
         depth_title.setStyleSheet("font-size: 12pt; font-weight: bold; color: #FFFFFF;")
 
+        # 补测测线叠加在水深图上（图像横轴为网格行号，纵轴为列号）
+        self.infill_curve = pg.PlotDataItem(pen=pg.mkPen(color='#FF4040', width=2), connect='pairs')
+        self.realtime_depth_image.getView().addItem(self.infill_curve)
+
         # 添加信息标签
         self.depth_info_label = QLabel("水深范围: 0.0m - 0.0m | 扫描覆盖率: 0.0%")
         self.depth_info_label.setAlignment(Qt.AlignCenter)
 
+        # 补测测线列表
+        self.infill_table = QTableWidget(0, 5)
+        self.infill_table.setHorizontalHeaderLabels(["顺序", "起点(m)", "终点(m)", "长度(m)", "漏洞面积(m²)"])
+        self.infill_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.infill_table.verticalHeader().setVisible(False)
+        self.infill_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        infill_group = QGroupBox("补测测线")
+        infill_layout = QVBoxLayout()
+        infill_layout.addWidget(self.infill_table)
+        infill_group.setLayout(infill_layout)
+
+        depth_row = QHBoxLayout()
+        depth_row.addWidget(self.realtime_depth_image, 3)
+        depth_row.addWidget(infill_group, 1)
+
         bottom_layout.addWidget(depth_title)
-        bottom_layout.addWidget(self.realtime_depth_image)
+        bottom_layout.addLayout(depth_row)
         bottom_layout.addWidget(self.depth_info_label)
 
         # 添加到分隔窗口
@@ -688,8 +741,15 @@ class MultibeamSonarSystem(QMainWindow):
         self.tabs.addTab(tab, "实时显示")
 
     def create_3d_view_tab(self):
-        """创建3D视图选项卡"""
-        tab = QWidget()
+        """创建3D视图选项卡（首次显示时构建）"""
+        self.view3d_tab = LazyPage(self.build_3d_view_tab)
+        self.tabs.addTab(self.view3d_tab, "3D地形图")
+
+    def build_3d_view_tab(self, tab):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        from mpl_toolkits.mplot3d import Axes3D  # 注册3d投影
+
         layout = QVBoxLayout()
 
         # 创建控制面板
@@ -768,13 +828,6 @@ class MultibeamSonarSystem(QMainWindow):
         layout.addWidget(bottom_panel)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, "3D地形图")
-
-        # 保存参数
-        self.view_mode = "彩色高程图"
-        self.color_scheme = "深度渐变"
-        self.elevation_factor = 2.0
-
 
     def create_device_monitor_tab(self):
         """创建设备监控选项卡"""
@@ -828,14 +881,12 @@ class MultibeamSonarSystem(QMainWindow):
         log_label = QLabel("系统日志")
         left_layout.addWidget(log_label)
 
-        self.system_log = QTableWidget(0, 2)
-        self.system_log.setHorizontalHeaderLabels(["时间", "事件"])
-        self.system_log.horizontalHeader().setStretchLastSection(True)
+        self.system_log = LogView(self.log_model)
         left_layout.addWidget(self.system_log)
 
         # 添加一些初始日志项
         self.add_system_log("系统初始化完成")
-        self.add_system_log("开始数据模拟")
+        self.add_system_log(f"开始数据模拟（种子 {self.scenario.seed}）")
 
         left_panel.setLayout(left_layout)
 
@@ -853,11 +904,13 @@ class MultibeamSonarSystem(QMainWindow):
         self.cpu_plot.setLabel('left', '使用率', '%')
         self.cpu_plot.setLabel('bottom', '时间', 's')
 
-        self.cpu_data = np.zeros(100)
-        self.cpu_curve = self.cpu_plot.plot(self.cpu_data, pen=pg.mkPen(color='#FF5500', width=2))
+        self.cpu_plot.addLegend(offset=(5, 5))
+        self.cpu_curve = self.cpu_plot.plot(pen=pg.mkPen(color='#FF5500', width=2), name="系统")
+        self.process_cpu_curve = self.cpu_plot.plot(pen=pg.mkPen(color='#FFCC00', width=1), name="本程序")
 
         cpu_layout.addWidget(self.cpu_plot)
         cpu_group.setLayout(cpu_layout)
+        self.cpu_group = cpu_group
 
         # 内存使用率图表
         mem_group = QGroupBox("内存使用率")
@@ -869,11 +922,11 @@ class MultibeamSonarSystem(QMainWindow):
         self.mem_plot.setLabel('left', '使用率', '%')
         self.mem_plot.setLabel('bottom', '时间', 's')
 
-        self.mem_data = np.zeros(100)
-        self.mem_curve = self.mem_plot.plot(self.mem_data, pen=pg.mkPen(color='#00CCFF', width=2))
+        self.mem_curve = self.mem_plot.plot(pen=pg.mkPen(color='#00CCFF', width=2))
 
         mem_layout.addWidget(self.mem_plot)
         mem_group.setLayout(mem_layout)
+        self.mem_group = mem_group
 
         # 网络流量图表
         net_group = QGroupBox("网络流量")
@@ -884,16 +937,34 @@ class MultibeamSonarSystem(QMainWindow):
         self.net_plot.setLabel('left', '流量', 'KB/s')
         self.net_plot.setLabel('bottom', '时间', 's')
 
-        self.net_data = np.zeros(100)
-        self.net_curve = self.net_plot.plot(self.net_data, pen=pg.mkPen(color='#00FF00', width=2))
+        self.net_plot.addLegend(offset=(5, 5))
+        self.net_curve = self.net_plot.plot(pen=pg.mkPen(color='#00FF00', width=2), name="接收")
+        self.net_sent_curve = self.net_plot.plot(pen=pg.mkPen(color='#FF00FF', width=1), name="发送")
 
         net_layout.addWidget(self.net_plot)
         net_group.setLayout(net_layout)
+        self.net_group = net_group
+
+        # 数据处理吞吐量图表
+        throughput_group = QGroupBox("数据处理吞吐量")
+        throughput_layout = QVBoxLayout()
+        self.throughput_plot = pg.PlotWidget()
+        self.throughput_plot.setBackground("#252526")
+        self.throughput_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.throughput_plot.setLabel('left', '数据包', 'ping/s')
+        self.throughput_plot.setLabel('bottom', '时间', 's')
+
+        self.throughput_curve = self.throughput_plot.plot(pen=pg.mkPen(color='#00A6FF', width=2))
+
+        throughput_layout.addWidget(self.throughput_plot)
+        throughput_group.setLayout(throughput_layout)
+        self.throughput_group = throughput_group
 
         # 添加到右侧布局
         right_layout.addWidget(cpu_group)
         right_layout.addWidget(mem_group)
         right_layout.addWidget(net_group)
+        right_layout.addWidget(throughput_group)
 
         right_panel.setLayout(right_layout)
 
@@ -909,9 +980,20 @@ class MultibeamSonarSystem(QMainWindow):
         self.perf_timer.timeout.connect(self.update_performance_data)
         self.perf_timer.start(1000)  # 每秒更新一次
 
+    def create_diagnostics_tab(self):
+        """创建性能诊断选项卡（各处理阶段耗时分位数）"""
+        self.diagnostics_panel = DiagnosticsPanel(self.timers)
+        self.tabs.addTab(self.diagnostics_panel, "性能诊断")
+
     def create_data_analysis_tab(self):
-        """创建数据分析选项卡"""
-        tab = QWidget()
+        """创建数据分析选项卡（首次显示时构建）"""
+        self.analysis_tab = LazyPage(self.build_data_analysis_tab)
+        self.tabs.addTab(self.analysis_tab, "数据分析")
+
+    def build_data_analysis_tab(self, tab):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
         layout = QVBoxLayout()
 
         # 创建分析控制面板
@@ -1000,7 +1082,6 @@ class MultibeamSonarSystem(QMainWindow):
         layout.addWidget(analysis_splitter)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, "数据分析")
 
         # 设置初始分析视图
         self.update_analysis_view()
@@ -1056,6 +1137,10 @@ class MultibeamSonarSystem(QMainWindow):
         auto_save_check = QCheckBox("自动保存数据")
         auto_save_check.setChecked(True)
 
+        log_file_check = QCheckBox("系统日志写入文件 (logs/system.log)")
+        log_file_check.setChecked(False)
+        log_file_check.toggled.connect(self.toggle_log_file)
+
         save_interval_label = QLabel("保存间隔:")
         save_interval_edit = QLineEdit("60")
         save_interval_unit = QLabel("秒")
@@ -1067,6 +1152,7 @@ class MultibeamSonarSystem(QMainWindow):
         storage_layout.addWidget(save_interval_label, 2, 0)
         storage_layout.addWidget(save_interval_edit, 2, 1)
         storage_layout.addWidget(save_interval_unit, 2, 2)
+        storage_layout.addWidget(log_file_check, 3, 0, 1, 3)
 
         storage_group.setLayout(storage_layout)
         layout.addWidget(storage_group)
@@ -1135,104 +1221,74 @@ class MultibeamSonarSystem(QMainWindow):
         # 保存设置控件
         self.refresh_rate_slider = refresh_rate_slider
 
-    def process_data(self, data_package):
-        """处理接收到的数据包"""
-        # 更新位置
-        self.track_x.append(data_package['position_x'])
-        self.track_y.append(data_package['position_y'])
+    def poll_pending(self):
+        """定时检查采集队列，有数据包时才处理（空闲时不计入处理耗时）"""
+        if self.ping_queue:
+            self.process_pending()
 
-        # 限制航迹长度
-        if len(self.track_x) > 1000:
-            self.track_x = self.track_x[-1000:]
-            self.track_y = self.track_y[-1000:]
-
-        # 更新波束数据
-        self.beam_angles = data_package['beam_angles']
-        self.beam_data = data_package['beam_data']
-        self.beam_count = len(self.beam_angles)
-
-        # 更新深度图
-        self.update_depth_map(data_package)
-
-        # 更新仪表盘统计数据
+    @timed("process_data")
+    def process_pending(self):
+        """批量处理各数据源队列中的数据包，然后刷新一次显示"""
+        count = len(self.ping_queue)
+        if count == 0:
+            return
+        packages = [self.ping_queue.popleft() for _ in range(count)]
+        # 整批网格化（多进程网格化时只分发一次），结果通过 on_ping_processed 回调
+        self.engine.ingest_many(packages)
+        self.refresh_displays()
+
+    def check_network_link(self):
+        """网络接收模式下按最近是否收到数据包更新数据链路状态，采集队列已满丢弃数据包时记录警告"""
+        last = self.ping_server.last_received
+        status = "正常" if last is not None and time.time() - last < LINK_TIMEOUT_S else "警告"
+        self.engine.set_device_status("数据链路", status)
+        dropped = self.ping_server.counters["dropped"]
+        if dropped > self.dropped_packets:
+            self.add_system_log(f"采集队列已满，丢弃 {dropped - self.dropped_packets} 个数据包", "警告")
+            self.dropped_packets = dropped
+
+    def on_ping_processed(self, data_package):
+        """处理引擎完成一个数据包后记录被更新的网格（显示在整批处理后刷新）"""
+        if self.depth_cells is not None:
+            self.depth_cells.append(data_package['grid_cells'])
+
+    def refresh_displays(self):
+        """刷新仪表盘统计与实时显示"""
         self.update_dashboard_stats()
-
-        # 更新实时显示
         self.update_realtime_display()
 
-    def update_depth_map(self, data_package):
-        """更新深度图数据"""
-        position_x = data_package['position_x']
-        position_y = data_package['position_y']
-        beam_angles = data_package['beam_angles']
-        beam_data = data_package['beam_data']
-
-        # 计算网格索引
-        grid_x = int((position_x % 20) / 20 * self.grid_size)
-        grid_y = int((position_y % 20) / 20 * self.grid_size)
-
-        # 更新当前点的深度数据
-        if 0 <= grid_x < self.grid_size and 0 <= grid_y < self.grid_size:
-            self.depth_data[grid_y, grid_x] = np.mean(beam_data)
-
-        # 沿波束方向更新深度数据
-        for i, angle in enumerate(beam_angles):
-            # 跳过一些波束以提高性能
-            if i % 4 != 0:
-                continue
-
-            angle_rad = np.deg2rad(angle)
-            beam_depth = beam_data[i]
-
-            # 计算波束在海底的位置
-            beam_distance = beam_depth * np.tan(abs(angle_rad))
-            beam_x = position_x + np.cos(angle_rad) * beam_distance
-            beam_y = position_y + np.sin(angle_rad) * beam_distance
-
-            # 转换为网格索引
-            beam_grid_x = int((beam_x % 20) / 20 * self.grid_size)
-            beam_grid_y = int((beam_y % 20) / 20 * self.grid_size)
-
-            # 更新深度数据
-            if 0 <= beam_grid_x < self.grid_size and 0 <= beam_grid_y < self.grid_size:
-                # 使用指数加权移动平均来平滑更新
-                alpha = 0.3  # 新数据权重
-                if np.isnan(self.depth_data[beam_grid_y, beam_grid_x]):
-                    self.depth_data[beam_grid_y, beam_grid_x] = beam_depth
-                else:
-                    self.depth_data[beam_grid_y, beam_grid_x] = (1 - alpha) * self.depth_data[
-                        beam_grid_y, beam_grid_x] + alpha * beam_depth
+    def on_grid_replaced(self):
+        """水深网格被整体替换（加载、滤波）后，下次刷新时整幅重绘水深图"""
+        self.depth_cells = None
+        self.coverage_changed = True
 
+    @timed("update_dashboard_stats")
     def update_dashboard_stats(self):
         """更新仪表盘统计数据"""
-        # 计算平均水深
-        valid_depths = self.depth_data[~np.isnan(self.depth_data)]
-        if len(valid_depths) > 0:
-            avg_depth = np.mean(valid_depths)
-            self.depth_value_label.setText(f"{avg_depth:.1f}")
+        stats = self.engine.stats
+
+        # 平均水深
+        if stats.coverage > 0:
+            self.depth_value_label.setText(f"{stats.grid_mean:.1f}")
 
             # 更新数据统计
-            self.data_stats["平均水深"] = avg_depth
-            self.data_stats["最小水深"] = np.min(valid_depths)
-            self.data_stats["最大水深"] = np.max(valid_depths)
+            self.data_stats["平均水深"] = stats.grid_mean
+            self.data_stats["最小水深"] = stats.grid_min
+            self.data_stats["最大水深"] = stats.grid_max
 
-        # 计算航行距离
+        # 航行距离
         if len(self.track_x) > 1:
-            dx = np.diff(self.track_x)
-            dy = np.diff(self.track_y)
-            distance = np.sum(np.sqrt(dx ** 2 + dy ** 2))
-            self.distance_value_label.setText(f"{distance:.2f}")
+            self.distance_value_label.setText(f"{stats.distance:.2f}")
 
         # 更新数据点数
         self.points_value_label.setText(f"{len(self.track_x)}")
         self.data_stats["总数据点"] = len(self.track_x)
 
-        # 计算扫描面积 (近似)
-        valid_cells = np.sum(~np.isnan(self.depth_data))
-        area = valid_cells / (self.grid_size * self.grid_size) * 400  # 20m x 20m = 400m²
-        self.area_value_label.setText(f"{area:.1f}")
-        self.data_stats["扫描面积"] = area
+        # 扫描面积 (近似)
+        self.area_value_label.setText(f"{stats.grid_area:.1f}")
+        self.data_stats["扫描面积"] = stats.grid_area
 
+    @timed("update_realtime_display")
     def update_realtime_display(self):
         """更新实时显示"""
         # 更新波束显示
@@ -1255,37 +1311,81 @@ class MultibeamSonarSystem(QMainWindow):
         # 更新当前位置标记
         if len(self.track_x) > 0 and len(self.track_y) > 0:
             self.position_marker.setData([self.track_x[-1]], [self.track_y[-1]])
-
-        # 更新水深图 - 使用掩码处理NaN值
-        masked_data = np.ma.masked_invalid(self.depth_data)
-        # 替换为:
-        valid_depths = self.depth_data[~np.isnan(self.depth_data)]
-        if len(valid_depths) > 0:
-            min_depth = np.min(valid_depths)
-            max_depth = np.max(valid_depths)
-            # 确保最小和最大深度有一定差距
-            if min_depth == max_depth:
-                max_depth = min_depth + 1.0
-            self.depth_image.setImage(masked_data, levels=(min_depth, max_depth))
-            self.realtime_depth_image.setImage(masked_data, levels=(min_depth, max_depth))
+        self.update_source_tracks()
+
+        # 更新水深图：只重新着色上次刷新后被更新的网格（网格被整体替换时整幅着色）
+        cells = self.depth_cells
+        self.depth_cells = []
+        if self.depth_layer is None:
+            values = self.depth_data
+            cells = None if cells is None else np.concatenate(cells) if cells else cells
         else:
-            # 如果没有有效数据，使用默认范围
-            self.depth_image.setImage(masked_data, levels=(0, 40))
-            self.realtime_depth_image.setImage(masked_data, levels=(0, 40))
-
-        # 更新深度信息标签
-        valid_depths = self.depth_data[~np.isnan(self.depth_data)]
-        if len(valid_depths) > 0:
-            min_depth = np.min(valid_depths)
-            max_depth = np.max(valid_depths)
-            coverage = 100 * np.sum(~np.isnan(self.depth_data)) / (self.grid_size * self.grid_size)
+            # 地形图层只重新计算被标记的瓦片，并只重新着色这些瓦片中的网格
+            terrain = self.engine.terrain
+            updated = terrain.refresh()
+            values = terrain.layers[self.depth_layer]
+            cells = None if cells is None else updated
+        self.depth_raster.update(values, cells)
+
+        # 更新深度信息标签（水深范围取处理引擎增量维护的网格统计，不再扫描整个网格）
+        stats = self.engine.stats
+        if stats.coverage > 0:
+            min_depth = stats.grid_min
+            max_depth = stats.grid_max
+            # 覆盖率按实际扫测带统计，而不是有水深值的网格比例
+            coverage = 100 * self.engine.coverage.coverage
             self.depth_info_label.setText(
-                f"水深范围: {min_depth:.1f}m - {max_depth:.1f}m | 扫描覆盖率: {coverage:.1f}%")
-
-    def update_device_status(self, device, status):
+                f"水深范围: {min_depth:.1f}m - {max_depth:.1f}m | 扫描覆盖率: {coverage:.1f}% | "
+                f"覆盖漏洞: {len(self.coverage_gaps)} 处")
+
+    def on_coverage(self, data_package, new_cells):
+        """覆盖栅格有新覆盖的网格时，下次检查重新查找漏洞"""
+        if new_cells:
+            self.coverage_changed = True
+
+    def check_coverage_gaps(self):
+        """检查覆盖漏洞，更新补测测线列表，并对新出现的漏洞发出警告"""
+        coverage = self.engine.coverage
+        if not self.coverage_changed or not np.any(coverage.covered):
+            return
+        self.coverage_changed = False
+        grid = self.engine.grid
+        position = (0.0, 0.0)
+        if len(self.track_x) > 0:
+            position = (self.track_x[-1], self.track_y[-1])
+            if grid.wrap:
+                position = (position[0] % grid.extent, position[1] % grid.extent)
+        self.coverage_gaps = plan_infill(coverage.find_gaps(min_area=self.gap_min_area), position)
+
+        # 与已警告的漏洞质心相距超过5个网格的视为新漏洞；已补测的漏洞不再保留
+        radius = 5 * grid.cell_size
+        alerted = []
+        for gap in self.coverage_gaps:
+            known = any(np.hypot(gap.centroid[0] - x, gap.centroid[1] - y) < radius for x, y in self.alerted_gaps)
+            if not known:
+                x0, y0, x1, y1 = gap.segment
+                message = (f"覆盖漏洞: 面积 {gap.area:.2f} m²，建议补测测线 ({x0:.1f}, {y0:.1f}) → "
+                           f"({x1:.1f}, {y1:.1f})，长度 {gap.length:.1f} m")
+                self.alert_model.append(message, "警告")
+                self.add_system_log(message, "警告")
+            alerted.append(gap.centroid)
+        self.alerted_gaps = alerted
+
+        self.infill_table.setRowCount(len(self.coverage_gaps))
+        for row, gap in enumerate(self.coverage_gaps):
+            x0, y0, x1, y1 = gap.segment
+            values = [str(row + 1), f"({x0:.1f}, {y0:.1f})", f"({x1:.1f}, {y1:.1f})", f"{gap.length:.1f}",
+                      f"{gap.area:.2f}"]
+            for column, text in enumerate(values):
+                self.infill_table.setItem(row, column, QTableWidgetItem(text))
+
+        # 水深图的像素坐标为 (行, 列)，即 (y, x) / 网格间距
+        segments = np.array([gap.segment for gap in self.coverage_gaps]).reshape(-1, 2, 2)
+        self.infill_curve.setData(segments[:, :, 1].ravel() / grid.cell_size,
+                                  segments[:, :, 0].ravel() / grid.cell_size)
+
+    def update_device_status(self, device, status, old_status=None):
         """更新设备状态"""
-        self.device_status[device] = status
-
         # 更新状态显示
         color = "#00FF00" if status == "正常" else "#FF0000"
 
@@ -1304,38 +1404,24 @@ class MultibeamSonarSystem(QMainWindow):
 
         # 如果状态为警告或错误，添加到警告日志
         if status != "正常":
-            current_time = datetime.now().strftime("%H:%M:%S")
-            row = self.alert_list.rowCount()
-            self.alert_list.insertRow(row)
-            self.alert_list.setItem(row, 0, QTableWidgetItem(current_time))
-            self.alert_list.setItem(row, 1, QTableWidgetItem(f"{device}: {status}"))
-            self.alert_list.scrollToBottom()
+            self.alert_model.append(f"{device}: {status}", "警告")
 
             # 同时添加到系统日志
             self.add_system_log(f"{device}状态变为{status}", "警告")
 
     def add_system_log(self, message, level="信息"):
         """添加系统日志"""
-        current_time = datetime.now().strftime("%H:%M:%S")
-        row = self.system_log.rowCount()
-        self.system_log.insertRow(row)
-
-        time_item = QTableWidgetItem(current_time)
-        self.system_log.setItem(row, 0, time_item)
-
-        msg_item = QTableWidgetItem(message)
-        if level == "警告":
-            msg_item.setForeground(QColor("#FFCC00"))
-        elif level == "错误":
-            msg_item.setForeground(QColor("#FF0000"))
-        else:
-            msg_item.setForeground(QColor("#00CCFF"))
-
-        self.system_log.setItem(row, 1, msg_item)
-        self.system_log.scrollToBottom()
+        self.log_model.append(message, level)
 
+    @timed("update_3d_view")
     def update_3d_view(self):
         """更新3D视图"""
+        if not self.view3d_tab.is_built:
+            return
+
+        from matplotlib import cm
+        from mpl_toolkits.mplot3d import Axes3D
+
         self.ax3d.clear()
 
         # 准备数据
@@ -1382,7 +1468,7 @@ class MultibeamSonarSystem(QMainWindow):
             points_z = Z.flatten()
 
             # 根据深度设置颜色
-            colors = plt.cm.viridis((points_z - np.min(points_z)) / (np.max(points_z) - np.min(points_z)))
+            colors = cm.viridis((points_z - np.min(points_z)) / (np.max(points_z) - np.min(points_z)))
 
             self.ax3d.scatter(
                 points_x, points_y, points_z,
@@ -1436,6 +1522,8 @@ class MultibeamSonarSystem(QMainWindow):
 
     def get_color_map(self):
         """根据颜色方案返回合适的颜色映射"""
+        from matplotlib import cm
+
         if self.color_scheme == "深度渐变":
             return cm.viridis
         elif self.color_scheme == "高光渲染":
@@ -1448,6 +1536,9 @@ class MultibeamSonarSystem(QMainWindow):
 
     def update_analysis_view(self):
         """更新分析视图"""
+        if not self.analysis_tab.is_built:
+            return  # 数据分析页首次显示时会执行一次
+
         analysis_type = self.analysis_combo.currentText()
 
         # 准备数据
@@ -1460,9 +1551,7 @@ class MultibeamSonarSystem(QMainWindow):
 
         if analysis_type == "海底坡度分析":
             # 计算水深梯度
-            grad_y, grad_x = np.gradient(self.depth_data)
-            slope = np.sqrt(grad_x ** 2 + grad_y ** 2)
-            slope[np.isnan(self.depth_data)] = np.nan
+            slope = analysis.slope(self.depth_data)
 
             # 绘制坡度热力图
             im = self.analysis_ax.imshow(
@@ -1501,8 +1590,9 @@ class MultibeamSonarSystem(QMainWindow):
             self.analysis_ax.set_title("水深分布直方图", color='white')
 
             # 添加平均值和中位数标记
-            mean_depth = np.mean(valid_data)
-            median_depth = np.median(valid_data)
+            counts, edges, depth_stats = analysis.depth_histogram(self.depth_data, bins=30)
+            mean_depth = depth_stats["mean"]
+            median_depth = depth_stats["median"]
             self.analysis_ax.axvline(mean_depth, color='red', linestyle='dashed', linewidth=1,
                                      label=f'平均值: {mean_depth:.2f}m')
             self.analysis_ax.axvline(median_depth, color='green', linestyle='dashed', linewidth=1,
@@ -1513,10 +1603,10 @@ class MultibeamSonarSystem(QMainWindow):
             self.update_stats_table([
                 ("平均水深", f"{mean_depth:.2f} m"),
                 ("中位水深", f"{median_depth:.2f} m"),
-                ("最大水深", f"{np.max(valid_data):.2f} m"),
-                ("最小水深", f"{np.min(valid_data):.2f} m"),
-                ("标准差", f"{np.std(valid_data):.2f} m"),
-                ("数据点数", f"{len(valid_data)}")
+                ("最大水深", f"{depth_stats['max']:.2f} m"),
+                ("最小水深", f"{depth_stats['min']:.2f} m"),
+                ("标准差", f"{depth_stats['std']:.2f} m"),
+                ("数据点数", f"{depth_stats['count']}")
             ])
 
             # 更新描述
@@ -1527,18 +1617,7 @@ class MultibeamSonarSystem(QMainWindow):
 
         elif analysis_type == "海底特征识别":
             # 使用拉普拉斯算子检测特征
-            from scipy import ndimage
-
-            # 填充NaN值以便进行卷积
-            filled_data = np.copy(self.depth_data)
-            mask = np.isnan(filled_data)
-            filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-            # 应用拉普拉斯滤波器检测边缘/特征
-            features = ndimage.laplace(filled_data)
-
-            # 将结果应用回原始掩码
-            features[mask] = np.nan
+            features, feature_stats = analysis.feature_map(self.depth_data)
 
             # 绘制特征图
             im = self.analysis_ax.imshow(
@@ -1550,17 +1629,12 @@ class MultibeamSonarSystem(QMainWindow):
             self.analysis_figure.colorbar(im, ax=self.analysis_ax, label='特征强度')
             self.analysis_ax.set_title("海底特征识别", color='white')
 
-            # 特征统计
-            feature_threshold = np.nanstd(features) * 2
-            strong_features = np.abs(features) > feature_threshold
-            feature_count = np.sum(strong_features & ~mask)
-
             # 更新统计数据
             self.update_stats_table([
-                ("检测到的特征数", f"{feature_count}"),
-                ("特征密度", f"{feature_count / np.sum(~mask):.4f}"),
-                ("平均特征强度", f"{np.nanmean(np.abs(features)):.2f}"),
-                ("最大特征强度", f"{np.nanmax(np.abs(features)):.2f}")
+                ("检测到的特征数", f"{feature_stats['count']}"),
+                ("特征密度", f"{feature_stats['density']:.4f}"),
+                ("平均特征强度", f"{feature_stats['mean_strength']:.2f}"),
+                ("最大特征强度", f"{feature_stats['max_strength']:.2f}")
             ])
 
             # 更新描述
@@ -1570,21 +1644,8 @@ class MultibeamSonarSystem(QMainWindow):
             )
 
         elif analysis_type == "数据质量评估":
-            # 计算相邻点的标准差来评估数据质量
-            # 创建一个3x3窗口的标准差滤波器
-            from scipy import ndimage
-
-            # 填充NaN值以便进行卷积
-            filled_data = np.copy(self.depth_data)
-            mask = np.isnan(filled_data)
-            filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-            # 计算局部标准差
-            def local_std(x):
-                return np.std(x) if np.sum(~np.isnan(x)) > 4 else np.nan
-
-            quality_map = ndimage.generic_filter(filled_data, local_std, size=3)
-            quality_map[mask] = np.nan
+            # 计算相邻点3x3窗口的标准差来评估数据质量
+            quality_map, quality_stats = analysis.quality_map(self.depth_data, size=3)
 
             # 绘制质量图
             im = self.analysis_ax.imshow(
@@ -1596,22 +1657,13 @@ class MultibeamSonarSystem(QMainWindow):
             self.analysis_figure.colorbar(im, ax=self.analysis_ax, label='局部标准差 (m)')
             self.analysis_ax.set_title("数据质量评估", color='white')
 
-            # 定义质量阈值
-            low_quality = quality_map > np.nanpercentile(quality_map, 90)
-            high_quality = quality_map < np.nanpercentile(quality_map, 10)
-
-            # 计算质量统计
-            low_quality_count = np.sum(low_quality & ~mask)
-            high_quality_count = np.sum(high_quality & ~mask)
-            total_valid = np.sum(~mask)
-
             # 更新统计数据
             self.update_stats_table([
-                ("高质量数据比例", f"{high_quality_count / total_valid * 100:.1f}%"),
-                ("低质量数据比例", f"{low_quality_count / total_valid * 100:.1f}%"),
-                ("平均局部标准差", f"{np.nanmean(quality_map):.3f} m"),
-                ("最大局部标准差", f"{np.nanmax(quality_map):.3f} m"),
-                ("数据质量评分", f"{100 - np.nanmean(quality_map) / np.nanmax(quality_map) * 100:.1f}/100")
+                ("高质量数据比例", f"{quality_stats['high_ratio'] * 100:.1f}%"),
+                ("低质量数据比例", f"{quality_stats['low_ratio'] * 100:.1f}%"),
+                ("平均局部标准差", f"{quality_stats['mean_std']:.3f} m"),
+                ("最大局部标准差", f"{quality_stats['max_std']:.3f} m"),
+                ("数据质量评分", f"{quality_stats['score']:.1f}/100")
             ])
 
             # 更新描述
@@ -1638,67 +1690,10 @@ class MultibeamSonarSystem(QMainWindow):
         """应用数据过滤"""
         filter_type = self.filter_combo.currentText()
 
-        if filter_type == "无过滤":
-            # 不做任何处理
-            pass
-
-        elif filter_type == "低通滤波":
-            # 应用高斯平滑
-            from scipy import ndimage
-
-            # 创建一个副本并填充NaN
-            filled_data = np.copy(self.depth_data)
-            mask = np.isnan(filled_data)
-            if np.any(mask):
-                filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-            # 应用高斯滤波
-            smoothed = ndimage.gaussian_filter(filled_data, sigma=1.0)
-
-            # 将滤波结果应用回原始数据，保留NaN
-            self.depth_data = np.where(mask, np.nan, smoothed)
-
-            # 更新显示
-            self.add_system_log("已应用低通滤波器")
-
-        elif filter_type == "高通滤波":
-            # 应用高通滤波来强调边缘
-            from scipy import ndimage
-
-            # 创建一个副本并填充NaN
-            filled_data = np.copy(self.depth_data)
-            mask = np.isnan(filled_data)
-            if np.any(mask):
-                filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-            # 应用拉普拉斯滤波器
-            high_pass = filled_data - ndimage.gaussian_filter(filled_data, sigma=2.0)
-            enhanced = filled_data + high_pass * 0.5  # 增强边缘
-
-            # 将结果应用回原始数据，保留NaN
-            self.depth_data = np.where(mask, np.nan, enhanced)
-
-            # 更新显示
-            self.add_system_log("已应用高通滤波器")
-
-        elif filter_type == "中值滤波":
-            # 应用中值滤波移除尖峰噪声
-            from scipy import ndimage
-
-            # 创建一个副本
-            filled_data = np.copy(self.depth_data)
-            mask = np.isnan(filled_data)
-            if np.any(mask):
-                filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-            # 应用中值滤波
-            median_filtered = ndimage.median_filter(filled_data, size=3)
-
-            # 将结果应用回原始数据，保留NaN
-            self.depth_data = np.where(mask, np.nan, median_filtered)
-
-            # 更新显示
-            self.add_system_log("已应用中值滤波器")
+        if filter_type != "无过滤":
+            # 由处理引擎对网格滤波，未探测区域保持NaN
+            self.engine.apply_filter(filter_type)
+            self.add_system_log(f"已应用{filter_type}器")
 
         # 更新分析和显示
         self.update_analysis_view()
@@ -1730,21 +1725,32 @@ class MultibeamSonarSystem(QMainWindow):
         self.progress_bar.setValue(value)
 
     def update_performance_data(self):
-        """更新性能数据图表"""
-        # 模拟CPU使用率
-        self.cpu_data = np.roll(self.cpu_data, -1)
-        self.cpu_data[-1] = 20 + 15 * np.sin(time.time() * 0.5) + np.random.rand() * 10
-        self.cpu_curve.setData(np.arange(len(self.cpu_data)), self.cpu_data)
-
-        # 模拟内存使用率
-        self.mem_data = np.roll(self.mem_data, -1)
-        self.mem_data[-1] = 40 + 10 * np.sin(time.time() * 0.2) + np.random.rand() * 5
-        self.mem_curve.setData(np.arange(len(self.mem_data)), self.mem_data)
-
-        # 模拟网络流量
-        self.net_data = np.roll(self.net_data, -1)
-        self.net_data[-1] = 50 + 30 * np.sin(time.time() * 0.3) + np.random.rand() * 20
-        self.net_curve.setData(np.arange(len(self.net_data)), self.net_data)
+        """更新性能数据图表（数据来自后台遥测线程的缓冲区）"""
+        t, data = self.telemetry.window("system_cpu", "process_cpu", "system_memory", "process_rss",
+                                        "net_recv", "net_sent", "disk_read", "disk_write",
+                                        "ping_rate", "sounding_rate")
+        if len(t) == 0:
+            return
+        latest = {name: values[-1] for name, values in data.items()}
+
+        # CPU使用率（系统 / 本程序）
+        self.cpu_curve.setData(t, data["system_cpu"], connect="finite")
+        self.process_cpu_curve.setData(t, data["process_cpu"], connect="finite")
+        self.cpu_group.setTitle(f"CPU使用率 (系统 {latest['system_cpu']:.0f}% | 本程序 {latest['process_cpu']:.0f}%)")
+
+        # 内存使用率
+        self.mem_curve.setData(t, data["system_memory"], connect="finite")
+        self.mem_group.setTitle(f"内存使用率 ({latest['system_memory']:.0f}% | 本程序 {latest['process_rss']:.0f} MB)")
+
+        # 网络流量
+        self.net_curve.setData(t, data["net_recv"], connect="finite")
+        self.net_sent_curve.setData(t, data["net_sent"], connect="finite")
+        self.net_group.setTitle(f"网络流量 (磁盘读 {latest['disk_read']:.2f} MB/s | 写 {latest['disk_write']:.2f} MB/s)")
+
+        # 数据处理吞吐量
+        self.throughput_curve.setData(t, data["ping_rate"], connect="finite")
+        self.throughput_group.setTitle(
+            f"数据处理吞吐量 ({latest['ping_rate']:.1f} ping/s | {latest['sounding_rate']:.0f} 测点/s)")
 
     def update_runtime(self):
         """更新运行时间显示"""
@@ -1754,23 +1760,49 @@ class MultibeamSonarSystem(QMainWindow):
         seconds = elapsed % 60
         self.runtime_label.setText(f"运行时间: {hours:02d}:{minutes:02d}:{seconds:02d}")
 
+    def update_source_tracks(self):
+        """更新主数据源以外各数据源的航迹与当前位置（首次出现时创建曲线）"""
+        for index, state in enumerate(list(self.engine.sources.values())[1:]):
+            items = self.source_items.get(state.name)
+            if items is None:
+                color = SOURCE_COLORS[index % len(SOURCE_COLORS)]
+                pen = pg.mkPen(color=color, width=2)
+                marker = pg.ScatterPlotItem(size=12, pen=pen, brush=pg.mkBrush(color=color))
+                self.realtime_track_plot.addItem(marker)
+                items = (self.track_plot.plot(pen=pen), self.realtime_track_plot.plot(pen=pen), marker)
+                self.source_items[state.name] = items
+                self.add_system_log(f"新数据源接入: {state.name}")
+            track_curve, realtime_curve, marker = items
+            track_curve.setData(state.track_x, state.track_y)
+            realtime_curve.setData(state.track_x, state.track_y)
+            if state.track_x:
+                marker.setData([state.track_x[-1]], [state.track_y[-1]])
+
     def change_view_mode(self, index):
-        """改变视图模式"""
+        """改变视图模式：水深图改为显示水深或对应的地形图层"""
         modes = ["标准视图", "高度差异视图", "坡度视图", "阴影浮雕视图"]
+        layers = [(None, 'viridis'), ("curvature", 'CET-D1'), ("slope", 'magma'), ("hillshade", 'CET-L1')]
+        self.depth_layer, colormap = layers[index]
+        self.depth_raster.set_colormap(colormap, render=False)
+        # 下次刷新时整幅着色，色标按新图层的数据范围重新确定
+        self.depth_cells = None
+        self.update_realtime_display()
         self.add_system_log(f"视图模式切换为: {modes[index]}")
 
     def change_beam_count(self, index):
         """改变波束数量"""
         beam_counts = [32, 64, 128, 256]
         count = beam_counts[index]
-        self.data_thread.set_params(beams=count)
+        for thread in self.data_threads:
+            thread.set_params(beams=count)
         self.add_system_log(f"波束数量已更改为: {count}")
 
     def change_data_quality(self, index):
         """改变数据质量模式"""
         quality_modes = ["高精度", "标准", "快速扫描"]
         quality = quality_modes[index]
-        self.data_thread.set_params(quality=quality)
+        for thread in self.data_threads:
+            thread.set_params(quality=quality)
         self.add_system_log(f"数据质量模式已更改为: {quality}")
 
     def change_3d_view_mode(self, index):
@@ -1795,62 +1827,55 @@ class MultibeamSonarSystem(QMainWindow):
     def change_refresh_rate(self, value):
         """改变刷新率"""
         interval = 1.0 / value  # 计算秒数
-        self.data_thread.set_params(interval=interval)
+        for thread in self.data_threads:
+            thread.set_params(interval=interval)
         self.add_system_log(f"数据刷新率已更改为: {value} Hz")
 
     def start_acquisition(self):
         """开始数据采集"""
-        self.data_thread.running = True
-        if not self.data_thread.isRunning():
-            self.data_thread.start()
+        if self.ping_server is not None:
+            if not self.ping_server.running:
+                self.ping_server.start()
+        else:
+            for thread in self.data_threads:
+                thread.running = True
+                if not thread.isRunning():
+                    thread.start()
         self.statusBar().showMessage("正在采集数据")
         self.add_system_log("开始数据采集")
 
     def stop_acquisition(self):
         """停止数据采集"""
-        self.data_thread.running = False
+        if self.ping_server is not None:
+            self.ping_server.stop()
+        for thread in self.data_threads:
+            thread.running = False
         self.statusBar().showMessage("数据采集已停止")
         self.add_system_log("停止数据采集")
 
     def save_data(self):
         """保存数据"""
         filename, _ = QFileDialog.getSaveFileName(self, "保存数据", "",
-                                                  "CSV文件 (*.csv);;NumPy文件 (*.npy);;所有文件 (*)")
+                                                  "测量容器 (*.svy);;CSV文件 (*.csv);;所有文件 (*)")
         if not filename:
             return
 
         try:
             # 保存航迹数据
             if filename.endswith('.csv'):
-                # 创建DataFrame
-                data = {
-                    'x': self.track_x,
-                    'y': self.track_y,
-                    'timestamp': [time.time() - self.start_time + i * 0.5 for i in range(len(self.track_x))]
-                }
-                df = pd.DataFrame(data)
-                df.to_csv(filename, index=False)
-
-                # 同时保存深度数据
-                depth_filename = filename.replace('.csv', '_depth.npy')
-                np.save(depth_filename, self.depth_data)
+                # 保存航迹CSV，同时保存深度数据
+                self.engine.export(filename)
 
                 self.add_system_log(f"数据已保存至: {filename}", "信息")
                 self.statusBar().showMessage(f"数据已保存至: {filename}")
 
-            elif filename.endswith('.npy'):
-                # 保存为NumPy数据包
-                data_package = {
-                    'track_x': np.array(self.track_x),
-                    'track_y': np.array(self.track_y),
-                    'depth_data': self.depth_data,
-                    'timestamp': time.time(),
-                    'metadata': {
-                        'grid_size': self.grid_size,
-                        'beam_count': self.beam_count
-                    }
-                }
-                np.save(filename, data_package)
+            elif filename.endswith('.svy'):
+                # 保存为压缩测量容器（航迹、水深网格、声速剖面与元数据在同一文件中）
+                self.engine.export(filename, metadata={
+                    'saved_at': time.time(),
+                    'grid_size': self.grid_size,
+                    'beam_count': self.beam_count
+                })
                 self.add_system_log(f"数据包已保存至: {filename}", "信息")
                 self.statusBar().showMessage(f"数据包已保存至: {filename}")
 
@@ -1864,36 +1889,18 @@ class MultibeamSonarSystem(QMainWindow):
     def load_data(self):
         """加载数据"""
         filename, _ = QFileDialog.getOpenFileName(self, "加载数据", "",
-                                                  "CSV文件 (*.csv);;NumPy文件 (*.npy);;所有文件 (*)")
+                                                  "测量数据 (*.svy *.csv);;所有文件 (*)")
         if not filename:
             return
 
         try:
             # 暂停数据生成
-            was_running = self.data_thread.running
-            self.data_thread.running = False
+            was_running = self.data_thread is not None and self.data_thread.running
+            for thread in self.data_threads:
+                thread.running = False
 
-            if filename.endswith('.csv'):
-                # 加载CSV数据
-                df = pd.read_csv(filename)
-                self.track_x = df['x'].tolist()
-                self.track_y = df['y'].tolist()
-
-                # 尝试加载深度数据
-                depth_filename = filename.replace('.csv', '_depth.npy')
-                if os.path.exists(depth_filename):
-                    self.depth_data = np.load(depth_filename)
-
-            elif filename.endswith('.npy'):
-                # 加载NumPy数据包
-                data_package = np.load(filename, allow_pickle=True).item()
-                self.track_x = data_package['track_x'].tolist()
-                self.track_y = data_package['track_y'].tolist()
-                self.depth_data = data_package['depth_data']
-
-                # 更新网格大小
-                if 'metadata' in data_package and 'grid_size' in data_package['metadata']:
-                    self.grid_size = data_package['metadata']['grid_size']
+            # 加载CSV航迹及深度数据，或压缩测量容器
+            self.engine.load(filename)
 
             # 更新显示
             self.update_dashboard_stats()
@@ -1902,7 +1909,8 @@ class MultibeamSonarSystem(QMainWindow):
             self.update_analysis_view()
 
             # 恢复数据生成
-            self.data_thread.running = was_running
+            for thread in self.data_threads:
+                thread.running = was_running
 
             self.add_system_log(f"已加载数据: {filename}", "信息")
             self.statusBar().showMessage(f"已加载数据: {filename}")
@@ -1917,143 +1925,17 @@ class MultibeamSonarSystem(QMainWindow):
     def export_report(self):
         """导出报告"""
         filename, _ = QFileDialog.getSaveFileName(self, "导出报告", "",
-                                                  "HTML文件 (*.html);;文本文件 (*.txt);;所有文件 (*)")
+                                                  "HTML文件 (*.html);;PDF文件 (*.pdf);;文本文件 (*.txt);;所有文件 (*)")
         if not filename:
             return
 
         try:
-            if filename.endswith('.html'):
-                # 创建HTML报告
-                html = """
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>多波束测深数据报告</title>
-                    <style>
-                        body { font-family: Arial, sans-serif; margin: 20px; }
-                        h1, h2 { color: #0066cc; }
-                        .stats-table { border-collapse: collapse; width: 100%; margin: 15px 0; }
-                        .stats-table th, .stats-table td { border: 1px solid #ddd; padding: 8px; text-align: left; }
-                        .stats-table th { background-color: #f2f2f2; }
-                        .figure { margin: 20px 0; text-align: center; }
-                        .figure img { max-width: 100%; border: 1px solid #ddd; }
-                    </style>
-                </head>
-                <body>
-                    <h1>多波束测深数据报告</h1>
-                    <p>生成时间: {date}</p>
-
-                    <h2>数据摘要</h2>
-                    <table class="stats-table">
-                        <tr><th>参数</th><th>值</th></tr>
-                        <tr><td>平均水深</td><td>{avg_depth:.2f} m</td></tr>
-                        <tr><td>最大水深</td><td>{max_depth:.2f} m</td></tr>
-                        <tr><td>最小水深</td><td>{min_depth:.2f} m</td></tr>
-                        <tr><td>数据点数</td><td>{points}</td></tr>
-                        <tr><td>扫描面积</td><td>{area:.2f} m²</td></tr>
-                        <tr><td>航行距离</td><td>{distance:.2f} m</td></tr>
-                    </table>
-
-                    <h2>地形图</h2>
-                    <div class="figure">
-                        <img src="depth_map.png" alt="水深图">
-                        <p>图1: 海底地形热力图</p>
-                    </div>
-
-                    <div class="figure">
-                        <img src="3d_view.png" alt="3D地形图">
-                        <p>图2: 海底3D地形图</p>
-                    </div>
-
-                    <h2>航迹图</h2>
-                    <div class="figure">
-                        <img src="track.png" alt="航迹图">
-                        <p>图3: 测量航迹</p>
-                    </div>
-
-                    <h2>分析结果</h2>
-                    <div class="figure">
-                        <img src="analysis.png" alt="分析图">
-                        <p>图4: {analysis_type}分析结果</p>
-                    </div>
-
-                    <h2>设备信息</h2>
-                    <table class="stats-table">
-                        <tr><th>设备</th><th>状态</th></tr>
-                """.format(
-                    date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    avg_depth=np.nanmean(self.depth_data) if np.any(~np.isnan(self.depth_data)) else 0,
-                    max_depth=np.nanmax(self.depth_data) if np.any(~np.isnan(self.depth_data)) else 0,
-                    min_depth=np.nanmin(self.depth_data) if np.any(~np.isnan(self.depth_data)) else 0,
-                    points=len(self.track_x),
-                    area=self.data_stats["扫描面积"],
-                    distance=np.sum(np.sqrt(np.diff(self.track_x) ** 2 + np.diff(self.track_y) ** 2)) if len(
-                        self.track_x) > 1 else 0,
-                    analysis_type=self.analysis_combo.currentText()
-                )
-
-                # 添加设备信息
-                for device, status in self.device_status.items():
-                    status_color = "green" if status == "正常" else "red"
-                    html += f'<tr><td>{device}</td><td style="color: {status_color};">{status}</td></tr>\n'
-
-                html += """
-                    </table>
-
-                    <h2>系统日志</h2>
-                    <pre style="background-color: #f8f8f8; padding: 10px; border: 1px solid #ddd; max-height: 300px; overflow: auto;">
-                """
-
-                # 添加系统日志
-                for row in range(self.system_log.rowCount()):
-                    time = self.system_log.item(row, 0).text()
-                    event = self.system_log.item(row, 1).text()
-                    html += f"{time} - {event}\n"
-
-                html += """
-                    </pre>
-
-                    <p style="margin-top: 30px; color: #666; font-size: 12px;">该报告由多波束测深显控平台自动生成。版权所有 © 2023</p>
-                </body>
-                </html>
-                """
-
-                # 保存HTML文件
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(html)
-
-                # 保存图像文件
-                img_path = os.path.dirname(filename)
-
-                # 保存深度图
-                plt.figure(figsize=(10, 8))
-                plt.imshow(np.ma.masked_invalid(self.depth_data), cmap='viridis')
-                plt.colorbar(label='水深 (m)')
-                plt.title("海底地形热力图")
-                plt.savefig(os.path.join(img_path, "depth_map.png"))
-                plt.close()
-
-                # 保存3D视图
-                self.figure.savefig(os.path.join(img_path, "3d_view.png"))
-
-                # 保存航迹图
-                plt.figure(figsize=(8, 8))
-                plt.plot(self.track_x, self.track_y, 'g-', linewidth=2)
-                plt.scatter([self.track_x[-1]], [self.track_y[-1]], color='red', s=50)
-                plt.grid(True, alpha=0.3)
-                plt.title("测量航迹")
-                plt.xlabel("X (m)")
-                plt.ylabel("Y (m)")
-                plt.savefig(os.path.join(img_path, "track.png"))
-                plt.close()
-
-                # 保存分析图
-                self.analysis_figure.savefig(os.path.join(img_path, "analysis.png"))
-
-                self.add_system_log(f"报告已导出至: {filename}", "信息")
-                self.statusBar().showMessage(f"报告已导出至: {filename}")
-
-            elif filename.endswith('.txt'):
+            if filename.endswith(('.html', '.pdf')):
+                # 图件渲染与报告组装在后台工作进程中完成，采集不中断
+                self.start_report_export(filename)
+                return
+
+            if filename.endswith('.txt'):
                 # 创建文本报告
                 with open(filename, 'w', encoding='utf-8') as f:
                     f.write("========================================\n")
@@ -2075,10 +1957,8 @@ class MultibeamSonarSystem(QMainWindow):
                         f.write(f"- {device}: {status}\n")
 
                     f.write("\n系统日志:\n")
-                    for row in range(min(self.system_log.rowCount(), 20)):  # 限制日志条数
-                        time = self.system_log.item(row, 0).text()
-                        event = self.system_log.item(row, 1).text()
-                        f.write(f"{time} - {event}\n")
+                    for record in self.log_model.log.records()[:20]:  # 限制日志条数
+                        f.write(f"{record.time_text} - {record.message}\n")
 
                 self.add_system_log(f"文本报告已导出至: {filename}", "信息")
                 self.statusBar().showMessage(f"文本报告已导出至: {filename}")
@@ -2090,6 +1970,40 @@ class MultibeamSonarSystem(QMainWindow):
             self.add_system_log(f"导出报告出错: {str(e)}", "错误")
             QMessageBox.critical(self, "导出错误", f"导出报告时发生错误:\n{str(e)}")
 
+    def start_report_export(self, filename):
+        """在工作进程中生成 HTML/PDF 报告（水深图、坡度图、直方图与统计摘要），显示进度并可取消"""
+        # 在界面线程中取数据快照，生成报告期间采集继续进行
+        data = report_data(self.depth_data, self.engine.grid.cell_size, self.track_x, self.track_y,
+                           area=self.data_stats["扫描面积"], device_status=self.device_status,
+                           log=[f"{record.time_text} - {record.message}" for record in self.log_model.log])
+
+        dialog = QProgressDialog("正在生成报告...", "取消", 0, 0, self)
+        dialog.setWindowTitle("导出报告")
+        dialog.setMinimumDuration(500)
+        task = BackgroundTask(lambda progress, cancelled: start_report(filename, data, cancelled=cancelled), self)
+        dialog.canceled.connect(task.cancel)
+
+        def finished(path):
+            dialog.reset()
+            if path is None:
+                self.add_system_log("报告生成已取消", "警告")
+                self.statusBar().showMessage("报告生成已取消")
+                return
+            self.add_system_log(f"报告已导出至: {path}", "信息")
+            self.statusBar().showMessage(f"报告已导出至: {path}")
+            QMessageBox.information(self, "导出成功", f"报告已成功导出至:\n{path}")
+
+        def failed(message):
+            dialog.reset()
+            self.add_system_log(f"导出报告出错: {message}", "错误")
+            QMessageBox.critical(self, "导出错误", f"导出报告时发生错误:\n{message}")
+
+        task.succeeded.connect(finished)
+        task.failed.connect(failed)
+        self.report_task = task
+        QApplication.instance().aboutToQuit.connect(task.stop)
+        task.start()
+
     def export_analysis(self):
         """导出分析结果"""
         analysis_type = self.analysis_combo.currentText()
@@ -2130,8 +2044,7 @@ class MultibeamSonarSystem(QMainWindow):
 
                 elif analysis_type == "水深分布直方图":
                     # 导出深度分布数据
-                    valid_data = self.depth_data[~np.isnan(self.depth_data)]
-                    hist, bins = np.histogram(valid_data, bins=30)
+                    hist, bins, _ = analysis.depth_histogram(self.depth_data, bins=30)
                     bin_centers = (bins[:-1] + bins[1:]) / 2
 
                     data = {
@@ -2141,18 +2054,7 @@ class MultibeamSonarSystem(QMainWindow):
 
                 elif analysis_type == "海底特征识别":
                     # 导出特征数据
-                    from scipy import ndimage
-
-                    # 填充NaN值以便进行卷积
-                    filled_data = np.copy(self.depth_data)
-                    mask = np.isnan(filled_data)
-                    filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-                    # 应用拉普拉斯滤波器检测边缘/特征
-                    features = ndimage.laplace(filled_data)
-
-                    # 将结果应用回原始掩码
-                    features[mask] = np.nan
+                    features, _ = analysis.feature_map(self.depth_data)
 
                     # 创建数据
                     x = np.arange(self.grid_size)
@@ -2168,19 +2070,7 @@ class MultibeamSonarSystem(QMainWindow):
 
                 elif analysis_type == "数据质量评估":
                     # 导出质量评估数据
-                    from scipy import ndimage
-
-                    # 填充NaN值以便进行卷积
-                    filled_data = np.copy(self.depth_data)
-                    mask = np.isnan(filled_data)
-                    filled_data[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled_data[~mask])
-
-                    # 计算局部标准差
-                    def local_std(x):
-                        return np.std(x) if np.sum(~np.isnan(x)) > 4 else np.nan
-
-                    quality_map = ndimage.generic_filter(filled_data, local_std, size=3)
-                    quality_map[mask] = np.nan
+                    quality_map, _ = analysis.quality_map(self.depth_data, size=3)
 
                     # 创建数据
                     x = np.arange(self.grid_size)
@@ -2194,6 +2084,8 @@ class MultibeamSonarSystem(QMainWindow):
                         'quality': quality_map.flatten()
                     }
 
+                import pandas as pd
+
                 # 保存为CSV
                 df = pd.DataFrame(data)
                 df.to_csv(filename, index=False)
@@ -2230,6 +2122,16 @@ class MultibeamSonarSystem(QMainWindow):
             # 此处应该更新存储路径输入框
             self.add_system_log(f"数据存储路径已更改为: {directory}")
 
+    def toggle_log_file(self, enabled):
+        """开启或关闭系统日志文件（按大小滚动）"""
+        if enabled:
+            path = os.path.join("logs", "system.log")
+            self.log_model.log.set_file_sink(path)
+            self.add_system_log(f"系统日志写入文件: {path}")
+        else:
+            self.add_system_log("系统日志停止写入文件")
+            self.log_model.log.set_file_sink(None)
+
     def save_settings(self):
         """保存设置"""
         # 这里应该实现设置的保存
@@ -2253,20 +2155,55 @@ class MultibeamSonarSystem(QMainWindow):
 
         if reply == QMessageBox.Yes:
             # 停止所有线程
-            self.data_thread.stop()
-            self.data_thread.wait()
+            self.ingest_timer.stop()
+            if self.ping_server is not None:
+                self.link_timer.stop()
+                self.ping_server.stop()
+            for thread in self.data_threads:
+                thread.stop()
+            for thread in self.data_threads:
+                thread.wait()
+            self.engine.close()
+            self.telemetry.stop()
+            self.log_model.log.close()
             self.timer.stop()
             self.progress_timer.stop()
             self.update_timer.stop()
+            self.gap_timer.stop()
             self.perf_timer.stop()
             event.accept()
         else:
             event.ignore()
 
 
+def report_startup():
+    """首帧显示后打印启动耗时报告"""
+    PROFILER.mark("首帧显示")
+    print("启动耗时分析:")
+    print(PROFILER.report())
+
+
 # 主程序入口
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MultibeamSonarSystem()
+    # --seed N / --scenario 场景.json 复现指定的模拟数据
+    scenario, argv = Scenario.from_argv(sys.argv)
+    # --grid-workers N 使用 N 个工作进程网格化
+    grid_workers = 0
+    if "--grid-workers" in argv:
+        index = argv.index("--grid-workers")
+        grid_workers = int(argv[index + 1])
+        del argv[index:index + 2]
+    # --listen 端口 从本机网络接收数据包（python -m sonar_engine.network emulate 模拟声呐）
+    listen_port = None
+    if "--listen" in argv:
+        index = argv.index("--listen")
+        listen_port = int(argv[index + 1])
+        del argv[index:index + 2]
+    app = QApplication(argv)
+    PROFILER.mark("创建 QApplication")
+    window = MultibeamSonarSystem(scenario, grid_workers, listen_port)
     window.show()
+    PROFILER.mark("显示主窗口")
+    if PROFILER.enabled:
+        QTimer.singleShot(0, report_startup)
     sys.exit(app.exec_())
\ No newline at end of file
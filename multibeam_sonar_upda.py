@@ -1,28 +1,53 @@
 import sys
-import numpy as np
 import time
+
+_startup_begin = time.perf_counter()
+
+import json
 import os
+from sonar_engine.profiling import StartupProfiler
+
+# 以 --profile-startup 启动时打印各子系统的导入与初始化耗时
+PROFILER = StartupProfiler(enabled="--profile-startup" in sys.argv, origin=_startup_begin)
+
+import numpy as np
+PROFILER.mark("导入 numpy")
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QVBoxLayout, QWidget, QPushButton, QLabel,
                              QGridLayout, QFileDialog, QComboBox, QSlider, QGroupBox, QHBoxLayout, QSplitter,
                              QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox, QProgressBar, QMenu, QAction,
                              QToolBar, QStatusBar, QDialog, QLineEdit, QFormLayout, QDialogButtonBox, QMessageBox,
-                             QScrollArea)
+                             QScrollArea, QDoubleSpinBox, QProgressDialog)
 from PyQt5.QtCore import QTimer, Qt, QDateTime, pyqtSignal
 from PyQt5.QtGui import QIcon, QColor, QPalette, QFont
+PROFILER.mark("导入 PyQt5")
+
 import pyqtgraph as pg
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
-import scipy.signal as signal
-from PyQt5.QtGui import QPixmap
+PROFILER.mark("导入 pyqtgraph")
+
+# pandas、scipy 和 matplotlib 在首次使用时才导入（3D视图、数据分析、设置选项卡首次显示时）
+from sonar_engine import analysis
+from sonar_engine.catalog import SurveyCatalog
+from sonar_engine.coverage import plan_coverage
+from sonar_engine.eventlog import EventLog
+from sonar_engine.export import grid_batches, grid_rows, stream_export, track_batches
+from sonar_engine.instrumentation import timed
+from sonar_engine.mesh import MESH_FORMATS, decimation_step, export_mesh
+from sonar_engine.planning import DepthSurface, plan_lines, search_headings
+from sonar_engine.report import report_data, start_report
+from sonar_engine.scenario import Scenario
+from sonar_engine.telemetry import TelemetrySampler
+from sonar_gui import BackgroundTask, DiagnosticsPanel, LazyImagePage, LazyPage, LogTableModel, LogView, ThumbnailCache
+PROFILER.mark("导入 sonar_engine / sonar_gui")
 
 
 class MultibeamSonarSystem(QMainWindow):
-    def __init__(self):
+    def __init__(self, scenario=None):
         super().__init__()
 
+        # 模拟场景（种子、波束数、数据包速率），同一种子的模拟数据逐位相同
+        self.scenario = scenario if scenario is not None else Scenario(model="trench")
+
         self.setWindowTitle("多波束测深显控平台 - 专业版")
         self.setGeometry(100, 100, 1200, 800)
 
@@ -34,34 +59,44 @@ class MultibeamSonarSystem(QMainWindow):
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("系统就绪")
 
-        # 添加系统日志 - 移到前面来
-        self.system_log = []
+        # 添加系统日志 - 移到前面来（定长缓冲区，只保留最近的记录）
+        self.log_model = LogTableModel(EventLog(capacity=5000, time_format="%Y-%m-%d %H:%M:%S"),
+                                       columns=[("时间", "time_text"), ("类型", "level"), ("消息", "message")],
+                                       parent=self)
+        self.system_log = self.log_model.log
+
+        # matplotlib中文字体在首次创建图表时配置
+        self.chinese_font = None
 
         # 添加工具栏
         self.create_toolbar()
+        PROFILER.mark("初始化 主题/工具栏")
 
         # 初始化数据
         self.init_data()
-
-        # 尝试设置matplotlib支持中文
-        self.setup_matplotlib_chinese_support()
+        PROFILER.mark("初始化 数据/处理引擎")
 
         # 创建选项卡
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
-        # 创建各个选项卡页面
+        # 创建各个选项卡页面，只有实时显示页立即构建，其余页面首次显示时构建
         self.create_realtime_tab()
+        PROFILER.mark("构建 实时显示选项卡")
         self.create_3d_view_tab()
-
+        self.create_device_monitor_tab()
+        self.create_data_management_tab()
         self.create_analysis_tab()  # 新增数据分析选项卡
         self.create_settings_tab()  # 新增设置选项卡
+        self.create_diagnostics_tab()
 
-        # 添加新的预览标签页
+        # 添加新的预览标签页（首次切换到标签页时才扫描目录并在后台加载图片）
+        self.thumbnail_cache = ThumbnailCache()
         self.tabs.addTab(self.create_3d_model_tab(), "三维情况模型的建立与求解")
         self.tabs.addTab(self.create_2d_model_tab(), "二维情况模型的建立与求解")
         self.tabs.addTab(self.create_comparison_tab(), "对比图")
         self.tabs.addTab(self.create_slope_model_tab(), "海底平面为坡面模型的建立与求解")
+        PROFILER.mark("构建 延迟加载选项卡")
         # 设置定时器，模拟实时数据
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_data)
@@ -75,7 +110,7 @@ class MultibeamSonarSystem(QMainWindow):
         self.clock_timer.start(1000)  # 每秒更新一次
 
         # 记录系统启动
-        self.add_log("系统启动")
+        self.add_log(f"系统启动（模拟种子 {self.scenario.seed}）")
 
     def apply_dark_theme(self):
         """应用暗色主题"""
@@ -317,25 +352,22 @@ class MultibeamSonarSystem(QMainWindow):
         self.position_x = 0
         self.position_y = 0
         self.vessel_heading = 0  # 船舶航向（角度）
+        self.vessel_roll = 0.0  # 横摇（角度，右舷向下为正）
+        self.vessel_pitch = 0.0  # 纵摇（角度，船艏向上为正）
 
         # GPS数据
         self.gps_lat = 30.0  # 起始纬度
         self.gps_lon = 120.0  # 起始经度
 
-        # 模拟航迹数据
-        self.track_x = []
-        self.track_y = []
-
-        # 模拟水深数据矩阵 (50x50)
-        self.depth_data = np.zeros((50, 50))
-        # 生成一些随机的海底地形
+        # 生成一些随机的海底地形 (50x50)
         x = np.linspace(0, 10, 50)
         y = np.linspace(0, 10, 50)
         X, Y = np.meshgrid(x, y)
-        self.depth_data = 20 + 5 * np.sin(X) + 3 * np.cos(Y) + np.random.rand(50, 50) * 2
+        self.display_rng = self.scenario.display_rng()
+        initial_depth = 20 + 5 * np.sin(X) + 3 * np.cos(Y) + self.display_rng.random((50, 50)) * 2
 
         # 模拟设备状态
-        self.device_status = {
+        device_status = {
             "电源": "正常",
             "传感器": "正常",
             "数据链路": "正常",
@@ -347,10 +379,25 @@ class MultibeamSonarSystem(QMainWindow):
             "湿度": "正常"
         }
 
-        # 模拟多波束数据
-        self.beam_count = 64  # 增加波束数量到64
-        self.beam_data = np.random.rand(self.beam_count) * 10 + 20  # 20-30米深度范围
-        self.beam_angles = np.linspace(-75, 75, self.beam_count)  # 扩大波束角度范围
+        # 航迹、波束、水深网格、声速剖面等由处理引擎持有，界面订阅处理结果
+        self.engine = self.scenario.engine(grid_size=50, extent=10.0, track_limit=500, history_limit=1000,
+                                          device_status=device_status, initial_grid=initial_depth)
+        self.engine.subscribe("ping", self.on_ping_processed)
+        self.engine.subscribe("status", self.on_device_status_changed)
+        self.engine.subscribe("svp", lambda profile: self.add_log("声速剖面已更新"))
+        self.device_status = self.engine.device_status
+        self.sound_velocity_profile = self.engine.sound_velocity_profile
+
+        # 各处理阶段的耗时直方图，与处理引擎共用（引擎记录取数/清洗/网格化/统计阶段）
+        self.timers = self.engine.timers
+
+        # 主机与处理流程遥测（后台线程采样，设备监控页只读取其缓冲区）
+        self.telemetry = TelemetrySampler(interval=1.0, history=120)
+        self.engine.subscribe("ping", self.telemetry.on_ping)
+        self.telemetry.start()
+
+        # 模拟多波束数据源（64个波束，沟壑地形模型）
+        self.simulator = self.scenario.simulator(wall_clock=True)
 
         # 模拟系统参数
         self.system_params = {
@@ -363,15 +410,6 @@ class MultibeamSonarSystem(QMainWindow):
             "分辨率": 0.05  # m
         }
 
-        # 存储历史深度数据
-        self.history_depth = []
-
-        # 模拟声速剖面
-        self.sound_velocity_profile = {
-            "深度": np.linspace(0, 100, 20),
-            "声速": np.linspace(1490, 1520, 20) + np.random.rand(20) * 5
-        }
-
         # 标准水深区域数据
         self.calibration_area = None
 
@@ -385,83 +423,81 @@ class MultibeamSonarSystem(QMainWindow):
             "coverage_area": 0,
         }
 
-    def update_data(self):
-        """更新模拟数据"""
-        if not self.acquisition_active:
-            return
+        # 数据目录索引（保存时登记，刷新历史列表时无需重新读取每个文件）
+        self.catalog = SurveyCatalog("data")
 
-        # 模拟声呐移动
-        self.position_x += 0.1
-        self.position_y += 0.05 * np.sin(self.position_x)
+        # 导出3D模型的最大顶点数，超过时抽稀
+        self.max_model_vertices = 4000000
 
-        # 更新船舶航向
-        self.vessel_heading = (np.arctan2(0.05 * np.cos(self.position_x), 0.1) * 180 / np.pi) % 360
+    # 以下属性将界面中原有的数据成员映射到处理引擎的状态
+    @property
+    def track_x(self):
+        return self.engine.track_x
 
-        # 更新GPS位置
-        self.gps_lat += 0.0001 * np.cos(self.vessel_heading * np.pi / 180)
-        self.gps_lon += 0.0001 * np.sin(self.vessel_heading * np.pi / 180)
+    @property
+    def track_y(self):
+        return self.engine.track_y
 
-        # 更新航迹
-        self.track_x.append(self.position_x)
-        self.track_y.append(self.position_y)
+    @property
+    def depth_data(self):
+        return self.engine.grid.values
 
-        # 限制航迹长度，避免内存占用过大
-        if len(self.track_x) > 500:  # 增加航迹长度
-            self.track_x = self.track_x[-500:]
-            self.track_y = self.track_y[-500:]
+    @depth_data.setter
+    def depth_data(self, values):
+        self.engine.load_grid(values)
 
-        # 更新波束数据 - 增加一些实际海底特征，如沟壑、山脊等
-        base_depth = 20 + 5 * np.sin(self.position_x * 0.5) + 3 * np.cos(self.position_y * 0.5)
-        # 添加沟壑效果
-        trench_effect = 5 * np.exp(-0.1 * (self.beam_angles - 20 * np.sin(self.position_x * 0.2)) ** 2)
-        # 随机波动
-        noise = np.random.rand(self.beam_count) * 1.5
+    @property
+    def beam_data(self):
+        return self.engine.beam_data
 
-        self.beam_data = base_depth + trench_effect + noise
+    @property
+    def beam_angles(self):
+        return self.engine.beam_angles
 
-        # 随机添加一些"异常点"，模拟鱼群或障碍物
-        if np.random.rand() > 0.9:
-            anomaly_pos = int(np.random.rand() * self.beam_count * 0.8 + 0.1 * self.beam_count)
-            anomaly_length = int(np.random.rand() * 5) + 2
-            for i in range(max(0, anomaly_pos - anomaly_length // 2),
-                           min(self.beam_count, anomaly_pos + anomaly_length // 2)):
-                self.beam_data[i] -= np.random.rand() * 5 + 2
+    @property
+    def beam_count(self):
+        return len(self.engine.beam_angles)
 
-        # 存储历史深度数据
-        self.history_depth.append(np.mean(self.beam_data))
-        if len(self.history_depth) > 1000:
-            self.history_depth = self.history_depth[-1000:]
+    @property
+    def history_depth(self):
+        return self.engine.history_depth
 
-        # 更新测量统计数据
-        self.stats["points_collected"] = len(self.track_x)
-        self.stats["max_depth"] = max(self.stats["max_depth"], np.max(self.beam_data))
-        self.stats["min_depth"] = min(self.stats["min_depth"], np.min(self.beam_data))
-        self.stats["avg_depth"] = np.mean(self.history_depth)
-        track_length = 0
-        if len(self.track_x) >= 2:
-            track_length = np.sum(np.sqrt(np.diff(self.track_x) ** 2 + np.diff(self.track_y) ** 2))
-        self.stats["coverage_area"] = track_length * 2 * 75 * np.pi / 180  # 近似航迹带宽
-
-        # 随机模拟设备状态变化
-        if np.random.rand() > 0.97:
-            keys = list(self.device_status.keys())
-            random_device = keys[int(np.random.rand() * len(keys))]
-            old_status = self.device_status[random_device]
-            self.device_status[random_device] = "警告" if self.device_status[random_device] == "正常" else "正常"
-            if old_status != self.device_status[random_device]:
-                self.add_log(f"设备状态变化: {random_device} 从 {old_status} 变为 {self.device_status[random_device]}")
-
-        # 更新声速剖面
-        if np.random.rand() > 0.95:
-            delta = np.random.rand(20) * 2 - 1
-            self.sound_velocity_profile["声速"] += delta
-            self.add_log("声速剖面已更新")
+    @timed("update_data")
+    def update_data(self):
+        """更新模拟数据"""
+        if not self.acquisition_active:
+            return
+
+        # 由处理引擎从模拟数据源取数并完成网格化与统计
+        self.engine.step(self.simulator)
 
         # 更新各个显示组件
         self.update_realtime_display()
         self.update_device_status()
         self.update_stats_display()
 
+    def on_ping_processed(self, package):
+        """处理引擎完成一个数据包后同步界面状态"""
+        self.position_x = package['position_x']
+        self.position_y = package['position_y']
+        self.vessel_heading = package['heading']
+        self.vessel_roll = package.get('roll', 0.0)
+        self.vessel_pitch = package.get('pitch', 0.0)
+        self.gps_lat = package['gps_lat']
+        self.gps_lon = package['gps_lon']
+
+        # 更新测量统计数据
+        engine_stats = self.engine.stats
+        self.stats["points_collected"] = len(self.track_x)
+        self.stats["max_depth"] = engine_stats.max_depth
+        self.stats["min_depth"] = engine_stats.min_depth
+        self.stats["avg_depth"] = np.mean(self.history_depth)
+        self.stats["coverage_area"] = engine_stats.swath_area  # 近似航迹带宽
+
+    def on_device_status_changed(self, device, status, old_status):
+        """设备状态变化时记录日志"""
+        self.add_log(f"设备状态变化: {device} 从 {old_status} 变为 {status}")
+
     def create_realtime_tab(self):
         """创建实时显示选项卡"""
         tab = QWidget()
@@ -480,6 +516,11 @@ class MultibeamSonarSystem(QMainWindow):
         self.heading_display.setStyleSheet("color: yellow; font-weight: bold")
         status_layout.addWidget(self.heading_display)
 
+        # 姿态
+        self.attitude_display = QLabel("横摇: 0.0° 纵摇: 0.0°")
+        self.attitude_display.setStyleSheet("color: yellow; font-weight: bold")
+        status_layout.addWidget(self.attitude_display)
+
         # 深度
         self.current_depth_display = QLabel("当前深度: 20.0 m")
         self.current_depth_display.setStyleSheet("color: lime; font-weight: bold")
@@ -578,8 +619,16 @@ class MultibeamSonarSystem(QMainWindow):
         self.tabs.addTab(tab, "实时显示")
 
     def create_3d_view_tab(self):
-        """创建3D视图选项卡"""
-        tab = QWidget()
+        """创建3D视图选项卡（首次显示时构建）"""
+        self.view3d_tab = LazyPage(self.build_3d_view_tab)
+        self.tabs.addTab(self.view3d_tab, "3D地形图")
+
+    def build_3d_view_tab(self, tab):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        from mpl_toolkits.mplot3d import Axes3D  # 注册3d投影
+
+        self.setup_matplotlib_chinese_support()
         layout = QVBoxLayout()
 
         # 创建控制面板
@@ -690,14 +739,15 @@ class MultibeamSonarSystem(QMainWindow):
         layout.addLayout(button_layout)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, "3D地形图")
 
         # 初始调用一次更新确保正确显示
         self.update_3d_view()
 
     def create_3d_model_tab(self):
-        """创建三维情况模型的建立与求解选项卡"""
-        tab = QWidget()
+        """创建三维情况模型的建立与求解选项卡（首次显示时构建）"""
+        return LazyImagePage(self.build_3d_model_tab, self.thumbnail_cache)
+
+    def build_3d_model_tab(self, tab):
         layout = QVBoxLayout()
 
         scroll = QScrollArea()
@@ -742,27 +792,14 @@ class MultibeamSonarSystem(QMainWindow):
             error_label.setStyleSheet("color: red")
             layout.addWidget(error_label)
             tab.setLayout(layout)
-            return tab
+            return
 
-        # 添加图片到布局
+        # 添加图片到布局，图片由后台线程加载
         for i, config in enumerate(image_paths):
             group = QGroupBox()
             group_layout = QVBoxLayout()
 
-            image_label = QLabel()
-            pixmap = QPixmap(config['path'])
-
-            if pixmap.isNull():
-                print(f"Failed to load image: {config['path']}")  # 调试信息
-                error_label = QLabel(f"无法加载图片: {config['path']}")
-                error_label.setStyleSheet("color: red")
-                group_layout.addWidget(error_label)
-            else:
-                print(f"Successfully loaded image: {config['path']}")  # 调试信息
-                scaled_pixmap = pixmap.scaled(800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                image_label.setPixmap(scaled_pixmap)
-                image_label.setAlignment(Qt.AlignCenter)
-                group_layout.addWidget(image_label)
+            group_layout.addWidget(tab.image_label(config['path'], (800, 600)))
 
             title_label = QLabel(config['title'])
             title_label.setAlignment(Qt.AlignCenter)
@@ -785,11 +822,12 @@ class MultibeamSonarSystem(QMainWindow):
         scroll.setWidget(scroll_content)
         layout.addWidget(scroll)
         tab.setLayout(layout)
-        return tab
 
     def create_2d_model_tab(self):
-        """创建二维情况模型的建立与求解选项卡"""
-        tab = QWidget()
+        """创建二维情况模型的建立与求解选项卡（首次显示时构建）"""
+        return LazyImagePage(self.build_2d_model_tab, self.thumbnail_cache)
+
+    def build_2d_model_tab(self, tab):
         layout = QVBoxLayout()
 
         scroll = QScrollArea()
@@ -817,12 +855,7 @@ class MultibeamSonarSystem(QMainWindow):
             group = QGroupBox()
             group_layout = QVBoxLayout()
 
-            image_label = QLabel()
-            pixmap = QPixmap(config['path'])
-            scaled_pixmap = pixmap.scaled(800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            image_label.setPixmap(scaled_pixmap)
-            image_label.setAlignment(Qt.AlignCenter)
-            group_layout.addWidget(image_label)
+            group_layout.addWidget(tab.image_label(config['path'], (800, 600)))
 
             title_label = QLabel(config['title'])
             title_label.setAlignment(Qt.AlignCenter)
@@ -838,11 +871,12 @@ class MultibeamSonarSystem(QMainWindow):
         scroll.setWidget(scroll_content)
         layout.addWidget(scroll)
         tab.setLayout(layout)
-        return tab
 
     def create_comparison_tab(self):
-        """创建对比图选项卡"""
-        tab = QWidget()
+        """创建对比图选项卡（首次显示时构建）"""
+        return LazyImagePage(self.build_comparison_tab, self.thumbnail_cache)
+
+    def build_comparison_tab(self, tab):
         layout = QVBoxLayout()
 
         scroll = QScrollArea()
@@ -869,12 +903,7 @@ class MultibeamSonarSystem(QMainWindow):
             group = QGroupBox()
             group_layout = QVBoxLayout()
 
-            image_label = QLabel()
-            pixmap = QPixmap(config['path'])
-            scaled_pixmap = pixmap.scaled(800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            image_label.setPixmap(scaled_pixmap)
-            image_label.setAlignment(Qt.AlignCenter)
-            group_layout.addWidget(image_label)
+            group_layout.addWidget(tab.image_label(config['path'], (800, 600)))
 
             title_label = QLabel(config['title'])
             title_label.setAlignment(Qt.AlignCenter)
@@ -890,11 +919,12 @@ class MultibeamSonarSystem(QMainWindow):
         scroll.setWidget(scroll_content)
         layout.addWidget(scroll)
         tab.setLayout(layout)
-        return tab
 
     def create_slope_model_tab(self):
-        """创建海底平面为坡面模型的建立与求解选项卡"""
-        tab = QWidget()
+        """创建海底平面为坡面模型的建立与求解选项卡（首次显示时构建）"""
+        return LazyImagePage(self.build_slope_model_tab, self.thumbnail_cache)
+
+    def build_slope_model_tab(self, tab):
         layout = QVBoxLayout()
 
         scroll = QScrollArea()
@@ -904,15 +934,18 @@ class MultibeamSonarSystem(QMainWindow):
         scroll_layout.setSpacing(10)
         scroll_content.setLayout(scroll_layout)
 
+        # 测线规划求解面板放在最上方，下面是原有的结果图片
+        scroll_layout.addWidget(self.create_line_planning_group(), 0, 0, 1, 2)
+
         base_path = os.path.join(os.getcwd(), "image", "海底平面为坡面模型的建立与求解")
         print(f"Base path: {base_path}")  # 调试信息
 
         # 定义需要处理的文件夹及其布局位置
         folders_map = {
-            "不同重叠率与测线数量关系（左）与测线位置（右）": (0, False),  # (行号, 是否需要并排)
-            "较浅较深情况（左）与单独抽取的圆锥结构（右）": (1, False),
-            "连接后的路径": (2, True),  # 需要并排显示
-            "最优方向": (2, True)  # 与连接后的路径并排
+            "不同重叠率与测线数量关系（左）与测线位置（右）": (1, False),  # (行号, 是否需要并排)
+            "较浅较深情况（左）与单独抽取的圆锥结构（右）": (2, False),
+            "连接后的路径": (3, True),  # 需要并排显示
+            "最优方向": (3, True)  # 与连接后的路径并排
         }
 
         # 处理每个文件夹
@@ -931,13 +964,7 @@ class MultibeamSonarSystem(QMainWindow):
 
                     for file in sorted(files):
                         image_path = os.path.join(folder_path, file)
-                        image_label = QLabel()
-                        pixmap = QPixmap(image_path)
-                        if not pixmap.isNull():
-                            scaled_pixmap = pixmap.scaled(400, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                            image_label.setPixmap(scaled_pixmap)
-                            image_label.setAlignment(Qt.AlignCenter)
-                            images_layout.addWidget(image_label)
+                        images_layout.addWidget(tab.image_label(image_path, (400, 400)))
 
                     group_layout.addLayout(images_layout)
 
@@ -967,11 +994,411 @@ class MultibeamSonarSystem(QMainWindow):
         scroll.setWidget(scroll_content)
         layout.addWidget(scroll)
         tab.setLayout(layout)
-        return tab
 
-    def create_analysis_tab(self):
-        """创建数据分析选项卡"""
+    def create_line_planning_group(self):
+        """测线规划求解面板：坡面模型或当前水深网格 → 测线位置、覆盖宽度与重叠率"""
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.setup_matplotlib_chinese_support()
+        group = QGroupBox("测线规划求解")
+        layout = QHBoxLayout()
+
+        # 参数
+        form = QFormLayout()
+        self.plan_source = QComboBox()
+        self.plan_source.addItems(["坡面模型", "当前水深网格"])
+        form.addRow("水深来源:", self.plan_source)
+
+        def spin_box(value, minimum, maximum, step, decimals=1, suffix=""):
+            box = QDoubleSpinBox()
+            box.setRange(minimum, maximum)
+            box.setDecimals(decimals)
+            box.setSingleStep(step)
+            box.setValue(value)
+            box.setSuffix(suffix)
+            return box
+
+        self.plan_params = {
+            "center_depth": spin_box(110.0, 1.0, 11000.0, 10.0, suffix=" m"),
+            "slope": spin_box(1.5, 0.0, 30.0, 0.1, 2, " °"),
+            "direction": spin_box(180.0, 0.0, 360.0, 5.0, suffix=" °"),
+            "width": spin_box(7408.0, 10.0, 100000.0, 100.0, 0, " m"),
+            "height": spin_box(3704.0, 10.0, 100000.0, 100.0, 0, " m"),
+            "cell_size": spin_box(20.0, 0.01, 1000.0, 1.0, 2, " m"),
+            "opening_angle": spin_box(120.0, 10.0, 170.0, 5.0, suffix=" °"),
+            "overlap_min": spin_box(10.0, 0.0, 90.0, 1.0, suffix=" %"),
+            "overlap_max": spin_box(20.0, 0.0, 95.0, 1.0, suffix=" %"),
+            "heading": spin_box(90.0, 0.0, 180.0, 2.5, suffix=" °"),
+        }
+        labels = {
+            "center_depth": "中心水深:", "slope": "坡度:", "direction": "水深增大方向:",
+            "width": "区域东西宽:", "height": "区域南北长:", "cell_size": "水深网格间距:",
+            "opening_angle": "换能器开角:", "overlap_min": "重叠率下限:", "overlap_max": "重叠率上限:",
+            "heading": "测线方向:",
+        }
+        self.plan_heading_mode = QComboBox()
+        self.plan_heading_mode.addItems(["自动搜索", "指定方向"])
+        for key, box in self.plan_params.items():
+            if key == "heading":
+                form.addRow("方向求解:", self.plan_heading_mode)
+            form.addRow(labels[key], box)
+
+        self.plan_layer = QComboBox()
+        self.plan_layer.addItems(["水深", "覆盖次数", "重叠率"])
+        form.addRow("底图:", self.plan_layer)
+
+        solve_button = QPushButton("求解")
+        solve_button.clicked.connect(self.solve_line_plan)
+        form.addRow(solve_button)
+
+        self.plan_summary = QLabel("修改参数后自动重新求解")
+        self.plan_summary.setWordWrap(True)
+        self.plan_summary.setStyleSheet("color: yellow")
+        form.addRow(self.plan_summary)
+        layout.addLayout(form)
+
+        # 平面图与方向搜索曲线
+        self.plan_figure = Figure(figsize=(8, 4), facecolor='#2D2D2D')
+        self.plan_canvas = FigureCanvas(self.plan_figure)
+        self.plan_canvas.setMinimumHeight(380)
+        layout.addWidget(self.plan_canvas, 3)
+
+        # 各测线结果
+        self.plan_table = QTableWidget(0, 5)
+        self.plan_table.setHorizontalHeaderLabels(["测线", "位置(m)", "长度(m)", "覆盖宽度(m)", "重叠率(%)"])
+        self.plan_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.plan_table.verticalHeader().setVisible(False)
+        self.plan_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.plan_table, 2)
+        group.setLayout(layout)
+
+        # 参数变化后稍作延迟再求解，连续调整时只求解一次
+        self.plan_timer = QTimer(self)
+        self.plan_timer.setSingleShot(True)
+        self.plan_timer.setInterval(300)
+        self.plan_timer.timeout.connect(self.solve_line_plan)
+        for box in self.plan_params.values():
+            box.valueChanged.connect(self.plan_timer.start)
+        self.plan_source.currentIndexChanged.connect(self.plan_timer.start)
+        self.plan_heading_mode.currentIndexChanged.connect(self.plan_timer.start)
+        # 切换底图只重绘，不重新求解
+        self.line_plan_result = None
+        self.plan_layer.currentIndexChanged.connect(self.redraw_line_plan)
+
+        self.solve_line_plan()
+        return group
+
+    def line_plan_surface(self):
+        """按所选水深来源构建规划用的水深面"""
+        params = {key: box.value() for key, box in self.plan_params.items()}
+        if self.plan_source.currentText() == "当前水深网格":
+            return DepthSurface(self.depth_data, cell_size=params["cell_size"])
+        return DepthSurface.plane(center_depth=params["center_depth"], slope=params["slope"],
+                                  width=params["width"], height=params["height"], direction=params["direction"])
+
+    def solve_line_plan(self):
+        """求解测线规划并更新图表与表格"""
+        params = {key: box.value() for key, box in self.plan_params.items()}
+        overlap = (params["overlap_min"] / 100, max(params["overlap_max"], params["overlap_min"]) / 100)
+        surface = self.line_plan_surface()
+        if not np.any(np.isfinite(surface.values) & (surface.values > 0)):
+            self.plan_summary.setText("没有有效水深数据")
+            return
+
+        started = time.perf_counter()
+        if self.plan_heading_mode.currentText() == "自动搜索":
+            plan, plans = search_headings(surface, opening_angle=params["opening_angle"], overlap=overlap)
+        else:
+            plan = plan_lines(surface, heading=params["heading"], opening_angle=params["opening_angle"],
+                              overlap=overlap)
+            plans = [plan]
+        elapsed = time.perf_counter() - started
+        self.line_plan = plan
+        # 在实际水深面上栅格化各测线扫测带，核对覆盖次数与重叠率
+        self.line_plan_coverage = plan_coverage(surface, plan, opening_angle=params["opening_angle"])
+        raster = self.line_plan_coverage.summary()
+
+        finite = plan.overlap_min[np.isfinite(plan.overlap_min)]
+        overlap_text = (f"{finite.min() * 100:.1f}%~{np.nanmax(plan.overlap_max) * 100:.1f}%"
+                        if len(finite) else "N/A")
+        self.plan_summary.setText(
+            f"测线方向 {plan.heading:.1f}°，{plan.line_count} 条测线，总长度 {plan.total_length / 1000:.2f} km\n"
+            f"覆盖率 {plan.coverage * 100:.2f}%，重叠率 {overlap_text}，"
+            f"超出上限的测线对 {plan.excess_overlap * 100:.0f}%\n"
+            f"栅格核对：覆盖率 {raster['coverage'] * 100:.2f}%，漏测网格 {raster['gap_cells']} 个，"
+            f"重叠区占 {raster['overlap_area'] * 100:.1f}%\n求解用时 {elapsed * 1000:.0f} ms")
+        self.line_plan_result = (surface, plan, plans)
+        self.draw_line_plan(surface, plan, plans)
+
+        self.plan_table.setRowCount(plan.line_count)
+        for i in range(plan.line_count):
+            overlap_cell = "—"
+            if np.isfinite(plan.overlap_min[i]):
+                overlap_cell = f"{plan.overlap_min[i] * 100:.1f}~{plan.overlap_max[i] * 100:.1f}"
+            values = [str(i + 1), f"{plan.offsets[i]:.1f}", f"{plan.lengths[i]:.0f}", f"{plan.widths[i]:.1f}",
+                      overlap_cell]
+            for column, text in enumerate(values):
+                self.plan_table.setItem(i, column, QTableWidgetItem(text))
+
+    def redraw_line_plan(self):
+        if self.line_plan_result is not None:
+            self.draw_line_plan(*self.line_plan_result)
+
+    def draw_line_plan(self, surface, plan, plans):
+        """绘制测线平面图与各方向的总测线长度"""
+        self.plan_figure.clear()
+        plan_ax = self.plan_figure.add_subplot(1, 2 if len(plans) > 1 else 1, 1)
+        xmin, ymin, xmax, ymax = surface.bounds
+        layer = self.plan_layer.currentText()
+        if layer == "覆盖次数":
+            counts = np.ma.masked_where(~self.line_plan_coverage.valid, self.line_plan_coverage.counts)
+            values, cmap, label = counts, 'magma', 'Coverage count'
+        elif layer == "重叠率":
+            values, cmap, label = self.line_plan_coverage.overlap, 'plasma', 'Overlap (%)'
+        else:
+            values, cmap, label = surface.values, 'viridis_r', 'Depth (m)'
+        image = plan_ax.imshow(values, origin='lower', extent=(xmin, xmax, ymin, ymax), cmap=cmap, aspect='auto')
+        self.plan_figure.colorbar(image, ax=plan_ax, label=label)
+        for x0, y0, x1, y1 in plan.segments:
+            plan_ax.plot([x0, x1], [y0, y1], color='white', linewidth=0.8)
+        plan_ax.set_xlim(xmin, xmax)
+        plan_ax.set_ylim(ymin, ymax)
+        plan_ax.set_title(f'Survey lines ({plan.line_count}, heading {plan.heading:.1f}°)', color='white')
+        plan_ax.set_xlabel('X (m)', color='white')
+        plan_ax.set_ylabel('Y (m)', color='white')
+
+        axes = [plan_ax]
+        if len(plans) > 1:
+            search_ax = self.plan_figure.add_subplot(1, 2, 2)
+            complete = [p for p in plans if p.complete]
+            pruned = [p for p in plans if not p.complete]
+            search_ax.plot([p.heading for p in complete], [p.total_length / 1000 for p in complete], 'o',
+                           color='#00A6FF', label='solved')
+            search_ax.plot([p.heading for p in pruned], [p.total_length / 1000 for p in pruned], 'x',
+                           color='#888888', label='pruned (> best)')
+            search_ax.axvline(plan.heading, color='yellow', linestyle='--')
+            search_ax.set_title('Total line length by heading', color='white')
+            search_ax.set_xlabel('Heading (°)', color='white')
+            search_ax.set_ylabel('Length (km)', color='white')
+            search_ax.legend(fontsize=8)
+            axes.append(search_ax)
+
+        for ax in axes:
+            ax.set_facecolor('#2D2D2D')
+            ax.tick_params(colors='white')
+        self.plan_figure.tight_layout()
+        self.plan_canvas.draw()
+
+    def create_device_monitor_tab(self):
+        """创建设备监控选项卡"""
         tab = QWidget()
+        layout = QVBoxLayout()
+
+        # 顶部添加系统状态概览
+        overview_group = QGroupBox("系统状态概览")
+        overview_layout = QHBoxLayout()
+
+        # 添加系统状态指示器
+        self.system_status_indicator = QLabel("系统状态: 正常")
+        self.system_status_indicator.setStyleSheet("color: lime; font-weight: bold; font-size: 14pt")
+        overview_layout.addWidget(self.system_status_indicator)
+
+        # 添加CPU和内存使用指示
+        self.cpu_usage = QProgressBar()
+        self.cpu_usage.setRange(0, 100)
+        self.cpu_usage.setValue(0)
+        self.cpu_usage.setFormat("CPU: %p%")
+        overview_layout.addWidget(self.cpu_usage)
+
+        self.memory_usage = QProgressBar()
+        self.memory_usage.setRange(0, 100)
+        self.memory_usage.setValue(0)
+        self.memory_usage.setFormat("内存: %p%")
+        overview_layout.addWidget(self.memory_usage)
+
+        # 添加数据接收速率
+        self.data_rate = QLabel("数据处理: -- ping/s")
+        overview_layout.addWidget(self.data_rate)
+
+        overview_group.setLayout(overview_layout)
+        layout.addWidget(overview_group)
+
+        # 性能趋势图表
+        perf_group = QGroupBox("性能趋势")
+        perf_layout = QHBoxLayout()
+
+        self.load_plot = pg.PlotWidget()
+        self.load_plot.setYRange(0, 100)
+        self.load_plot.setLabel('left', '使用率', '%')
+        self.load_plot.setLabel('bottom', '时间', 's')
+        self.load_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.load_plot.addLegend(offset=(5, 5))
+        self.system_cpu_curve = self.load_plot.plot(pen=pg.mkPen('r', width=2), name="系统CPU")
+        self.process_cpu_curve = self.load_plot.plot(pen=pg.mkPen('y', width=1), name="本程序CPU")
+        self.memory_curve = self.load_plot.plot(pen=pg.mkPen('c', width=2), name="内存")
+        perf_layout.addWidget(self.load_plot)
+
+        self.throughput_plot = pg.PlotWidget()
+        self.throughput_plot.setLabel('left', '数据包', 'ping/s')
+        self.throughput_plot.setLabel('bottom', '时间', 's')
+        self.throughput_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.throughput_curve = self.throughput_plot.plot(pen=pg.mkPen('g', width=2))
+        perf_layout.addWidget(self.throughput_plot)
+
+        perf_group.setLayout(perf_layout)
+        layout.addWidget(perf_group)
+
+        # 添加设备状态监控表格布局
+        device_group = QGroupBox("设备状态监控")
+        device_layout = QGridLayout()
+
+        # 创建设备状态表
+        self.device_table = QTableWidget()
+        self.device_table.setColumnCount(3)
+        self.device_table.setHorizontalHeaderLabels(["设备", "状态", "详细信息"])
+        self.device_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        # 初始化设备状态显示
+        self.device_table.setRowCount(len(self.device_status))
+        row = 0
+        self.status_cells = {}
+
+        for device, status in self.device_status.items():
+            # 设备名称
+            self.device_table.setItem(row, 0, QTableWidgetItem(device))
+
+            # 状态
+            status_item = QTableWidgetItem(status)
+            if status == "正常":
+                status_item.setForeground(QColor("green"))
+            else:
+                status_item.setForeground(QColor("red"))
+            self.device_table.setItem(row, 1, status_item)
+            self.status_cells[device] = status_item
+
+            # 详细信息
+            self.device_table.setItem(row, 2, QTableWidgetItem("正常工作"))
+
+            row += 1
+
+        device_layout.addWidget(self.device_table)
+        device_group.setLayout(device_layout)
+        layout.addWidget(device_group)
+
+        # 添加系统日志区域
+        log_group = QGroupBox("系统日志")
+        log_layout = QVBoxLayout()
+
+        self.log_table = LogView(self.log_model)
+        log_layout.addWidget(self.log_table)
+        log_group.setLayout(log_layout)
+        layout.addWidget(log_group)
+
+        tab.setLayout(layout)
+        self.tabs.addTab(tab, "设备监控")
+
+    def create_data_management_tab(self):
+        """创建数据管理选项卡"""
+        tab = QWidget()
+        layout = QVBoxLayout()
+
+        # 数据操作面板
+        ops_group = QGroupBox("数据操作")
+        ops_layout = QHBoxLayout()
+
+        # 保存按钮
+        save_button = QPushButton("保存当前数据")
+        save_button.clicked.connect(lambda: self.save_data())
+        ops_layout.addWidget(save_button)
+
+        # 加载按钮
+        load_button = QPushButton("加载历史数据")
+        load_button.clicked.connect(self.load_data)
+        ops_layout.addWidget(load_button)
+
+        # 导出成果按钮
+        export_button = QPushButton("导出成果")
+        export_button.clicked.connect(self.export_results)
+        ops_layout.addWidget(export_button)
+
+        # 数据过滤按钮
+        filter_button = QPushButton("数据过滤")
+        filter_button.clicked.connect(self.filter_data)
+        ops_layout.addWidget(filter_button)
+
+        ops_group.setLayout(ops_layout)
+        layout.addWidget(ops_group)
+
+        # 统计信息面板
+        stats_group = QGroupBox("统计信息")
+        stats_layout = QGridLayout()
+
+        # 添加统计数据标签
+        stats_items = [
+            ("采集点数", "points_collected", "个"),
+            ("最大水深", "max_depth", "m"),
+            ("最小水深", "min_depth", "m"),
+            ("平均水深", "avg_depth", "m"),
+            ("测量时长", "survey_duration", ""),
+            ("覆盖面积", "coverage_area", "m²")
+        ]
+
+        self.stats_display = {}
+        row, col = 0, 0
+        for label_text, key, unit in stats_items:
+            label = QLabel(f"{label_text}:")
+            stats_layout.addWidget(label, row, col * 2)
+
+            value = QLabel(f"0 {unit}")
+            value.setStyleSheet("color: cyan; font-weight: bold")
+            self.stats_display[key] = value
+            stats_layout.addWidget(value, row, col * 2 + 1)
+
+            col += 1
+            if col > 2:
+                col = 0
+                row += 1
+
+        stats_group.setLayout(stats_layout)
+        layout.addWidget(stats_group)
+
+        # 历史记录表格（来自数据目录索引，点击“加载”列载入该测量）
+        history_group = QGroupBox("历史数据记录")
+        history_layout = QVBoxLayout()
+
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(6)
+        self.history_table.setHorizontalHeaderLabels([
+            "文件名", "记录时间", "数据点数", "最大水深", "最小水深", "操作"
+        ])
+        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.history_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.history_table.setRowCount(0)  # 初始为空
+        self.history_table.cellClicked.connect(self.on_history_clicked)
+
+        history_layout.addWidget(self.history_table)
+        history_group.setLayout(history_layout)
+        layout.addWidget(history_group)
+
+        # 刷新历史数据按钮
+        refresh_history_button = QPushButton("刷新历史数据列表")
+        refresh_history_button.clicked.connect(self.refresh_history)
+        layout.addWidget(refresh_history_button)
+
+        tab.setLayout(layout)
+        self.tabs.addTab(tab, "数据管理")
+
+    def create_analysis_tab(self):
+        """创建数据分析选项卡（首次显示时构建）"""
+        self.analysis_tab = LazyPage(self.build_analysis_tab)
+        self.tabs.addTab(self.analysis_tab, "数据分析")
+
+    def build_analysis_tab(self, tab):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.setup_matplotlib_chinese_support()
         main_layout = QVBoxLayout()
 
         # 创建顶部控制栏
@@ -1058,11 +1485,22 @@ class MultibeamSonarSystem(QMainWindow):
         main_layout.addWidget(results_group)
 
         tab.setLayout(main_layout)
-        self.tabs.addTab(tab, "数据分析")
+
+    def create_diagnostics_tab(self):
+        """创建性能诊断选项卡（各处理阶段耗时分位数）"""
+        self.diagnostics_panel = DiagnosticsPanel(self.timers)
+        self.tabs.addTab(self.diagnostics_panel, "性能诊断")
 
     def create_settings_tab(self):
-        """创建设置选项卡"""
-        tab = QWidget()
+        """创建设置选项卡（首次显示时构建）"""
+        self.settings_tab = LazyPage(self.build_settings_tab)
+        self.tabs.addTab(self.settings_tab, "设置")
+
+    def build_settings_tab(self, tab):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.setup_matplotlib_chinese_support()
         layout = QVBoxLayout()
 
         # 系统参数设置
@@ -1160,13 +1598,14 @@ class MultibeamSonarSystem(QMainWindow):
         layout.addWidget(calib_group)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, "设置")
 
+    @timed("update_realtime_display")
     def update_realtime_display(self):
         """更新实时显示"""
         # 更新顶部状态
         self.gps_display.setText(f"GPS: {self.gps_lat:.4f}° N, {self.gps_lon:.4f}° E")
         self.heading_display.setText(f"航向: {self.vessel_heading:.1f}°")
+        self.attitude_display.setText(f"横摇: {self.vessel_roll:.1f}° 纵摇: {self.vessel_pitch:.1f}°")
         current_depth = np.mean(self.beam_data)
         self.current_depth_display.setText(f"当前深度: {current_depth:.1f} m")
 
@@ -1177,7 +1616,7 @@ class MultibeamSonarSystem(QMainWindow):
         confidence_x = []
         confidence_y = []
         for i in range(len(self.beam_angles)):
-            if np.random.rand() > 0.8:  # 随机选择20%的点显示置信度问题
+            if self.display_rng.random() > 0.8:  # 随机选择20%的点显示置信度问题
                 confidence_x.append(self.beam_angles[i])
                 confidence_y.append(self.beam_data[i])
         self.beam_confidence.setData(confidence_x, confidence_y)
@@ -1190,22 +1629,12 @@ class MultibeamSonarSystem(QMainWindow):
             self.current_pos_indicator.setData([self.track_x[-1]], [self.track_y[-1]],
                                                symbol='o', symbolSize=10, symbolBrush='r')
 
-        # 更新水深图
-        x_idx = min(int(self.position_x * 5) % 50, 49)
-        y_idx = min(int(self.position_y * 5) % 50, 49)
-        # 在当前位置附近添加新的水深数据
-        radius = 3
-        for i in range(max(0, x_idx - radius), min(50, x_idx + radius)):
-            for j in range(max(0, y_idx - radius), min(50, y_idx + radius)):
-                if np.sqrt((i - x_idx) ** 2 + (j - y_idx) ** 2) <= radius:
-                    # 模拟测得新的水深数据
-                    self.depth_data[j, i] = self.beam_data[len(self.beam_data) // 2] + np.random.rand() * 2 - 1
-
+        # 更新水深图（网格由处理引擎更新）
         self.depth_image.setImage(self.depth_data, autoLevels=False, levels=(10, 30))
 
         # 更新深度范围标签
-        min_depth = np.min(self.depth_data)
-        max_depth = np.max(self.depth_data)
+        min_depth = np.nanmin(self.depth_data)
+        max_depth = np.nanmax(self.depth_data)
         self.depth_range_label.setText(f"深度范围: {min_depth:.1f} - {max_depth:.1f} m")
 
     def update_device_status(self):
@@ -1227,8 +1656,18 @@ class MultibeamSonarSystem(QMainWindow):
             self.system_status_indicator.setText("系统状态: 正常")
             self.system_status_indicator.setStyleSheet("color: lime; font-weight: bold; font-size: 14pt")
 
-        # 模拟CPU和内存使用
-        cpu = 30 + int(np.random.rand() * 20)
+        self.update_performance_display()
+
+    def update_performance_display(self):
+        """显示遥测线程采集的CPU、内存与数据处理吞吐量"""
+        t, data = self.telemetry.window("system_cpu", "process_cpu", "system_memory", "process_rss", "ping_rate")
+        if len(t) == 0:
+            return
+        latest = {name: values[-1] for name, values in data.items()}
+
+        # 未安装psutil时系统CPU为NaN，使用本程序CPU
+        cpu = latest["system_cpu"] if np.isfinite(latest["system_cpu"]) else latest["process_cpu"]
+        cpu = int(np.nan_to_num(cpu))
         self.cpu_usage.setValue(cpu)
         if cpu > 80:
             self.cpu_usage.setStyleSheet("QProgressBar::chunk { background-color: red; }")
@@ -1237,15 +1676,24 @@ class MultibeamSonarSystem(QMainWindow):
         else:
             self.cpu_usage.setStyleSheet("QProgressBar::chunk { background-color: green; }")
 
-        mem = 25 + int(np.random.rand() * 15)
-        self.memory_usage.setValue(mem)
+        self.memory_usage.setValue(int(np.nan_to_num(latest["system_memory"])))
+        self.memory_usage.setFormat(f"内存: %p% (本程序 {np.nan_to_num(latest['process_rss']):.0f} MB)")
+
+        # 更新数据处理速率
+        self.data_rate.setText(f"数据处理: {latest['ping_rate']:.1f} ping/s")
 
-        # 更新数据传输率
-        data_rate = 2.0 + np.random.rand() * 1.0
-        self.data_rate.setText(f"数据传输率: {data_rate:.1f} MB/s")
+        # 更新趋势图
+        self.system_cpu_curve.setData(t, data["system_cpu"], connect="finite")
+        self.process_cpu_curve.setData(t, data["process_cpu"], connect="finite")
+        self.memory_curve.setData(t, data["system_memory"], connect="finite")
+        self.throughput_curve.setData(t, data["ping_rate"], connect="finite")
 
+    @timed("update_3d_view")
     def update_3d_view(self):
         """更新3D视图"""
+        if not self.view3d_tab.is_built:
+            return  # 3D视图首次显示时会按当前数据绘制
+
         self.ax3d.clear()
 
         x = np.linspace(0, 10, 50)
@@ -1365,25 +1813,7 @@ class MultibeamSonarSystem(QMainWindow):
 
     def add_log(self, message, log_type="信息"):
         """添加系统日志"""
-        timestamp = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
-        self.system_log.append((timestamp, log_type, message))
-
-        # 更新日志表格
-        row = None
-        # self.log_table.insertRow(row)
-        # self.log_table.setItem(row, 0, QTableWidgetItem(timestamp))
-
-        type_item = QTableWidgetItem(log_type)
-        if log_type == "警告" or log_type == "错误":
-            type_item.setForeground(QColor("red"))
-        elif log_type == "成功":
-            type_item.setForeground(QColor("green"))
-        # self.log_table.setItem(row, 1, type_item)
-
-        # self.log_table.setItem(row, 2, QTableWidgetItem(message))
-
-        # 自动滚动到最新的日志
-        # self.log_table.scrollToBottom()
+        self.log_model.append(message, log_type)
 
     def update_stats_display(self):
         """更新统计信息显示"""
@@ -1400,7 +1830,7 @@ class MultibeamSonarSystem(QMainWindow):
     def quick_save(self):
         """快速保存当前数据"""
         # 使用当前时间作为默认文件名
-        default_filename = QDateTime.currentDateTime().toString("yyyyMMdd_hhmmss") + ".csv"
+        default_filename = QDateTime.currentDateTime().toString("yyyyMMdd_hhmmss") + ".svy"
         self.save_data(default_filename)
         self.statusBar.showMessage(f"数据已快速保存: {default_filename}")
 
@@ -1411,38 +1841,19 @@ class MultibeamSonarSystem(QMainWindow):
             # 确保目录存在
             os.makedirs("data", exist_ok=True)
         else:
-            filename, _ = QFileDialog.getSaveFileName(self, "保存数据", "", "CSV Files (*.csv);;All Files (*)")
+            filename, _ = QFileDialog.getSaveFileName(self, "保存数据", "",
+                                                      "Survey Files (*.svy);;CSV Files (*.csv);;All Files (*)")
 
         if filename:
             try:
-                # 创建包含当前数据的DataFrame
-                data = {
-                    'track_x': self.track_x,
-                    'track_y': self.track_y,
-                    'beam_data': [list(self.beam_data) for _ in range(len(self.track_x))],  # 每个点保存当前深度数据
-                    'timestamp': [time.time() + i for i in range(len(self.track_x))],
-                    'gps_lat': [self.gps_lat + i * 0.0001 for i in range(len(self.track_x))],
-                    'gps_lon': [self.gps_lon + i * 0.0001 for i in range(len(self.track_x))]
-                }
-
-                # 对齐数据长度
-                min_len = min(len(self.track_x), len(self.track_y))
-                df = pd.DataFrame({
-                    'track_x': self.track_x[:min_len],
-                    'track_y': self.track_y[:min_len],
-                    'gps_lat': data['gps_lat'][:min_len],
-                    'gps_lon': data['gps_lon'][:min_len],
-                    'timestamp': data['timestamp'][:min_len]
-                })
-
-                # 保存
-                df.to_csv(filename, index=False)
-
-                # 同时保存水深图
-                depth_filename = filename.replace('.csv', '_depth.npy')
-                np.save(depth_filename, self.depth_data)
+                # 保存测量容器（或航迹CSV与水深图），保存在数据目录中时登记到索引
+                catalog = self.catalog if self.catalog.contains(filename) else None
+                filename, depth_filename = self.engine.export(filename, catalog=catalog)
 
-                self.add_log(f"数据已保存到 {filename} 和 {depth_filename}", "成功")
+                if depth_filename == filename:
+                    self.add_log(f"数据已保存到 {filename}", "成功")
+                else:
+                    self.add_log(f"数据已保存到 {filename} 和 {depth_filename}", "成功")
                 self.refresh_history()
 
                 return True
@@ -1454,23 +1865,17 @@ class MultibeamSonarSystem(QMainWindow):
 
     def load_data(self):
         """加载历史数据"""
-        filename, _ = QFileDialog.getOpenFileName(self, "加载数据", "", "CSV Files (*.csv);;All Files (*)")
+        filename, _ = QFileDialog.getOpenFileName(self, "加载数据", "",
+                                                  "Survey Files (*.svy *.csv);;All Files (*)")
         if filename:
             try:
-                # 加载航迹数据
-                df = pd.read_csv(filename)
-                self.track_x = df['track_x'].tolist()
-                self.track_y = df['track_y'].tolist()
+                # 加载航迹数据和水深图
+                survey = self.engine.load(filename)
 
                 # 如果有GPS数据就加载
-                if 'gps_lat' in df.columns and 'gps_lon' in df.columns:
-                    self.gps_lat = df['gps_lat'].iloc[-1]
-                    self.gps_lon = df['gps_lon'].iloc[-1]
-
-                # 尝试加载水深图
-                depth_filename = filename.replace('.csv', '_depth.npy')
-                if os.path.exists(depth_filename):
-                    self.depth_data = np.load(depth_filename)
+                if survey['gps_lat'] is not None and len(survey['gps_lat']) > 0:
+                    self.gps_lat = survey['gps_lat'][-1]
+                    self.gps_lon = survey['gps_lon'][-1]
 
                 # 更新显示
                 self.update_realtime_display()
@@ -1478,9 +1883,7 @@ class MultibeamSonarSystem(QMainWindow):
 
                 # 更新统计数据
                 self.stats["points_collected"] = len(self.track_x)
-                if len(self.track_x) >= 2:
-                    track_length = np.sum(np.sqrt(np.diff(self.track_x) ** 2 + np.diff(self.track_y) ** 2))
-                    self.stats["coverage_area"] = track_length * 2 * 75 * np.pi / 180
+                self.stats["coverage_area"] = self.engine.stats.swath_area
 
                 self.add_log(f"已加载数据，共 {len(self.track_x)} 个点", "成功")
                 self.statusBar.showMessage(f"已加载数据 {filename}")
@@ -1490,35 +1893,23 @@ class MultibeamSonarSystem(QMainWindow):
                 QMessageBox.critical(self, "加载失败", f"无法加载数据: {str(e)}")
 
     def export_3d_model(self):
-        """导出3D模型"""
-        filename, _ = QFileDialog.getSaveFileName(self, "导出3D模型", "", "OBJ Files (*.obj);;All Files (*)")
+        """导出3D模型（按扩展名选择 OBJ/PLY/STL/glTF，未探测区域留空）"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "导出3D模型", "",
+            "PLY Files (*.ply);;glTF Binary (*.glb);;STL Files (*.stl);;OBJ Files (*.obj);;All Files (*)")
         if filename:
             try:
-                # 此处应实现为真实的3D模型导出
-                # 这里只做简单的模拟
-                with open(filename, 'w') as f:
-                    f.write("# 3D model export from MultibeamSonarSystem\n")
-
-                    # 写入顶点
-                    x = np.linspace(0, 10, 50)
-                    y = np.linspace(0, 10, 50)
-                    X, Y = np.meshgrid(x, y)
-                    Z = self.depth_data
-
-                    for i in range(50):
-                        for j in range(50):
-                            f.write(f"v {X[i, j]} {Y[i, j]} {Z[i, j]}\n")
-
-                    # 写入面
-                    for i in range(49):
-                        for j in range(49):
-                            idx1 = i * 50 + j + 1
-                            idx2 = i * 50 + j + 2
-                            idx3 = (i + 1) * 50 + j + 2
-                            idx4 = (i + 1) * 50 + j + 1
-                            f.write(f"f {idx1} {idx2} {idx3} {idx4}\n")
-
-                self.add_log(f"3D模型已导出到 {filename}", "成功")
+                if os.path.splitext(filename)[1].lower() not in MESH_FORMATS:
+                    filename += ".ply"
+
+                # 网格过大时抽稀，限制模型顶点数
+                step = decimation_step(self.depth_data.shape, self.max_model_vertices)
+                vertices, faces = export_mesh(filename, self.depth_data, cell_size=self.engine.grid.cell_size,
+                                              step=step)
+
+                message = f"3D模型已导出到 {filename}（{vertices} 个顶点，{faces} 个三角形"
+                message += f"，抽稀步长 {step}）" if step > 1 else "）"
+                self.add_log(message, "成功")
                 QMessageBox.information(self, "导出成功", f"3D模型已成功导出到：\n{filename}")
 
             except Exception as e:
@@ -1526,72 +1917,61 @@ class MultibeamSonarSystem(QMainWindow):
                 QMessageBox.critical(self, "导出失败", f"无法导出3D模型: {str(e)}")
 
     def refresh_history(self):
-        """刷新历史数据列表"""
-        # 清空表格
-        self.history_table.setRowCount(0)
-
-        # 检查数据目录
-        if not os.path.exists("data"):
-            os.makedirs("data")
-            return
-
-        # 查找所有CSV文件
-        csv_files = [f for f in os.listdir("data") if f.endswith(".csv")]
-
-        for csv_file in csv_files:
-            try:
-                filepath = os.path.join("data", csv_file)
-                df = pd.read_csv(filepath)
-
-                row = self.history_table.rowCount()
-                self.history_table.insertRow(row)
-
-                # 文件名
-                self.history_table.setItem(row, 0, QTableWidgetItem(csv_file))
-
-                # 记录时间（从文件名中提取或使用修改时间）
-                if "_" in csv_file:
-                    time_str = csv_file.split("_")[0]
-                    self.history_table.setItem(row, 1, QTableWidgetItem(time_str))
-                else:
-                    mtime = os.path.getmtime(filepath)
-                    time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
-                    self.history_table.setItem(row, 1, QTableWidgetItem(time_str))
-
-                # 数据点数
-                self.history_table.setItem(row, 2, QTableWidgetItem(str(len(df))))
-
-                # 暂时跳过水深信息，实际应用中应从数据中提取
-                self.history_table.setItem(row, 3, QTableWidgetItem("N/A"))
-                self.history_table.setItem(row, 4, QTableWidgetItem("N/A"))
-
-                # 添加加载按钮
-                load_btn = QPushButton("加载")
-                load_btn.clicked.connect(lambda checked, f=filepath: self.load_specific_file(f))
-                self.history_table.setCellWidget(row, 5, load_btn)
-
-            except Exception as e:
-                print(f"处理文件 {csv_file} 时发生错误: {str(e)}")
-
-        self.add_log(f"已刷新历史数据列表，共 {self.history_table.rowCount()} 条记录")
+        """刷新历史数据列表（由数据目录索引提供，只重新读取新增或被修改的文件）"""
+        errors = []
+        self.catalog.scan(errors=errors)
+        for path, error in errors:
+            self.add_log(f"处理文件 {os.path.basename(path)} 时发生错误: {error}", "警告")
+        entries = self.catalog.entries()
+
+        table = self.history_table
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            # 文件名（完整路径保存在单元格数据中，提示中显示时间范围与航迹范围）
+            name_item = QTableWidgetItem(entry["name"])
+            name_item.setData(Qt.UserRole, entry["path"])
+            tooltip = [entry["path"]]
+            if entry["time_start"] is not None:
+                tooltip.append(f"时间跨度: {entry['time_end'] - entry['time_start']:.1f} s")
+            if entry["xmin"] is not None:
+                tooltip.append(f"航迹范围: x {entry['xmin']:.1f}~{entry['xmax']:.1f} m, "
+                               f"y {entry['ymin']:.1f}~{entry['ymax']:.1f} m")
+            name_item.setToolTip("\n".join(tooltip))
+            table.setItem(row, 0, name_item)
+
+            # 记录时间（文件写入时间）
+            time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["mtime"]))
+            table.setItem(row, 1, QTableWidgetItem(time_str))
+
+            # 数据点数与水深范围
+            table.setItem(row, 2, QTableWidgetItem(str(entry["points"])))
+            for column, key in ((3, "depth_max"), (4, "depth_min")):
+                value = entry[key]
+                table.setItem(row, column, QTableWidgetItem("N/A" if value is None else f"{value:.2f} m"))
+
+            load_item = QTableWidgetItem("加载")
+            load_item.setForeground(QColor(42, 130, 218))
+            table.setItem(row, 5, load_item)
+        table.setUpdatesEnabled(True)
+
+        self.add_log(f"已刷新历史数据列表，共 {len(entries)} 条记录")
+
+    def on_history_clicked(self, row, column):
+        """点击历史列表的“加载”列时加载对应测量"""
+        if column == 5:
+            self.load_specific_file(self.history_table.item(row, 0).data(Qt.UserRole))
 
     def load_specific_file(self, filepath):
         """加载特定文件"""
         try:
-            # 加载航迹数据
-            df = pd.read_csv(filepath)
-            self.track_x = df['track_x'].tolist()
-            self.track_y = df['track_y'].tolist()
+            # 加载航迹数据和水深图
+            survey = self.engine.load(filepath)
 
             # 如果有GPS数据就加载
-            if 'gps_lat' in df.columns and 'gps_lon' in df.columns:
-                self.gps_lat = df['gps_lat'].iloc[-1]
-                self.gps_lon = df['gps_lon'].iloc[-1]
-
-            # 尝试加载水深图
-            depth_filename = filepath.replace('.csv', '_depth.npy')
-            if os.path.exists(depth_filename):
-                self.depth_data = np.load(depth_filename)
+            if survey['gps_lat'] is not None and len(survey['gps_lat']) > 0:
+                self.gps_lat = survey['gps_lat'][-1]
+                self.gps_lon = survey['gps_lon'][-1]
 
             # 更新显示
             self.update_realtime_display()
@@ -1665,22 +2045,21 @@ class MultibeamSonarSystem(QMainWindow):
         if analysis_type == "深度趋势分析":
             # 分析深度趋势
             if len(self.history_depth) > 0:
-                x = np.arange(len(self.history_depth))
-                y = self.history_depth
+                trend = analysis.depth_trend(self.history_depth, window=10)
+                x = trend["x"]
+                y = trend["y"]
 
                 # 绘制深度值
                 self.depth_trend_ax.plot(x, y, 'b-', label='Raw Depth')  # 使用英文
 
-                # 计算移动平均
-                if len(y) >= 10:
-                    window = 10
-                    y_smooth = np.convolve(y, np.ones(window) / window, mode='valid')
-                    x_smooth = x[window - 1:]
-                    self.depth_trend_ax.plot(x_smooth, y_smooth, 'r-', linewidth=2, label='Moving Average')  # 使用英文
+                # 移动平均
+                if trend["smooth_y"] is not None:
+                    self.depth_trend_ax.plot(trend["smooth_x"], trend["smooth_y"], 'r-', linewidth=2,
+                                             label='Moving Average')  # 使用英文
 
-                # 计算趋势线
-                if len(y) >= 2:
-                    z = np.polyfit(x, y, 1)
+                # 趋势线
+                if trend["coeffs"] is not None:
+                    z = trend["coeffs"]
                     p = np.poly1d(z)
                     self.depth_trend_ax.plot(x, p(x), "g--", linewidth=2,
                                              label=f'Trend {z[0]:.4f}x + {z[1]:.2f}')  # 使用英文
@@ -1691,45 +2070,34 @@ class MultibeamSonarSystem(QMainWindow):
                 self.depth_trend_ax.set_title('Depth Trend Analysis', color='white')  # 使用英文
 
                 # 更新统计信息
-                avg_depth = np.mean(y)
-                std_depth = np.std(y)
-                max_depth = np.max(y)
-                min_depth = np.min(y)
-
-                self.stats_labels["平均深度"].setText(f"{avg_depth:.2f} m")
-                self.stats_labels["最大深度"].setText(f"{max_depth:.2f} m")
-                self.stats_labels["最小深度"].setText(f"{min_depth:.2f} m")
-                self.stats_labels["深度标准差"].setText(f"{std_depth:.2f} m")
+                depth_stats = analysis.summarize(y)
+                self.stats_labels["平均深度"].setText(f"{depth_stats['mean']:.2f} m")
+                self.stats_labels["最大深度"].setText(f"{depth_stats['max']:.2f} m")
+                self.stats_labels["最小深度"].setText(f"{depth_stats['min']:.2f} m")
+                self.stats_labels["深度标准差"].setText(f"{depth_stats['std']:.2f} m")
 
         elif analysis_type == "地形坡度分析":
             # 计算地形坡度
-            gradient_x = np.gradient(self.depth_data, axis=1)
-            gradient_y = np.gradient(self.depth_data, axis=0)
-            slope = np.sqrt(gradient_x ** 2 + gradient_y ** 2)
-            slope_degrees = np.degrees(np.arctan(slope))
+            slope_degrees = analysis.slope(self.depth_data, degrees=True)
 
             # 绘制坡度图
             im = self.depth_trend_ax.imshow(slope_degrees, cmap='hot',
                                             interpolation='nearest', aspect='auto')
-            cbar = plt.colorbar(im, ax=self.depth_trend_ax)
+            cbar = self.analysis_figure.colorbar(im, ax=self.depth_trend_ax)
             cbar.set_label('Slope (degrees)', color='white')  # 使用英文
             cbar.ax.yaxis.set_tick_params(color='white')
-            plt.setp(plt.getp(cbar.ax.axes, 'yticklabels'), color='white')
+            cbar.ax.tick_params(labelcolor='white')
 
             self.depth_trend_ax.set_xlabel('X', color='white')
             self.depth_trend_ax.set_ylabel('Y', color='white')
             self.depth_trend_ax.set_title('Terrain Slope Analysis', color='white')  # 使用英文
 
             # 更新统计信息
-            avg_slope = np.mean(slope_degrees)
-            max_slope = np.max(slope_degrees)
-            min_slope = np.min(slope_degrees)
-            std_slope = np.std(slope_degrees)
-
-            self.stats_labels["坡度平均值"].setText(f"{avg_slope:.2f}°")
-            self.stats_labels["最大坡度"].setText(f"{max_slope:.2f}°")
-            self.stats_labels["最小坡度"].setText(f"{min_slope:.2f}°")
-            self.stats_labels["坡度标准差"].setText(f"{std_slope:.2f}°")
+            slope_stats = analysis.summarize(slope_degrees)
+            self.stats_labels["坡度平均值"].setText(f"{slope_stats['mean']:.2f}°")
+            self.stats_labels["最大坡度"].setText(f"{slope_stats['max']:.2f}°")
+            self.stats_labels["最小坡度"].setText(f"{slope_stats['min']:.2f}°")
+            self.stats_labels["坡度标准差"].setText(f"{slope_stats['std']:.2f}°")
 
         elif analysis_type == "声速剖面分析":
             # 绘制声速剖面
@@ -1749,15 +2117,16 @@ class MultibeamSonarSystem(QMainWindow):
                 x = np.arange(len(self.history_depth))
 
                 # 模拟随时间变化的精度
-                accuracy = 0.05 + 0.02 * np.random.rand(len(x))
+                rng = self.display_rng
+                accuracy = 0.05 + 0.02 * rng.random(len(x))
 
                 # 添加一些随机的精度变化
                 for i in range(5):
-                    pos = np.random.randint(0, len(x))
-                    width = np.random.randint(5, 20)
+                    pos = rng.integers(0, len(x))
+                    width = rng.integers(5, 20)
                     for j in range(max(0, pos - width // 2), min(len(x), pos + width // 2)):
                         if j < len(accuracy):
-                            accuracy[j] += 0.1 * np.random.rand()
+                            accuracy[j] += 0.1 * rng.random()
 
                 self.depth_trend_ax.plot(x, accuracy, 'g-', linewidth=2)
 
@@ -1796,38 +2165,44 @@ class MultibeamSonarSystem(QMainWindow):
             self.svp_canvas.draw()
 
     def setup_matplotlib_chinese_support(self):
-        """尝试设置matplotlib支持中文"""
+        """尝试设置matplotlib支持中文
+
+        只在已安装的字体列表中查找，不再逐个字体试绘图；首次创建图表时调用一次。
+        """
+        if self.chinese_font is not None:
+            return bool(self.chinese_font)
+
         try:
+            import matplotlib
+            from matplotlib import font_manager
+
             # 尝试不同的中文字体
             font_options = ['SimHei', 'Microsoft YaHei', 'WenQuanYi Micro Hei', 'AR PL UMing CN']
+            installed = {font.name for font in font_manager.fontManager.ttflist}
 
             for font in font_options:
-                try:
-                    plt.rcParams['font.sans-serif'] = [font]
-                    plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-                    # 测试字体是否工作
-                    fig = Figure()
-                    ax = fig.add_subplot(111)
-                    ax.set_title('测试')
-                    fig.canvas.draw()
-                    # 如果没有抛出异常，则字体可用
+                if font in installed:
+                    matplotlib.rcParams['font.sans-serif'] = [font] + matplotlib.rcParams['font.sans-serif']
+                    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
                     print(f"成功配置matplotlib支持中文，使用字体: {font}")
+                    self.chinese_font = font
                     return True
-                except:
-                    continue
 
-            # 如果所有字体都失败了
+            # 如果所有字体都不可用
             print("无法找到支持中文的字体，将使用英文标签")
-            return False
         except Exception as e:
             print(f"配置matplotlib中文支持时出错: {str(e)}")
-            return False
+
+        self.chinese_font = ""
+        return False
 
     def load_svp(self):
         """加载声速剖面数据"""
         filename, _ = QFileDialog.getOpenFileName(self, "加载声速剖面", "", "CSV Files (*.csv);;All Files (*)")
         if filename:
             try:
+                import pandas as pd
+
                 # 加载声速剖面数据
                 df = pd.read_csv(filename)
 
@@ -2053,36 +2428,7 @@ class MultibeamSonarSystem(QMainWindow):
             strength = filter_strength.value()
 
             # 应用过滤
-            if filter_name == "噪声过滤":
-                # 应用高斯过滤
-                sigma = 0.5 * strength
-                self.depth_data = signal.gaussian_filter(self.depth_data, sigma)
-
-            elif filter_name == "离群值移除":
-                # 移除离群值
-                threshold = 0.2 * strength
-                mean = np.mean(self.depth_data)
-                std = np.std(self.depth_data)
-                mask = np.abs(self.depth_data - mean) > threshold * std
-                self.depth_data[mask] = np.median(self.depth_data)
-
-            elif filter_name == "平滑处理":
-                # 应用中值过滤
-                kernel_size = 1 + 2 * strength
-                self.depth_data = signal.medfilt2d(self.depth_data, kernel_size=kernel_size)
-
-            elif filter_name == "综合过滤":
-                # 同时应用多种过滤
-                # 先移除离群值
-                threshold = 0.2 * strength
-                mean = np.mean(self.depth_data)
-                std = np.std(self.depth_data)
-                mask = np.abs(self.depth_data - mean) > threshold * std
-                self.depth_data[mask] = np.median(self.depth_data)
-
-                # 再应用高斯平滑
-                sigma = 0.3 * strength
-                self.depth_data = signal.gaussian_filter(self.depth_data, sigma)
+            self.engine.apply_filter(filter_name, strength)
 
             # 更新显示
             self.depth_image.setImage(self.depth_data, autoLevels=False)
@@ -2103,7 +2449,7 @@ class MultibeamSonarSystem(QMainWindow):
         layout.addWidget(QLabel("选择导出格式:"))
 
         export_format = QComboBox()
-        export_format.addItems(["CSV", "Excel", "PDF报告", "图像"])
+        export_format.addItems(["CSV", "Parquet", "NumPy列目录", "Excel", "PDF报告", "HTML报告", "图像"])
         layout.addWidget(export_format)
 
         # 添加导出内容选择
@@ -2143,43 +2489,42 @@ class MultibeamSonarSystem(QMainWindow):
             # 根据选择的格式决定文件扩展名
             if format_name == "CSV":
                 ext = "csv"
+            elif format_name == "Parquet":
+                ext = "parquet"
+            elif format_name == "NumPy列目录":
+                ext = ""
             elif format_name == "Excel":
                 ext = "xlsx"
             elif format_name == "PDF报告":
                 ext = "pdf"
+            elif format_name == "HTML报告":
+                ext = "html"
             elif format_name == "图像":
                 ext = "png"
 
-            filename, _ = QFileDialog.getSaveFileName(self, "导出结果", f"survey_result.{ext}",
-                                                      f"{format_name} Files (*.{ext});;All Files (*)")
+            if ext:
+                filename, _ = QFileDialog.getSaveFileName(self, "导出结果", f"survey_result.{ext}",
+                                                          f"{format_name} Files (*.{ext});;All Files (*)")
+            else:
+                filename, _ = QFileDialog.getSaveFileName(self, "导出结果（列目录）", "survey_result")
 
             if filename:
-                try:
-                    # 导出数据
-                    if format_name == "CSV":
-                        # 创建DataFrame存储数据
-                        export_data = {}
+                # 列式格式在后台分批导出，采集不中断
+                if format_name in ("CSV", "Parquet", "NumPy列目录"):
+                    fmt = {"CSV": "csv", "Parquet": "parquet", "NumPy列目录": "npy"}[format_name]
+                    self.start_streaming_export(filename, fmt, export_track.isChecked(), export_depth.isChecked(),
+                                                export_stats.isChecked())
+                    return
+                # 报告在工作进程中渲染与组装
+                if format_name in ("PDF报告", "HTML报告"):
+                    self.start_report_export(filename)
+                    return
 
-                        if export_track.isChecked() and self.track_x:
-                            export_data['track_x'] = self.track_x
-                            export_data['track_y'] = self.track_y
-
-                        if export_depth.isChecked():
-                            # 将2D深度数据转为1D数组
-                            export_data['depth'] = self.depth_data.flatten()
-
-                        if export_stats.isChecked():
-                            for key, value in self.stats.items():
-                                if isinstance(value, (int, float)):
-                                    export_data[key] = [value] * len(self.track_x)
-
-                        # 创建DataFrame
-                        df = pd.DataFrame(export_data)
-
-                        # 保存CSV
-                        df.to_csv(filename, index=False)
+                try:
+                    import pandas as pd
 
-                    elif format_name == "Excel":
+                    # 导出数据
+                    if format_name == "Excel":
                         # 使用pandas导出到Excel
                         with pd.ExcelWriter(filename) as writer:
                             # 导出航迹数据
@@ -2190,24 +2535,23 @@ class MultibeamSonarSystem(QMainWindow):
                                 })
                                 track_df.to_excel(writer, sheet_name='航迹数据', index=False)
 
-                            # 导出深度数据
+                            # 导出深度数据（有效网格的 x, y, depth 列）
                             if export_depth.isChecked():
-                                depth_df = pd.DataFrame(self.depth_data)
-                                depth_df.to_excel(writer, sheet_name='水深数据')
+                                if grid_rows(self.depth_data) >= 1048576:
+                                    raise ValueError("水深数据超过Excel行数上限，请导出为CSV或Parquet")
+                                depth_df = pd.concat([pd.DataFrame(batch) for batch in grid_batches(
+                                    self.depth_data, self.engine.grid.cell_size)])
+                                depth_df.to_excel(writer, sheet_name='水深数据', index=False)
 
                             # 导出统计数据
                             if export_stats.isChecked():
                                 stats_df = pd.DataFrame([self.stats])
                                 stats_df.to_excel(writer, sheet_name='统计数据', index=False)
 
-                    elif format_name == "PDF报告":
-                        # 这里简单模拟PDF生成过程
-                        with open(filename, 'wb') as f:
-                            f.write(b'%PDF-1.4\n%Mock PDF for survey results\n')
-
                     elif format_name == "图像":
                         # 导出当前3D视图为图像
                         if export_3d.isChecked():
+                            self.view3d_tab.ensure_built()
                             self.figure.savefig(filename, dpi=300, facecolor='#2D2D2D')
 
                     self.add_log(f"测量结果已导出: {filename}", "成功")
@@ -2219,18 +2563,134 @@ class MultibeamSonarSystem(QMainWindow):
                     QMessageBox.critical(self, "导出失败", f"无法导出结果: {str(e)}")
 
 
+    def start_streaming_export(self, filename, fmt, track=True, depth=True, stats=True):
+        """在后台线程中分批导出航迹、水深测点与统计数据，显示进度并可取消
+
+        水深测点写入 filename，航迹写入同名的 ``_track`` 文件，统计数据写入 ``_stats.json``。
+        """
+        base, ext = os.path.splitext(filename) if fmt != "npy" else (filename, "")
+
+        # 在界面线程中取数据快照，导出期间采集继续进行
+        jobs = []
+        if depth:
+            grid = self.depth_data.copy()
+            jobs.append((filename, grid_batches(grid, self.engine.grid.cell_size), grid_rows(grid)))
+        if track and self.track_x:
+            engine = self.engine
+            track_data = [np.array(values, dtype=float) for values in
+                          (engine.track_x, engine.track_y, engine.track_t, engine.track_lat, engine.track_lon)]
+            jobs.append((f"{base}_track{ext}", track_batches(*track_data), len(track_data[0])))
+        stats_snapshot = {key: value if isinstance(value, (str, int)) else float(value)
+                          for key, value in self.stats.items()}
+        total = sum(rows for _, _, rows in jobs)
+
+        def run(progress, cancelled):
+            done = 0
+            written = []
+            for path, batches, rows in jobs:
+                result = stream_export(batches, path, fmt, total=rows, cancelled=cancelled,
+                                       progress=lambda count, _: progress(done + count, total))
+                if result["cancelled"]:
+                    return None
+                done += result["rows"]
+                written.append(path)
+            if stats:
+                path = f"{base}_stats.json"
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(stats_snapshot, f, ensure_ascii=False, indent=2)
+                written.append(path)
+            return written
+
+        dialog = QProgressDialog("正在导出测量结果...", "取消", 0, 100, self)
+        dialog.setWindowTitle("导出测量结果")
+        dialog.setMinimumDuration(500)
+        task = BackgroundTask(run, self)
+        task.progressed.connect(lambda done, count: dialog.setValue(int(done * 100 / count) if count else 0))
+        dialog.canceled.connect(task.cancel)
+
+        def finished(written):
+            dialog.reset()
+            if written is None:
+                self.add_log("导出已取消，未完成的文件已删除", "警告")
+                self.statusBar.showMessage("导出已取消")
+                return
+            self.add_log(f"测量结果已导出: {', '.join(written)}（{total} 行）", "成功")
+            self.statusBar.showMessage(f"导出完成: {filename}")
+            QMessageBox.information(self, "导出成功", "结果已成功导出至：\n" + "\n".join(written))
+
+        def failed(message):
+            dialog.reset()
+            self.add_log(f"导出结果失败: {message}", "错误")
+            QMessageBox.critical(self, "导出失败", f"无法导出结果: {message}")
+
+        task.succeeded.connect(finished)
+        task.failed.connect(failed)
+        self.export_task = task
+        QApplication.instance().aboutToQuit.connect(task.stop)
+        task.start()
+
+    def start_report_export(self, filename):
+        """在工作进程中生成 PDF/HTML 报告（水深图、坡度图、直方图与统计摘要），显示进度并可取消"""
+        # 在界面线程中取数据快照，生成报告期间采集继续进行
+        data = report_data(self.depth_data, self.engine.grid.cell_size, self.track_x, self.track_y,
+                           area=self.engine.stats.swath_area, device_status=self.device_status,
+                           log=[f"{record.time_text} - {record.message}" for record in self.log_model.log])
+
+        dialog = QProgressDialog("正在生成报告...", "取消", 0, 0, self)
+        dialog.setWindowTitle("导出报告")
+        dialog.setMinimumDuration(500)
+        task = BackgroundTask(lambda progress, cancelled: start_report(filename, data, cancelled=cancelled), self)
+        dialog.canceled.connect(task.cancel)
+
+        def finished(path):
+            dialog.reset()
+            if path is None:
+                self.add_log("报告生成已取消", "警告")
+                self.statusBar.showMessage("报告生成已取消")
+                return
+            self.add_log(f"测量报告已导出: {path}", "成功")
+            self.statusBar.showMessage(f"导出完成: {path}")
+            QMessageBox.information(self, "导出成功", f"报告已成功导出至：\n{path}")
+
+        def failed(message):
+            dialog.reset()
+            self.add_log(f"导出报告失败: {message}", "错误")
+            QMessageBox.critical(self, "导出失败", f"无法生成报告: {message}")
+
+        task.succeeded.connect(finished)
+        task.failed.connect(failed)
+        self.report_task = task
+        QApplication.instance().aboutToQuit.connect(task.stop)
+        task.start()
+
+
+def report_startup():
+    """首帧显示后打印启动耗时报告"""
+    PROFILER.mark("首帧显示")
+    print("启动耗时分析:")
+    print(PROFILER.report())
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # --seed N / --scenario 场景.json 复现指定的模拟数据
+    scenario, argv = Scenario.from_argv(sys.argv, model="trench")
+    app = QApplication(argv)
+    PROFILER.mark("创建 QApplication")
 
     # 设置应用程序图标和主题（如果有图标文件）
     # app.setWindowIcon(QIcon('icon.png'))
 
     # 创建并显示主窗口
-    window = MultibeamSonarSystem()
+    window = MultibeamSonarSystem(scenario)
     window.show()
+    PROFILER.mark("显示主窗口")
+
+    if PROFILER.enabled:
+        QTimer.singleShot(0, report_startup)
 
     # 如果提供了命令行参数，尝试加载指定文件
-    if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
-        window.load_specific_file(sys.argv[1])
+    args = [arg for arg in argv[1:] if arg != "--profile-startup"]
+    if args and os.path.exists(args[0]):
+        window.load_specific_file(args[0])
 
     sys.exit(app.exec_())
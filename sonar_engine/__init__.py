@@ -0,0 +1,12 @@
+"""多波束测深数据处理引擎
+
+不依赖Qt的处理核心：接收(ingest) → 清洗(clean) → 网格化(grid) → 统计(stats) → 导出(export)。
+图形界面通过 SonarEngine.subscribe 订阅处理结果，服务器、批处理与基准测试可直接无界面运行。
+"""
+
+from .engine import SonarEngine
+from .gridding import DepthGrid
+from .simulator import PingSimulator
+from .stats import SurveyStats
+
+__all__ = ["SonarEngine", "DepthGrid", "PingSimulator", "SurveyStats"]
@@ -0,0 +1,131 @@
+"""水深网格分析
+
+坡度、水深分布、海底特征与数据质量等分析算法，输入输出均为 NumPy 数组和数值字典，
+由界面负责绘图和格式化。
+"""
+
+import numpy as np
+
+
+def fill_nan(values, default=20.0):
+    """用相邻有效值线性插值填充NaN，返回 (填充后的副本, NaN掩码)"""
+    filled = np.array(values, dtype=float)
+    mask = np.isnan(filled)
+    if np.all(mask):
+        filled[:] = default
+    elif np.any(mask):
+        filled[mask] = np.interp(np.flatnonzero(mask), np.flatnonzero(~mask), filled[~mask])
+    return filled, mask
+
+
+def slope(values, cell_size=1.0, degrees=False):
+    """计算海底坡度，未探测区域保持NaN
+
+    degrees=False 时返回坡度比 (m/m)，否则返回角度。
+    """
+    grad_y, grad_x = np.gradient(values, cell_size)
+    result = np.sqrt(grad_x ** 2 + grad_y ** 2)
+    if degrees:
+        result = np.degrees(np.arctan(result))
+    result[np.isnan(values)] = np.nan
+    return result
+
+
+def summarize(values):
+    """有效值的平均值、最大值、最小值、标准差"""
+    valid = values[~np.isnan(values)]
+    if len(valid) == 0:
+        return {"mean": np.nan, "max": np.nan, "min": np.nan, "std": np.nan, "count": 0}
+    return {
+        "mean": float(np.mean(valid)),
+        "max": float(np.max(valid)),
+        "min": float(np.min(valid)),
+        "std": float(np.std(valid)),
+        "count": int(len(valid)),
+    }
+
+
+def depth_histogram(values, bins=30):
+    """水深分布直方图，返回 (频次, 分箱边界, 统计字典)"""
+    valid = values[~np.isnan(values)]
+    counts, edges = np.histogram(valid, bins=bins)
+    stats = summarize(values)
+    stats["median"] = float(np.median(valid)) if len(valid) else np.nan
+    return counts, edges, stats
+
+
+def feature_map(values, cell_size=1.0):
+    """使用拉普拉斯算子检测海底特征，返回 (特征强度, 统计字典)
+
+    特征强度为按网格尺寸 cell_size(m) 换算的曲率 (1/m)。
+    """
+    from scipy import ndimage
+
+    filled, mask = fill_nan(values)
+    features = ndimage.laplace(filled) / (cell_size * cell_size)
+    features[mask] = np.nan
+
+    strength = np.abs(features)
+    feature_threshold = np.nanstd(features) * 2
+    strong = (strength > feature_threshold) & ~mask
+    valid_count = np.count_nonzero(~mask)
+    feature_count = int(np.count_nonzero(strong))
+
+    return features, {
+        "count": feature_count,
+        "density": feature_count / valid_count if valid_count else 0.0,
+        "mean_strength": float(np.nanmean(strength)) if valid_count else np.nan,
+        "max_strength": float(np.nanmax(strength)) if valid_count else np.nan,
+    }
+
+
+def local_std(values, size=3):
+    """局部标准差（滑动窗口方差，向量化实现）"""
+    from scipy import ndimage
+
+    mean = ndimage.uniform_filter(values, size=size)
+    mean_sq = ndimage.uniform_filter(values * values, size=size)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def quality_map(values, size=3):
+    """通过局部标准差评估数据质量，返回 (质量图, 统计字典)"""
+    filled, mask = fill_nan(values)
+    quality = local_std(filled, size=size)
+    quality[mask] = np.nan
+
+    total_valid = np.count_nonzero(~mask)
+    if total_valid == 0:
+        return quality, {"high_ratio": 0.0, "low_ratio": 0.0, "mean_std": np.nan,
+                         "max_std": np.nan, "score": np.nan}
+
+    # 定义质量阈值
+    low_quality = quality > np.nanpercentile(quality, 90)
+    high_quality = quality < np.nanpercentile(quality, 10)
+    max_std = float(np.nanmax(quality))
+    mean_std = float(np.nanmean(quality))
+
+    return quality, {
+        "high_ratio": np.count_nonzero(high_quality & ~mask) / total_valid,
+        "low_ratio": np.count_nonzero(low_quality & ~mask) / total_valid,
+        "mean_std": mean_std,
+        "max_std": max_std,
+        "score": 100 - mean_std / max_std * 100 if max_std > 0 else 100.0,
+    }
+
+
+def depth_trend(history, window=10):
+    """深度趋势：移动平均与线性趋势
+
+    返回字典，包含 x、移动平均 (smooth_x, smooth_y) 和趋势系数 coeffs（不足两点时为None）。
+    """
+    y = np.asarray(history, dtype=float)
+    x = np.arange(len(y))
+    result = {"x": x, "y": y, "smooth_x": None, "smooth_y": None, "coeffs": None}
+
+    if len(y) >= window:
+        result["smooth_y"] = np.convolve(y, np.ones(window) / window, mode='valid')
+        result["smooth_x"] = x[window - 1:]
+    if len(y) >= 2:
+        result["coeffs"] = np.polyfit(x, y, 1)
+    return result
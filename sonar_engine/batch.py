@@ -0,0 +1,178 @@
+"""测量数据批处理命令行工具
+
+对一个目录下记录的全部测量数据（``*.csv`` 及同名 ``_depth.npy``，或 ``*.svy`` 容器）执行网格化、滤波、
+坡度与数据质量分析，按测量文件分配到进程池中并行处理，每个测量输出网格与JSON报告。坡度与特征按实际
+网格尺寸计算：XYZ测点取网格化的网格尺寸，记录的水深网格取容器中保存的网格尺寸，CSV记录的网格按
+``--grid-extent``（界面网格的边长）除以网格数得到。
+
+用法::
+
+    python -m sonar_engine.batch data/ -o results/ --filter 中值滤波 --workers 8
+
+指定 ``--mosaic`` 时，处理完成后把各测量（XYZ测点文件、记录的水深网格或 ``.svy`` 容器）依次合并到
+磁盘镶嵌图（见 mosaic 模块）。
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from . import analysis, filters
+from .catalog import SURVEY_PATTERNS
+from .gridding import grid_soundings
+from .mosaic import MosaicStore
+from .survey_io import DEFAULT_GRID_EXTENT, grid_geometry, load_survey
+
+
+def find_surveys(directory, pattern=SURVEY_PATTERNS):
+    """查找目录下的测量文件（按文件名排序），pattern 为匹配模式或模式序列"""
+    patterns = (pattern,) if isinstance(pattern, str) else pattern
+    return sorted({path for p in patterns for path in glob.glob(os.path.join(directory, p))})
+
+
+def _track_summary(survey):
+    track_x = survey['track_x']
+    track_y = survey['track_y']
+    summary = {"points": int(len(track_x)), "distance": 0.0, "time_span": None}
+    if len(track_x) >= 2:
+        summary["distance"] = float(np.sum(np.hypot(np.diff(track_x), np.diff(track_y))))
+    if survey['timestamp'] is not None and len(survey['timestamp']) > 0:
+        summary["time_span"] = [float(np.nanmin(survey['timestamp'])), float(np.nanmax(survey['timestamp']))]
+    return summary
+
+
+def process_survey(path, output_dir, filter_name="中值滤波", strength=5, cell_size=None, grid_size=100,
+                   grid_extent=DEFAULT_GRID_EXTENT):
+    """处理单个测量文件，返回结果摘要字典（在工作进程中运行）
+
+    grid_extent 为没有记录网格尺寸的水深网格（CSV 与 _depth.npy）的边长(m)。
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    started = time.perf_counter()
+    try:
+        survey = load_survey(path)
+
+        # 网格化：XYZ测点文件重新网格化，否则使用记录的水深网格
+        if survey['depth'] is not None:
+            grid, bounds, grid_cell = grid_soundings(survey['track_x'], survey['track_y'], survey['depth'],
+                                                     cell_size=cell_size, size=grid_size)
+        elif survey['depth_data'] is not None:
+            grid = np.asarray(survey['depth_data'], dtype=float)
+            bounds = None
+            _, grid_cell = grid_geometry(survey, grid_extent)
+        else:
+            raise ValueError("没有可处理的水深数据（缺少depth列或_depth.npy文件）")
+
+        # 滤波
+        filtered = filters.apply_filter(grid, filter_name, strength)
+
+        # 坡度与数据质量分析
+        slope = analysis.slope(filtered, cell_size=grid_cell, degrees=True)
+        quality, quality_stats = analysis.quality_map(filtered)
+        _, feature_stats = analysis.feature_map(filtered, cell_size=grid_cell)
+        counts, edges, depth_stats = analysis.depth_histogram(filtered)
+
+        survey_dir = os.path.join(output_dir, name)
+        os.makedirs(survey_dir, exist_ok=True)
+        np.save(os.path.join(survey_dir, "grid.npy"), filtered)
+        np.save(os.path.join(survey_dir, "slope.npy"), slope)
+        np.save(os.path.join(survey_dir, "quality.npy"), quality)
+
+        report = {
+            "survey": name,
+            "source": os.path.abspath(path),
+            "status": "ok",
+            "filter": {"name": filter_name, "strength": strength},
+            "grid_shape": list(filtered.shape),
+            "cell_size": float(grid_cell),
+            "bounds": bounds,
+            "track": _track_summary(survey),
+            "depth": depth_stats,
+            "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+            "slope_deg": analysis.summarize(slope),
+            "quality": quality_stats,
+            "features": feature_stats,
+            "elapsed": time.perf_counter() - started,
+        }
+        with open(os.path.join(survey_dir, "report.json"), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    except Exception as e:
+        return {"survey": name, "source": os.path.abspath(path), "status": "error", "error": str(e),
+                "elapsed": time.perf_counter() - started}
+
+
+def run_batch(paths, output_dir, workers=None, progress=None, **options):
+    """用进程池并行处理多个测量文件，每个工作进程处理一个测量，返回结果列表"""
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(process_survey, path, output_dir, **options): path for path in paths}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress is not None:
+                progress(len(results), len(paths), result)
+    results.sort(key=lambda r: r["survey"])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多波束测量数据批处理")
+    parser.add_argument("directory", help="测量数据目录（包含 *.csv 与 *_depth.npy，或 *.svy）")
+    parser.add_argument("-o", "--output", default="batch_output", help="输出目录")
+    parser.add_argument("--pattern", action="append", help="测量文件匹配模式（可重复，缺省 *.csv 与 *.svy）")
+    parser.add_argument("--filter", default="中值滤波", choices=sorted(filters.FILTERS), help="滤波类型")
+    parser.add_argument("--strength", type=int, default=5, help="滤波强度 (1-10)")
+    parser.add_argument("--cell-size", type=float, default=None, help="XYZ测点网格化的网格尺寸(m)")
+    parser.add_argument("--grid-size", type=int, default=100, help="未指定网格尺寸时的长边网格数")
+    parser.add_argument("--grid-extent", type=float, default=DEFAULT_GRID_EXTENT,
+                        help="CSV记录的水深网格的边长(m)，用于计算网格尺寸（.svy 容器记录了网格尺寸）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="工作进程数（默认CPU核数）")
+    parser.add_argument("--mosaic", default=None, help="把各测量合并到该镶嵌图目录（不存在时新建）")
+    parser.add_argument("--mosaic-cell-size", type=float, default=1.0, help="新建镶嵌图的网格尺寸(m)")
+    args = parser.parse_args(argv)
+
+    paths = find_surveys(args.directory, args.pattern or SURVEY_PATTERNS)
+    if not paths:
+        print(f"目录中没有测量文件: {args.directory}", file=sys.stderr)
+        return 1
+
+    def progress(done, total, result):
+        state = "完成" if result["status"] == "ok" else f"失败: {result['error']}"
+        print(f"[{done}/{total}] {result['survey']} {state} ({result['elapsed']:.2f}s)")
+
+    started = time.perf_counter()
+    results = run_batch(paths, args.output, workers=args.workers, progress=progress,
+                        filter_name=args.filter, strength=args.strength,
+                        cell_size=args.cell_size, grid_size=args.grid_size, grid_extent=args.grid_extent)
+    elapsed = time.perf_counter() - started
+
+    if args.mosaic:
+        # 镶嵌图只能由一个进程写入，在主进程中按文件顺序合并
+        with MosaicStore(args.mosaic, cell_size=args.mosaic_cell_size) as store:
+            for result in results:
+                if result["status"] != "ok":
+                    continue
+                result["mosaic_soundings"] = store.merge_survey(result["source"], grid_extent=args.grid_extent)
+        print(f"已合并到镶嵌图 {args.mosaic}，共 {len(store)} 个瓦片")
+
+    failed = [r for r in results if r["status"] != "ok"]
+    summary = {"directory": os.path.abspath(args.directory), "surveys": len(results),
+               "failed": len(failed), "elapsed": elapsed, "results": results}
+    with open(os.path.join(args.output, "campaign_summary.json"), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"共处理 {len(results)} 个测量，失败 {len(failed)} 个，用时 {elapsed:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""测量数据目录索引
+
+在数据目录中用 SQLite 数据库（``catalog.sqlite``）记录每个测量文件的摘要：点数、时间范围、
+航迹外包框、水深范围与坐标系。保存测量时直接登记，刷新历史列表时只比较文件的修改时间和大小，
+新增或被外部修改的文件才重新读取，因此有上千个测量文件时列表也能立即显示。
+
+用法::
+
+    python -m sonar_engine.catalog data/
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+CATALOG_NAME = "catalog.sqlite"
+# 登记的测量文件：航迹CSV与压缩容器
+SURVEY_PATTERNS = ("*.csv", "*.svy")
+
+COLUMNS = ("path", "name", "mtime", "size", "points", "time_start", "time_end",
+           "xmin", "ymin", "xmax", "ymax", "depth_min", "depth_max", "depth_mean", "crs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS surveys (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    time_start REAL,
+    time_end REAL,
+    xmin REAL,
+    ymin REAL,
+    xmax REAL,
+    ymax REAL,
+    depth_min REAL,
+    depth_max REAL,
+    depth_mean REAL,
+    crs TEXT
+)
+"""
+
+
+def _finite_range(values):
+    """有效值的 (最小值, 最大值)，没有有效值时为 (None, None)"""
+    if values is None:
+        return None, None
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None, None
+    return float(values.min()), float(values.max())
+
+
+def summarize_survey(track_x, track_y, timestamps=None, depth=None, crs=None):
+    """测量摘要字典：点数、时间范围、外包框、水深范围（depth 为网格或测点水深）"""
+    xmin, xmax = _finite_range(track_x)
+    ymin, ymax = _finite_range(track_y)
+    time_start, time_end = _finite_range(timestamps)
+    depth_min, depth_max = _finite_range(depth)
+    depth_mean = None
+    if depth_min is not None:
+        depth_mean = float(np.nanmean(np.asarray(depth, dtype=float)))
+    return {
+        "points": int(min(len(track_x), len(track_y))),
+        "time_start": time_start, "time_end": time_end,
+        "xmin": xmin, "ymin": ymin, "xmax": xmax, "ymax": ymax,
+        "depth_min": depth_min, "depth_max": depth_max, "depth_mean": depth_mean,
+        "crs": crs.to_string() if crs is not None else None,
+    }
+
+
+def summarize_file(path):
+    """读取测量文件（航迹CSV及水深网格）计算摘要，压缩容器直接使用其中保存的摘要"""
+    from .container import Container
+    from .survey_io import is_container, load_survey
+
+    if is_container(path):
+        summary = Container(path).attrs.get("summary")
+        if summary is not None:
+            return summary
+
+    survey = load_survey(path)
+    depth = survey['depth'] if survey['depth'] is not None else survey['depth_data']
+    return summarize_survey(survey['track_x'], survey['track_y'], survey['timestamp'], depth, survey['crs'])
+
+
+class SurveyCatalog:
+    """数据目录中测量文件的 SQLite 索引
+
+    path 为数据库文件，缺省为 directory 下的 ``catalog.sqlite``。
+    """
+
+    def __init__(self, directory, path=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = path or os.path.join(directory, CATALOG_NAME)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(_SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM surveys").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    def contains(self, path):
+        """文件是否位于本目录（只有目录中的文件才登记）"""
+        return os.path.dirname(self._key(path)) == os.path.abspath(self.directory)
+
+    def record(self, path, summary, commit=True):
+        """登记（或更新）一个刚写入的测量文件，summary 为 summarize_survey 的结果"""
+        stat = os.stat(path)
+        row = dict(summary, path=self._key(path), name=os.path.basename(path), mtime=stat.st_mtime,
+                   size=stat.st_size)
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO surveys ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [row[column] for column in COLUMNS])
+        if commit:
+            self.connection.commit()
+        return row
+
+    def record_survey(self, path, track_x, track_y, timestamps=None, depth=None, crs=None):
+        """按内存中的测量数据登记刚保存的文件，无需重新读取"""
+        return self.record(path, summarize_survey(track_x, track_y, timestamps, depth, crs))
+
+    def record_file(self, path, commit=True):
+        """读取测量文件计算摘要并登记"""
+        return self.record(path, summarize_file(path), commit)
+
+    def remove(self, path):
+        self.connection.execute("DELETE FROM surveys WHERE path = ?", (self._key(path),))
+        self.connection.commit()
+
+    def scan(self, pattern=SURVEY_PATTERNS, errors=None):
+        """与数据目录同步：登记新增或被修改的文件，删除已不存在的记录，返回重新读取的文件数
+
+        pattern 为匹配模式或模式序列。只比较修改时间与文件大小；无法读取的文件跳过，
+        errors 为列表时追加 (路径, 错误信息)。
+        """
+        known = {row["path"]: (row["mtime"], row["size"])
+                 for row in self.connection.execute("SELECT path, mtime, size FROM surveys")}
+        present = set()
+        updated = 0
+        patterns = (pattern,) if isinstance(pattern, str) else pattern
+        paths = sorted({path for p in patterns for path in glob.glob(os.path.join(self.directory, p))})
+        for path in paths:
+            key = self._key(path)
+            present.add(key)
+            stat = os.stat(path)
+            if known.get(key) == (stat.st_mtime, stat.st_size):
+                continue
+            try:
+                self.record_file(path, commit=False)
+                updated += 1
+            except Exception as e:
+                if errors is not None:
+                    errors.append((path, str(e)))
+
+        stale = [(key,) for key in known if key not in present]
+        self.connection.executemany("DELETE FROM surveys WHERE path = ?", stale)
+        self.connection.commit()
+        return updated
+
+    def entries(self, order="mtime DESC"):
+        """全部测量摘要（字典列表），缺省按修改时间从新到旧"""
+        if order.split()[0] not in COLUMNS:
+            raise ValueError(f"未知的排序字段: {order}")
+        return [dict(row) for row in self.connection.execute(f"SELECT * FROM surveys ORDER BY {order}")]
+
+    def query(self, bounds=None, time_range=None):
+        """按外包框 (xmin, ymin, xmax, ymax) 相交和/或时间范围 (起, 止) 重叠查询测量摘要"""
+        clauses, params = [], []
+        if bounds is not None:
+            clauses.append("xmax >= ? AND xmin <= ? AND ymax >= ? AND ymin <= ?")
+            params += [bounds[0], bounds[2], bounds[1], bounds[3]]
+        if time_range is not None:
+            clauses.append("time_end >= ? AND time_start <= ?")
+            params += [time_range[0], time_range[1]]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [dict(row) for row in self.connection.execute(f"SELECT * FROM surveys{where} ORDER BY mtime DESC",
+                                                             params)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量数据目录索引")
+    parser.add_argument("directory", help="测量数据目录")
+    parser.add_argument("--pattern", action="append", help="测量文件匹配模式（可重复，缺省 *.csv 与 *.svy）")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    errors = []
+    with SurveyCatalog(args.directory) as catalog:
+        updated = catalog.scan(args.pattern or SURVEY_PATTERNS, errors=errors)
+        entries = catalog.entries()
+    for path, error in errors:
+        print(f"{path} 读取失败: {error}", file=sys.stderr)
+
+    for entry in entries:
+        depth = "N/A" if entry["depth_min"] is None else f"{entry['depth_min']:.2f}~{entry['depth_max']:.2f} m"
+        recorded = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["mtime"]))
+        print(f"{entry['name']:<32} {recorded}  {entry['points']:>8} 点  水深 {depth}")
+    print(f"共 {len(entries)} 个测量，重新索引 {updated} 个 ({time.perf_counter() - started:.2f}s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+"""压缩测量数据容器（.svy）
+
+把一次测量的全部数据（航迹、数据包、水深网格、声速剖面、元数据）保存在一个自描述的二进制文件中，
+取代 ``name.csv`` + ``name_depth.npy`` + ``name_crs.txt`` 的文件组合，读写都不需要 pickle。
+
+文件结构::
+
+    b"SNRSURV1"                       文件头
+    数据块 ...                         各数据集按块压缩后依次追加
+    索引 (JSON, UTF-8)                 数据集的类型、形状、分块位置与每块的最小/最大值，以及元数据
+    索引偏移 (uint64) + b"SNRINDEX"    文件尾
+
+数据集名按 "组/列" 组织（例如 ``track/x``、``grid/depth``）。每个数据块先做字节重排（同一数值的
+各字节放在一起，浮点数据压缩率显著提高），再逐个字节平面压缩（接近随机的平面原样保存）；压缩算法
+缺省为 zstd（安装了 zstandard 时），否则为 zlib 1 级。一维数据集记录每块的最小/最大值，按时间读取
+航迹时只解压时间范围重叠的块；二维网格按瓦片分块，按区域读取时只解压相交的瓦片。
+"""
+
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+CONTAINER_EXT = ".svy"
+MAGIC = b"SNRSURV1"
+FOOTER = b"SNRINDEX"
+VERSION = 1
+
+CHUNK_ELEMENTS = 65536  # 一维/行分块数据集每块的元素数
+GRID_CHUNK = 256        # 二维网格的瓦片边长
+PROBE = 4096            # 字节平面压缩试探长度
+RAW_RATIO = 0.9         # 试探压缩率高于此值的字节平面不压缩
+
+
+# ---------------------------------------------------------------- 压缩算法
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def default_codec():
+    """可用的最快压缩算法：zstd（需要 zstandard）或 zlib"""
+    return "zstd" if _zstd() is not None else "zlib"
+
+
+def _compress(data, codec, level):
+    if codec == "zlib":
+        return zlib.compress(data, 1 if level is None else level)
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise ImportError("zstd 压缩需要安装 zstandard：pip install zstandard")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    if codec == "none":
+        return bytes(data)
+    raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def _decompress(data, codec):
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise ImportError("读取 zstd 压缩的数据需要安装 zstandard：pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "none":
+        return data
+    raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def _planes(array):
+    """按字节重排：(n, itemsize) 转置为 itemsize 个字节平面"""
+    flat = np.ascontiguousarray(array).reshape(-1)
+    return flat.view(np.uint8).reshape(-1, flat.dtype.itemsize).T
+
+
+def _encode(array, codec, level):
+    """数据块编码为 (字节串, 各字节平面的压缩长度)
+
+    每个字节平面单独压缩；浮点尾数低位等接近随机的平面先压缩开头 PROBE 字节试探，
+    压缩率不足 RAW_RATIO 时原样保存（长度记为负数），避免在不可压缩的数据上浪费时间。
+    """
+    parts, sizes = [], []
+    for plane in _planes(array):
+        data = plane.tobytes()
+        if codec != "none" and len(data) > PROBE and \
+                len(_compress(data[:PROBE], codec, level)) > PROBE * RAW_RATIO:
+            parts.append(data)
+            sizes.append(-len(data))
+            continue
+        data = _compress(data, codec, level)
+        parts.append(data)
+        sizes.append(len(data))
+    return b"".join(parts), sizes
+
+
+def _decode(data, planes, codec, dtype, shape):
+    raw = np.empty((dtype.itemsize, int(np.prod(shape))), dtype=np.uint8)
+    offset = 0
+    for i, size in enumerate(planes):
+        chunk = data[offset:offset + abs(size)]
+        offset += abs(size)
+        raw[i] = np.frombuffer(chunk if size < 0 else _decompress(chunk, codec), dtype=np.uint8)
+    return np.ascontiguousarray(raw.T).view(dtype).reshape(shape)
+
+
+def _default_chunks(shape):
+    if len(shape) == 0:
+        return ()
+    row = int(np.prod(shape[1:])) if len(shape) > 1 else 1
+    return (max(1, CHUNK_ELEMENTS // max(row, 1)),) + tuple(shape[1:])
+
+
+def _jsonable(value):
+    """元数据中的 numpy 标量/数组转换为 JSON 类型"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+# ---------------------------------------------------------------- 写入
+class ContainerWriter:
+    """逐个数据集写入容器，也可以分批追加（例如实时记录数据包）
+
+    attrs 为整个容器的元数据字典，close() 时与索引一起写入。
+    """
+
+    def __init__(self, filename, codec=None, level=None):
+        self.filename = filename
+        self.codec = codec or default_codec()
+        self.level = level
+        self.attrs = {}
+        self.datasets = {}
+        self._pending = {}
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(filename, 'wb')
+        self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self.filename)
+
+    def _write_chunk(self, info, block, start):
+        data, planes = _encode(block, self.codec, self.level)
+        entry = {"offset": self._file.tell(), "size": len(data), "planes": planes, "start": list(start),
+                 "shape": list(block.shape)}
+        if block.ndim == 1 and block.dtype.kind in "iuf" and len(block):
+            finite = block[np.isfinite(block)] if block.dtype.kind == "f" else block
+            if len(finite):
+                entry["min"] = finite.min().item()
+                entry["max"] = finite.max().item()
+        self._file.write(data)
+        info["chunks"].append(entry)
+
+    def _new_dataset(self, name, array, chunks, attrs):
+        if name in self.datasets:
+            raise ValueError(f"数据集已存在: {name}")
+        info = {"dtype": np.lib.format.dtype_to_descr(array.dtype), "shape": list(array.shape),
+                "chunks": [], "chunk_shape": list(chunks), "attrs": _jsonable(attrs or {})}
+        self.datasets[name] = info
+        return info
+
+    def write(self, name, array, chunks=None, attrs=None):
+        """写入整个数组，chunks 为分块形状（缺省按行分块，每块约 65536 个元素）"""
+        array = np.asarray(array)
+        if array.dtype == object:
+            raise TypeError(f"数据集 {name} 不能是 object 类型")
+        if array.ndim == 0:
+            array = array.reshape(1)
+        chunks = tuple(chunks) if chunks is not None else _default_chunks(array.shape)
+        info = self._new_dataset(name, array, chunks, attrs)
+        starts = np.stack(np.meshgrid(*[np.arange(0, max(n, 1), c) for n, c in zip(array.shape, chunks)],
+                                      indexing='ij'), -1).reshape(-1, array.ndim)
+        for start in starts:
+            index = tuple(slice(s, s + c) for s, c in zip(start, chunks))
+            block = array[index]
+            if block.size or not array.size:
+                self._write_chunk(info, block, start.tolist())
+        return info
+
+    def append(self, name, array, attrs=None):
+        """沿第0维追加数据（数据集不存在时创建），满一块即压缩写出"""
+        array = np.asarray(array)
+        if array.ndim == 0:
+            array = array.reshape(1)
+        if name not in self.datasets:
+            info = self._new_dataset(name, array, _default_chunks(array.shape), attrs)
+            info["shape"][0] = 0
+            self._pending[name] = []
+        info = self.datasets[name]
+        pending = self._pending[name]
+        pending.append(array.astype(np.dtype(info["dtype"]), copy=False))
+        buffered = sum(len(a) for a in pending)
+        rows = info["chunk_shape"][0]
+        if buffered >= rows:
+            data = np.concatenate(pending)
+            full = len(data) // rows * rows
+            for start in range(0, full, rows):
+                self._write_chunk(info, data[start:start + rows], [info["shape"][0]] + [0] * (data.ndim - 1))
+                info["shape"][0] += rows
+            self._pending[name] = [data[full:]] if full < len(data) else []
+
+    def close(self):
+        for name, pending in self._pending.items():
+            if pending:
+                info = self.datasets[name]
+                data = np.concatenate(pending)
+                self._write_chunk(info, data, [info["shape"][0]] + [0] * (data.ndim - 1))
+                info["shape"][0] += len(data)
+        self._pending = {}
+
+        index_offset = self._file.tell()
+        index = {"version": VERSION, "codec": self.codec, "attrs": _jsonable(self.attrs),
+                 "datasets": self.datasets}
+        self._file.write(json.dumps(index, ensure_ascii=False).encode('utf-8'))
+        self._file.write(struct.pack("<Q", index_offset) + FOOTER)
+        self._file.close()
+
+
+# ---------------------------------------------------------------- 读取
+class Container:
+    """容器读取：只读取索引，数据集按需解压（支持按行、窗口、时间和区域部分读取）"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是测量数据容器文件: {filename}")
+            f.seek(-16, os.SEEK_END)
+            end = f.tell()
+            index_offset, footer = struct.unpack("<Q8s", f.read(16))
+            if footer != FOOTER:
+                raise ValueError(f"容器文件不完整（缺少索引）: {filename}")
+            f.seek(index_offset)
+            index = json.loads(f.read(end - index_offset).decode('utf-8'))
+        self.codec = index["codec"]
+        self.attrs = index["attrs"]
+        self.datasets = index["datasets"]
+
+    def __contains__(self, name):
+        return name in self.datasets
+
+    def names(self, group=None):
+        """数据集名列表，指定 group 时只返回该组中的列名"""
+        if group is None:
+            return list(self.datasets)
+        prefix = group + "/"
+        return [name[len(prefix):] for name in self.datasets if name.startswith(prefix)]
+
+    def shape(self, name):
+        return tuple(self.datasets[name]["shape"])
+
+    def dataset_attrs(self, name):
+        return self.datasets[name]["attrs"]
+
+    def read(self, name, index=None):
+        """读取数据集，index 为各维的 slice（步长为1），只解压与之相交的块"""
+        info = self.datasets[name]
+        dtype = np.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        if index is None:
+            index = ()
+        if not isinstance(index, tuple):
+            index = (index,)
+        index = index + (slice(None),) * (len(shape) - len(index))
+        bounds = [s.indices(n)[:2] for s, n in zip(index, shape)]
+        out_shape = tuple(max(0, stop - start) for start, stop in bounds)
+        result = np.empty(out_shape, dtype=dtype)
+        if result.size == 0:
+            return result
+
+        with open(self.filename, 'rb') as f:
+            for chunk in info["chunks"]:
+                start, size = chunk["start"], chunk["shape"]
+                overlap = [(max(lo, s), min(hi, s + n)) for (lo, hi), s, n in zip(bounds, start, size)]
+                if any(lo >= hi for lo, hi in overlap):
+                    continue
+                f.seek(chunk["offset"])
+                block = _decode(f.read(chunk["size"]), chunk["planes"], self.codec, dtype, tuple(size))
+                source = tuple(slice(lo - s, hi - s) for (lo, hi), s in zip(overlap, start))
+                target = tuple(slice(lo - b[0], hi - b[0]) for (lo, hi), b in zip(overlap, bounds))
+                result[target] = block[source]
+        return result
+
+    def read_group(self, group, rows=None):
+        """读取一组列，返回 {列名: 数组}，rows 为行范围 slice"""
+        return {column: self.read(f"{group}/{column}", rows) for column in self.names(group)}
+
+    def select_time(self, group, start, stop, time_column="timestamp"):
+        """读取组中时间列在 [start, stop] 内的行，只解压时间范围重叠的块"""
+        chunks = self.datasets[f"{group}/{time_column}"]["chunks"]
+        ranges = [(c["start"][0], c["start"][0] + c["shape"][0]) for c in chunks
+                  if "min" in c and c["max"] >= start and c["min"] <= stop]
+        # 相邻的块合并为连续的行范围
+        merged = []
+        for lo, hi in ranges:
+            if merged and merged[-1][1] == lo:
+                merged[-1] = (merged[-1][0], hi)
+            else:
+                merged.append((lo, hi))
+        columns = self.names(group)
+        parts = {column: [self.read(f"{group}/{column}", slice(lo, hi)) for lo, hi in merged] for column in columns}
+        result = {}
+        for column in columns:
+            dtype = np.dtype(self.datasets[f"{group}/{column}"]["dtype"])
+            result[column] = (np.concatenate(parts[column]) if merged
+                              else np.empty((0,) + self.shape(f"{group}/{column}")[1:], dtype=dtype))
+        times = result[time_column]
+        keep = (times >= start) & (times <= stop)
+        return {column: values[keep] for column, values in result.items()}
+
+    def read_area(self, name, xmin, ymin, xmax, ymax):
+        """按平面范围读取网格数据集（属性中含 origin 与 cell_size），返回 (网格, 实际范围)"""
+        attrs = self.dataset_attrs(name)
+        cell = attrs["cell_size"]
+        x0, y0 = attrs.get("origin", (0.0, 0.0))
+        rows, cols = self.shape(name)
+        col0 = int(np.clip(np.floor((xmin - x0) / cell), 0, cols))
+        col1 = int(np.clip(np.floor((xmax - x0) / cell) + 1, 0, cols))
+        row0 = int(np.clip(np.floor((ymin - y0) / cell), 0, rows))
+        row1 = int(np.clip(np.floor((ymax - y0) / cell) + 1, 0, rows))
+        values = self.read(name, (slice(row0, row1), slice(col0, col1)))
+        return values, (x0 + col0 * cell, y0 + row0 * cell, x0 + col1 * cell, y0 + row1 * cell)
+
+
+# ---------------------------------------------------------------- 测量数据
+def save_container(filename, track_x, track_y, depth_data, timestamps=None, gps_lat=None, gps_lon=None, crs=None,
+                   cell_size=1.0, svp=None, pings=None, metadata=None, codec=None):
+    """把一次测量保存为容器文件，返回文件名
+
+    pings 为 {列名: 数组} 字典（例如 timestamp、position_x、beam_data），逐数据包保存；
+    svp 为 {"深度": 数组, "声速": 数组}；metadata 为任意可 JSON 序列化的字典。
+    """
+    from .catalog import summarize_survey
+
+    count = min(len(track_x), len(track_y))
+    track = {"x": track_x, "y": track_y, "timestamp": timestamps, "gps_lat": gps_lat, "gps_lon": gps_lon}
+    with ContainerWriter(filename, codec=codec) as writer:
+        for column, values in track.items():
+            if values is not None:
+                writer.write(f"track/{column}", np.asarray(values, dtype=float)[:count])
+        if depth_data is not None:
+            writer.write("grid/depth", np.asarray(depth_data, dtype=float), chunks=(GRID_CHUNK, GRID_CHUNK),
+                         attrs={"cell_size": cell_size, "origin": [0.0, 0.0]})
+        if svp is not None:
+            writer.write("svp/depth", np.asarray(svp["深度"], dtype=float))
+            writer.write("svp/velocity", np.asarray(svp["声速"], dtype=float))
+        for column, values in (pings or {}).items():
+            writer.write(f"pings/{column}", np.asarray(values))
+        writer.attrs.update({
+            "crs": crs.to_string() if crs is not None else None,
+            "metadata": metadata or {},
+            # 目录索引直接读取摘要，不必解压数据
+            "summary": summarize_survey(np.asarray(track_x)[:count], np.asarray(track_y)[:count],
+                                        None if timestamps is None else np.asarray(timestamps, dtype=float)[:count],
+                                        depth_data, crs),
+        })
+    return filename
+
+
+def load_container(filename):
+    """读取容器文件，返回与 survey_io.load_survey 相同的测量字典"""
+    from . import crs as crs_module
+
+    container = Container(filename)
+
+    def column(name):
+        return container.read(name) if name in container else None
+
+    svp = None
+    if "svp/depth" in container:
+        svp = {"深度": container.read("svp/depth"), "声速": container.read("svp/velocity")}
+    crs = container.attrs.get("crs")
+    return {
+        'track_x': column("track/x"),
+        'track_y': column("track/y"),
+        'gps_lat': column("track/gps_lat"),
+        'gps_lon': column("track/gps_lon"),
+        'timestamp': column("track/timestamp"),
+        'depth': None,
+        'depth_data': column("grid/depth"),
+        'cell_size': container.dataset_attrs("grid/depth")["cell_size"] if "grid/depth" in container else None,
+        'grid_origin': (tuple(container.dataset_attrs("grid/depth").get("origin", (0.0, 0.0)))
+                        if "grid/depth" in container else None),
+        'crs': crs_module.from_string(crs) if crs else None,
+        'svp': svp,
+        'metadata': container.attrs.get("metadata", {}),
+    }
@@ -0,0 +1,393 @@
+"""测线覆盖与重叠率栅格计算
+
+对一组测线（规划测线或实际航迹），按实际水深面逐网格计算被多少条测线的扫测带覆盖，以及
+每条测线与其他测线的重叠率，结果为与水深网格同尺寸的栅格。
+
+判定条件：网格点到测线的水平距离 |n| 不超过 D·tan(开角/2)（D 为该网格点水深）时，
+该点落在测线的扫测带内，即该点相对换能器的入射角不超过开角一半。此条件对任意海底地形成立，
+不需要假设坡面。每条测线只在其外包框内的网格上按数组计算。
+
+实时测量中 CoverageMap 按数据包把实际波束落点之间扫过的区域累积到覆盖栅格，find_gaps 对
+测区内未覆盖的连通区域做标记，并为每个漏洞沿其主方向生成补测测线。
+"""
+
+import numpy as np
+
+from .gridding import beam_footprint, cell_index
+
+
+class CoverageGrid:
+    """覆盖计算结果
+
+    counts 为每个网格被扫测带覆盖的次数；overlap 为重叠率(%)：网格所在测线横断面上，
+    该测线扫测带中同时被其他测线覆盖的比例（多条测线取最大值，未覆盖处为NaN）。
+    """
+
+    def __init__(self, counts, overlap, valid):
+        self.counts = counts
+        self.overlap = overlap
+        self.valid = valid
+
+    @property
+    def coverage(self):
+        """有效水深网格中被覆盖的比例"""
+        total = np.count_nonzero(self.valid)
+        return np.count_nonzero((self.counts > 0) & self.valid) / total if total else 0.0
+
+    @property
+    def overlap_area(self):
+        """被覆盖网格中被两条及以上测线覆盖的比例"""
+        covered = np.count_nonzero((self.counts > 0) & self.valid)
+        return np.count_nonzero((self.counts > 1) & self.valid) / covered if covered else 0.0
+
+    @property
+    def gaps(self):
+        """有效水深但未被覆盖的网格掩码"""
+        return self.valid & (self.counts == 0)
+
+    def summary(self):
+        overlap = self.overlap[np.isfinite(self.overlap)]
+        return {
+            "coverage": self.coverage,
+            "overlap_area": self.overlap_area,
+            "gap_cells": int(np.count_nonzero(self.gaps)),
+            "max_passes": int(self.counts.max()) if self.counts.size else 0,
+            "overlap_mean": float(np.mean(overlap)) if len(overlap) else np.nan,
+            "overlap_max": float(np.max(overlap)) if len(overlap) else np.nan,
+        }
+
+
+def track_segments(track_x, track_y, min_length=0.0):
+    """将航迹折线拆分为线段 [(x0, y0, x1, y1)]，合并长度小于 min_length 的相邻点"""
+    x = np.asarray(track_x, dtype=float)
+    y = np.asarray(track_y, dtype=float)
+    if len(x) < 2:
+        return np.empty((0, 4))
+    keep = [0]
+    for i in range(1, len(x)):
+        if np.hypot(x[i] - x[keep[-1]], y[i] - y[keep[-1]]) >= min_length or i == len(x) - 1:
+            keep.append(i)
+    keep = np.array(keep)
+    return np.column_stack([x[keep[:-1]], y[keep[:-1]], x[keep[1:]], y[keep[1:]]])
+
+
+class _Rasterizer:
+    """在水深面网格上逐条测线计算扫测带覆盖的网格"""
+
+    def __init__(self, surface, opening_angle):
+        self.surface = surface
+        self.values = surface.values
+        self.valid = np.isfinite(self.values) & (self.values > 0)
+        # 每个网格点的最大可覆盖水平距离
+        self.reach = np.where(self.valid, self.values, 0.0) * np.tan(np.deg2rad(opening_angle) / 2)
+        self.max_reach = float(self.reach.max()) if self.reach.size else 0.0
+
+    def footprint(self, segment):
+        """返回 (行切片, 列切片, 覆盖掩码, 沿测线位置)，测线不经过网格时返回None"""
+        x0, y0, x1, y1 = segment
+        surface = self.surface
+        rows, cols = self.values.shape
+        cell = surface.cell_size
+        ox, oy = surface.origin
+
+        # 外包框（扩展最大覆盖距离）对应的网格范围
+        margin = self.max_reach
+        c0 = max(int(np.floor((min(x0, x1) - margin - ox) / cell)), 0)
+        c1 = min(int(np.ceil((max(x0, x1) + margin - ox) / cell)) + 1, cols)
+        r0 = max(int(np.floor((min(y0, y1) - margin - oy) / cell)), 0)
+        r1 = min(int(np.ceil((max(y0, y1) + margin - oy) / cell)) + 1, rows)
+        if c0 >= c1 or r0 >= r1:
+            return None
+
+        length = np.hypot(x1 - x0, y1 - y0)
+        if length > 0:
+            ux, uy = (x1 - x0) / length, (y1 - y0) / length
+        else:
+            ux, uy = 1.0, 0.0
+        px = ox + np.arange(c0, c1) * cell - x0
+        py = oy + np.arange(r0, r1) * cell - y0
+        t = py[:, None] * uy + px[None, :] * ux
+        n = py[:, None] * ux - px[None, :] * uy
+
+        # 线段端点处各延伸半个网格，使首尾相接的航迹线段之间不留缝
+        half = cell / 2
+        rows_slice, cols_slice = slice(r0, r1), slice(c0, c1)
+        mask = (t >= -half) & (t <= length + half) & (np.abs(n) <= self.reach[rows_slice, cols_slice])
+        return rows_slice, cols_slice, mask, t
+
+
+def rasterize_coverage(surface, segments, opening_angle=120.0, overlap=True):
+    """计算一组测线在水深面上的覆盖次数与重叠率，返回 CoverageGrid
+
+    segments 为 [(x0, y0, x1, y1)]，可取 LinePlan.segments 或 track_segments 的结果。
+    只需要覆盖次数时（例如优化中大量评估候选测线组）令 overlap=False，跳过重叠率计算。
+    """
+    raster = _Rasterizer(surface, opening_angle)
+    counts = np.zeros(surface.values.shape, dtype=np.int32)
+    footprints = []
+    for segment in np.asarray(segments, dtype=float).reshape(-1, 4):
+        if not np.all(np.isfinite(segment)):
+            continue
+        footprint = raster.footprint(segment)
+        if footprint is None:
+            continue
+        rows, cols, mask, t = footprint
+        counts[rows, cols] += mask
+        if overlap:
+            footprints.append(footprint)
+
+    overlap_grid = np.full(surface.values.shape, np.nan)
+    cell = surface.cell_size
+    for rows, cols, mask, t in footprints:
+        if not np.any(mask):
+            continue
+        # 按沿测线位置把覆盖网格分到横断面，计算每个横断面中被其他测线覆盖的比例
+        section = np.floor(t[mask] / cell).astype(np.int64)
+        section -= section.min()
+        shared = counts[rows, cols][mask] > 1
+        total = np.bincount(section)
+        ratio = np.bincount(section, weights=shared) / np.maximum(total, 1) * 100
+
+        window = overlap_grid[rows, cols]
+        current = window[mask]
+        window[mask] = np.fmax(current, ratio[section])
+        overlap_grid[rows, cols] = window
+
+    counts[~raster.valid] = 0
+    overlap_grid[~raster.valid] = np.nan
+    return CoverageGrid(counts, overlap_grid, raster.valid)
+
+
+def plan_coverage(surface, plan, opening_angle=120.0, overlap=True):
+    """规划结果（LinePlan）在水深面上的覆盖栅格"""
+    return rasterize_coverage(surface, plan.segments, opening_angle, overlap)
+
+
+class CoverageMap:
+    """按数据包增量更新的覆盖栅格，与 DepthGrid 使用相同的尺寸和坐标映射
+
+    每个数据包的扫测带由相邻波束落点之间的连线构成，并与上一数据包对应落点之间扫过的
+    四边形一起写入栅格。被剔除的波束（超出量程等）两侧不连线，因此会留下真实的漏测区域。
+    counts 为每个网格被多少个数据包覆盖。
+
+    循环网格（wrap）上扫测带以当前位置所在的网格周期为准，超出网格的部分直接舍去而不折回，
+    否则宽于网格的扫测带几个数据包就会覆盖整个网格，漏测检查失去意义。
+    """
+
+    def __init__(self, grid, max_step=None, max_samples=None):
+        self.grid = grid
+        # 相邻两个数据包的位置相距超过 max_step(m) 时不连接（缺省为网格边长的1/4）
+        self.max_step = max_step
+        # 四边形每个方向的最大采样数，缺省为按半个网格间距跨越整个网格所需的采样数
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(self.grid.values.shape, dtype=np.int32)
+        # 各数据源（数据包 source 字段）上一数据包的扫测带，不同探头/船的扫测带之间不连接
+        self._previous = {}
+
+    def sync(self):
+        """网格被整体替换后，尺寸变化时清空覆盖栅格"""
+        if self.counts.shape != self.grid.values.shape:
+            self.reset()
+
+    def mark_depths(self, values=None):
+        """以已有水深网格的有效网格作为覆盖范围（加载历史数据时）"""
+        values = self.grid.values if values is None else values
+        self.counts = np.isfinite(values).astype(np.int32)
+        self._previous = {}
+
+    @property
+    def covered(self):
+        return self.counts > 0
+
+    @property
+    def coverage(self):
+        """被覆盖网格比例 (0-1)"""
+        return np.count_nonzero(self.counts) / self.counts.size if self.counts.size else 0.0
+
+    def _swath(self, package):
+        """按波束角排序的落点坐标，以及相邻波束之间是否连续"""
+        angles = np.asarray(package['beam_angles'], dtype=float)
+        x, y, _ = beam_footprint(package)
+        order = np.argsort(angles)
+        angles, x, y = angles[order], x[order], y[order]
+        steps = np.diff(angles)
+        if len(steps):
+            # 相邻波束角间隔明显大于标称间隔时说明中间的波束被剔除
+            connected = steps <= 1.5 * np.median(steps)
+        else:
+            connected = np.zeros(0, dtype=bool)
+        return {'angles': angles, 'x': x, 'y': y, 'connected': connected,
+                'position': (package['position_x'], package['position_y'])}
+
+    def add_ping(self, package):
+        """将一个数据包的扫测带写入覆盖栅格，返回新覆盖的网格数"""
+        self.sync()
+        swath = self._swath(package)
+        source = package.get('source')
+        previous = self._previous.get(source)
+        self._previous[source] = swath
+        if len(swath['x']) == 0:
+            return 0
+
+        grid = self.grid
+        max_step = self.max_step if self.max_step is not None else grid.extent / 4
+        # 循环网格上以当前位置所在的网格周期为原点
+        origin_x, origin_y = (np.floor(np.asarray(swath['position']) / grid.extent) * grid.extent
+                              if grid.wrap else (0.0, 0.0))
+        x1, y1 = swath['x'] - origin_x, swath['y'] - origin_y
+        connected = swath['connected']
+        if (previous is not None and np.array_equal(previous['angles'], swath['angles'])
+                and np.hypot(swath['position'][0] - previous['position'][0],
+                             swath['position'][1] - previous['position'][1]) <= max_step):
+            x0, y0 = previous['x'] - origin_x, previous['y'] - origin_y
+            connected = connected & previous['connected']
+        else:
+            x0, y0 = x1, y1
+
+        # 每条波束从上一数据包到当前数据包的轨迹，以及相邻连续波束之间扫过的四边形
+        beams = np.arange(len(x1))
+        pairs = np.flatnonzero(connected)
+        left = np.concatenate([beams, pairs])
+        right = np.concatenate([beams, pairs + 1])
+        # 只采样与网格相交的四边形：扫测带通常远宽于网格，大部分四边形落在网格外
+        corners_x = np.stack([x0[left], x0[right], x1[left], x1[right]])
+        corners_y = np.stack([y0[left], y0[right], y1[left], y1[right]])
+        inside = ((corners_x.max(axis=0) >= 0) & (corners_x.min(axis=0) < grid.extent)
+                  & (corners_y.max(axis=0) >= 0) & (corners_y.min(axis=0) < grid.extent))
+        left, right = left[inside], right[inside]
+        if len(left) == 0:
+            return 0
+        # 真航向（自北顺时针）对应的航迹方向 (东, 北)
+        heading = np.deg2rad(package.get('heading', 0.0))
+        points_x, points_y = self._sample_quads(x0[left], y0[left], x0[right], y0[right],
+                                                x1[left], y1[left], x1[right], y1[right],
+                                                (np.sin(heading), np.cos(heading)))
+
+        # 同一网格在一个数据包中只计一次，只访问被扫过的网格
+        ix, iy, valid = cell_index(points_x, points_y, grid.size, grid.extent, wrap=False)
+        cells = np.unique(iy[valid] * grid.size + ix[valid])
+        counts = self.counts.reshape(-1)
+        new_cells = int(np.count_nonzero(counts[cells] == 0))
+        counts[cells] += 1
+        return new_cells
+
+    def _sample_quads(self, ax, ay, bx, by, cx, cy, dx, dy, direction):
+        """在四边形 (a→b 为上一数据包一侧, c→d 为当前数据包一侧) 内按半个网格间距采样
+
+        每个四边形按自身的边长确定采样数，所有四边形的采样点一次生成。沿航迹方向只按角点在
+        航向 direction 上的位移确定采样数：横摇使外侧波束沿扫测带滑动，并不扩大扫过的区域。
+        """
+        half = self.grid.cell_size / 2
+        ux, uy = direction
+        along = np.maximum(np.abs((cx - ax) * ux + (cy - ay) * uy), np.abs((dx - bx) * ux + (dy - by) * uy))
+        across = np.maximum(np.hypot(bx - ax, by - ay), np.hypot(dx - cx, dy - cy))
+        max_samples = self.max_samples if self.max_samples is not None else 2 * self.grid.size + 1
+        n_along = np.minimum(np.ceil(along / half).astype(np.int64) + 1, max_samples)
+        n_across = np.minimum(np.ceil(across / half).astype(np.int64) + 1, max_samples)
+
+        sizes = n_along * n_across
+        quad = np.repeat(np.arange(len(sizes)), sizes)
+        local = np.arange(len(quad)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        u = (local // n_across[quad]) / np.maximum(n_along[quad] - 1, 1)
+        v = (local % n_across[quad]) / np.maximum(n_across[quad] - 1, 1)
+        x = (1 - u) * ((1 - v) * ax[quad] + v * bx[quad]) + u * ((1 - v) * cx[quad] + v * dx[quad])
+        y = (1 - u) * ((1 - v) * ay[quad] + v * by[quad]) + u * ((1 - v) * cy[quad] + v * dy[quad])
+        return x, y
+
+    def find_gaps(self, min_area=None, closing=5, area=None):
+        """标记测区内未覆盖的连通区域，返回按面积从大到小排列的 CoverageGap 列表
+
+        area 为测区掩码；缺省时对已覆盖区域做 closing 个网格的闭运算并填充孔洞作为测区，
+        即宽度小于约 2×closing 个网格的条带和被覆盖区域包围的空洞视为漏测。
+        min_area 为漏洞的最小面积(m²)，缺省为 4 个网格。
+        """
+        from scipy import ndimage
+
+        covered = self.covered
+        cell = self.grid.cell_size
+        if area is None:
+            padded = np.pad(covered, closing)
+            closed = ndimage.binary_closing(padded, iterations=closing) if closing > 0 else padded
+            area = ndimage.binary_fill_holes(closed)[closing:closing + covered.shape[0],
+                                                     closing:closing + covered.shape[1]]
+        holes = np.asarray(area, dtype=bool) & ~covered
+        labels, count = ndimage.label(holes, structure=np.ones((3, 3), dtype=bool))
+        if count == 0:
+            return []
+
+        min_cells = max(int(np.ceil((min_area if min_area is not None else 4 * cell * cell) / (cell * cell))), 1)
+        sizes = np.bincount(labels.ravel())
+        gaps = []
+        for label, sl in enumerate(ndimage.find_objects(labels), start=1):
+            if sl is None or sizes[label] < min_cells:
+                continue
+            iy, ix = np.nonzero(labels[sl] == label)
+            x = (ix + sl[1].start + 0.5) * cell
+            y = (iy + sl[0].start + 0.5) * cell
+            gaps.append(CoverageGap(label, x, y, cell))
+        gaps.sort(key=lambda gap: gap.area, reverse=True)
+        return gaps
+
+
+class CoverageGap:
+    """一个未覆盖的连通区域及其补测测线
+
+    补测测线沿漏洞网格坐标的主成分方向穿过其质心，两端延伸到漏洞最远的网格外缘。
+    坐标为覆盖栅格内的坐标 (m)。
+    """
+
+    def __init__(self, label, x, y, cell_size):
+        self.label = label
+        self.cells = len(x)
+        self.area = self.cells * cell_size * cell_size
+        self.centroid = (float(np.mean(x)), float(np.mean(y)))
+
+        points = np.column_stack([x - self.centroid[0], y - self.centroid[1]])
+        if self.cells > 1:
+            _, vectors = np.linalg.eigh(np.cov(points, rowvar=False))
+            axis = vectors[:, -1]
+        else:
+            axis = np.array([1.0, 0.0])
+        normal = np.array([-axis[1], axis[0]])
+        along = points @ axis
+        self.width = float(np.ptp(points @ normal) + cell_size)
+        start = along.min() - cell_size / 2
+        end = along.max() + cell_size / 2
+        cx, cy = self.centroid
+        self.segment = (cx + axis[0] * start, cy + axis[1] * start, cx + axis[0] * end, cy + axis[1] * end)
+        self.length = float(end - start)
+
+    def reversed(self):
+        """补测测线反向（从另一端开始测量）"""
+        x0, y0, x1, y1 = self.segment
+        self.segment = (x1, y1, x0, y0)
+        return self
+
+    def as_dict(self):
+        return {
+            "cells": self.cells,
+            "area": self.area,
+            "centroid": self.centroid,
+            "width": self.width,
+            "length": self.length,
+            "segment": tuple(float(v) for v in self.segment),
+        }
+
+
+def plan_infill(gaps, position=(0.0, 0.0)):
+    """按就近原则排列补测测线：从当前位置出发，每次选起点或终点最近的漏洞，并调整测线方向"""
+    remaining = list(gaps)
+    ordered = []
+    x, y = position
+    while remaining:
+        distances = [min(np.hypot(gap.segment[0] - x, gap.segment[1] - y),
+                         np.hypot(gap.segment[2] - x, gap.segment[3] - y)) for gap in remaining]
+        gap = remaining.pop(int(np.argmin(distances)))
+        if np.hypot(gap.segment[2] - x, gap.segment[3] - y) < np.hypot(gap.segment[0] - x, gap.segment[1] - y):
+            gap.reversed()
+        ordered.append(gap)
+        x, y = gap.segment[2], gap.segment[3]
+    return ordered
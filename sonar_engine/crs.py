@@ -0,0 +1,275 @@
+"""坐标参考系
+
+经纬度（WGS84）与平面坐标之间的转换。平面坐标统一为 x 向东、y 向北，单位m：
+
+    UTM（横轴墨卡托投影）：6阶 Krüger 级数，投影带参数按带号缓存，精度优于 1 mm；
+    LocalTangentPlane（站心东北天坐标）：以原点处的切平面为平面，适合小范围测区。
+
+全部按数组向量化计算，级数用复数 Clenshaw 求和，每个点只需计算一次复数三角函数。
+航迹、水深网格和导出文件共用同一个坐标系，用 ``to_string`` / ``from_string`` 保存和恢复，例如
+``utm:50N``、``enu:30.0,120.0``。
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# WGS84 椭球
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_E = np.sqrt(WGS84_E2)
+
+
+def _krueger_coefficients(f):
+    """横轴墨卡托正算(alpha)与反算(beta)的 Krüger 级数系数及矩形化半径 A"""
+    n = f / (2 - f)
+    n2, n3, n4, n5, n6 = n ** 2, n ** 3, n ** 4, n ** 5, n ** 6
+    radius = WGS84_A / (1 + n) * (1 + n2 / 4 + n4 / 64 + n6 / 256)
+    alpha = np.array([
+        n / 2 - 2 * n2 / 3 + 5 * n3 / 16 + 41 * n4 / 180 - 127 * n5 / 288 + 7891 * n6 / 37800,
+        13 * n2 / 48 - 3 * n3 / 5 + 557 * n4 / 1440 + 281 * n5 / 630 - 1983433 * n6 / 1935360,
+        61 * n3 / 240 - 103 * n4 / 140 + 15061 * n5 / 26880 + 167603 * n6 / 181440,
+        49561 * n4 / 161280 - 179 * n5 / 168 + 6601661 * n6 / 7257600,
+        34729 * n5 / 80640 - 3418889 * n6 / 1995840,
+        212378941 * n6 / 319334400,
+    ])
+    beta = np.array([
+        n / 2 - 2 * n2 / 3 + 37 * n3 / 96 - n4 / 360 - 81 * n5 / 512 + 96199 * n6 / 604800,
+        n2 / 48 + n3 / 15 - 437 * n4 / 1440 + 46 * n5 / 105 - 1118711 * n6 / 3870720,
+        17 * n3 / 480 - 37 * n4 / 840 - 209 * n5 / 4480 + 5569 * n6 / 90720,
+        4397 * n4 / 161280 - 11 * n5 / 504 - 830251 * n6 / 7257600,
+        4583 * n5 / 161280 - 108847 * n6 / 3991680,
+        20648693 * n6 / 638668800,
+    ])
+    return radius, alpha, beta
+
+
+_RADIUS, _ALPHA, _BETA = _krueger_coefficients(WGS84_F)
+
+
+def _sine_series(coefficients, zeta):
+    """复数 Clenshaw 求和 Σ c_j·sin(2jζ)"""
+    two_cos = 2 * np.cos(2 * zeta)
+    b1 = np.zeros_like(zeta)
+    b2 = np.zeros_like(zeta)
+    for c in coefficients[::-1]:
+        b1, b2 = c + two_cos * b1 - b2, b1
+    return b1 * np.sin(2 * zeta)
+
+
+class CRS:
+    """平面坐标系基类：forward(纬度, 经度) → (x, y)，inverse(x, y) → (纬度, 经度)"""
+
+    def forward(self, lat, lon):
+        raise NotImplementedError
+
+    def inverse(self, x, y):
+        raise NotImplementedError
+
+    def to_string(self):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return isinstance(other, CRS) and self.to_string() == other.to_string()
+
+    def __hash__(self):
+        return hash(self.to_string())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_string()!r})"
+
+
+class TransverseMercator(CRS):
+    """横轴墨卡托投影（WGS84），lon0 为中央经线"""
+
+    def __init__(self, lon0, k0=0.9996, false_easting=500000.0, false_northing=0.0):
+        self.lon0 = float(lon0)
+        self.k0 = float(k0)
+        self.false_easting = float(false_easting)
+        self.false_northing = float(false_northing)
+        self._scale = self.k0 * _RADIUS
+
+    def forward(self, lat, lon):
+        lat = np.deg2rad(np.asarray(lat, dtype=float))
+        lon = np.deg2rad((np.asarray(lon, dtype=float) - self.lon0 + 180) % 360 - 180)
+        sin_lat = np.sin(lat)
+        # 等角纬度的正切
+        t = np.sinh(np.arctanh(sin_lat) - WGS84_E * np.arctanh(WGS84_E * sin_lat))
+        xi = np.arctan2(t, np.cos(lon))
+        eta = np.arctanh(np.sin(lon) / np.sqrt(1 + t * t))
+        zeta = xi + 1j * eta
+        zeta = zeta + _sine_series(_ALPHA, zeta)
+        x = self.false_easting + self._scale * zeta.imag
+        y = self.false_northing + self._scale * zeta.real
+        return x, y
+
+    def inverse(self, x, y):
+        eta = (np.asarray(x, dtype=float) - self.false_easting) / self._scale
+        xi = (np.asarray(y, dtype=float) - self.false_northing) / self._scale
+        zeta = xi + 1j * eta
+        zeta = zeta - _sine_series(_BETA, zeta)
+        xi, eta = zeta.real, zeta.imag
+
+        sinh_eta = np.sinh(eta)
+        cos_xi = np.cos(xi)
+        tau_prime = np.sin(xi) / np.sqrt(sinh_eta * sinh_eta + cos_xi * cos_xi)
+        lon = np.arctan2(sinh_eta, cos_xi)
+
+        # 由等角纬度求大地纬度（牛顿迭代，3次即收敛到机器精度）
+        tau = tau_prime.copy()
+        for _ in range(3):
+            sqrt_tau = np.sqrt(1 + tau * tau)
+            sigma = np.sinh(WGS84_E * np.arctanh(WGS84_E * tau / sqrt_tau))
+            tau_i = tau * np.sqrt(1 + sigma * sigma) - sigma * sqrt_tau
+            tau += ((tau_prime - tau_i) / np.sqrt(1 + tau_i * tau_i)
+                    * (1 + (1 - WGS84_E2) * tau * tau) / ((1 - WGS84_E2) * sqrt_tau))
+        return np.rad2deg(np.arctan(tau)), self.lon0 + np.rad2deg(lon)
+
+    def to_string(self):
+        return f"tm:{self.lon0:g},{self.k0:g},{self.false_easting:g},{self.false_northing:g}"
+
+
+class UTM(TransverseMercator):
+    """UTM 投影带，zone 为 1~60，south=True 为南半球（北向偏移 10000 km）"""
+
+    def __init__(self, zone, south=False):
+        if not 1 <= int(zone) <= 60:
+            raise ValueError(f"UTM带号应为1~60: {zone}")
+        self.zone = int(zone)
+        self.south = bool(south)
+        super().__init__(lon0=self.zone * 6 - 183, false_northing=10000000.0 if self.south else 0.0)
+
+    @property
+    def epsg(self):
+        return (32700 if self.south else 32600) + self.zone
+
+    def to_string(self):
+        return f"utm:{self.zone}{'S' if self.south else 'N'}"
+
+
+@lru_cache(maxsize=None)
+def utm(zone, south=False):
+    """按带号缓存的 UTM 投影"""
+    return UTM(zone, south)
+
+
+def utm_zone(lat, lon):
+    """经纬度所在的 UTM 带号与南北半球 (zone, south)，含挪威与斯瓦尔巴的特例"""
+    lon = (float(lon) + 180) % 360 - 180
+    zone = int((lon + 180) // 6) + 1
+    if 56 <= lat < 64 and 3 <= lon < 12:
+        zone = 32
+    elif 72 <= lat < 84 and 0 <= lon < 42:
+        zone = 31 + 2 * int((lon + 3) // 12)
+    return min(zone, 60), lat < 0
+
+
+def auto_utm(lat, lon):
+    """按测点的中心位置选择 UTM 投影带"""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    return utm(*utm_zone(float(np.nanmean(lat)), float(np.nanmean(lon))))
+
+
+class LocalTangentPlane(CRS):
+    """站心坐标系：以 (lat0, lon0, h0) 为原点的东-北-天切平面，x 向东、y 向北
+
+    inverse 返回椭球面（高程 h0）上与平面点对应的经纬度，与 forward 互为逆运算。
+    """
+
+    def __init__(self, lat0, lon0, h0=0.0):
+        self.lat0 = float(lat0)
+        self.lon0 = float(lon0)
+        self.h0 = float(h0)
+        phi, lam = np.deg2rad(self.lat0), np.deg2rad(self.lon0)
+        self._origin = self._ecef(phi, lam, self.h0)
+        sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        # 行依次为东、北、天方向在地心坐标系中的单位向量
+        self._rotation = np.array([
+            [-sin_lam, cos_lam, 0.0],
+            [-sin_phi * cos_lam, -sin_phi * sin_lam, cos_phi],
+            [cos_phi * cos_lam, cos_phi * sin_lam, sin_phi],
+        ])
+        prime = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+        meridian = prime * (1 - WGS84_E2) / (1 - WGS84_E2 * sin_phi ** 2)
+        self._radius = np.sqrt(prime * meridian) + self.h0
+
+    @staticmethod
+    def _ecef(phi, lam, h):
+        sin_phi = np.sin(phi)
+        prime = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi * sin_phi)
+        cos_phi = np.cos(phi)
+        return np.array([(prime + h) * cos_phi * np.cos(lam), (prime + h) * cos_phi * np.sin(lam),
+                         (prime * (1 - WGS84_E2) + h) * sin_phi])
+
+    def enu(self, lat, lon, h=None):
+        """经纬度与高程（缺省为 h0）转换为 (东, 北, 天)"""
+        lat = np.deg2rad(np.asarray(lat, dtype=float))
+        lon = np.deg2rad(np.asarray(lon, dtype=float))
+        h = self.h0 if h is None else np.asarray(h, dtype=float)
+        delta = self._ecef(lat, lon, h) - self._origin.reshape((3,) + (1,) * lat.ndim)
+        r = self._rotation
+        east = r[0, 0] * delta[0] + r[0, 1] * delta[1]
+        north = r[1, 0] * delta[0] + r[1, 1] * delta[1] + r[1, 2] * delta[2]
+        up = r[2, 0] * delta[0] + r[2, 1] * delta[1] + r[2, 2] * delta[2]
+        return east, north, up
+
+    def geodetic(self, east, north, up):
+        """(东, 北, 天) 转换为 (纬度, 经度, 高程)，地心坐标到大地坐标用 Bowring 公式"""
+        east = np.asarray(east, dtype=float)
+        north = np.asarray(north, dtype=float)
+        up = np.asarray(up, dtype=float)
+        r = self._rotation
+        X = self._origin[0] + r[0, 0] * east + r[1, 0] * north + r[2, 0] * up
+        Y = self._origin[1] + r[0, 1] * east + r[1, 1] * north + r[2, 1] * up
+        Z = self._origin[2] + r[1, 2] * north + r[2, 2] * up
+
+        b = WGS84_A * (1 - WGS84_F)
+        ep2 = WGS84_E2 / (1 - WGS84_E2)
+        p = np.hypot(X, Y)
+        theta = np.arctan2(Z * WGS84_A, p * b)
+        phi = np.arctan2(Z + ep2 * b * np.sin(theta) ** 3, p - WGS84_E2 * WGS84_A * np.cos(theta) ** 3)
+        sin_phi = np.sin(phi)
+        prime = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi * sin_phi)
+        h = p / np.cos(phi) - prime
+        return np.rad2deg(phi), np.rad2deg(np.arctan2(Y, X)), h
+
+    def forward(self, lat, lon):
+        east, north, _ = self.enu(lat, lon)
+        return east, north
+
+    def inverse(self, x, y):
+        # 切平面上的点高于椭球面，沿天向下移到高程 h0 处（两次修正后误差小于 1 mm）
+        up = -(np.square(x) + np.square(y)) / (2 * self._radius)
+        for _ in range(2):
+            lat, lon, h = self.geodetic(x, y, up)
+            up = up - (h - self.h0)
+        lat, lon, _ = self.geodetic(x, y, up)
+        return lat, lon
+
+    def to_string(self):
+        text = f"enu:{self.lat0:.9g},{self.lon0:.9g}"
+        return text + (f",{self.h0:g}" if self.h0 else "")
+
+
+def from_string(text):
+    """由 to_string 的结果（或 EPSG:326xx/327xx）恢复坐标系，None 或空串返回 None"""
+    if not text:
+        return None
+    text = text.strip()
+    kind, _, value = text.partition(":")
+    kind = kind.lower()
+    if kind == "utm":
+        return utm(int(value[:-1]), value[-1].upper() == "S")
+    if kind == "epsg":
+        code = int(value)
+        if 32601 <= code <= 32660 or 32701 <= code <= 32760:
+            return utm(code % 100, code >= 32700)
+        raise ValueError(f"不支持的EPSG代码: {code}")
+    if kind == "enu":
+        return LocalTangentPlane(*(float(v) for v in value.split(",")))
+    if kind == "tm":
+        return TransverseMercator(*(float(v) for v in value.split(",")))
+    raise ValueError(f"无法识别的坐标系: {text}")
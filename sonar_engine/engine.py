@@ -0,0 +1,471 @@
+"""多波束数据处理引擎
+
+SonarEngine 持有测量状态（航迹、波束、水深网格、统计、设备状态），按
+接收 → 清洗 → 归位 → 网格化 → 统计 的顺序处理每个数据包，并把结果通知给订阅者。
+引擎本身不依赖Qt，界面只是订阅者之一。各处理阶段的耗时记录在 ``timers`` 中。
+
+多探头或多船同时测量时，数据包的 ``source`` 字段为数据源名称，每个数据源有自己的航迹、
+最新波束、统计与设备状态（SourceState），水深网格、覆盖栅格与地形图层由所有数据源共用。
+没有 ``source`` 字段的数据包属于主数据源 DEFAULT_SOURCE；track_x、beam_data、device_status
+等属性是主数据源的状态。
+"""
+
+import time
+
+import numpy as np
+
+from . import filters
+from .coverage import CoverageMap
+from .georef import georeference_ping
+from .gridding import DepthGrid
+from .instrumentation import StageTimers
+from .parallel import ParallelGrid
+from .stats import SurveyStats
+from .survey_io import load_survey, save_survey
+from .terrain import TerrainLayers
+
+DEFAULT_DEVICE_STATUS = {
+    "电源": "正常",
+    "传感器": "正常",
+    "数据链路": "正常",
+    "存储系统": "正常",
+    "GPS": "正常",
+}
+
+RUN_BATCH = 64  # run() 每批处理的数据包数
+DEFAULT_SOURCE = "数据源1"
+
+
+class SourceState:
+    """一个数据源（测深仪探头或测量船）的航迹、最新波束、统计与设备状态
+
+    mounting 为该探头的安装参数（双探头各自的安装角），None 时使用引擎的 mounting。
+    """
+
+    def __init__(self, name, track_limit=1000, history_limit=1000, device_status=None, mounting=None):
+        self.name = name
+        self.mounting = mounting
+        self.track_limit = track_limit
+        self.history_limit = history_limit
+        self.device_status = dict(device_status if device_status is not None else DEFAULT_DEVICE_STATUS)
+        # 只统计本数据源的数据包（网格统计在引擎的 stats 中）
+        self.stats = SurveyStats()
+        self.reset()
+
+    def reset(self):
+        """清空航迹、波束与统计数据"""
+        self.track_x = []
+        self.track_y = []
+        self.track_t = []
+        self.track_lat = []
+        self.track_lon = []
+        self.history_depth = []
+        # 与航迹对应的逐数据包记录 (航向, 波束角, 波束水深)，保存测量时写入容器的 pings 组
+        self.ping_records = []
+        self.beam_angles = np.linspace(-75, 75, 64)
+        self.beam_data = np.zeros(len(self.beam_angles))
+        self.last_package = None
+        self.stats.reset()
+
+    def append(self, package):
+        """记录数据包的位置与波束"""
+        self.track_x.append(package['position_x'])
+        self.track_y.append(package['position_y'])
+        self.track_t.append(package.get('timestamp', time.time()))
+        self.track_lat.append(package.get('gps_lat', np.nan))
+        self.track_lon.append(package.get('gps_lon', np.nan))
+        self.ping_records.append((package.get('heading', 0.0), package['beam_angles'], package['beam_data']))
+
+        # 限制航迹长度，避免内存占用过大
+        if len(self.track_x) > self.track_limit:
+            for track in (self.track_x, self.track_y, self.track_t, self.track_lat, self.track_lon):
+                del track[:-self.track_limit]
+        if len(self.ping_records) > self.track_limit:
+            del self.ping_records[:-self.track_limit]
+
+        # 存储历史深度数据
+        self.history_depth.append(float(np.mean(package['beam_data'])))
+        if len(self.history_depth) > self.history_limit:
+            del self.history_depth[:-self.history_limit]
+
+        self.beam_angles = package['beam_angles']
+        self.beam_data = package['beam_data']
+        self.last_package = package
+
+    def ping_columns(self):
+        """逐数据包记录的列字典（timestamp、position_x、position_y、heading 与 (数据包数, 最大波束数) 的
+        beam_angles、beam_data，波束数不足的行以NaN补齐），没有记录时返回None"""
+        count = len(self.ping_records)
+        if count == 0:
+            return None
+        width = max(len(beam_data) for _, _, beam_data in self.ping_records)
+        beam_angles = np.full((count, width), np.nan, dtype=np.float32)
+        beam_data = np.full((count, width), np.nan, dtype=np.float32)
+        for row, (_, angles, depths) in enumerate(self.ping_records):
+            beam_angles[row, :len(angles)] = angles
+            beam_data[row, :len(depths)] = depths
+        # 加载的历史航迹没有数据包记录，逐数据包记录只对应航迹末尾的 count 个点
+        return {
+            "timestamp": np.asarray(self.track_t[-count:], dtype=float),
+            "position_x": np.asarray(self.track_x[-count:], dtype=float),
+            "position_y": np.asarray(self.track_y[-count:], dtype=float),
+            "heading": np.array([heading for heading, _, _ in self.ping_records], dtype=float),
+            "beam_angles": beam_angles,
+            "beam_data": beam_data,
+        }
+
+    def set_track(self, track_x, track_y, timestamps=None, gps_lat=None, gps_lon=None):
+        """替换整条航迹（加载历史数据）"""
+        self.reset()
+        self.track_x = [float(v) for v in track_x]
+        self.track_y = [float(v) for v in track_y]
+        count = len(self.track_x)
+        self.track_t = list(timestamps) if timestamps is not None else [np.nan] * count
+        self.track_lat = list(gps_lat) if gps_lat is not None else [np.nan] * count
+        self.track_lon = list(gps_lon) if gps_lon is not None else [np.nan] * count
+        self.stats.set_track(self.track_x, self.track_y)
+
+
+class SonarEngine:
+    """无界面的多波束数据处理引擎
+
+    订阅事件：
+        "ping"   (package)               每个数据包处理完成后
+        "grid"   ()                      网格被整体替换（加载、滤波）后
+        "status" (device, status, old)   设备状态变化
+        "log"    (message, level)        日志消息
+        "svp"    (profile)               声速剖面更新
+        "source" (state)                 出现新的数据源
+        "coverage" (package, new_cells)  数据包扫测带写入覆盖栅格后
+
+    覆盖栅格（coverage）只在有 "coverage" 订阅者时随数据包更新。
+    非主数据源的设备状态变化以 "数据源名 设备名" 作为 "status" 事件的设备名。
+    """
+
+    def __init__(self, grid_size=100, extent=20.0, track_limit=1000, history_limit=1000,
+                 min_depth=None, max_depth=None, device_status=None, initial_grid=None, wrap=True, timers=None,
+                 rng=None, mounting=None, crs=None, grid_workers=0):
+        if grid_workers:
+            # 多进程网格化：网格位于共享内存，由 grid_workers 个工作进程按瓦片分片写入
+            self.grid = ParallelGrid(grid_size, extent, wrap=wrap, initial=initial_grid, workers=grid_workers)
+        else:
+            self.grid = DepthGrid(grid_size, extent, wrap=wrap, initial=initial_grid)
+        # 由实际扫测带累积的覆盖栅格，用于漏测检查
+        self.coverage = CoverageMap(self.grid)
+        # 坡度、坡向、阴影浮雕与曲率图层，按瓦片增量更新
+        self.terrain = TerrainLayers(self.grid)
+        self.timers = timers if timers is not None else StageTimers()
+        self.stats = SurveyStats()
+        self.track_limit = track_limit
+        self.history_limit = history_limit
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        # 换能器安装参数（杠臂、安装角、吃水），None 表示换能器位于定位参考点
+        self.mounting = mounting
+        # 航迹、网格与导出文件共用的平面坐标系（crs 模块），None 表示未指定
+        self.crs = crs
+        self._subscribers = {}
+        # 各数据源的航迹与状态，按出现顺序排列，第一个为主数据源
+        self.sources = {}
+        self.primary = self.add_source(DEFAULT_SOURCE, device_status)
+
+        # 声速剖面（rng 为 np.random.Generator，复现测量场景时由 Scenario 传入）
+        rng = rng if rng is not None else np.random.default_rng()
+        self.sound_velocity_profile = {
+            "深度": np.linspace(0, 100, 20),
+            "声速": np.linspace(1490, 1520, 20) + rng.random(20) * 5
+        }
+        self.reset_track()
+
+    # ------------------------------------------------------------------ 订阅
+    def subscribe(self, event, callback):
+        """订阅引擎事件"""
+        self._subscribers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event, callback):
+        callbacks = self._subscribers.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def emit(self, event, *args):
+        for callback in list(self._subscribers.get(event, [])):
+            callback(*args)
+
+    # ------------------------------------------------------------------ 状态
+    def add_source(self, name, device_status=None, mounting=None):
+        """登记数据源（已存在时直接返回），返回其 SourceState"""
+        state = self.sources.get(name)
+        if state is None:
+            state = SourceState(name, self.track_limit, self.history_limit, device_status, mounting)
+            self.sources[name] = state
+            self.emit("source", state)
+        return state
+
+    def source_of(self, package):
+        """数据包所属数据源的 SourceState"""
+        name = package.get('source')
+        if name is None:
+            return self.primary
+        state = self.sources.get(name)
+        return state if state is not None else self.add_source(name)
+
+    def reset_track(self):
+        """清空各数据源的航迹、波束与统计数据（保留水深网格）"""
+        for state in self.sources.values():
+            state.reset()
+        self.stats.reset()
+
+    @property
+    def track_x(self):
+        return self.primary.track_x
+
+    @property
+    def track_y(self):
+        return self.primary.track_y
+
+    @property
+    def track_t(self):
+        return self.primary.track_t
+
+    @property
+    def track_lat(self):
+        return self.primary.track_lat
+
+    @property
+    def track_lon(self):
+        return self.primary.track_lon
+
+    @property
+    def history_depth(self):
+        return self.primary.history_depth
+
+    @property
+    def beam_angles(self):
+        return self.primary.beam_angles
+
+    @property
+    def beam_data(self):
+        return self.primary.beam_data
+
+    @property
+    def last_package(self):
+        return self.primary.last_package
+
+    @property
+    def device_status(self):
+        return self.primary.device_status
+
+    @property
+    def depth_data(self):
+        return self.grid.values
+
+    # ------------------------------------------------------------------ 处理流程
+    def clean(self, package):
+        """剔除无效波束与超出量程的深度，全部无效时返回None"""
+        beam_angles = np.asarray(package['beam_angles'], dtype=float)
+        beam_data = np.asarray(package['beam_data'], dtype=float)
+
+        keep = np.isfinite(beam_data)
+        if self.min_depth is not None:
+            keep &= beam_data >= self.min_depth
+        if self.max_depth is not None:
+            keep &= beam_data <= self.max_depth
+        if not np.any(keep):
+            return None
+
+        cleaned = dict(package)
+        if np.all(keep):
+            cleaned['beam_angles'] = beam_angles
+            cleaned['beam_data'] = beam_data
+        else:
+            cleaned['beam_angles'] = beam_angles[keep]
+            cleaned['beam_data'] = beam_data[keep]
+        return cleaned
+
+    def project(self, package):
+        """只有经纬度的数据包（实测定位）按坐标系补充平面坐标 position_x/position_y"""
+        if 'position_x' in package or self.crs is None:
+            return package
+        package = dict(package)
+        x, y = self.crs.forward(package['gps_lat'], package['gps_lon'])
+        package['position_x'], package['position_y'] = float(x), float(y)
+        return package
+
+    def _prepare(self, package):
+        """清洗、归位数据包并记录航迹，被剔除时返回None"""
+        timers = self.timers
+        package = self.project(package)
+        with timers.stage("engine.clean"):
+            package = self.clean(package)
+        if package is None:
+            return None
+
+        state = self.source_of(package)
+        if not self.grid.georeferences:
+            # 多进程网格化时在工作进程中归位
+            with timers.stage("engine.georef"):
+                package['beam_x'], package['beam_y'], package['beam_z'] = georeference_ping(package,
+                                                                                            self.mounting_of(state))
+
+        state.append(package)
+        return package
+
+    def mounting_of(self, state):
+        """数据源的安装参数（未单独指定时为引擎的安装参数）"""
+        return state.mounting if state.mounting is not None else self.mounting
+
+    def _grid(self, packages):
+        with self.timers.stage("engine.grid"):
+            # 被更新网格的扁平索引，界面据此只重绘变化的网格
+            mountings = [self.mounting_of(self.source_of(package)) for package in packages]
+            for package, cells in zip(packages, self.grid.add_pings(packages, mountings)):
+                package['grid_cells'] = cells
+                self.terrain.mark(cells)
+
+    def _finish(self, packages):
+        timers = self.timers
+        if self._subscribers.get("coverage"):
+            with timers.stage("engine.coverage"):
+                for package in packages:
+                    self.emit("coverage", package, self.coverage.add_ping(package))
+
+        with timers.stage("engine.stats"):
+            for package in packages:
+                self.stats.update_ping(package)
+                self.source_of(package).stats.update_ping(package)
+            # 只统计本批被更新的网格
+            self.stats.update_cells(self.grid, np.concatenate([package['grid_cells'] for package in packages]))
+
+        with timers.stage("engine.notify"):
+            for package in packages:
+                self.emit("ping", package)
+
+    def ingest(self, package):
+        """处理一个数据包，返回清洗后的数据包（被剔除时返回None）"""
+        package = self._prepare(package)
+        if package is None:
+            return None
+        self._grid([package])
+        self._finish([package])
+        return package
+
+    def ingest_many(self, packages):
+        """处理一批数据包，返回清洗后的数据包列表（不含被剔除的）
+
+        整批测点一次网格化（多进程网格化时只分发一次），网格统计在整批处理后更新一次，
+        适用于高速率或多探头的数据源。网格结果与逐个 ingest 相同。
+        """
+        packages = [package for package in map(self._prepare, packages) if package is not None]
+        if packages:
+            self._grid(packages)
+            self._finish(packages)
+        return packages
+
+    def set_device_status(self, device, status, source=None):
+        """更新数据源 source（缺省为主数据源）的设备状态"""
+        state = self.primary if source is None else self.add_source(source)
+        old_status = state.device_status.get(device)
+        state.device_status[device] = status
+        if old_status != status:
+            self.emit("status", device if state is self.primary else f"{state.name} {device}", status, old_status)
+
+    def update_svp(self, delta):
+        """叠加声速剖面扰动"""
+        self.sound_velocity_profile["声速"] = self.sound_velocity_profile["声速"] + delta
+        self.emit("svp", self.sound_velocity_profile)
+
+    def log(self, message, level="信息"):
+        self.emit("log", message, level)
+
+    def step(self, source):
+        """从数据源取一个数据包并处理，同时处理设备状态与声速剖面事件"""
+        with self.timers.stage("source.next_ping"):
+            raw = source.next_ping()
+        package = self.ingest(raw)
+        self._poll(source, raw)
+        return package
+
+    def _poll(self, source, raw):
+        """处理数据源在取出数据包 raw 之后的设备状态与声速剖面事件"""
+        name = raw.get('source')
+        change = source.poll_status_change(self.device_status if name is None else self.add_source(name).device_status)
+        if change is not None:
+            self.set_device_status(*change, source=name)
+
+        delta = source.poll_svp_delta(len(self.sound_velocity_profile["声速"]))
+        if delta is not None:
+            self.update_svp(delta)
+
+    def run(self, source, count, batch=RUN_BATCH):
+        """无界面全速运行 count 个数据包，返回实际处理的数据包数
+
+        source 为数据源列表时（多探头/多船）每个数据源轮流各取 count 个数据包。数据包按 batch 个
+        一批交给 ingest_many（多进程网格化时每批只分发一次），网格结果与逐个处理相同。
+        """
+        sources = source if isinstance(source, (list, tuple)) else [source]
+        processed = 0
+        pending = []
+        for _ in range(count):
+            for source in sources:
+                with self.timers.stage("source.next_ping"):
+                    raw = source.next_ping()
+                self._poll(source, raw)
+                pending.append(raw)
+            if len(pending) >= batch:
+                processed += len(self.ingest_many(pending))
+                pending = []
+        if pending:
+            processed += len(self.ingest_many(pending))
+        return processed
+
+    def close(self):
+        """结束多进程网格化的工作进程（普通网格无需调用）"""
+        self.grid.close()
+
+    # ------------------------------------------------------------------ 网格操作
+    def load_grid(self, values):
+        self.grid.load(values)
+        self.terrain.invalidate()
+        self.coverage.sync()
+        self.stats.update_grid(self.grid)
+        self.emit("grid")
+
+    def apply_filter(self, name, strength=5):
+        """对水深网格应用滤波器"""
+        self.load_grid(filters.apply_filter(self.grid.values, name, strength))
+
+    # ------------------------------------------------------------------ 导入导出
+    def export(self, filename, catalog=None, metadata=None):
+        """保存航迹与水深网格，返回 (csv路径, 水深文件路径)
+
+        文件名为 .svy 时保存为压缩容器（含主数据源逐数据包的波束水深、声速剖面与元数据 metadata）。
+        航迹为主数据源的航迹，水深网格包含所有数据源。catalog 为 SurveyCatalog 时同时把测量摘要登记到目录索引。
+        """
+        paths = save_survey(filename, self.track_x, self.track_y, self.grid.values,
+                            timestamps=self.track_t, gps_lat=self.track_lat, gps_lon=self.track_lon, crs=self.crs,
+                            cell_size=self.grid.cell_size, svp=self.sound_velocity_profile,
+                            pings=self.primary.ping_columns(), metadata=metadata)
+        if catalog is not None:
+            catalog.record_survey(paths[0], self.track_x, self.track_y, self.track_t, self.grid.values, self.crs)
+        return paths
+
+    def set_track(self, track_x, track_y, timestamps=None, gps_lat=None, gps_lon=None):
+        """替换整条航迹（加载历史数据，航迹属于主数据源）"""
+        self.reset_track()
+        self.primary.set_track(track_x, track_y, timestamps, gps_lat, gps_lon)
+        self.stats.set_track(self.track_x, self.track_y)
+
+    def load(self, filename):
+        """加载历史测量数据"""
+        survey = load_survey(filename, crs=self.crs)
+        if survey['crs'] is not None:
+            self.crs = survey['crs']
+        self.set_track(survey['track_x'], survey['track_y'], timestamps=survey['timestamp'],
+                       gps_lat=survey['gps_lat'], gps_lon=survey['gps_lon'])
+        if survey['depth_data'] is not None:
+            self.load_grid(survey['depth_data'])
+            self.coverage.mark_depths()
+        if survey['svp'] is not None:
+            self.sound_velocity_profile = survey['svp']
+            self.emit("svp", self.sound_velocity_profile)
+        return survey
@@ -0,0 +1,90 @@
+"""系统日志
+
+日志记录保存在定长环形缓冲区中，长时间测量时内存占用不再随消息数增长。
+可选地同时写入按大小滚动的日志文件，保留完整记录。
+"""
+
+import logging
+import logging.handlers
+import os
+import time
+from collections import namedtuple
+
+from .ringbuffer import RingBuffer
+
+LogRecord = namedtuple("LogRecord", ["timestamp", "time_text", "level", "message"])
+
+# 界面中的日志级别 → logging 级别
+LEVELS = {
+    "信息": logging.INFO,
+    "成功": logging.INFO,
+    "警告": logging.WARNING,
+    "错误": logging.ERROR,
+}
+
+
+class EventLog:
+    """保存最近 capacity 条记录的系统日志
+
+    time_format 为界面显示的时间格式（time.strftime 格式）。
+    """
+
+    def __init__(self, capacity=5000, time_format="%H:%M:%S"):
+        self.buffer = RingBuffer(capacity)
+        self.time_format = time_format
+        self._logger = None
+        self._handler = None
+        self.file_path = None
+
+    def append(self, message, level="信息"):
+        """记录一条日志，返回记录的序号"""
+        now = time.time()
+        record = LogRecord(now, time.strftime(self.time_format, time.localtime(now)), level, message)
+        if self._logger is not None:
+            self._logger.log(LEVELS.get(level, logging.INFO), "[%s] %s", level, message)
+        return self.buffer.append(record)
+
+    def set_file_sink(self, path, max_bytes=5 * 1024 * 1024, backup_count=5):
+        """把日志同时写入滚动日志文件，path 为None时关闭文件输出"""
+        self.close()
+        if path is None:
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes,
+                                                       backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+
+        logger = logging.getLogger(f"sonar_engine.eventlog.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+
+        self._logger = logger
+        self._handler = handler
+        self.file_path = path
+
+    def close(self):
+        if self._handler is not None:
+            self._logger.removeHandler(self._handler)
+            self._handler.close()
+        self._logger = None
+        self._handler = None
+        self.file_path = None
+
+    def records(self, levels=None):
+        """按时间顺序返回保留的记录，可按级别筛选"""
+        if levels is None:
+            return list(self.buffer)
+        return [record for record in self.buffer if record.level in levels]
+
+    def tail(self, count):
+        return self.buffer.tail(count)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __iter__(self):
+        return iter(self.buffer)
@@ -0,0 +1,250 @@
+"""分批流式导出
+
+测量成果（航迹、XYZ测点、水深网格、镶嵌图）由生成器按固定行数逐批产生，每批是 {列名: 数组} 字典，
+写出器逐批追加到文件，因此导出时的内存占用只与批大小有关，与测量规模无关。支持的格式：
+
+    csv      文本，每批一次格式化后写出
+    parquet  Apache Parquet，每批一个行组（需要 pyarrow）
+    npy      列目录：每列一个 .npy 文件，可直接用 np.load(..., mmap_mode='r') 按列读取
+
+导出过程可以报告进度（已写行数/总行数）并随时取消，取消时删除未完成的输出。
+"""
+
+import os
+import struct
+
+import numpy as np
+
+# 扩展名对应的格式，没有扩展名时导出为 npy 列目录
+EXTENSIONS = {".csv": "csv", ".xyz": "csv", ".txt": "csv", ".parquet": "parquet", "": "npy"}
+DEFAULT_BATCH = 250000
+
+
+# ---------------------------------------------------------------- 数据批
+def track_batches(track_x, track_y, timestamps=None, gps_lat=None, gps_lon=None, batch_size=DEFAULT_BATCH):
+    """航迹逐批产生 track_x、track_y（以及 timestamp、gps_lat、gps_lon）列"""
+    columns = {"track_x": track_x, "track_y": track_y, "timestamp": timestamps, "gps_lat": gps_lat,
+               "gps_lon": gps_lon}
+    columns = {name: np.asarray(values, dtype=float) for name, values in columns.items() if values is not None}
+    count = min(len(values) for values in columns.values())
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        yield {name: values[start:stop] for name, values in columns.items()}
+
+
+def grid_batches(values, cell_size=1.0, origin=(0.0, 0.0), batch_size=DEFAULT_BATCH):
+    """水深网格的有效单元按行分批产生 x、y、depth 列（单元中心坐标）"""
+    values = np.asarray(values)
+    rows, cols = values.shape
+    step = max(1, batch_size // max(cols, 1))
+    for row in range(0, rows, step):
+        block = values[row:row + step]
+        block_rows, block_cols = np.nonzero(np.isfinite(block))
+        if len(block_rows) == 0:
+            continue
+        yield {
+            "x": origin[0] + (block_cols + 0.5) * cell_size,
+            "y": origin[1] + (block_rows + row + 0.5) * cell_size,
+            "depth": block[block_rows, block_cols].astype(float),
+        }
+
+
+def sounding_batches(x, y, depth, batch_size=DEFAULT_BATCH):
+    """离散测点逐批产生 x、y、depth 列（跳过无效测点）"""
+    x, y, depth = (np.asarray(v, dtype=float) for v in (x, y, depth))
+    for start in range(0, len(depth), batch_size):
+        batch = {"x": x[start:start + batch_size], "y": y[start:start + batch_size],
+                 "depth": depth[start:start + batch_size]}
+        valid = np.isfinite(batch["x"]) & np.isfinite(batch["y"]) & np.isfinite(batch["depth"])
+        if not np.all(valid):
+            batch = {name: column[valid] for name, column in batch.items()}
+        if len(batch["depth"]):
+            yield batch
+
+
+def mosaic_batches(store, batch_size=DEFAULT_BATCH):
+    """镶嵌图（mosaic.MosaicStore）逐瓦片产生有效单元的 x、y、depth、weight 列"""
+    size = store.tile_size
+    for key, depth in store.iter_tiles():
+        weight = store.read(key[0] * size, key[1] * size, size, size, "weight")
+        xmin, ymin, _, _ = store.tile_bounds(key)
+        rows, cols = np.nonzero(weight > 0)
+        for start in range(0, len(rows), batch_size):
+            row, col = rows[start:start + batch_size], cols[start:start + batch_size]
+            yield {
+                "x": xmin + (col + 0.5) * store.cell_size,
+                "y": ymin + (row + 0.5) * store.cell_size,
+                "depth": depth[row, col].astype(float),
+                "weight": weight[row, col].astype(float),
+            }
+
+
+def grid_rows(values):
+    """网格的有效单元数（用于进度显示的总行数）"""
+    return int(np.count_nonzero(np.isfinite(values)))
+
+
+# ---------------------------------------------------------------- 写出器
+class CsvWriter:
+    """逐批追加的CSV写出器
+
+    每批按列格式拼成一个格式串一次格式化，比逐行写出快得多。float_format 为浮点列的缺省格式，
+    formats 可以为个别列指定格式。
+    """
+
+    FORMATS = {"gps_lat": "%.9f", "gps_lon": "%.9f", "lat": "%.9f", "lon": "%.9f", "timestamp": "%.3f"}
+
+    def __init__(self, filename, float_format="%.3f", formats=None):
+        self.filename = filename
+        self.float_format = float_format
+        self.formats = dict(self.FORMATS, **(formats or {}))
+        self._file = open(filename, 'w', encoding='utf-8', newline='')
+        self._row_format = None
+
+    def write(self, batch):
+        if self._row_format is None:
+            self._file.write(",".join(batch) + "\n")
+            self._row_format = ",".join(
+                self.formats.get(name, "%d" if np.issubdtype(np.asarray(column).dtype, np.integer)
+                                 else self.float_format)
+                for name, column in batch.items()) + "\n"
+        table = np.column_stack([np.asarray(column, dtype=float) for column in batch.values()])
+        self._file.write((self._row_format * len(table)) % tuple(table.ravel().tolist()))
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        self.close()
+        os.remove(self.filename)
+
+
+class ParquetWriter:
+    """逐批写入行组的 Parquet 写出器（需要 pyarrow）"""
+
+    def __init__(self, filename, compression="zstd"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("导出 Parquet 需要安装 pyarrow：pip install pyarrow") from None
+        self.filename = filename
+        self.compression = compression
+        self._writer = None
+
+    def write(self, batch):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(batch)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.filename, table.schema, compression=self.compression)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+class NpyColumnWriter:
+    """列目录写出器：每列追加到一个 .npy 文件，关闭时回填数组长度
+
+    文件头预留固定长度，数据直接追加在后面，不需要预先知道总行数。取消或出错时只删除本次写出的
+    列文件，目录只在由本写出器新建时删除，目录中原有的其他文件不受影响。
+    """
+
+    HEADER_SIZE = 128
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._created = not os.path.isdir(directory)
+        os.makedirs(directory, exist_ok=True)
+        self._paths = []
+        self._files = {}
+        self._dtypes = {}
+        self.rows = 0
+
+    def _header(self, dtype, rows):
+        header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (rows,)})
+        # 魔数(6) + 版本(2) + 头长度(2) + 头，以换行结尾并用空格补齐到固定长度
+        header = header.ljust(self.HEADER_SIZE - 10 - 1) + "\n"
+        return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode('latin1')
+
+    def write(self, batch):
+        for name, column in batch.items():
+            column = np.ascontiguousarray(column)
+            if name not in self._files:
+                path = os.path.join(self.directory, f"{name}.npy")
+                self._files[name] = open(path, 'wb')
+                self._paths.append(path)
+                self._dtypes[name] = column.dtype
+                self._files[name].write(self._header(column.dtype, 0))
+            column.astype(self._dtypes[name], copy=False).tofile(self._files[name])
+        self.rows += len(next(iter(batch.values())))
+
+    def close(self):
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(self._header(self._dtypes[name], self.rows))
+            f.close()
+        self._files = {}
+
+    def discard(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        for path in self._paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self._paths = []
+        if self._created and os.path.isdir(self.directory) and not os.listdir(self.directory):
+            os.rmdir(self.directory)
+
+
+WRITERS = {"csv": CsvWriter, "parquet": ParquetWriter, "npy": NpyColumnWriter}
+
+
+def open_writer(filename, fmt=None):
+    """按格式（缺省按扩展名，无扩展名为 npy 列目录）创建写出器"""
+    if fmt is None:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in EXTENSIONS:
+            raise ValueError(f"无法由扩展名确定导出格式: {extension}（支持 {', '.join(e for e in EXTENSIONS if e)}）")
+        fmt = EXTENSIONS[extension]
+    if fmt not in WRITERS:
+        raise ValueError(f"不支持的导出格式: {fmt}（支持 {', '.join(WRITERS)}）")
+    return WRITERS[fmt](filename)
+
+
+def read_columns(directory, mmap_mode='r'):
+    """读取 npy 列目录，返回 {列名: 数组}（缺省内存映射）"""
+    return {os.path.splitext(name)[0]: np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+            for name in sorted(os.listdir(directory)) if name.endswith(".npy")}
+
+
+def stream_export(batches, filename, fmt=None, total=None, progress=None, cancelled=None):
+    """把数据批逐批写入文件，返回 {"rows": 写出行数, "cancelled": 是否被取消}
+
+    progress(已写行数, 总行数) 在每批写出后调用（total 未知时总行数为None）；cancelled() 返回True时
+    停止导出并删除未完成的文件。
+    """
+    writer = open_writer(filename, fmt)
+    rows = 0
+    try:
+        for batch in batches:
+            if cancelled is not None and cancelled():
+                writer.discard()
+                return {"rows": rows, "cancelled": True}
+            writer.write(batch)
+            rows += len(next(iter(batch.values())))
+            if progress is not None:
+                progress(rows, total)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+    return {"rows": rows, "cancelled": False}
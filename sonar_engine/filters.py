@@ -0,0 +1,71 @@
+"""水深网格滤波器组
+
+所有滤波器先插值填充未探测区域再做卷积，结果中原来的NaN位置保持为NaN。
+"""
+
+import numpy as np
+
+from .analysis import fill_nan
+
+
+def lowpass(values, sigma=1.0):
+    """低通滤波（高斯平滑）"""
+    from scipy import ndimage
+
+    filled, mask = fill_nan(values)
+    return np.where(mask, np.nan, ndimage.gaussian_filter(filled, sigma=sigma))
+
+
+def highpass(values, sigma=2.0, gain=0.5):
+    """高通增强：叠加高频分量以强调边缘"""
+    from scipy import ndimage
+
+    filled, mask = fill_nan(values)
+    high_pass = filled - ndimage.gaussian_filter(filled, sigma=sigma)
+    return np.where(mask, np.nan, filled + high_pass * gain)
+
+
+def median(values, size=3):
+    """中值滤波，移除尖峰噪声"""
+    from scipy import ndimage
+
+    filled, mask = fill_nan(values)
+    return np.where(mask, np.nan, ndimage.median_filter(filled, size=size))
+
+
+def remove_outliers(values, threshold=1.0):
+    """将偏离均值超过 threshold 倍标准差的值替换为中值"""
+    result = np.array(values, dtype=float)
+    valid = ~np.isnan(result)
+    if not np.any(valid):
+        return result
+    mean = np.mean(result[valid])
+    std = np.std(result[valid])
+    outliers = valid & (np.abs(result - mean) > threshold * std)
+    result[outliers] = np.median(result[valid])
+    return result
+
+
+def combined(values, strength=5):
+    """综合过滤：先移除离群值，再做高斯平滑"""
+    return lowpass(remove_outliers(values, 0.2 * strength), sigma=0.3 * strength)
+
+
+# 界面中的滤波名称 → 滤波函数(values, strength)
+FILTERS = {
+    "无过滤": lambda values, strength=5: values,
+    "低通滤波": lambda values, strength=5: lowpass(values, sigma=1.0),
+    "高通滤波": lambda values, strength=5: highpass(values, sigma=2.0),
+    "中值滤波": lambda values, strength=5: median(values, size=3),
+    "噪声过滤": lambda values, strength=5: lowpass(values, sigma=0.5 * strength),
+    "离群值移除": lambda values, strength=5: remove_outliers(values, 0.2 * strength),
+    "平滑处理": lambda values, strength=5: median(values, size=1 + 2 * strength),
+    "综合过滤": combined,
+}
+
+
+def apply_filter(values, name, strength=5):
+    """按名称应用滤波器"""
+    if name not in FILTERS:
+        raise ValueError(f"未知的滤波类型: {name}")
+    return FILTERS[name](values, strength)
@@ -0,0 +1,105 @@
+"""波束归位
+
+把换能器坐标系中的波束（横向波束角 + 垂直深度）按航向、姿态和安装参数换算到平面坐标。
+所有计算按矩阵批量进行：一个数据包的全部波束一次完成，也可以一次处理多个数据包。
+
+坐标约定：
+    平面坐标 x 向东、y 向北，与数据包的 position_x/position_y 相同（坐标系见 crs 模块，单位m）；
+    航向 heading 为真航向，自北顺时针(°)；
+    船体坐标系为 前-右舷-下；横摇 roll 右舷向下为正，纵摇 pitch 船艏向上为正；
+    波束角为换能器坐标系中的横向角，右舷为正；beam_data 为换能器以下的垂直深度。
+"""
+
+import numpy as np
+
+
+def rotation_matrix(heading, pitch=0.0, roll=0.0):
+    """船体坐标系到 北-东-下 坐标系的旋转矩阵 Rz(航向)·Ry(纵摇)·Rx(横摇)
+
+    参数为角度(°)，可以是标量或同形状数组，返回形状为 (..., 3, 3)。
+    """
+    heading, pitch, roll = np.broadcast_arrays(*(np.deg2rad(np.asarray(v, dtype=float))
+                                                 for v in (heading, pitch, roll)))
+    ch, sh = np.cos(heading), np.sin(heading)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cr, sr = np.cos(roll), np.sin(roll)
+
+    matrix = np.empty(heading.shape + (3, 3))
+    matrix[..., 0, 0] = ch * cp
+    matrix[..., 0, 1] = ch * sp * sr - sh * cr
+    matrix[..., 0, 2] = ch * sp * cr + sh * sr
+    matrix[..., 1, 0] = sh * cp
+    matrix[..., 1, 1] = sh * sp * sr + ch * cr
+    matrix[..., 1, 2] = sh * sp * cr - ch * sr
+    matrix[..., 2, 0] = -sp
+    matrix[..., 2, 1] = cp * sr
+    matrix[..., 2, 2] = cp * cr
+    return matrix
+
+
+class Mounting:
+    """换能器安装参数
+
+    lever_arm 为换能器相对定位参考点（GNSS天线等）的偏移 (前, 右舷, 下)，单位m；
+    angles 为换能器相对船体的安装角 (横摇, 纵摇, 航向)，单位°（校准试验得到的偏差）；
+    draft 为定位参考点在水面以下的深度(m)，参考点在水面以上时为负值。
+    """
+
+    def __init__(self, lever_arm=(0.0, 0.0, 0.0), angles=(0.0, 0.0, 0.0), draft=0.0):
+        self.lever_arm = np.asarray(lever_arm, dtype=float)
+        self.angles = tuple(float(v) for v in angles)
+        self.draft = float(draft)
+        roll, pitch, heading = self.angles
+        self.matrix = rotation_matrix(heading, pitch, roll)
+
+    def as_dict(self):
+        return {"lever_arm": [float(v) for v in self.lever_arm], "angles": list(self.angles), "draft": self.draft}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def georeference(x, y, heading, beam_angles, depths, pitch=0.0, roll=0.0, mounting=None):
+    """批量波束归位，返回各波束落点 (x, y, 水面以下深度)
+
+    x、y、heading、pitch、roll 为每个数据包一个值，形状为 (P,) 或标量；beam_angles 与 depths 的
+    形状为 (P, N) 或 (N,)。换能器在水面以下的深度由杠臂和吃水决定，落点深度为其与波束深度之和。
+    """
+    depths = np.asarray(depths, dtype=float)
+    x = np.asarray(x, dtype=float)[..., None]
+    y = np.asarray(y, dtype=float)[..., None]
+    attitude = rotation_matrix(heading, pitch, roll)
+    lever = np.zeros(3)
+    draft = 0.0
+    if mounting is not None:
+        lever = mounting.lever_arm
+        draft = mounting.draft
+        # 换能器 → 船体 → 北-东-下
+        rotation = attitude @ mounting.matrix
+    else:
+        rotation = attitude
+
+    # 换能器坐标系中波束方向为 (0, sinθ, cosθ)，只需旋转矩阵的后两列
+    angle = np.deg2rad(np.asarray(beam_angles, dtype=float))
+    sin_a, cos_a = np.sin(angle), np.cos(angle)
+    # 旋转后第0行为北(y)、第1行为东(x)
+    dx = rotation[..., 1, 1:2] * sin_a + rotation[..., 1, 2:3] * cos_a
+    dy = rotation[..., 0, 1:2] * sin_a + rotation[..., 0, 2:3] * cos_a
+    dz = rotation[..., 2, 1:2] * sin_a + rotation[..., 2, 2:3] * cos_a
+    offset = attitude @ lever
+
+    # 按垂直深度把方向向量缩放为斜距，横摇/纵摇使波束接近水平时结果为NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(dz > 1e-6, depths / dz, np.nan)
+    beam_x = x + offset[..., 1:2] + scale * dx
+    beam_y = y + offset[..., 0:1] + scale * dy
+    beam_z = draft + offset[..., 2:3] + depths
+    return beam_x, beam_y, beam_z
+
+
+def georeference_ping(package, mounting=None):
+    """单个数据包的波束归位，缺少姿态字段时按零横摇/纵摇处理"""
+    return georeference(package['position_x'], package['position_y'], package.get('heading', 0.0),
+                        package['beam_angles'], package['beam_data'],
+                        pitch=package.get('pitch', 0.0), roll=package.get('roll', 0.0), mounting=mounting)
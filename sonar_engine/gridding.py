@@ -0,0 +1,157 @@
+"""水深网格化
+
+将波束测点累积到规则网格上。同一网格单元内的新测点使用指数加权移动平均平滑更新，
+所有计算按测点向量化，不再逐个波束循环。
+"""
+
+import numpy as np
+
+from .georef import georeference_ping
+
+
+def beam_footprint(package, mounting=None):
+    """计算一个数据包中各波束在海底的位置，返回 (x, y, depth)
+
+    数据包已经过归位（含 beam_x/beam_y/beam_z 字段）时直接使用，否则按航向与姿态归位。
+    """
+    if 'beam_x' in package:
+        return package['beam_x'], package['beam_y'], package['beam_z']
+    return georeference_ping(package, mounting)
+
+
+def grid_soundings(x, y, depth, cell_size=None, size=None, bounds=None):
+    """将离散测点按网格求平均（批处理网格化）
+
+    bounds 为 (xmin, ymin, xmax, ymax)，缺省时取测点外包框；cell_size 与 size 二选一，
+    size 为长边网格数。返回 (网格, bounds, 网格尺寸)，无测点的网格为NaN。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    depth = np.asarray(depth, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(depth)
+    x, y, depth = x[valid], y[valid], depth[valid]
+
+    if bounds is None:
+        bounds = (float(np.min(x)), float(np.min(y)), float(np.max(x)), float(np.max(y)))
+    xmin, ymin, xmax, ymax = bounds
+    if cell_size is None:
+        cell_size = max(xmax - xmin, ymax - ymin) / (size or 100)
+    cell_size = cell_size or 1.0
+
+    cols = int(np.floor((xmax - xmin) / cell_size)) + 1
+    rows = int(np.floor((ymax - ymin) / cell_size)) + 1
+    ix = np.floor((x - xmin) / cell_size).astype(np.int64)
+    iy = np.floor((y - ymin) / cell_size).astype(np.int64)
+    inside = (ix >= 0) & (ix < cols) & (iy >= 0) & (iy < rows)
+    flat = iy[inside] * cols + ix[inside]
+
+    sums = np.bincount(flat, weights=depth[inside], minlength=rows * cols)
+    counts = np.bincount(flat, minlength=rows * cols)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        grid = np.where(counts > 0, sums / counts, np.nan)
+    return grid.reshape(rows, cols), bounds, cell_size
+
+
+def cell_index(x, y, size, extent, wrap=True):
+    """将坐标转换为 size×size、边长 extent 的网格索引，返回 (ix, iy, valid)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if wrap:
+        x = x % extent
+        y = y % extent
+    ix = np.floor(x / extent * size).astype(np.int64)
+    iy = np.floor(y / extent * size).astype(np.int64)
+    valid = (ix >= 0) & (ix < size) & (iy >= 0) & (iy < size)
+    return ix, iy, valid
+
+
+def accumulate(grid, flat, depth, alpha):
+    """把测点（扁平网格索引 flat）累积到扁平网格 grid，返回被更新的扁平索引
+
+    同一网格内多个测点先求平均，再与已有值按新数据权重 alpha 做加权平均。
+    """
+    cells, inverse = np.unique(flat, return_inverse=True)
+    sums = np.bincount(inverse, weights=depth)
+    counts = np.bincount(inverse)
+    mean = sums / counts
+
+    current = grid[cells]
+    grid[cells] = np.where(np.isnan(current), mean, (1 - alpha) * current + alpha * mean)
+    return cells
+
+
+class DepthGrid:
+    """规则水深网格
+
+    size 为每边网格数，extent 为网格覆盖的边长(m)。wrap=True 时坐标按 extent 取模，
+    与原界面中 ``(x % 20) / 20 * grid_size`` 的滚动显示方式一致。
+    """
+
+    # add_pings 是否自行归位（为True时处理引擎不预先归位，把安装参数随数据包交给网格）
+    georeferences = False
+
+    def __init__(self, size=100, extent=20.0, alpha=0.3, wrap=True, initial=None):
+        self.size = size
+        self.extent = float(extent)
+        self.alpha = alpha  # 新数据权重
+        self.wrap = wrap
+        if initial is None:
+            # 初始化为NaN表示未探测区域
+            self.values = np.full((size, size), np.nan)
+        else:
+            self.values = np.array(initial, dtype=float)
+
+    @property
+    def cell_size(self):
+        return self.extent / self.size
+
+    def load(self, values):
+        """替换整个网格（加载历史数据或滤波结果）"""
+        values = np.asarray(values, dtype=float)
+        self.values = values
+        self.size = values.shape[0]
+
+    def reset(self):
+        self.values = np.full((self.size, self.size), np.nan)
+
+    def cell_index(self, x, y):
+        """将坐标转换为网格索引，返回 (ix, iy, valid)"""
+        return cell_index(x, y, self.size, self.extent, self.wrap)
+
+    def add_soundings(self, x, y, depth):
+        """将一批测点累积到网格，返回被更新的扁平索引"""
+        depth = np.asarray(depth, dtype=float)
+        ix, iy, valid = self.cell_index(x, y)
+        valid &= np.isfinite(depth)
+        if not np.any(valid):
+            return np.empty(0, dtype=np.int64)
+
+        flat = iy[valid] * self.size + ix[valid]
+        return accumulate(self.values.reshape(-1), flat, depth[valid], self.alpha)
+
+    def add_ping(self, package, mounting=None):
+        """将一个数据包写入网格，返回被更新的扁平索引（未归位的数据包按安装参数 mounting 归位）"""
+        beam_x, beam_y, beam_depth = beam_footprint(package, mounting)
+        cells = self.add_soundings(beam_x, beam_y, beam_depth)
+
+        # 当前位置处记录平均水深
+        ix, iy, valid = self.cell_index(package['position_x'], package['position_y'])
+        if valid:
+            self.values[iy, ix] = np.mean(package['beam_data'])
+            cells = np.append(cells, iy * self.size + ix)
+        return cells
+
+    def add_pings(self, packages, mountings=None):
+        """按顺序将多个数据包写入网格，返回各数据包被更新的扁平索引列表（mountings 与数据包一一对应）"""
+        mountings = mountings if mountings is not None else [None] * len(packages)
+        return [self.add_ping(package, mounting) for package, mounting in zip(packages, mountings)]
+
+    def close(self):
+        """释放网格占用的资源（普通网格无需释放）"""
+
+    def valid_depths(self):
+        return self.values[~np.isnan(self.values)]
+
+    def coverage(self):
+        """已探测网格比例 (0-1)"""
+        return np.count_nonzero(~np.isnan(self.values)) / self.values.size
@@ -0,0 +1,157 @@
+"""处理流程分阶段耗时统计
+
+每个阶段的耗时记录到固定对数分桶的直方图中（1µs~100s，每十倍10个桶），
+记录一次只是一次对数运算和一次计数，不保存原始样本，内存固定。
+分位数（p50/p95/p99）按所在桶的上边界估计，相对误差不超过一个桶宽（约26%）。
+"""
+
+import functools
+import json
+import math
+import threading
+import time
+
+MIN_LATENCY = 1e-6      # s
+BUCKETS_PER_DECADE = 10
+DECADES = 8
+
+
+class LatencyHistogram:
+    """固定对数分桶的耗时直方图"""
+
+    def __init__(self):
+        self.bucket_count = BUCKETS_PER_DECADE * DECADES
+        # 第0个桶收集小于 MIN_LATENCY 的值，最后一个桶收集溢出值
+        self.counts = [0] * (self.bucket_count + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_edge(index):
+        """第 index 个桶的上边界(s)"""
+        return MIN_LATENCY * 10 ** (index / BUCKETS_PER_DECADE)
+
+    def record(self, seconds):
+        if seconds < MIN_LATENCY:
+            index = 0
+        else:
+            index = min(int(math.log10(seconds / MIN_LATENCY) * BUCKETS_PER_DECADE) + 1, self.bucket_count + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """估计第 p 百分位的耗时(s)"""
+        if self.count == 0:
+            return 0.0
+        target = p / 100.0 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count:
+                # 不超过实际观测到的最大值
+                return min(self.bucket_edge(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        """统计摘要，耗时单位为毫秒"""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean * 1000,
+            "min_ms": (self.min if self.count else 0.0) * 1000,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "total_s": self.total,
+        }
+
+    def buckets(self):
+        """非空桶列表 [(上边界ms, 计数)]"""
+        return [(self.bucket_edge(index) * 1000, count) for index, count in enumerate(self.counts) if count]
+
+
+class _StageTimer:
+    __slots__ = ("timers", "name", "start")
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timers.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimers:
+    """各处理阶段的耗时直方图集合（线程安全）
+
+    用法::
+
+        with timers.stage("grid"):
+            ...
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def snapshot(self):
+        """各阶段统计摘要 {阶段: summary}"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def to_dict(self):
+        with self._lock:
+            stages = {}
+            for name, histogram in self.histograms.items():
+                stages[name] = histogram.summary()
+                stages[name]["buckets_ms"] = histogram.buckets()
+        return {"generated": time.strftime("%Y-%m-%dT%H:%M:%S"), "stages": stages}
+
+    def dump_json(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return filename
+
+
+def timed(name):
+    """方法装饰器：把方法的耗时记录到 self.timers 的 name 阶段"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.timers.stage(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,181 @@
+"""水深网格三维模型导出
+
+把水深网格转换为三角网（顶点数组 + 三角形索引数组），支持 OBJ、PLY、STL 和 glTF(.glb) 格式。
+网格与索引全部用 NumPy 批量生成，未探测区域（NaN）留空而不是写成顶点，二进制格式按整块缓冲区一次写入。
+水深向下为正，导出模型的 z 为高程（向上为正，即 -水深）；x、y 为网格单元中心的平面坐标。
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MESH_FORMATS = {".obj": "OBJ", ".ply": "PLY", ".stl": "STL", ".glb": "glTF"}
+
+
+def grid_mesh(values, cell_size=1.0, origin=(0.0, 0.0), step=1, normals=False):
+    """水深网格转换为三角网，返回 (顶点 (N, 3) float32, 三角形 (M, 3) uint32)
+
+    step>1 时每隔 step 个网格取一个顶点（抽稀）。每个网格四边形沿对角线分为两个三角形，
+    只保留三个顶点都有效的三角形，因此无数据区域在模型中是空洞。normals=True 时另外返回
+    由网格中心差分得到的顶点单位法向量 (N, 3)。
+    """
+    values = np.asarray(values, dtype=float)[::step, ::step]
+    rows, cols = values.shape
+    valid = np.isfinite(values)
+
+    # 有效网格按行优先顺序编号为顶点
+    index = np.cumsum(valid.reshape(-1), dtype=np.int64).reshape(rows, cols) - 1
+    row, col = np.nonzero(valid)
+    spacing = cell_size * step
+    vertices = np.empty((len(row), 3), dtype=np.float32)
+    vertices[:, 0] = origin[0] + (col + 0.5) * spacing
+    vertices[:, 1] = origin[1] + (row + 0.5) * spacing
+    vertices[:, 2] = -values[row, col]
+
+    # 四边形的四个角：a=(i,j) b=(i,j+1) c=(i+1,j+1) d=(i+1,j)，三角形 (a,b,c) 与 (a,c,d)
+    a, b = valid[:-1, :-1], valid[:-1, 1:]
+    c, d = valid[1:, 1:], valid[1:, :-1]
+    ia, ib = index[:-1, :-1], index[:-1, 1:]
+    ic, id_ = index[1:, 1:], index[1:, :-1]
+    upper = a & b & c
+    lower = a & c & d
+    faces = np.empty((np.count_nonzero(upper) + np.count_nonzero(lower), 3), dtype=np.uint32)
+    split = np.count_nonzero(upper)
+    for column, corner in enumerate((ia, ib, ic)):
+        faces[:split, column] = corner[upper]
+    for column, corner in enumerate((ia, ic, id_)):
+        faces[split:, column] = corner[lower]
+    if not normals:
+        return vertices, faces
+
+    # 高程 z=-水深 的梯度，无数据的相邻网格按水平处理
+    with np.errstate(invalid='ignore'):
+        grad_y, grad_x = np.gradient(-values, spacing) if min(rows, cols) > 1 else (np.zeros_like(values),) * 2
+    grad_x = np.nan_to_num(grad_x[row, col])
+    grad_y = np.nan_to_num(grad_y[row, col])
+    length = np.sqrt(grad_x ** 2 + grad_y ** 2 + 1)
+    vertex_normal = np.column_stack([-grad_x / length, -grad_y / length, 1 / length]).astype(np.float32)
+    return vertices, faces, vertex_normal
+
+
+def triangle_normals(triangles):
+    """三角形 (M, 3, 3) 的单位法向量 (M, 3) float32"""
+    e1 = triangles[:, 1] - triangles[:, 0]
+    e2 = triangles[:, 2] - triangles[:, 0]
+    normals = np.empty((len(triangles), 3), dtype=np.float32)
+    normals[:, 0] = e1[:, 1] * e2[:, 2] - e1[:, 2] * e2[:, 1]
+    normals[:, 1] = e1[:, 2] * e2[:, 0] - e1[:, 0] * e2[:, 2]
+    normals[:, 2] = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+    length = np.sqrt(np.einsum('ij,ij->i', normals, normals))[:, None]
+    np.divide(normals, length, out=normals, where=length > 0)
+    return normals
+
+
+def write_obj(filename, vertices, faces, chunk=100000):
+    """文本 OBJ，按块格式化后写入"""
+    with open(filename, 'w', encoding='ascii') as f:
+        f.write("# multibeam bathymetry mesh\n")
+        for start in range(0, len(vertices), chunk):
+            block = vertices[start:start + chunk]
+            f.write(("v %.3f %.3f %.3f\n" * len(block)) % tuple(block.ravel().tolist()))
+        for start in range(0, len(faces), chunk):
+            block = faces[start:start + chunk].astype(np.int64) + 1  # OBJ 索引从1开始
+            f.write(("f %d %d %d\n" * len(block)) % tuple(block.ravel().tolist()))
+
+
+def write_ply(filename, vertices, faces):
+    """二进制小端 PLY"""
+    header = (
+        "ply\nformat binary_little_endian 1.0\ncomment multibeam bathymetry mesh\n"
+        f"element vertex {len(vertices)}\nproperty float x\nproperty float y\nproperty float z\n"
+        f"element face {len(faces)}\nproperty list uchar uint vertex_indices\nend_header\n"
+    )
+    face_records = np.empty(len(faces), dtype=[("count", "u1"), ("index", "<u4", 3)])
+    face_records["count"] = 3
+    face_records["index"] = faces
+    with open(filename, 'wb') as f:
+        f.write(header.encode('ascii'))
+        np.ascontiguousarray(vertices, dtype='<f4').tofile(f)
+        face_records.tofile(f)
+
+
+def write_stl(filename, vertices, faces):
+    """二进制 STL（每个三角形独立保存三个顶点与法向量）"""
+    records = np.zeros(len(faces), dtype=[("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+    records["vertices"] = vertices[faces]
+    records["normal"] = triangle_normals(records["vertices"])
+    with open(filename, 'wb') as f:
+        f.write(b"multibeam bathymetry mesh".ljust(80, b" "))
+        f.write(struct.pack("<I", len(faces)))
+        records.tofile(f)
+
+
+def write_glb(filename, vertices, faces, normals=None):
+    """二进制 glTF 2.0 (.glb)：顶点坐标、顶点法向量（可选）与三角形索引放在一个缓冲区中
+
+    glTF 以 y 轴向上，顶点按 (x, 高程, -y) 写入。
+    """
+    flip = np.array([1, 1, -1], dtype=np.float32)
+    blobs = [np.ascontiguousarray(vertices[:, [0, 2, 1]] * flip, dtype='<f4')]
+    if normals is not None:
+        blobs.append(np.ascontiguousarray(normals[:, [0, 2, 1]] * flip, dtype='<f4'))
+    blobs.append(np.ascontiguousarray(faces, dtype='<u4'))
+    positions = blobs[0]
+    offsets = np.cumsum([0] + [blob.nbytes for blob in blobs])
+    length = int(offsets[-1])
+
+    views = [{"buffer": 0, "byteOffset": int(offset), "byteLength": blob.nbytes, "target": 34962}
+             for offset, blob in zip(offsets, blobs)]
+    views[-1]["target"] = 34963
+    attributes = {"POSITION": 0}
+    accessors = [{"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3",
+                  "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()}]
+    if normals is not None:
+        attributes["NORMAL"] = 1
+        accessors.append({"bufferView": 1, "componentType": 5126, "count": len(positions), "type": "VEC3"})
+    accessors.append({"bufferView": len(blobs) - 1, "componentType": 5125, "count": int(faces.size),
+                      "type": "SCALAR"})
+    document = {
+        "asset": {"version": "2.0", "generator": "sonar_engine.mesh"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": attributes, "indices": len(accessors) - 1, "mode": 4}]}],
+        "buffers": [{"byteLength": length}],
+        "bufferViews": views,
+        "accessors": accessors,
+    }
+    # 各数据块须按4字节对齐（float32/uint32 数组本身已对齐）：JSON 用空格补齐
+    text = json.dumps(document, separators=(",", ":")).encode('utf-8')
+    text += b" " * (-len(text) % 4)
+    with open(filename, 'wb') as f:
+        f.write(struct.pack("<III", 0x46546C67, 2, 12 + 8 + len(text) + 8 + length))
+        f.write(struct.pack("<II", len(text), 0x4E4F534A))
+        f.write(text)
+        f.write(struct.pack("<II", length, 0x004E4942))
+        for blob in blobs:
+            blob.tofile(f)
+
+
+WRITERS = {"OBJ": write_obj, "PLY": write_ply, "STL": write_stl, "glTF": write_glb}
+
+
+def export_mesh(filename, values, cell_size=1.0, origin=(0.0, 0.0), step=1, fmt=None):
+    """把水深网格导出为三维模型文件，格式按扩展名（或 fmt）确定，返回 (顶点数, 三角形数)"""
+    if fmt is None:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in MESH_FORMATS:
+            raise ValueError(f"不支持的模型格式: {extension}（支持 {', '.join(MESH_FORMATS)}）")
+        fmt = MESH_FORMATS[extension]
+    mesh = grid_mesh(values, cell_size=cell_size, origin=origin, step=step, normals=fmt == "glTF")
+    if len(mesh[1]) == 0:
+        raise ValueError("水深网格中没有可构成三角形的有效数据")
+    WRITERS[fmt](filename, *mesh)
+    return len(mesh[0]), len(mesh[1])
+
+
+def decimation_step(shape, max_vertices):
+    """使顶点数不超过 max_vertices 的最小抽稀步长"""
+    return max(1, int(np.ceil(np.sqrt(shape[0] * shape[1] / max_vertices))))
@@ -0,0 +1,536 @@
+"""分块磁盘水深镶嵌图
+
+把多次测量合并成一张可以大于内存的水深镶嵌图。镶嵌图按固定大小的瓦片保存在目录中：
+
+    index.json              网格尺寸、瓦片大小、原点、坐标系以及各瓦片的统计信息
+    tiles/r<行>_c<列>.npy   每个瓦片一个 (2, T, T) float32 数组，第0层为加权平均水深，第1层为权重
+
+瓦片以内存映射方式打开，只在读写到时才由操作系统载入；同时打开的瓦片数有上限。
+新测量按网格单元加权平均流式合并，分析与导出逐瓦片进行，整个镶嵌图不会一次读入内存。
+网格行对应 y（向北），列对应 x（向东），与 DepthGrid 相同。XYZ测点文件分块读取测点合并；界面记录的
+测量（``.svy`` 容器，或航迹CSV加同名 ``_depth.npy``）按网格原点与网格尺寸放置后逐单元合并。
+
+用法::
+
+    python -m sonar_engine.mosaic merge mosaic/ data/line_*.csv data/survey_*.svy --cell-size 1.0
+    python -m sonar_engine.mosaic info mosaic/
+    python -m sonar_engine.mosaic export mosaic/ -o mosaic.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from . import crs as crs_module
+from .survey_io import DEFAULT_GRID_EXTENT, grid_geometry, is_container, load_survey, read_crs
+
+INDEX_NAME = "index.json"
+TILE_DIR = "tiles"
+LAYERS = {"depth": 0, "weight": 1}
+GEOGRAPHIC = ('gps_lon', 'lon')
+
+
+class MosaicStore:
+    """内存映射瓦片水深镶嵌图
+
+    path 目录中已有镶嵌图时直接打开（其余参数被忽略），否则按 cell_size（m）、tile_size（每个瓦片的
+    网格数）、origin（网格 (0, 0) 的左下角坐标）和 crs 新建。readonly=True 时只读打开。
+    """
+
+    def __init__(self, path, cell_size=None, tile_size=512, origin=(0.0, 0.0), crs=None, readonly=False,
+                 max_open=64):
+        self.path = path
+        self.readonly = readonly
+        self.max_open = max_open
+        self._open = OrderedDict()
+        self._dirty = False
+
+        index_file = os.path.join(path, INDEX_NAME)
+        if os.path.exists(index_file):
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.cell_size = float(index["cell_size"])
+            self.tile_size = int(index["tile_size"])
+            self.origin = tuple(float(v) for v in index["origin"])
+            self.crs = crs_module.from_string(index["crs"]) if index.get("crs") else None
+            self.tiles = {tuple(int(v) for v in key.split(",")): stats for key, stats in index["tiles"].items()}
+        else:
+            if readonly:
+                raise FileNotFoundError(f"镶嵌图不存在: {path}")
+            if cell_size is None or cell_size <= 0:
+                raise ValueError("新建镶嵌图需要指定正的网格尺寸")
+            self.cell_size = float(cell_size)
+            self.tile_size = int(tile_size)
+            self.origin = (float(origin[0]), float(origin[1]))
+            self.crs = crs
+            self.tiles = {}
+            os.makedirs(os.path.join(path, TILE_DIR), exist_ok=True)
+            self._dirty = True
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.tiles)
+
+    # ------------------------------------------------------------------ 瓦片
+    def tile_path(self, key):
+        return os.path.join(self.path, TILE_DIR, f"r{key[0]}_c{key[1]}.npy")
+
+    def _tile(self, key, create=False):
+        """打开瓦片的内存映射，瓦片不存在且 create=False 时返回None"""
+        tile = self._open.get(key)
+        if tile is not None:
+            self._open.move_to_end(key)
+            return tile
+        if key in self.tiles:
+            tile = np.load(self.tile_path(key), mmap_mode='r' if self.readonly else 'r+')
+        elif create:
+            size = self.tile_size
+            tile = np.lib.format.open_memmap(self.tile_path(key), mode='w+', dtype=np.float32,
+                                             shape=(2, size, size))
+            tile[0] = np.nan
+            tile[1] = 0.0
+            self.tiles[key] = {"count": 0, "min": None, "max": None}
+        else:
+            return None
+
+        self._open[key] = tile
+        while len(self._open) > self.max_open:
+            _, old = self._open.popitem(last=False)
+            if not self.readonly:
+                old.flush()
+        return tile
+
+    def _update_stats(self, key, tile):
+        valid = tile[1] > 0
+        count = int(np.count_nonzero(valid))
+        depth = tile[0][valid]
+        self.tiles[key] = {"count": count,
+                           "min": float(depth.min()) if count else None,
+                           "max": float(depth.max()) if count else None}
+        self._dirty = True
+
+    def keys(self):
+        """已有瓦片的 (行, 列) 编号（按行列排序）"""
+        return sorted(self.tiles)
+
+    def tile_bounds(self, key):
+        """瓦片的平面范围 (xmin, ymin, xmax, ymax)"""
+        extent = self.tile_size * self.cell_size
+        xmin = self.origin[0] + key[1] * extent
+        ymin = self.origin[1] + key[0] * extent
+        return xmin, ymin, xmin + extent, ymin + extent
+
+    def cell_index(self, x, y):
+        """坐标转换为全局网格索引 (行, 列)，可以为负"""
+        row = np.floor((np.asarray(y, dtype=float) - self.origin[1]) / self.cell_size).astype(np.int64)
+        col = np.floor((np.asarray(x, dtype=float) - self.origin[0]) / self.cell_size).astype(np.int64)
+        return row, col
+
+    def window_bounds(self, row, col, rows, cols):
+        """网格窗口的平面范围 (xmin, ymin, xmax, ymax)"""
+        xmin = self.origin[0] + col * self.cell_size
+        ymin = self.origin[1] + row * self.cell_size
+        return xmin, ymin, xmin + cols * self.cell_size, ymin + rows * self.cell_size
+
+    def extent(self):
+        """有数据的网格范围 (起始行, 起始列, 行数, 列数)，没有数据时返回None"""
+        keys = [key for key, stats in self.tiles.items() if stats["count"]]
+        if not keys:
+            return None
+        size = self.tile_size
+        rows = [key[0] for key in keys]
+        cols = [key[1] for key in keys]
+        row, col = min(rows) * size, min(cols) * size
+        return row, col, (max(rows) + 1) * size - row, (max(cols) + 1) * size - col
+
+    # ------------------------------------------------------------------ 窗口读写
+    def _window_tiles(self, row, col, rows, cols):
+        """窗口覆盖的各瓦片：(瓦片编号, 瓦片内切片, 窗口内切片)"""
+        size = self.tile_size
+        for tile_row in range(row // size, (row + rows - 1) // size + 1):
+            r0 = max(row, tile_row * size)
+            r1 = min(row + rows, (tile_row + 1) * size)
+            for tile_col in range(col // size, (col + cols - 1) // size + 1):
+                c0 = max(col, tile_col * size)
+                c1 = min(col + cols, (tile_col + 1) * size)
+                inner = (slice(r0 - tile_row * size, r1 - tile_row * size),
+                         slice(c0 - tile_col * size, c1 - tile_col * size))
+                outer = (slice(r0 - row, r1 - row), slice(c0 - col, c1 - col))
+                yield (tile_row, tile_col), inner, outer
+
+    def read(self, row, col, rows, cols, layer="depth"):
+        """读取网格窗口，layer 为 "depth"（无数据为NaN）或 "weight"（无数据为0）"""
+        index = LAYERS[layer]
+        result = np.full((rows, cols), np.nan if layer == "depth" else 0.0, dtype=np.float32)
+        for key, inner, outer in self._window_tiles(row, col, rows, cols):
+            tile = self._tile(key)
+            if tile is not None:
+                result[outer] = tile[(index,) + inner]
+        return result
+
+    def read_bounds(self, xmin, ymin, xmax, ymax, layer="depth"):
+        """按平面范围读取，返回 (网格, 实际范围)"""
+        row0, col0 = self.cell_index(xmin, ymin)
+        row1, col1 = self.cell_index(xmax, ymax)
+        rows, cols = int(row1 - row0) + 1, int(col1 - col0) + 1
+        return self.read(int(row0), int(col0), rows, cols, layer), self.window_bounds(row0, col0, rows, cols)
+
+    def write(self, row, col, values, weights=None):
+        """用 values 覆盖网格窗口（NaN 表示清除该单元），weights 缺省时有效单元权重为1"""
+        values = np.asarray(values, dtype=np.float32)
+        valid = np.isfinite(values)
+        if weights is None:
+            weights = valid.astype(np.float32)
+        else:
+            weights = np.where(valid, np.asarray(weights, dtype=np.float32), 0.0)
+        rows, cols = values.shape
+        for key, inner, outer in self._window_tiles(row, col, rows, cols):
+            tile = self._tile(key, create=bool(valid[outer].any()))
+            if tile is None:
+                continue
+            tile[(0,) + inner] = np.where(valid[outer], values[outer], np.nan)
+            tile[(1,) + inner] = weights[outer]
+            self._update_stats(key, tile)
+
+    # ------------------------------------------------------------------ 合并
+    def merge_soundings(self, x, y, depth, weights=None):
+        """把一批测点按网格单元加权平均合并到镶嵌图，返回合并的测点数
+
+        同一单元内的测点与已有值按权重（缺省每个测点为1）求加权平均，可以多次调用分块合并。
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        depth = np.asarray(depth, dtype=float)
+        weights = np.ones_like(depth) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float),
+                                                                               depth.shape)
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(depth) & (weights > 0)
+        if not np.any(valid):
+            return 0
+        row, col = self.cell_index(x[valid], y[valid])
+        depth, weights = depth[valid], weights[valid]
+
+        # 按瓦片分组，每个瓦片内用 bincount 汇总
+        size = self.tile_size
+        tile_row, tile_col = row // size, col // size
+        base_row, base_col = tile_row.min(), tile_col.min()
+        span = int(tile_col.max() - base_col) + 1
+        tile_id = (tile_row - base_row) * span + (tile_col - base_col)
+        order = np.argsort(tile_id, kind='stable')
+        tile_id = tile_id[order]
+        starts = np.flatnonzero(np.r_[True, tile_id[1:] != tile_id[:-1]])
+        ends = np.r_[starts[1:], len(tile_id)]
+
+        local = (row - tile_row * size) * size + (col - tile_col * size)
+        local, depth, weights = local[order], depth[order], weights[order]
+        for start, end in zip(starts, ends):
+            key = (int(base_row + tile_id[start] // span), int(base_col + tile_id[start] % span))
+            tile = self._tile(key, create=True)
+            cells, inverse = np.unique(local[start:end], return_inverse=True)
+            w = np.bincount(inverse, weights=weights[start:end])
+            s = np.bincount(inverse, weights=weights[start:end] * depth[start:end])
+
+            mean = tile[0].reshape(-1)
+            weight = tile[1].reshape(-1)
+            old_w = weight[cells].astype(float)
+            old_mean = np.nan_to_num(mean[cells].astype(float))
+            total = old_w + w
+            mean[cells] = (old_mean * old_w + s) / total
+            weight[cells] = total
+            self._update_stats(key, tile)
+        return int(len(depth))
+
+    def merge_grid(self, values, xmin, ymin, cell_size=None, weight=1.0):
+        """合并一个规则网格（左下角为 (xmin, ymin)），各有效单元以其中心作为权重为 weight 的测点"""
+        values = np.asarray(values, dtype=float)
+        cell_size = cell_size or self.cell_size
+        rows, cols = values.shape
+        merged = 0
+        # 按行分块，避免为大网格一次生成全部单元坐标
+        step = max(1, 1000000 // max(cols, 1))
+        x = xmin + (np.arange(cols) + 0.5) * cell_size
+        for row in range(0, rows, step):
+            block = values[row:row + step]
+            y = ymin + (np.arange(row, row + len(block)) + 0.5) * cell_size
+            merged += self.merge_soundings(np.broadcast_to(x, block.shape), np.broadcast_to(y[:, None], block.shape),
+                                           block, weight)
+        return merged
+
+    def merge_stream(self, chunks, progress=None):
+        """合并 (x, y, depth) 或 (x, y, depth, weights) 测点块的迭代器，返回合并的测点数"""
+        merged = 0
+        for chunk in chunks:
+            merged += self.merge_soundings(*chunk)
+            if progress is not None:
+                progress(merged)
+        self.flush()
+        return merged
+
+    def _check_crs(self, survey_crs):
+        """测量的坐标系须与镶嵌图一致，返回合并时使用的坐标系"""
+        if survey_crs is not None and self.crs is not None and survey_crs != self.crs:
+            raise ValueError(f"测量文件坐标系 {survey_crs.to_string()} 与镶嵌图坐标系 {self.crs.to_string()} 不一致")
+        return survey_crs or self.crs
+
+    def merge_survey(self, filename, chunksize=1000000, weight=1.0, progress=None, grid_extent=DEFAULT_GRID_EXTENT):
+        """合并一个测量文件，返回合并的测点（网格单元）数
+
+        XYZ测点文件（x/y 或 track_x/track_y 或经纬度列，加 depth 列）分块读取合并；``.svy`` 容器和不含
+        depth 列的航迹CSV（同名 ``_depth.npy`` 网格）按记录的水深网格合并，见 merge_recorded。
+        测量文件带坐标系时须与镶嵌图一致，镶嵌图尚未指定坐标系时采用测量文件的坐标系；
+        只有经纬度列时按镶嵌图的坐标系投影，都没有坐标系时取测点所在的UTM投影带。
+        """
+        import pandas as pd
+
+        if is_container(filename) or 'depth' not in pd.read_csv(filename, nrows=0).columns:
+            return self.merge_recorded(filename, weight=weight, grid_extent=grid_extent)
+
+        crs = self._check_crs(read_crs(filename))
+        x_col, y_col = sounding_columns(filename)
+        if crs is None and x_col in GEOGRAPHIC:
+            head = pd.read_csv(filename, usecols=[x_col, y_col], nrows=1000)
+            crs = crs_module.auto_utm(head[y_col].to_numpy(dtype=float), head[x_col].to_numpy(dtype=float))
+        if self.crs is None and crs is not None:
+            self.crs = crs
+            self._dirty = True
+        return self.merge_stream(read_soundings(filename, chunksize, crs=crs, weight=weight), progress)
+
+    def merge_recorded(self, filename, weight=1.0, grid_extent=DEFAULT_GRID_EXTENT):
+        """合并界面记录的测量（``.svy`` 或航迹CSV加 ``_depth.npy``）的水深网格，返回合并的网格单元数
+
+        网格按记录的原点与网格尺寸放置（原有布局不保存网格尺寸，按边长 grid_extent 计算），
+        各有效单元以其中心作为测点合并，网格尺寸与镶嵌图不同时按单元中心重新分配到镶嵌图网格。
+        """
+        survey = load_survey(filename)
+        if survey['depth_data'] is None:
+            raise ValueError("没有可合并的水深数据（缺少depth列、_depth.npy文件或容器中的网格）")
+        crs = self._check_crs(survey['crs'])
+        if self.crs is None and crs is not None:
+            self.crs = crs
+            self._dirty = True
+        (xmin, ymin), cell_size = grid_geometry(survey, grid_extent)
+        merged = self.merge_grid(survey['depth_data'], xmin, ymin, cell_size, weight)
+        self.flush()
+        return merged
+
+    # ------------------------------------------------------------------ 流式访问
+    def iter_tiles(self, layer="depth", halo=0):
+        """逐瓦片产生 (瓦片编号, 网格)，halo>0 时网格四周带 halo 个相邻单元（用于坡度等模板运算）"""
+        size = self.tile_size
+        for key in self.keys():
+            if not self.tiles[key]["count"]:
+                continue
+            if halo:
+                block = self.read(key[0] * size - halo, key[1] * size - halo, size + 2 * halo, size + 2 * halo, layer)
+            else:
+                block = np.array(self._tile(key)[LAYERS[layer]])
+            yield key, block
+
+    def summary(self):
+        """逐瓦片累计的水深统计，字段与 analysis.summarize 相同"""
+        count, total, total_sq = 0, 0.0, 0.0
+        for _, block in self.iter_tiles():
+            valid = block[np.isfinite(block)].astype(float)
+            count += len(valid)
+            total += float(valid.sum())
+            total_sq += float(np.dot(valid, valid))
+        if count == 0:
+            return {"mean": np.nan, "max": np.nan, "min": np.nan, "std": np.nan, "count": 0}
+        mean = total / count
+        stats = [s for s in self.tiles.values() if s["count"]]
+        return {
+            "mean": mean,
+            "max": max(s["max"] for s in stats),
+            "min": min(s["min"] for s in stats),
+            "std": float(np.sqrt(max(total_sq / count - mean * mean, 0.0))),
+            "count": count,
+        }
+
+    def histogram(self, bins=30):
+        """逐瓦片累计的水深直方图，返回 (频次, 分箱边界)"""
+        stats = [s for s in self.tiles.values() if s["count"]]
+        if not stats:
+            return np.zeros(bins, dtype=np.int64), np.linspace(0.0, 1.0, bins + 1)
+        edges = np.linspace(min(s["min"] for s in stats), max(s["max"] for s in stats), bins + 1)
+        counts = np.zeros(bins, dtype=np.int64)
+        for _, block in self.iter_tiles():
+            counts += np.histogram(block[np.isfinite(block)], bins=edges)[0]
+        return counts, edges
+
+    def overview(self, max_size=1000):
+        """按步长抽稀的全图概览，返回 (网格, 范围)，用于显示"""
+        extent = self.extent()
+        if extent is None:
+            return np.full((0, 0), np.nan, dtype=np.float32), None
+        row, col, rows, cols = extent
+        step = max(1, int(np.ceil(max(rows, cols) / max_size)))
+        result = np.full(((rows + step - 1) // step, (cols + step - 1) // step), np.nan, dtype=np.float32)
+        for key, inner, outer in self._window_tiles(row, col, rows, cols):
+            tile = self._tile(key)
+            if tile is None:
+                continue
+            # 只取落在抽稀格点上的单元
+            r0, c0 = outer[0].start, outer[1].start
+            first_r, first_c = -r0 % step, -c0 % step
+            block = tile[0, inner[0].start + first_r:inner[0].stop:step, inner[1].start + first_c:inner[1].stop:step]
+            result[(r0 + first_r) // step:(r0 + first_r) // step + block.shape[0],
+                   (c0 + first_c) // step:(c0 + first_c) // step + block.shape[1]] = block
+        return result, self.window_bounds(row, col, rows, cols)
+
+    def export_xyz(self, filename, fmt=None, progress=None, cancelled=None):
+        """逐瓦片导出有效单元中心的 x,y,depth,weight 列（格式见 export 模块），返回导出的单元数"""
+        from .export import mosaic_batches, stream_export
+
+        total = sum(stats["count"] for stats in self.tiles.values())
+        result = stream_export(mosaic_batches(self), filename, fmt, total=total, progress=progress,
+                               cancelled=cancelled)
+        return result["rows"]
+
+    def export_grid(self, filename, window=None):
+        """把窗口（缺省为有数据的全部范围）逐瓦片写入 .npy 文件，返回 (形状, 范围)"""
+        window = window or self.extent()
+        if window is None:
+            raise ValueError("镶嵌图中没有数据")
+        row, col, rows, cols = window
+        output = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float32, shape=(rows, cols))
+        output[:] = np.nan
+        for key, inner, outer in self._window_tiles(row, col, rows, cols):
+            tile = self._tile(key)
+            if tile is not None:
+                output[outer] = tile[(0,) + inner]
+        output.flush()
+        del output
+        return (rows, cols), self.window_bounds(row, col, rows, cols)
+
+    # ------------------------------------------------------------------ 持久化
+    def flush(self):
+        """写回已打开的瓦片与索引"""
+        if self.readonly:
+            return
+        for tile in self._open.values():
+            tile.flush()
+        if not self._dirty:
+            return
+        index = {
+            "cell_size": self.cell_size,
+            "tile_size": self.tile_size,
+            "origin": list(self.origin),
+            "crs": self.crs.to_string() if self.crs is not None else None,
+            "tiles": {f"{key[0]},{key[1]}": stats for key, stats in sorted(self.tiles.items())},
+        }
+        # 先写临时文件再替换，避免中断时索引损坏
+        index_file = os.path.join(self.path, INDEX_NAME)
+        with open(index_file + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(index_file + ".tmp", index_file)
+        self._dirty = False
+
+    def close(self):
+        self.flush()
+        self._open.clear()
+
+
+def sounding_columns(filename):
+    """XYZ测点文件的平面坐标列名 (x列, y列)，经纬度文件为 (经度列, 纬度列)"""
+    import pandas as pd
+
+    columns = pd.read_csv(filename, nrows=0).columns
+    if 'depth' not in columns:
+        raise ValueError("文件中没有depth列（不是XYZ测点文件）")
+    for x_col, y_col in (('x', 'y'), ('track_x', 'track_y'), ('gps_lon', 'gps_lat'), ('lon', 'lat')):
+        if x_col in columns and y_col in columns:
+            return x_col, y_col
+    raise ValueError("文件格式不正确，需要包含'x'/'y'、'track_x'/'track_y'或经纬度列")
+
+
+def read_soundings(filename, chunksize=1000000, crs=None, weight=1.0):
+    """分块读取XYZ测点文件，产生 (x, y, depth, weights) 测点块，经纬度按 crs 投影"""
+    import pandas as pd
+
+    x_col, y_col = sounding_columns(filename)
+    if x_col in GEOGRAPHIC and crs is None:
+        raise ValueError("经纬度测点需要指定坐标系")
+    for chunk in pd.read_csv(filename, usecols=[x_col, y_col, 'depth'], chunksize=chunksize):
+        x = chunk[x_col].to_numpy(dtype=float)
+        y = chunk[y_col].to_numpy(dtype=float)
+        if x_col in GEOGRAPHIC:
+            x, y = crs.forward(y, x)
+        yield x, y, chunk['depth'].to_numpy(dtype=float), weight
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分块磁盘水深镶嵌图")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge = commands.add_parser("merge", help="把测量文件合并到镶嵌图（不存在时新建）")
+    merge.add_argument("mosaic", help="镶嵌图目录")
+    merge.add_argument("surveys", nargs="+", help="XYZ测点CSV、航迹CSV（同名 _depth.npy）或 .svy 测量文件")
+    merge.add_argument("--cell-size", type=float, default=1.0, help="新建时的网格尺寸(m)")
+    merge.add_argument("--tile-size", type=int, default=512, help="新建时每个瓦片的网格数")
+    merge.add_argument("--crs", default=None, help="新建时的坐标系，例如 utm:50N，缺省取测量文件的坐标系")
+    merge.add_argument("--weight", type=float, default=1.0, help="测点权重")
+    merge.add_argument("--chunk-size", type=int, default=1000000, help="每次读取的测点数")
+    merge.add_argument("--grid-extent", type=float, default=DEFAULT_GRID_EXTENT,
+                       help="航迹CSV记录的水深网格的边长(m)，用于计算网格尺寸")
+
+    info = commands.add_parser("info", help="显示镶嵌图范围与水深统计")
+    info.add_argument("mosaic", help="镶嵌图目录")
+
+    export = commands.add_parser("export", help="导出有效单元的 x,y,depth,weight 列，或导出 .npy 网格")
+    export.add_argument("mosaic", help="镶嵌图目录")
+    export.add_argument("-o", "--output", required=True,
+                        help="输出文件：.npy 导出网格，.csv/.parquet 导出XYZ，无扩展名导出 npy 列目录")
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        crs = crs_module.from_string(args.crs) if args.crs else None
+        with MosaicStore(args.mosaic, cell_size=args.cell_size, tile_size=args.tile_size, crs=crs) as store:
+            failed = 0
+            for path in args.surveys:
+                started = time.perf_counter()
+                try:
+                    count = store.merge_survey(path, chunksize=args.chunk_size, weight=args.weight,
+                                               grid_extent=args.grid_extent)
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    print(f"{path} 失败: {e}", file=sys.stderr)
+                    continue
+                print(f"{path}: {count} 个测点 ({time.perf_counter() - started:.2f}s)")
+            print(f"镶嵌图共 {len(store)} 个瓦片")
+        return 1 if failed else 0
+
+    if not os.path.exists(os.path.join(args.mosaic, INDEX_NAME)):
+        print(f"镶嵌图不存在: {args.mosaic}", file=sys.stderr)
+        return 1
+    with MosaicStore(args.mosaic, readonly=True) as store:
+        if args.command == "info":
+            crs = store.crs.to_string() if store.crs is not None else "未指定"
+            print(f"网格尺寸 {store.cell_size} m，瓦片 {store.tile_size}×{store.tile_size}，"
+                  f"共 {len(store)} 个瓦片，坐标系 {crs}")
+            extent = store.extent()
+            if extent is not None:
+                print("范围: " + ", ".join(f"{v:.1f}" for v in store.window_bounds(*extent)))
+            stats = store.summary()
+            print(f"有效单元 {stats['count']}，平均水深 {stats['mean']:.2f} m，"
+                  f"最浅 {stats['min']:.2f} m，最深 {stats['max']:.2f} m，标准差 {stats['std']:.2f} m")
+        elif args.output.endswith(".npy"):
+            shape, bounds = store.export_grid(args.output)
+            print(f"已导出 {shape[0]}×{shape[1]} 网格到 {args.output}")
+        else:
+            count = store.export_xyz(args.output)
+            print(f"已导出 {count} 个单元到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
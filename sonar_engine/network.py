@@ -0,0 +1,406 @@
+"""本机网络数据包接收与声呐模拟发送
+
+数据包以二进制报文传输：定长报头（HEADER_DTYPE，小端）后接 beams 个 float32 波束角和 beams 个
+float32 水深。UDP 每个报文一个数据包；TCP 按报头中的波束数连续读取。接收端用 ``np.frombuffer``
+直接解析报文，得到与 PingSimulator.next_ping 相同结构的数据包（另带 sequence 序号）。
+
+PingServer 在后台线程中运行 asyncio 事件循环，同时监听 UDP 与 TCP，解析后的数据包追加到
+collections.deque 队列，由使用方（界面的采集队列、serve 命令）批量取出交给 SonarEngine.ingest_many。
+emulate 是独立运行的模拟声呐，按指定速率发送场景模拟器生成的数据包，用于不接设备时按实际网络速率
+测试解析与网格化::
+
+    python -m sonar_engine.network serve --port 5600 --grid-size 1000
+    python -m sonar_engine.network emulate --port 5600 --rate 500 --beams 512 --sources 2
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5600
+MAGIC = b"SPNG"
+VERSION = 1
+QUALITY_CODES = ("高精度", "标准", "快速扫描")
+RECEIVE_BUFFER = 4 * 1024 * 1024  # UDP 接收缓冲区，高速率时减少丢包
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"), ("version", "<u2"), ("source", "<u2"), ("sequence", "<u4"), ("beams", "<u4"),
+    ("timestamp", "<f8"), ("position_x", "<f8"), ("position_y", "<f8"), ("heading", "<f8"),
+    ("roll", "<f8"), ("pitch", "<f8"), ("gps_lat", "<f8"), ("gps_lon", "<f8"), ("noise_level", "<f8"),
+    ("quality", "u1"), ("reserved", "V7"),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+MAX_DATAGRAM = 65507
+MAX_BEAMS = (MAX_DATAGRAM - HEADER_SIZE) // 8
+INGEST_BATCH = 256  # serve 每次最多处理的数据包数，处理跟不上时仍能按时输出统计
+QUEUE_LIMIT = 10000  # 接收队列的最大长度，处理跟不上时丢弃最早的数据包
+
+
+def source_name(index):
+    """报头中的数据源编号对应的数据源名称，0 为主数据源（数据包不带 source 字段）"""
+    return None if index == 0 else f"数据源{index + 1}"
+
+
+# ---------------------------------------------------------------- 报文格式
+def encode_ping(package, sequence=0, source=0):
+    """把数据包编码为报文（bytearray），source 为数据源编号"""
+    beam_angles = np.asarray(package['beam_angles'], dtype='<f4')
+    beam_data = np.asarray(package['beam_data'], dtype='<f4')
+    beams = len(beam_data)
+    if beams > MAX_BEAMS:
+        raise ValueError(f"波束数超过单个报文的上限 {MAX_BEAMS}")
+    quality = package.get('quality', QUALITY_CODES[0])
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header[0] = (MAGIC, VERSION, source, sequence, beams, package.get('timestamp', time.time()),
+                 package['position_x'], package['position_y'], package.get('heading', 0.0),
+                 package.get('roll', 0.0), package.get('pitch', 0.0),
+                 package.get('gps_lat', np.nan), package.get('gps_lon', np.nan), package.get('noise_level', 0.0),
+                 QUALITY_CODES.index(quality) if quality in QUALITY_CODES else 0, b"")
+    message = bytearray(HEADER_SIZE + 8 * beams)
+    message[:HEADER_SIZE] = header.tobytes()
+    message[HEADER_SIZE:HEADER_SIZE + 4 * beams] = beam_angles.tobytes()
+    message[HEADER_SIZE + 4 * beams:] = beam_data.tobytes()
+    return message
+
+
+def message_size(header):
+    """由报头计算整个报文的长度"""
+    return HEADER_SIZE + 8 * int(np.frombuffer(header, HEADER_DTYPE, count=1)["beams"][0])
+
+
+def decode_ping(message):
+    """解析报文，返回数据包；格式不对时抛出 ValueError"""
+    if len(message) < HEADER_SIZE:
+        raise ValueError("报文长度不足")
+    (magic, version, source, sequence, beams, timestamp, position_x, position_y, heading, roll, pitch,
+     gps_lat, gps_lon, noise_level, quality, _) = np.frombuffer(message, HEADER_DTYPE, count=1)[0].item()
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("不是数据包报文")
+    if len(message) != HEADER_SIZE + 8 * beams:
+        raise ValueError(f"报文长度 {len(message)} 与波束数 {beams} 不符")
+    values = np.frombuffer(message, '<f4', count=2 * beams, offset=HEADER_SIZE).astype(float)
+    package = {
+        'timestamp': timestamp,
+        'position_x': position_x,
+        'position_y': position_y,
+        'heading': heading,
+        'roll': roll,
+        'pitch': pitch,
+        'gps_lat': gps_lat,
+        'gps_lon': gps_lon,
+        'beam_angles': values[:beams],
+        'beam_data': values[beams:],
+        'quality': QUALITY_CODES[quality] if quality < len(QUALITY_CODES) else QUALITY_CODES[0],
+        'noise_level': noise_level,
+        'sequence': sequence,
+    }
+    name = source_name(source)
+    if name is not None:
+        package['source'] = name
+    return package
+
+
+# ---------------------------------------------------------------- 接收
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.receive(data)
+
+
+class PingServer:
+    """在后台线程中接收 UDP/TCP 数据包的 asyncio 服务
+
+    解析后的数据包追加到 queue（缺省新建一个最多 QUEUE_LIMIT 个数据包的 deque），deque 的追加与取出是
+    线程安全的；队列已满时 deque 丢弃最早的数据包。counters 记录收到的报文数、字节数、格式错误数、
+    按序号推算的网络丢包数和因队列已满被丢弃的数据包数（dropped）。
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, udp=True, tcp=True, queue=None):
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.tcp = tcp
+        self.queue = queue if queue is not None else deque(maxlen=QUEUE_LIMIT)
+        self.counters = {"packets": 0, "bytes": 0, "errors": 0, "lost": 0, "dropped": 0}
+        self.last_received = None
+        self._sequences = {}
+        self._streams = set()
+        self._transport = self._tcp_server = None
+        self._loop = None
+        self._thread = None
+
+    def receive(self, message):
+        """解析一个报文并放入队列（在事件循环线程中调用）"""
+        counters = self.counters
+        counters["bytes"] += len(message)
+        try:
+            package = decode_ping(message)
+        except ValueError:
+            counters["errors"] += 1
+            return
+        counters["packets"] += 1
+        self.last_received = time.time()
+
+        source = package.get('source')
+        sequence = package['sequence']
+        last = self._sequences.get(source)
+        if last is not None and sequence > last + 1:
+            counters["lost"] += sequence - last - 1
+        self._sequences[source] = sequence
+        queue = self.queue
+        if queue.maxlen is not None and len(queue) >= queue.maxlen:
+            counters["dropped"] += 1
+        queue.append(package)
+
+    async def _handle_stream(self, reader, writer):
+        task = asyncio.current_task()
+        self._streams.add(task)
+        try:
+            while True:
+                header = await reader.readexactly(HEADER_SIZE)
+                size = message_size(header)
+                if header[:4] != MAGIC or size - HEADER_SIZE > 8 * MAX_BEAMS:
+                    # 流中的位置已经错乱，断开连接
+                    self.counters["errors"] += 1
+                    break
+                self.receive(header + await reader.readexactly(size - HEADER_SIZE))
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self._streams.discard(task)
+            writer.close()
+
+    async def _open(self):
+        loop = asyncio.get_running_loop()
+        if self.udp:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+            try:
+                sock.bind((self.host, self.port))
+            except OSError:
+                sock.close()
+                raise
+            self._transport, _ = await loop.create_datagram_endpoint(lambda: _DatagramProtocol(self), sock=sock)
+        if self.tcp:
+            self._tcp_server = await asyncio.start_server(self._handle_stream, self.host, self.port)
+
+    async def _close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            streams = list(self._streams)
+            for task in streams:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+
+    def _run(self, ready):
+        loop = self._loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._open())
+        except OSError as e:
+            self._error = e
+            loop.run_until_complete(self._close())
+            loop.close()
+            ready.set()
+            return
+        ready.set()
+        try:
+            loop.run_forever()
+            loop.run_until_complete(self._close())
+        finally:
+            loop.close()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """启动接收线程，端口无法监听时抛出 OSError"""
+        self._error = None
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="PingServer", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------------------------------------------------------------- 模拟发送
+async def _emulate(host, port, protocol, rate, duration, simulators, pool):
+    loop = asyncio.get_running_loop()
+    if protocol == "tcp":
+        _, writer = await asyncio.open_connection(host, port)
+        send = writer.write
+    else:
+        transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+        send = transport.sendto
+
+    # pool > 0 时预先生成并编码 pool 个数据包循环发送（只更新序号和时间戳），发送速率不受模拟器限制
+    pools = []
+    for simulator in simulators:
+        messages = [encode_ping(simulator.next_ping()) for _ in range(pool)]
+        pools.append([(message, np.frombuffer(message, HEADER_DTYPE, count=1)) for message in messages])
+
+    sent = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            elapsed = time.perf_counter() - started
+            if duration is not None and elapsed >= duration:
+                break
+            due = int(elapsed * rate) + 1 if rate > 0 else sent + 64
+            while sent < due:
+                for source, simulator in enumerate(simulators):
+                    if pool:
+                        message, header = pools[source][sent % pool]
+                        header["source"] = source
+                        header["sequence"] = sent
+                        header["timestamp"] = time.time()
+                    else:
+                        message = encode_ping(simulator.next_ping(), sequence=sent, source=source)
+                    send(message)
+                sent += 1
+            if protocol == "tcp":
+                await writer.drain()
+            await asyncio.sleep(0.001 if rate > 0 else 0)
+    finally:
+        if protocol == "tcp":
+            writer.close()
+            await writer.wait_closed()
+        else:
+            transport.close()
+    return sent * len(simulators)
+
+
+def emulate(host=DEFAULT_HOST, port=DEFAULT_PORT, protocol="udp", rate=100.0, duration=10.0, scenario=None,
+            pool=0):
+    """模拟声呐：按每个数据源 rate 个数据包/秒（0 为尽快发送）发送 duration 秒，返回发送的数据包数"""
+    from .scenario import Scenario
+
+    scenario = scenario if scenario is not None else Scenario()
+    simulators = scenario.simulators(wall_clock=True)
+    return asyncio.run(_emulate(host, port, protocol, rate, duration, simulators, pool))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本机网络数据包接收与模拟声呐")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="接收数据包并网格化，每秒打印吞吐量")
+    serve.add_argument("--host", default=DEFAULT_HOST, help="监听地址")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="UDP/TCP 端口")
+    serve.add_argument("--protocol", choices=["udp", "tcp", "both"], default="both", help="监听的协议")
+    serve.add_argument("--grid-size", type=int, default=100, help="水深网格尺寸")
+    serve.add_argument("--extent", type=float, default=20.0, help="网格边长(m)")
+    serve.add_argument("--grid-workers", type=int, default=0, help="多进程网格化的工作进程数（0为单进程）")
+    serve.add_argument("--duration", type=float, default=None, help="运行时长(s)，缺省一直运行")
+
+    emulator = commands.add_parser("emulate", help="模拟声呐，按指定速率发送数据包")
+    emulator.add_argument("--host", default=DEFAULT_HOST, help="目标地址")
+    emulator.add_argument("--port", type=int, default=DEFAULT_PORT, help="目标端口")
+    emulator.add_argument("--protocol", choices=["udp", "tcp"], default="udp", help="发送协议")
+    emulator.add_argument("--rate", type=float, default=100.0, help="每个数据源的数据包速率(ping/s)，0为尽快发送")
+    emulator.add_argument("--duration", type=float, default=10.0, help="发送时长(s)")
+    emulator.add_argument("--beams", type=int, default=256, help="波束数")
+    emulator.add_argument("--sources", type=int, default=1, help="数据源（探头/测量船）数")
+    emulator.add_argument("--seed", type=int, default=None, help="随机种子")
+    emulator.add_argument("--pool", type=int, default=0, help="预先生成的数据包数（循环发送），0为实时生成")
+    args = parser.parse_args(argv)
+
+    if args.command == "emulate":
+        from .scenario import Scenario
+
+        if args.beams > MAX_BEAMS:
+            print(f"波束数超过单个报文的上限 {MAX_BEAMS}", file=sys.stderr)
+            return 1
+        scenario = Scenario(seed=args.seed, beams=args.beams, sources=args.sources)
+        started = time.perf_counter()
+        try:
+            sent = emulate(args.host, args.port, args.protocol, args.rate, args.duration, scenario, args.pool)
+        except OSError as e:
+            print(f"发送失败: {e}", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - started
+        print(f"已发送 {sent} 个数据包（{sent / elapsed:.0f} ping/s，种子 {scenario.seed}）")
+        return 0
+
+    from .engine import SonarEngine
+
+    engine = SonarEngine(grid_size=args.grid_size, extent=args.extent, grid_workers=args.grid_workers)
+    server = PingServer(args.host, args.port, udp=args.protocol != "tcp", tcp=args.protocol != "udp")
+    try:
+        server.start()
+    except OSError as e:
+        print(f"无法监听 {args.host}:{args.port}: {e}", file=sys.stderr)
+        engine.close()
+        return 1
+    print(f"正在监听 {args.host}:{args.port} ({args.protocol})", flush=True)
+
+    started = last_report = time.perf_counter()
+    previous = dict(server.counters)
+    pings = 0
+    busy = 0.0
+    try:
+        while args.duration is None or time.perf_counter() - started < args.duration:
+            # 队列中有数据包时连续处理，只在队列为空时等待
+            count = min(len(server.queue), INGEST_BATCH)
+            if count:
+                packages = [server.queue.popleft() for _ in range(count)]
+                begin = time.perf_counter()
+                pings += len(engine.ingest_many(packages))
+                busy += time.perf_counter() - begin
+            else:
+                time.sleep(0.005)
+
+            now = time.perf_counter()
+            if now - last_report >= 1.0:
+                counters = dict(server.counters)
+                interval = now - last_report
+                print(f"接收 {(counters['packets'] - previous['packets']) / interval:.0f} ping/s "
+                      f"{(counters['bytes'] - previous['bytes']) / interval / 1e6:.1f} MB/s  "
+                      f"丢失 {counters['lost']}  丢弃 {counters['dropped']}  错误 {counters['errors']}  "
+                      f"积压 {len(server.queue)}  已处理 {pings}  处理占用 {busy / interval:.0%}", flush=True)
+                previous, last_report, busy = counters, now, 0.0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        engine.close()
+    counters = server.counters
+    print(f"共接收 {counters['packets']} 个数据包，处理 {pings} 个，丢失 {counters['lost']}，"
+          f"丢弃 {counters['dropped']}，错误 {counters['errors']}，"
+          f"网格覆盖率 {engine.stats.coverage:.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""多进程水深网格化
+
+ParallelGrid 与 DepthGrid 接口相同，网格数组放在 ``multiprocessing.shared_memory`` 中。网格按
+tile_size×tile_size 瓦片划分给各工作进程，瓦片 (行, 列) 归第 (行 + 列) % workers 个进程所有，
+航向无论东西还是南北，一条扫测带都会落在多个进程的瓦片上。各工作进程只写自己的瓦片，不需要加锁；
+界面与统计直接读取共享数组，不做复制。
+
+一批数据包的写入分两步，都在工作进程中执行：主进程把波束角与波束深度（已归位的数据包为测点坐标）
+写入共享的暂存区后，
+1. 各进程为暂存区中的一段波束归位，计算所在网格与所属进程（分片）；
+2. 各进程从暂存区取出属于自己的测点，按数据包顺序累积到网格，被更新的网格索引写回暂存区。
+第二步按“轮”向量化：同一网格的各次更新按数据包顺序排队，每轮处理所有网格的下一次更新。
+主进程只做拼接、整理结果与两次消息往来，这部分以及处理引擎中的清洗、覆盖与统计都不随进程数减少。
+
+写入是同步的：add_ping / add_pings 返回时所有工作进程都已完成，读取网格不会看到写了一半的数据包。
+每次写入有两次进程间往返的固定开销，应使用 add_pings（SonarEngine.ingest_many）一次分发一批数据包；
+同一网格内按数据包顺序做加权平均，结果与 DepthGrid 逐包写入逐位相同。
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .georef import georeference
+from .gridding import DepthGrid, cell_index
+
+STAGE_CAPACITY = 65536  # 暂存区初始容量（测点数），不足时按两倍扩大
+# 暂存区中各数组的类型：测点坐标与水深（归位前 depth 为波束深度）、波束角、网格索引、所属进程、被更新的网格索引
+STAGE_FIELDS = (("x", np.float64), ("y", np.float64), ("depth", np.float64), ("angle", np.float64),
+                ("flat", np.int64), ("cells", np.int64), ("owner", np.uint8))
+
+
+def tile_owner(ix, iy, tile_size, workers):
+    """网格 (ix, iy) 所属的工作进程"""
+    return ((iy // tile_size + ix // tile_size) % workers).astype(np.uint8)
+
+
+def _stage_arrays(segment, capacity):
+    arrays = {}
+    offset = 0
+    for name, dtype in STAGE_FIELDS:
+        arrays[name] = np.ndarray(capacity, dtype=dtype, buffer=segment.buf, offset=offset)
+        offset += capacity * np.dtype(dtype).itemsize
+    return arrays
+
+
+def _stage_bytes(capacity):
+    return sum(capacity * np.dtype(dtype).itemsize for _, dtype in STAGE_FIELDS)
+
+
+class _Worker:
+    """工作进程中的共享数组"""
+
+    def __init__(self, grid_name, shape, stage_name, capacity):
+        # 工作进程与主进程共用资源跟踪器，共享内存由主进程 unlink
+        self.grid_segment = self.stage_segment = None
+        self.attach_grid(grid_name, shape)
+        self.attach_stage(stage_name, capacity)
+
+    def attach_grid(self, name, shape):
+        self.values = None
+        self.first_event = None  # add 中每个网格本轮第一次更新的事件序号，按网格尺寸分配一次
+        if self.grid_segment is not None:
+            self.grid_segment.close()
+        self.grid_segment = shared_memory.SharedMemory(name=name)
+        self.values = np.ndarray(shape, dtype=float, buffer=self.grid_segment.buf)
+
+    def attach_stage(self, name, capacity):
+        self.stage = None
+        if self.stage_segment is not None:
+            self.stage_segment.close()
+        self.stage_segment = shared_memory.SharedMemory(name=name)
+        self.stage = _stage_arrays(self.stage_segment, capacity)
+
+    def georeference(self, start, stop, pings):
+        """把暂存区 [start, stop)（数据包边界）中的波束归位，落点写回 x/y/depth"""
+        stage = self.stage
+        offsets = pings["offsets"]
+        first, last = np.searchsorted(offsets, [start, stop])
+        selected = np.arange(first, last)
+        beams = np.diff(offsets)[selected]
+        # 波束数与安装参数相同的数据包组成 (数据包, 波束) 矩阵一次归位
+        groups = beams * len(pings["mountings"]) + pings["mounting"][selected]
+        for group in np.unique(groups):
+            chosen = selected[groups == group]
+            count = np.diff(offsets)[chosen[0]]
+            index = offsets[chosen][:, None] + np.arange(count)
+            x, y, z = georeference(pings["x"][chosen], pings["y"][chosen], pings["heading"][chosen],
+                                   stage["angle"][index], stage["depth"][index],
+                                   pitch=pings["pitch"][chosen], roll=pings["roll"][chosen],
+                                   mounting=pings["mountings"][pings["mounting"][chosen[0]]])
+            stage["x"][index], stage["y"][index], stage["depth"][index] = x, y, z
+
+    def index(self, start, stop, size, extent, wrap, tile_size, workers, pings=None):
+        """第一步：（pings 不为None时先归位）计算暂存区 [start, stop) 中测点所在网格与所属进程，返回各进程的测点数"""
+        stage = self.stage
+        if pings is not None and stop > start:
+            self.georeference(start, stop, pings)
+        ix, iy, valid = cell_index(stage["x"][start:stop], stage["y"][start:stop], size, extent, wrap)
+        valid &= np.isfinite(stage["depth"][start:stop])
+        stage["flat"][start:stop] = iy * size + ix
+        owner = stage["owner"][start:stop]
+        owner[:] = workers  # 无效测点不属于任何进程
+        owner[valid] = tile_owner(ix[valid], iy[valid], tile_size, workers)
+        return np.bincount(owner, minlength=workers + 1)[:workers]
+
+    def add(self, worker, count, offsets, positions, position_values, alpha, out):
+        """第二步：按数据包顺序累积属于本进程的测点，被更新的网格索引从暂存区 out 处写起，返回各数据包的个数
+
+        与逐包调用 accumulate 相同：每个数据包先对同一网格内的测点求平均，再与已有值加权平均；
+        当前位置处的网格在该数据包之后直接写入平均水深。
+        """
+        stage = self.stage
+        grid = self.values.reshape(-1)
+        pings = len(positions)
+        mine = np.flatnonzero(stage["owner"][:count] == worker)
+        ping = np.searchsorted(offsets, mine, side='right') - 1
+
+        # 每个 (数据包, 网格) 一组求平均，组内测点的求和顺序与逐包计算相同
+        keys, inverse = np.unique(ping * grid.size + stage["flat"][mine], return_inverse=True)
+        mean = np.bincount(inverse, weights=stage["depth"][mine]) / np.bincount(inverse)
+        # 更新事件按 (数据包, 先测点后位置) 排列：当前位置插入到所在数据包的测点之后
+        placed = np.flatnonzero(positions >= 0)
+        insert = np.searchsorted(keys, (placed + 1) * grid.size)
+        event_ping = np.insert(keys // grid.size, insert, placed)
+        event_cell = np.insert(keys % grid.size, insert, positions[placed])
+        event_value = np.insert(mean, insert, np.asarray(position_values, dtype=float)[placed])
+        is_position = np.insert(np.zeros(len(keys), dtype=bool), insert, True)
+
+        # 同一网格的各次更新按上述顺序依次处理：每轮取每个网格尚未处理的第一次更新（事件序号最小者），
+        # 轮数为一批中同一网格被更新的最多次数
+        if self.first_event is None or self.first_event.size != grid.size:
+            self.first_event = np.full(grid.size, np.iinfo(np.int32).max, dtype=np.int32)
+        first_event = self.first_event
+        pending = np.arange(len(event_cell), dtype=np.int32)
+        while len(pending):
+            cells = event_cell[pending]
+            np.minimum.at(first_event, cells, pending)
+            first = first_event[cells] == pending
+            first_event[cells] = np.iinfo(np.int32).max
+            events = pending[first]
+            pending = pending[~first]
+
+            cells, values = event_cell[events], event_value[events]
+            current = grid[cells]
+            blended = np.where(np.isnan(current), values, (1 - alpha) * current + alpha * values)
+            grid[cells] = np.where(is_position[events], values, blended)
+
+        # 被更新的网格按数据包排列：先为测点更新的网格（升序），再为当前位置
+        stage["cells"][out:out + len(event_cell)] = event_cell
+        return np.bincount(event_ping, minlength=pings)
+
+    def close(self):
+        self.values = self.stage = None
+        self.grid_segment.close()
+        self.stage_segment.close()
+
+
+def _grid_worker(conn, grid_name, shape, stage_name, capacity):
+    """工作进程：按顺序执行主进程发来的命令"""
+    worker = _Worker(grid_name, shape, stage_name, capacity)
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            command, args = message
+            result = getattr(worker, command)(*args)
+            if result is not None:
+                conn.send(result)
+    finally:
+        worker.close()
+
+
+class ParallelGrid(DepthGrid):
+    """网格数组位于共享内存、由多个工作进程按瓦片分片写入的水深网格
+
+    workers 为工作进程数（缺省为CPU核数）；tile_size 为分配给工作进程的瓦片边长。
+    不再使用时调用 close() 结束工作进程并释放共享内存（也可以用作上下文管理器）。
+    """
+
+    georeferences = True
+
+    def __init__(self, size=100, extent=20.0, alpha=0.3, wrap=True, initial=None, workers=None, tile_size=32):
+        super().__init__(size, extent, alpha, wrap, initial)
+        workers = int(workers or os.cpu_count() or 1)
+        if not 1 <= workers <= 255:
+            raise ValueError("工作进程数必须在1~255之间")
+        self.workers = workers
+        self.tile_size = max(1, int(tile_size))
+        self._segment = None
+        self._retired = []
+        self._allocate(self.values)
+        self._stage_segment = None
+        self._allocate_stage(STAGE_CAPACITY)
+
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        for _ in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_grid_worker, daemon=True,
+                                      args=(child, self._segment.name, self.values.shape,
+                                            self._stage_segment.name, self._capacity))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    # ---------------------------------------------------------------- 共享内存
+    def _allocate(self, values):
+        """把网格复制到新的共享内存块"""
+        segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        shared = np.ndarray(values.shape, dtype=float, buffer=segment.buf)
+        shared[:] = values
+        if self._segment is not None:
+            # 旧数组可能仍被界面引用，共享内存块先删除名称，close() 时再解除映射
+            self._segment.unlink()
+            self._retired.append(self._segment)
+        self._segment = segment
+        self.values = shared
+
+    def _allocate_stage(self, capacity):
+        if self._stage_segment is not None:
+            self._stage = None
+            self._stage_segment.close()
+            self._stage_segment.unlink()
+        self._stage_segment = shared_memory.SharedMemory(create=True, size=_stage_bytes(capacity))
+        self._stage = _stage_arrays(self._stage_segment, capacity)
+        self._capacity = capacity
+
+    def _send(self, command, *args, workers=None):
+        for conn in self._connections if workers is None else workers:
+            conn.send((command, args))
+
+    def load(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.shape == self.values.shape:
+            self.values[:] = values
+        else:
+            self._allocate(values)
+            self._send("attach_grid", self._segment.name, values.shape)
+        self.size = values.shape[0]
+
+    def reset(self):
+        if self.values.shape == (self.size, self.size):
+            self.values[:] = np.nan
+        else:
+            self.load(np.full((self.size, self.size), np.nan))
+
+    def close(self):
+        """结束工作进程并释放共享内存"""
+        if self._segment is None:
+            return
+        for conn, process in zip(self._connections, self._processes):
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        # 把网格复制回普通数组，close() 之后仍可读取
+        self.values = np.array(self.values)
+        self._stage = None
+        self._stage_segment.close()
+        self._stage_segment.unlink()
+        for segment in self._retired + [self._segment]:
+            try:
+                segment.close()
+            except BufferError:
+                # 界面仍持有旧数组时保留映射，进程结束时释放
+                pass
+        self._segment.unlink()
+        self._segment = None
+        self._retired = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------------------------------------------- 写入
+    def _dispatch(self, columns, positions=None, position_values=None, attitude=None):
+        """把多个数据包的测点交给工作进程写入网格，返回各数据包被更新的扁平索引列表
+
+        columns 为 {暂存区数组名: [各数据包的数组]}：已归位时为 x/y/depth，否则为 angle/depth（波束深度），
+        此时 attitude 为各数据包的位置、姿态与安装参数（_ping_fields），由工作进程归位。
+        positions 为各数据包的位置 (x, y)，该处网格写入 position_values。
+        """
+        if self._segment is None:
+            raise RuntimeError("网格已关闭")
+        counts = [np.size(values) for values in columns["depth"]]
+        pings = len(counts)
+        count = int(sum(counts))
+        if count + pings > self._capacity:
+            capacity = self._capacity
+            while capacity < count + pings:
+                capacity *= 2
+            self._allocate_stage(capacity)
+            self._send("attach_stage", self._stage_segment.name, capacity)
+        stage = self._stage
+        for name, arrays in columns.items():
+            if count:
+                np.concatenate([np.asarray(values, dtype=float).ravel() for values in arrays],
+                               out=stage[name][:count])
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        # 第一步：各进程为一段测点（归位并）计算所在网格与所属进程
+        workers = self.workers
+        if attitude is not None:
+            attitude["offsets"] = offsets
+        bounds = np.linspace(0, count, workers + 1).astype(np.int64)
+        if attitude is not None:
+            # 归位按整个数据包进行，各段边界对齐到数据包边界
+            bounds = offsets[np.searchsorted(offsets, bounds)]
+        for worker, conn in enumerate(self._connections):
+            conn.send(("index", (bounds[worker], bounds[worker + 1], self.size, self.extent, self.wrap,
+                                 self.tile_size, workers, attitude)))
+        owned = sum(conn.recv() for conn in self._connections)
+
+        cells_at = np.full(pings, -1, dtype=np.int64)
+        position_owner = np.full(pings, -1, dtype=np.int64)
+        if positions is not None:
+            px, py, inside = cell_index(positions[0], positions[1], self.size, self.extent, self.wrap)
+            cells_at[inside] = py[inside] * self.size + px[inside]
+            position_owner[inside] = tile_owner(px[inside], py[inside], self.tile_size, workers)
+            position_values = np.asarray(position_values, dtype=float)
+        else:
+            position_values = np.zeros(pings)
+
+        # 第二步：各进程累积属于自己的测点，被更新的网格索引写入暂存区中互不重叠的区段
+        owned = owned + np.bincount(position_owner[position_owner >= 0], minlength=workers)
+        out = np.concatenate(([0], np.cumsum(owned)))
+        busy = []
+        for worker, conn in enumerate(self._connections):
+            if owned[worker] == 0:
+                continue
+            conn.send(("add", (worker, count, offsets, np.where(position_owner == worker, cells_at, -1),
+                               position_values, self.alpha, out[worker])))
+            busy.append(worker)
+        sizes = np.zeros((workers, pings), dtype=np.int64)
+        for worker in busy:
+            sizes[worker] = self._connections[worker].recv()
+
+        # 按数据包整理被更新的网格：各进程的区段内按数据包顺序排列，区段末尾可能未写满
+        cells = np.concatenate([stage["cells"][out[worker]:out[worker] + length]
+                                for worker, length in enumerate(sizes.sum(axis=1))])
+        order = np.argsort(np.repeat(np.tile(np.arange(pings), workers), sizes.ravel()), kind='stable')
+        cells = cells[order]
+        return np.split(cells, np.cumsum(sizes.sum(axis=0))[:-1])
+
+    def add_soundings(self, x, y, depth):
+        return self._dispatch({"x": [x], "y": [y], "depth": [depth]})[0]
+
+    def add_ping(self, package, mounting=None):
+        return self.add_pings([package], [mounting])[0]
+
+    def add_pings(self, packages, mountings=None):
+        """按顺序将多个数据包写入网格，返回各数据包被更新的扁平索引列表
+
+        未归位的数据包在工作进程中按 mountings（与数据包一一对应）归位，落点写回数据包的
+        beam_x/beam_y/beam_z 字段，供覆盖统计等后续步骤使用。
+        """
+        if not packages:
+            return []
+        mountings = mountings if mountings is not None else [None] * len(packages)
+        attitude = self._ping_fields(packages, mountings)
+        # 与 DepthGrid.add_ping 相同：当前位置处记录平均水深
+        positions = (attitude["x"], attitude["y"])
+        position_values = [np.mean(package['beam_data']) for package in packages]
+        if all('beam_x' in package for package in packages):
+            columns = {"x": [package['beam_x'] for package in packages],
+                       "y": [package['beam_y'] for package in packages],
+                       "depth": [package['beam_z'] for package in packages]}
+            return self._dispatch(columns, positions, position_values)
+
+        columns = {"angle": [package['beam_angles'] for package in packages],
+                   "depth": [package['beam_data'] for package in packages]}
+        cells = self._dispatch(columns, positions, position_values, attitude)
+        # 落点写回数据包（一次复制后按数据包切分）
+        offsets = attitude["offsets"][1:-1]
+        count = attitude["offsets"][-1]
+        for field, name in (("beam_x", "x"), ("beam_y", "y"), ("beam_z", "depth")):
+            for package, values in zip(packages, np.split(self._stage[name][:count].copy(), offsets)):
+                package[field] = values
+        return cells
+
+    @staticmethod
+    def _ping_fields(packages, mountings):
+        """各数据包的位置、姿态与安装参数（安装参数按对象去重后以编号表示）"""
+        unique = []
+        index = []
+        for mounting in mountings:
+            for number, known in enumerate(unique):
+                if known is mounting:
+                    break
+            else:
+                number = len(unique)
+                unique.append(mounting)
+            index.append(number)
+        fields = {name: np.array([package.get(key, 0.0) for package in packages], dtype=float)
+                  for name, key in (("x", 'position_x'), ("y", 'position_y'), ("heading", 'heading'),
+                                    ("pitch", 'pitch'), ("roll", 'roll'))}
+        fields["mounting"] = np.array(index, dtype=np.int64)
+        fields["mountings"] = unique
+        return fields
@@ -0,0 +1,425 @@
+"""多波束测线规划
+
+给定海底坡面模型或已加载的水深网格、换能器开角和目标重叠率范围，计算平行测线的位置、
+每条测线的覆盖宽度和与相邻测线的重叠率，并在多个测线方向上并行求解，选出总测线长度最短的方案。
+
+几何约定：x 向东、y 向北，测线方向 heading 为测线与 x 轴的夹角(°，逆时针，0~180)。
+测线法向 n 上某一点的覆盖宽度按局部平面计算：设水深沿 n 的梯度为 g，开角一半为 h，
+则两侧覆盖边缘到测线的水平距离为 D/(cot h + g)（n 负向）与 D/(cot h - g)（n 正向）。
+所有沿测线的采样点与候选测线位置均按数组一次计算。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class DepthSurface:
+    """规则网格水深面，values[row, col] 对应坐标 (xmin + col*cell, ymin + row*cell)"""
+
+    def __init__(self, values, cell_size=1.0, origin=(0.0, 0.0)):
+        self.values = np.asarray(values, dtype=float)
+        self.cell_size = float(cell_size)
+        self.origin = (float(origin[0]), float(origin[1]))
+        # 水深梯度 (∂D/∂y, ∂D/∂x)
+        self.grad_y, self.grad_x = np.gradient(self.values, self.cell_size)
+
+    @classmethod
+    def plane(cls, center_depth=110.0, slope=1.5, width=7408.0, height=3704.0, direction=180.0, cells=200):
+        """坡面模型：区域中心水深 center_depth(m)，坡度 slope(°)，水深沿 direction(°) 方向增大"""
+        cell_size = max(width, height) / cells
+        cols = int(np.ceil(width / cell_size)) + 1
+        rows = int(np.ceil(height / cell_size)) + 1
+        x = np.arange(cols) * cell_size - width / 2
+        y = np.arange(rows) * cell_size - height / 2
+        X, Y = np.meshgrid(x, y)
+        direction = np.deg2rad(direction)
+        values = center_depth + np.tan(np.deg2rad(slope)) * (X * np.cos(direction) + Y * np.sin(direction))
+        return cls(values, cell_size, origin=(-width / 2, -height / 2))
+
+    @property
+    def bounds(self):
+        """(xmin, ymin, xmax, ymax)"""
+        rows, cols = self.values.shape
+        xmin, ymin = self.origin
+        return xmin, ymin, xmin + (cols - 1) * self.cell_size, ymin + (rows - 1) * self.cell_size
+
+    def sample(self, x, y, field=None):
+        """双线性插值采样，区域外为NaN"""
+        return self.sample_fields(x, y, [self.values if field is None else field])[0]
+
+    def sample_fields(self, x, y, fields, clamp=False):
+        """用同一组插值权重采样多个同尺寸网格
+
+        clamp=True 时区域外的点取最近边界处的值（测线中心在区域外、覆盖带仍伸入区域时使用），
+        否则区域外为NaN。
+        """
+        rows, cols = self.values.shape
+        fx = (np.asarray(x, dtype=float) - self.origin[0]) / self.cell_size
+        fy = (np.asarray(y, dtype=float) - self.origin[1]) / self.cell_size
+        # 容许边界上的舍入误差
+        eps = 1e-6
+        inside = (fx >= -eps) & (fx <= cols - 1 + eps) & (fy >= -eps) & (fy <= rows - 1 + eps)
+
+        fx = np.clip(fx, 0, max(cols - 1 - 1e-9, 0))
+        fy = np.clip(fy, 0, max(rows - 1 - 1e-9, 0))
+        ix = fx.astype(np.int64)
+        iy = fy.astype(np.int64)
+        tx = fx - ix
+        ty = fy - iy
+        ix1 = np.minimum(ix + 1, cols - 1)
+        iy1 = np.minimum(iy + 1, rows - 1)
+        w00 = (1 - tx) * (1 - ty)
+        w01 = tx * (1 - ty)
+        w10 = (1 - tx) * ty
+        w11 = tx * ty
+        i00 = iy * cols + ix
+        i01 = iy * cols + ix1
+        i10 = iy1 * cols + ix
+        i11 = iy1 * cols + ix1
+
+        results = []
+        for field in fields:
+            flat = field.reshape(-1)
+            result = flat[i00] * w00 + flat[i01] * w01 + flat[i10] * w10 + flat[i11] * w11
+            if not clamp:
+                result = np.where(inside, result, np.nan)
+            results.append(result)
+        return results
+
+    def nodes(self, limit=5000, spacing=None):
+        """有效水深的网格节点坐标 (x, y)
+
+        节点过多时均匀抽稀到约 limit 个，但抽稀后的节点间距不超过 spacing(m)。
+        """
+        rows, cols = self.values.shape
+        step = max(1, int(np.ceil(np.sqrt(rows * cols / limit))))
+        if spacing is not None:
+            step = max(1, min(step, int(spacing / self.cell_size)))
+        iy, ix = np.mgrid[0:rows:step, 0:cols:step]
+        valid = np.isfinite(self.values[iy, ix]) & (self.values[iy, ix] > 0)
+        return (self.origin[0] + ix[valid] * self.cell_size,
+                self.origin[1] + iy[valid] * self.cell_size)
+
+
+class LinePlan:
+    """一个测线方向上的规划结果
+
+    offsets 为各测线在法向上的位置(m)；segments 为测线在区域内的端点 (x0, y0, x1, y1)；
+    widths 为各测线的平均覆盖宽度(m)；overlap_min/overlap_max 为与下一条测线重叠率的
+    最小/最大值（最后一条为NaN）。complete=False 表示总长度超过上限后提前停止（方向搜索剪枝）。
+    """
+
+    def __init__(self, heading, offsets, segments, lengths, widths, overlap_min, overlap_mean, overlap_max,
+                 coverage, overlap_range, complete=True):
+        self.heading = heading
+        self.offsets = offsets
+        self.segments = segments
+        self.lengths = lengths
+        self.widths = widths
+        self.overlap_min = overlap_min
+        self.overlap_mean = overlap_mean
+        self.overlap_max = overlap_max
+        self.coverage = coverage
+        self.overlap_range = overlap_range
+        self.complete = complete
+
+    @property
+    def line_count(self):
+        return len(self.offsets)
+
+    @property
+    def total_length(self):
+        return float(np.sum(self.lengths))
+
+    @property
+    def excess_overlap(self):
+        """重叠率超过目标上限的测线对比例"""
+        overlap = self.overlap_max[np.isfinite(self.overlap_max)]
+        if len(overlap) == 0:
+            return 0.0
+        return float(np.mean(overlap > self.overlap_range[1]))
+
+    def as_dict(self):
+        return {
+            "heading": self.heading,
+            "line_count": self.line_count,
+            "total_length": self.total_length,
+            "coverage": self.coverage,
+            "complete": self.complete,
+            "excess_overlap": self.excess_overlap,
+            "lines": [
+                {"offset": float(self.offsets[i]), "segment": [float(v) for v in self.segments[i]],
+                 "length": float(self.lengths[i]), "width": float(self.widths[i]),
+                 "overlap_min": float(self.overlap_min[i]), "overlap_mean": float(self.overlap_mean[i]),
+                 "overlap_max": float(self.overlap_max[i])}
+                for i in range(self.line_count)
+            ],
+        }
+
+
+def _leading_true(flags):
+    """布尔数组开头连续 True 的个数"""
+    return len(flags) if np.all(flags) else int(np.argmin(flags))
+
+
+def overlap_ratio(offset, left, right, next_offset, next_left, next_right):
+    """相邻两条测线覆盖带的重叠宽度 / 后一条测线的覆盖宽度（无重叠时为负值，表示漏测）"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        overlap = (np.minimum(offset + right, next_offset + next_right)
+                   - np.maximum(offset - left, next_offset - next_left))
+        return overlap / (next_left + next_right)
+
+
+def _largest_feasible(feasible, lo, hi, count=12, rounds=3):
+    """在 [lo, hi] 上求满足条件的最大值（条件对较小的值成立），每轮一次性评估 count 个候选
+
+    lo 本身不满足时返回None。
+    """
+    for _ in range(rounds):
+        candidates = np.linspace(lo, hi, count)
+        run = _leading_true(feasible(candidates))
+        if run == 0:
+            return None
+        if run == count:
+            return hi
+        lo, hi = candidates[run - 1], candidates[run]
+    return lo
+
+
+class _Swath:
+    """某一测线方向上沿测线的采样几何"""
+
+    def __init__(self, surface, heading, opening_angle, station_spacing):
+        self.surface = surface
+        theta = np.deg2rad(heading)
+        self.along = np.array([np.cos(theta), np.sin(theta)])
+        self.normal = np.array([-np.sin(theta), np.cos(theta)])
+        self.cot_half = 1.0 / np.tan(np.deg2rad(opening_angle) / 2)
+
+        xmin, ymin, xmax, ymax = surface.bounds
+        corners = np.array([[xmin, ymin], [xmax, ymin], [xmin, ymax], [xmax, ymax]])
+        n = corners @ self.normal
+        t = corners @ self.along
+        self.n_range = (float(n.min()), float(n.max()))
+        count = max(2, int(np.ceil((t.max() - t.min()) / station_spacing)) + 1)
+        self.stations = np.linspace(t.min(), t.max(), count)
+        self.station_spacing = (t.max() - t.min()) / (count - 1)
+
+        # 有效网格节点在 (n, 所在采样点) 坐标下的位置，用于检查覆盖
+        node_x, node_y = surface.nodes(spacing=self.station_spacing)
+        self.node_n = node_x * self.normal[0] + node_y * self.normal[1]
+        node_t = node_x * self.along[0] + node_y * self.along[1]
+        self.node_station = np.clip(np.rint((node_t - self.stations[0]) / self.station_spacing), 0,
+                                    count - 1).astype(np.int64)
+        # 每个采样点处需要覆盖的法向范围（无有效节点的采样点为空区间）
+        self.low = np.full(count, np.inf)
+        self.high = np.full(count, -np.inf)
+        np.minimum.at(self.low, self.node_station, self.node_n)
+        np.maximum.at(self.high, self.node_station, self.node_n)
+        # 两端有效采样点之间没有落入节点的采样点按相邻采样点插值
+        filled = np.isfinite(self.low)
+        if np.count_nonzero(filled) >= 2:
+            indices = np.flatnonzero(filled)
+            gaps = ~filled & (np.arange(count) > indices[0]) & (np.arange(count) < indices[-1])
+            self.low[gaps] = np.interp(np.flatnonzero(gaps), indices, self.low[filled])
+            self.high[gaps] = np.interp(np.flatnonzero(gaps), indices, self.high[filled])
+
+    def edges(self, offsets):
+        """测线位置 offsets（任意形状）在各采样点的 (左宽, 右宽)，无效处为NaN"""
+        offsets = np.asarray(offsets, dtype=float)[..., None]
+        x = offsets * self.normal[0] + self.stations * self.along[0]
+        y = offsets * self.normal[1] + self.stations * self.along[1]
+        surface = self.surface
+        depth, grad_x, grad_y = surface.sample_fields(x, y, [surface.values, surface.grad_x, surface.grad_y],
+                                                      clamp=True)
+        gradient = grad_x * self.normal[0] + grad_y * self.normal[1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            left = depth / (self.cot_half + gradient)
+            right = depth / (self.cot_half - gradient)
+        invalid = ~(depth > 0) | ~(left > 0) | ~(right > 0)
+        left[invalid] = np.nan
+        right[invalid] = np.nan
+        return left, right
+
+    def needed(self, offsets, left, right):
+        """各采样点处测线覆盖带是否与需要覆盖的范围相交"""
+        offsets = np.asarray(offsets, dtype=float)[..., None]
+        with np.errstate(invalid='ignore'):
+            return (offsets - left <= self.high) & (offsets + right >= self.low)
+
+    def segment(self, offset, valid):
+        """测线上需要测量部分的端点与长度"""
+        if not np.any(valid):
+            return (np.nan,) * 4, 0.0
+        indices = np.flatnonzero(valid)
+        t0, t1 = self.stations[indices[0]], self.stations[indices[-1]]
+        start = offset * self.normal + t0 * self.along
+        end = offset * self.normal + t1 * self.along
+        return (start[0], start[1], end[0], end[1]), len(indices) * self.station_spacing
+
+
+def plan_lines(surface, heading=90.0, opening_angle=120.0, overlap=(0.1, 0.2), station_spacing=None,
+               max_lines=500, length_limit=None):
+    """在给定测线方向上按重叠率下限依次布设测线，返回 LinePlan
+
+    每条新测线取满足"所有采样点重叠率不低于 overlap[0]"的最大间距，直到覆盖全部有效区域，
+    重叠率的定义见 overlap_ratio。已布设测线的总长度超过
+    length_limit 时提前停止。
+    """
+    min_overlap = overlap[0]
+    if station_spacing is None:
+        xmin, ymin, xmax, ymax = surface.bounds
+        station_spacing = max(xmax - xmin, ymax - ymin) / 100
+    swath = _Swath(surface, heading, opening_angle, station_spacing)
+    n_min, n_max = swath.n_range
+    # 测线间距上限：区域内最大水深与最大坡度对应的覆盖宽度
+    max_depth = np.nanmax(surface.values)
+    max_gradient = np.nanmax(np.hypot(surface.grad_x, surface.grad_y))
+    if swath.cot_half > max_gradient:
+        reach = 2 * max_depth / (swath.cot_half - max_gradient)
+    else:
+        reach = 4 * max_depth / swath.cot_half
+
+    # 第一条测线：左侧覆盖边缘在各采样点都到达区域边界
+    def first_feasible(candidates):
+        left, _ = swath.edges(candidates)
+        with np.errstate(invalid='ignore'):
+            covered = candidates[:, None] - left <= swath.low + 1e-6
+        return np.all(covered | ~np.isfinite(swath.low), axis=1)
+
+    first = _largest_feasible(first_feasible, n_min, n_min + reach)
+    offsets = [n_min if first is None else first]
+    left, right = swath.edges(offsets[-1])
+    lefts, rights = [left], [right]
+    length = 0.0
+    complete = True
+
+    while len(offsets) < max_lines:
+        current = offsets[-1]
+        if length_limit is not None:
+            length += np.count_nonzero(swath.needed(current, lefts[-1], rights[-1])) * swath.station_spacing
+            if length > length_limit:
+                complete = False
+                break
+        # 各采样点处需要覆盖的范围都已被覆盖时结束
+        right_edge = current + np.nan_to_num(rights[-1], nan=0.0)
+        if np.all(swath.high <= right_edge + 1e-6):
+            break
+
+        def next_feasible(candidates, current=current, left=lefts[-1], right=rights[-1]):
+            next_left, next_right = swath.edges(candidates)
+            ratio = overlap_ratio(current, left, right, candidates[:, None], next_left, next_right)
+            # 只约束两条测线都需要测量的采样点
+            both = swath.needed(current, left, right) & swath.needed(candidates, next_left, next_right)
+            ok = np.where(both & ~np.isnan(ratio), ratio >= min_overlap, True)
+            return np.all(ok, axis=1)
+
+        spacing_limit = current + reach
+        best = _largest_feasible(next_feasible, current + station_spacing * 0.01, spacing_limit)
+        if best is None:
+            best = current + station_spacing
+        if best > n_max + reach:
+            break
+        offsets.append(best)
+        left, right = swath.edges(best)
+        lefts.append(left)
+        rights.append(right)
+
+    offsets = np.array(offsets)
+    lefts = np.array(lefts)
+    rights = np.array(rights)
+
+    count = len(offsets)
+    segments = np.full((count, 4), np.nan)
+    lengths = np.zeros(count)
+    widths = np.full(count, np.nan)
+    overlap_min = np.full(count, np.nan)
+    overlap_mean = np.full(count, np.nan)
+    overlap_max = np.full(count, np.nan)
+    needed = swath.needed(offsets, lefts, rights)
+    width = lefts + rights
+    ratio = overlap_ratio(offsets[:-1, None], lefts[:-1], rights[:-1], offsets[1:, None], lefts[1:], rights[1:])
+    ratio[~(needed[:-1] & needed[1:])] = np.nan
+    for i in range(count):
+        valid = needed[i] & ~np.isnan(width[i])
+        segments[i], lengths[i] = swath.segment(offsets[i], valid)
+        if np.any(valid):
+            widths[i] = np.mean(width[i][valid])
+        if i < count - 1:
+            pair = ratio[i][~np.isnan(ratio[i])]
+            if len(pair):
+                overlap_min[i], overlap_mean[i], overlap_max[i] = pair.min(), pair.mean(), pair.max()
+
+    # 覆盖率：落在任一测线覆盖带内的有效节点比例
+    stations = swath.node_station
+    low = offsets[:, None] - lefts[:, stations]
+    high = offsets[:, None] + rights[:, stations]
+    covered = np.any((swath.node_n >= low - 1e-6) & (swath.node_n <= high + 1e-6), axis=0)
+    coverage = float(np.mean(covered)) if len(covered) else 0.0
+
+    # 去掉不需要测量的测线
+    keep = lengths > 0
+    return LinePlan(heading, offsets[keep], segments[keep], lengths[keep], widths[keep], overlap_min[keep],
+                    overlap_mean[keep], overlap_max[keep], coverage, tuple(overlap), complete)
+
+
+def contour_heading(surface):
+    """平均水深梯度的垂直方向（沿等深线），坡面上即为最优测线方向的初始估计"""
+    grad_x = np.nanmean(surface.grad_x)
+    grad_y = np.nanmean(surface.grad_y)
+    if not np.isfinite(grad_x) or not np.isfinite(grad_y) or grad_x == grad_y == 0:
+        return 0.0
+    return float((np.degrees(np.arctan2(grad_y, grad_x)) + 90.0) % 180.0)
+
+
+def search_headings(surface, headings=None, opening_angle=120.0, overlap=(0.1, 0.2), station_spacing=None,
+                    min_coverage=0.99, workers=None, refine=True):
+    """在多个测线方向上并行求解，返回 (最优方案, 按方向排列的全部方案)
+
+    headings 缺省时先以一半的采样密度按15°间隔粗搜，再在最优方向±7.5°内按2.5°间隔
+    以完整采样密度细化。最优方案为覆盖率不低于 min_coverage 的方案中总测线长度最短者
+    （均不满足时取覆盖率最高者）。先求沿等深线方向的方案作为长度上限，其余方向的总长度
+    超过上限后即停止布设。
+    """
+    if station_spacing is None:
+        xmin, ymin, xmax, ymax = surface.bounds
+        station_spacing = max(xmax - xmin, ymax - ymin) / 100
+    workers = workers or os.cpu_count()
+
+    def best_of(plans):
+        feasible = [plan for plan in plans if plan.complete and plan.coverage >= min_coverage]
+        if feasible:
+            return min(feasible, key=lambda plan: (plan.total_length, plan.line_count))
+        return max(plans, key=lambda plan: plan.coverage)
+
+    def solve(batch, bound=None, spacing=station_spacing):
+        limit = None
+        if bound is not None and bound.complete and bound.coverage >= min_coverage:
+            limit = bound.total_length
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda heading: plan_lines(surface, heading=heading, opening_angle=opening_angle,
+                                                            overlap=overlap, station_spacing=spacing,
+                                                            length_limit=limit), batch))
+
+    if headings is not None:
+        headings = [float(h) % 180 for h in headings]
+        seed = solve(headings[:1])[0]
+        plans = [seed] + solve(headings[1:], seed)
+        return best_of(plans), sorted(plans, key=lambda plan: plan.heading)
+
+    coarse_spacing = station_spacing * 2 if refine else station_spacing
+    seed = solve([round(contour_heading(surface) / 2.5) * 2.5 % 180], spacing=coarse_spacing)[0]
+    coarse = [float(h) for h in np.arange(0.0, 180.0, 15.0)]
+    plans = [seed] + solve([h for h in coarse if h != seed.heading], seed, coarse_spacing)
+    if not refine:
+        return best_of(plans), sorted(plans, key=lambda plan: plan.heading)
+
+    center = best_of(plans).heading
+    fine = [float(h % 180) for h in np.arange(center - 7.5, center + 7.51, 2.5)]
+    best = solve([center])[0]
+    fine_plans = [best] + solve([h for h in fine if h != center], best)
+    refined = {plan.heading for plan in fine_plans}
+    plans = [plan for plan in plans if plan.heading not in refined] + fine_plans
+    return best_of(fine_plans), sorted(plans, key=lambda plan: plan.heading)
@@ -0,0 +1,70 @@
+"""启动耗时分析
+
+按检查点记录各子系统（模块导入、数据初始化、各选项卡构建、首帧显示）的耗时，
+界面脚本以 ``--profile-startup`` 参数启动时在首帧显示后打印报告。
+未启用时所有记录操作都是空操作。
+"""
+
+import time
+import unicodedata
+from contextlib import contextmanager
+
+
+def _ljust(text, width):
+    """按显示宽度左对齐（中文字符占两列）"""
+    display = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    return text + ' ' * max(width - display, 0)
+
+
+class StartupProfiler:
+    """启动阶段耗时记录
+
+    mark(name) 记录距上一个检查点的耗时；section(name) 记录一段代码的耗时，
+    并把检查点移动到代码段结束处。origin 为计时起点，缺省为创建时刻。
+    """
+
+    def __init__(self, enabled=False, origin=None):
+        self.enabled = enabled
+        self.origin = origin if origin is not None else time.perf_counter()
+        self._last = self.origin
+        self.records = []  # [(名称, 耗时秒)]
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.records.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        self._last = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    @property
+    def total(self):
+        return self._last - self.origin
+
+    def report(self):
+        """返回按检查点顺序排列的耗时报告文本"""
+        total = self.total or 1e-9
+        lines = [f"{_ljust('阶段', 32)}{'耗时(ms)':>10}{'占比':>8}{'累计(ms)':>10}"]
+        elapsed = 0.0
+        for name, duration in self.records:
+            elapsed += duration
+            lines.append(f"{_ljust(name, 32)}{duration * 1000:>10.1f}{duration / total:>8.1%}{elapsed * 1000:>10.1f}")
+        untracked = self.total - elapsed
+        if untracked > 0.0005:
+            lines.append(f"{_ljust('(未归类)', 32)}{untracked * 1000:>10.1f}{untracked / total:>8.1%}{self.total * 1000:>10.1f}")
+        lines.append(f"{_ljust('总计', 32)}{self.total * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def as_dict(self):
+        return {"total": self.total, "stages": [{"name": name, "seconds": duration}
+                                                 for name, duration in self.records]}
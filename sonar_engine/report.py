@@ -0,0 +1,317 @@
+"""测量报告生成（HTML / PDF）
+
+水深图、坡度图、水深直方图与航迹图用 matplotlib 的非交互 Agg 画布渲染（不经过 pyplot，不依赖界面），
+再组装为报告：HTML 报告把图片以 base64 内嵌为单个文件，PDF 报告每页一张图（首页为统计摘要）。
+界面通过 start_report 在独立的工作进程中生成报告，渲染大网格时不占用界面进程的 GIL，采集不受影响。
+PDF 中的文字使用英文（缺省字体没有中文字形），HTML 报告使用中文。
+
+用法::
+
+    python -m sonar_engine.report data/20240101_120000.svy report.pdf
+"""
+
+import argparse
+import base64
+import html
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+REPORT_FORMATS = {".html": "html", ".htm": "html", ".pdf": "pdf"}
+MAX_IMAGE_SIZE = 1500    # 渲染前网格抽稀到的最大边长
+MAX_TRACK_POINTS = 20000  # 航迹图抽稀到的最大点数
+
+# 摘要项：(键, 中文名, 英文名, 单位)
+SUMMARY_FIELDS = [
+    ("mean_depth", "平均水深", "Mean depth", "m"),
+    ("max_depth", "最大水深", "Max depth", "m"),
+    ("min_depth", "最小水深", "Min depth", "m"),
+    ("std_depth", "水深标准差", "Depth std", "m"),
+    ("mean_slope", "平均坡度", "Mean slope", "°"),
+    ("max_slope", "最大坡度", "Max slope", "°"),
+    ("cells", "有效网格数", "Valid cells", ""),
+    ("points", "航迹点数", "Track points", ""),
+    ("distance", "航行距离", "Track length", "m"),
+    ("area", "扫描面积", "Swath area", "m²"),
+]
+
+
+def report_data(depth, cell_size=1.0, track_x=(), track_y=(), area=None, title="多波束测深数据报告",
+                device_status=None, log=()):
+    """收集生成报告所需的数据（可 pickle，在界面线程中取快照后交给工作进程）"""
+    return {
+        "title": title,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "depth": np.array(depth, dtype=float),
+        "cell_size": float(cell_size),
+        "track_x": np.asarray(track_x, dtype=float),
+        "track_y": np.asarray(track_y, dtype=float),
+        "area": area,
+        "device_status": dict(device_status or {}),
+        "log": list(log),
+    }
+
+
+def summarize_report(data, slope=None):
+    """报告摘要：{键: 数值}，无有效数据的项为None"""
+    from .analysis import summarize
+
+    depth = summarize(data["depth"])
+    track_x, track_y = data["track_x"], data["track_y"]
+    summary = {
+        "mean_depth": depth["mean"], "max_depth": depth["max"], "min_depth": depth["min"],
+        "std_depth": depth["std"], "cells": depth["count"],
+        "points": int(len(track_x)),
+        "distance": float(np.sum(np.hypot(np.diff(track_x), np.diff(track_y)))) if len(track_x) > 1 else 0.0,
+        "area": data["area"],
+        "mean_slope": None, "max_slope": None,
+    }
+    if slope is not None and np.any(np.isfinite(slope)):
+        summary["mean_slope"] = float(np.nanmean(slope))
+        summary["max_slope"] = float(np.nanmax(slope))
+    return {key: None if isinstance(value, float) and not np.isfinite(value) else value
+            for key, value in summary.items()}
+
+
+def _format(value, unit):
+    if value is None:
+        return "N/A"
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}"
+    return f"{value:,.2f} {unit}".rstrip()
+
+
+# ---------------------------------------------------------------- 渲染
+def _figure(width=8, height=6):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(width, height), dpi=100)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _decimate(values, cell_size):
+    step = max(1, int(np.ceil(max(values.shape) / MAX_IMAGE_SIZE)))
+    return values[::step, ::step], cell_size * step
+
+
+def render_figures(data):
+    """渲染报告图件，返回 ([(标题, 英文标题, Figure), ...], 坡度网格)"""
+    from .analysis import slope
+
+    values, cell = _decimate(data["depth"], data["cell_size"])
+    rows, cols = values.shape
+    extent = (0, cols * cell, 0, rows * cell)
+    slope_values = slope(values, cell, degrees=True) if min(rows, cols) > 1 else np.full(values.shape, np.nan)
+    figures = []
+
+    figure = _figure()
+    ax = figure.add_subplot(111)
+    image = ax.imshow(np.ma.masked_invalid(values), cmap='viridis_r', origin='lower', extent=extent)
+    figure.colorbar(image, ax=ax, label='Depth (m)')
+    ax.set_title('Bathymetry')
+    ax.set_xlabel('X (m)')
+    ax.set_ylabel('Y (m)')
+    figures.append(("海底地形图", "Bathymetry", figure))
+
+    figure = _figure()
+    ax = figure.add_subplot(111)
+    image = ax.imshow(np.ma.masked_invalid(slope_values), cmap='magma', origin='lower', extent=extent)
+    figure.colorbar(image, ax=ax, label='Slope (°)')
+    ax.set_title('Seafloor slope')
+    ax.set_xlabel('X (m)')
+    ax.set_ylabel('Y (m)')
+    figures.append(("海底坡度图", "Seafloor slope", figure))
+
+    figure = _figure(8, 5)
+    ax = figure.add_subplot(111)
+    valid = data["depth"][np.isfinite(data["depth"])]
+    if len(valid):
+        ax.hist(valid, bins=50, color='#3a7bd5', edgecolor='white', linewidth=0.5)
+        ax.axvline(float(np.mean(valid)), color='red', linestyle='--', label=f'Mean {np.mean(valid):.2f} m')
+        ax.legend()
+    ax.set_title('Depth distribution')
+    ax.set_xlabel('Depth (m)')
+    ax.set_ylabel('Cells')
+    ax.grid(True, alpha=0.3)
+    figures.append(("水深分布直方图", "Depth distribution", figure))
+
+    if len(data["track_x"]):
+        figure = _figure(8, 8)
+        ax = figure.add_subplot(111)
+        step = max(1, int(np.ceil(len(data["track_x"]) / MAX_TRACK_POINTS)))
+        ax.plot(data["track_x"][::step], data["track_y"][::step], 'g-', linewidth=1.5)
+        ax.scatter(data["track_x"][-1:], data["track_y"][-1:], color='red', s=40, zorder=3)
+        ax.set_aspect('equal', adjustable='datalim')
+        ax.grid(True, alpha=0.3)
+        ax.set_title('Survey track')
+        ax.set_xlabel('X (m)')
+        ax.set_ylabel('Y (m)')
+        figures.append(("测量航迹", "Survey track", figure))
+    return figures, slope_values
+
+
+# ---------------------------------------------------------------- 组装
+def write_html(filename, data, figures, summary):
+    """单文件 HTML 报告（图片以 base64 PNG 内嵌）"""
+    rows = "".join(f"<tr><td>{name}</td><td>{_format(summary[key], unit)}</td></tr>\n"
+                   for key, name, _, unit in SUMMARY_FIELDS)
+    images = []
+    for index, (title, _, figure) in enumerate(figures, 1):
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format='png', dpi=100)
+        encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+        images.append(f'<div class="figure"><img src="data:image/png;base64,{encoded}" alt="{title}">'
+                      f'<p>图{index}: {title}</p></div>\n')
+    devices = "".join(
+        f'<tr><td>{html.escape(device)}</td><td style="color: {"green" if status == "正常" else "red"};">'
+        f'{html.escape(status)}</td></tr>\n' for device, status in data["device_status"].items())
+    log = html.escape("\n".join(data["log"]))
+
+    document = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(data["title"])}</title>
+<style>
+    body {{ font-family: Arial, sans-serif; margin: 20px; }}
+    h1, h2 {{ color: #0066cc; }}
+    .stats-table {{ border-collapse: collapse; width: 100%; margin: 15px 0; }}
+    .stats-table th, .stats-table td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+    .stats-table th {{ background-color: #f2f2f2; }}
+    .figure {{ margin: 20px 0; text-align: center; }}
+    .figure img {{ max-width: 100%; border: 1px solid #ddd; }}
+    pre {{ background-color: #f8f8f8; padding: 10px; border: 1px solid #ddd; max-height: 300px; overflow: auto; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(data["title"])}</h1>
+<p>生成时间: {data["created"]}</p>
+<h2>数据摘要</h2>
+<table class="stats-table">
+<tr><th>参数</th><th>值</th></tr>
+{rows}</table>
+<h2>图件</h2>
+{"".join(images)}"""
+    if devices:
+        document += f"""<h2>设备信息</h2>
+<table class="stats-table">
+<tr><th>设备</th><th>状态</th></tr>
+{devices}</table>
+"""
+    if log:
+        document += f"<h2>系统日志</h2>\n<pre>{log}</pre>\n"
+    document += "</body>\n</html>\n"
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(document)
+
+
+def write_pdf(filename, data, figures, summary):
+    """多页 PDF 报告：首页为统计摘要，其后每页一张图"""
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    cover = _figure(8.27, 11.69)  # A4
+    cover.text(0.5, 0.93, "Multibeam Bathymetry Survey Report", ha='center', fontsize=18, weight='bold')
+    cover.text(0.5, 0.89, f"Generated {data['created']}", ha='center', fontsize=10, color='#555555')
+    ax = cover.add_axes([0.12, 0.45, 0.76, 0.38])
+    ax.axis('off')
+    table = ax.table(cellText=[[label, _format(summary[key], unit)] for key, _, label, unit in SUMMARY_FIELDS],
+                     colLabels=["Parameter", "Value"], loc='upper center', cellLoc='left')
+    table.scale(1, 1.6)
+    with PdfPages(filename) as pdf:
+        pdf.savefig(cover)
+        for _, _, figure in figures:
+            pdf.savefig(figure)
+        info = pdf.infodict()
+        info['Title'] = "Multibeam Bathymetry Survey Report"
+        info['Creator'] = "sonar_engine.report"
+
+
+WRITERS = {"html": write_html, "pdf": write_pdf}
+
+
+def report_format(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in REPORT_FORMATS:
+        raise ValueError(f"不支持的报告格式: {extension}（支持 {', '.join(REPORT_FORMATS)}）")
+    return REPORT_FORMATS[extension]
+
+
+def build_report(filename, data, fmt=None):
+    """渲染图件并写出报告（在当前进程中执行），返回文件名"""
+    fmt = fmt or report_format(filename)
+    figures, slope_values = render_figures(data)
+    WRITERS[fmt](filename, data, figures, summarize_report(data, slope_values))
+    return filename
+
+
+# ---------------------------------------------------------------- 工作进程
+def _report_worker(filename, data, fmt, results):
+    try:
+        results.put((True, build_report(filename, data, fmt)))
+    except Exception as e:
+        results.put((False, f"{type(e).__name__}: {e}"))
+
+
+def start_report(filename, data, fmt=None, cancelled=None, poll=0.1):
+    """在独立的工作进程（spawn）中生成报告，等待完成并返回文件名
+
+    cancelled() 返回True时终止工作进程、删除未完成的文件并返回None；工作进程中的异常以
+    RuntimeError 抛出。适合在后台线程（例如 sonar_gui.BackgroundTask）中调用。
+    """
+    fmt = fmt or report_format(filename)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_report_worker, args=(filename, data, fmt, results), daemon=True)
+    process.start()
+    try:
+        while True:
+            try:
+                ok, result = results.get(timeout=poll)
+                break
+            except queue.Empty:
+                pass
+            if cancelled is not None and cancelled():
+                process.terminate()
+                if os.path.exists(filename):
+                    os.remove(filename)
+                return None
+            if not process.is_alive() and results.empty():
+                raise RuntimeError(f"报告生成进程异常退出（退出码 {process.exitcode}）")
+    finally:
+        process.join(timeout=5)
+        results.close()
+    if not ok:
+        raise RuntimeError(result)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="由测量文件生成 HTML/PDF 报告")
+    parser.add_argument("survey", help="测量文件（.svy 或航迹CSV）")
+    parser.add_argument("output", help="报告文件（.html 或 .pdf）")
+    args = parser.parse_args(argv)
+
+    from .survey_io import load_survey
+
+    started = time.perf_counter()
+    survey = load_survey(args.survey)
+    if survey['depth_data'] is None:
+        print(f"{args.survey} 没有水深网格", file=sys.stderr)
+        return 1
+    cell_size = survey.get('cell_size') or 1.0
+    data = report_data(survey['depth_data'], cell_size, survey['track_x'], survey['track_y'],
+                       title=f"多波束测深数据报告 - {os.path.basename(args.survey)}")
+    build_report(args.output, data)
+    print(f"报告已生成: {args.output} ({time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
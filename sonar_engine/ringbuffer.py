@@ -0,0 +1,99 @@
+"""定长环形缓冲区
+
+容量满后覆盖最旧的元素，追加与按位置访问都是O(1)。每个元素带有递增的序号，
+持有序号的一方（例如界面的表格模型）可以判断元素是否已被覆盖。
+ArrayRingBuffer 是保存数值的版本，按时间顺序返回 numpy 数组供图表使用。
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """保存最近 capacity 个元素的环形缓冲区"""
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("容量必须大于0")
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self._items = [None] * self.capacity
+        self._start = 0      # 最旧元素所在位置
+        self._count = 0
+        self.first_seq = 0   # 最旧元素的序号
+        self.next_seq = 0    # 下一个追加元素的序号
+
+    def append(self, item):
+        """追加元素，返回其序号"""
+        if self._count < self.capacity:
+            self._items[(self._start + self._count) % self.capacity] = item
+            self._count += 1
+        else:
+            self._items[self._start] = item
+            self._start = (self._start + 1) % self.capacity
+            self.first_seq += 1
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
+
+    def get(self, seq, default=None):
+        """按序号取元素，已被覆盖或尚未写入时返回 default"""
+        if seq < self.first_seq or seq >= self.next_seq:
+            return default
+        return self._items[(self._start + seq - self.first_seq) % self.capacity]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("RingBuffer index out of range")
+        return self._items[(self._start + index) % self.capacity]
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._items[(self._start + index) % self.capacity]
+
+    def tail(self, count):
+        """最近的 count 个元素（从旧到新）"""
+        count = min(count, self._count)
+        return [self[index] for index in range(self._count - count, self._count)]
+
+
+class ArrayRingBuffer:
+    """数值环形缓冲区（numpy数组），用于图表的时间序列"""
+
+    def __init__(self, capacity, dtype=float):
+        if capacity <= 0:
+            raise ValueError("容量必须大于0")
+        self.capacity = capacity
+        self._data = np.full(capacity, np.nan, dtype=dtype)
+        self._start = 0
+        self._count = 0
+
+    def append(self, value):
+        if self._count < self.capacity:
+            self._data[(self._start + self._count) % self.capacity] = value
+            self._count += 1
+        else:
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self.capacity
+
+    def values(self):
+        """按时间顺序返回数据副本"""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    @property
+    def last(self):
+        if self._count == 0:
+            return np.nan
+        return self._data[(self._start + self._count - 1) % self.capacity]
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,196 @@
+"""可复现的模拟测量场景
+
+Scenario 描述一次模拟测量：种子、数据包速率、波束数、时长以及模拟器参数。由同一个种子经
+``SeedSequence.spawn`` 为模拟器、处理引擎和界面显示派生独立的随机流，同一场景在任意机器上
+重复运行得到逐位相同的数据包与水深网格，用于回归测试、基准测试和回放。
+
+用法::
+
+    python -m sonar_engine.scenario scenario.json -o data/replay.csv
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+
+import numpy as np
+
+from .engine import SonarEngine
+from .crs import LocalTangentPlane
+from .simulator import DEFAULT_ORIGIN, PingSimulator, spawn_streams
+
+# 场景派生的随机流：模拟器、处理引擎、界面显示、其余数据源的模拟器（追加在末尾，不影响前面的随机流）
+SCENARIO_STREAMS = ("simulator", "engine", "display", "sources")
+
+
+class Scenario:
+    """模拟测量场景
+
+    rate 为数据包速率(ping/s)，duration 为时长(s)，两者决定数据包数 ping_count；
+    数据包时间戳从 start_time 起按 1/rate 递增，与实际运行速度无关。seed 为None时取一个
+    随机种子并保存在 seed 中，记录下来即可复现这次运行。
+    sources 为同时测量的数据源（探头/测量船）数，各自沿相距 source_spacing(m) 的平行测线航行，
+    每个数据源的 ping_count 个数据包按轮流顺序处理。
+    """
+
+    FIELDS = ("seed", "rate", "beams", "duration", "model", "noise", "quality", "swath_angle", "start_time",
+              "sources", "source_spacing")
+
+    def __init__(self, seed=None, rate=2.0, beams=64, duration=60.0, model="terrain", noise=0.2, quality="高精度",
+                 swath_angle=150.0, start_time=0.0, sources=1, source_spacing=5.0):
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2 ** 63)
+        self.seed = seed
+        self.rate = rate
+        self.beams = beams
+        self.duration = duration
+        self.model = model
+        self.noise = noise
+        self.quality = quality
+        self.swath_angle = swath_angle
+        self.start_time = start_time
+        self.sources = sources
+        self.source_spacing = source_spacing
+
+    @property
+    def ping_count(self):
+        return int(round(self.rate * self.duration))
+
+    @property
+    def interval(self):
+        """数据包间隔(s)"""
+        return 1.0 / self.rate
+
+    @property
+    def crs(self):
+        """模拟位置所在的坐标系（以 DEFAULT_ORIGIN 为原点的站心坐标）"""
+        return LocalTangentPlane(*DEFAULT_ORIGIN)
+
+    def _sequences(self):
+        children = np.random.SeedSequence(self.seed).spawn(len(SCENARIO_STREAMS))
+        return dict(zip(SCENARIO_STREAMS, children))
+
+    def simulator(self, wall_clock=False):
+        """按场景参数创建模拟数据源
+
+        wall_clock=True 时数据包时间戳取当前时间（界面实时显示），其余数据仍由种子决定。
+        """
+        return self.simulators(wall_clock)[0]
+
+    def simulators(self, wall_clock=False):
+        """按场景参数创建 sources 个模拟数据源
+
+        第一个为主数据源（数据包不带 source 字段，与单数据源场景相同），其余数据源
+        的数据包 source 字段为 "数据源N"，随机流由 "sources" 随机流派生。
+        """
+        sequences = self._sequences()
+        seeds = [sequences["simulator"]] + sequences["sources"].spawn(max(self.sources - 1, 0))
+        return [PingSimulator(beam_count=self.beams, noise_level=self.noise, data_quality=self.quality,
+                              model=self.model, swath_angle=self.swath_angle, seed=seed,
+                              rate=None if wall_clock else self.rate, start_time=self.start_time, crs=self.crs,
+                              source=None if index == 0 else f"数据源{index + 1}",
+                              start_y=index * self.source_spacing)
+                for index, seed in enumerate(seeds)]
+
+    def engine(self, **kwargs):
+        """创建使用场景随机流的处理引擎，kwargs 传给 SonarEngine"""
+        kwargs.setdefault("crs", self.crs)
+        return SonarEngine(rng=np.random.default_rng(self._sequences()["engine"]), **kwargs)
+
+    def display_rng(self):
+        """界面显示（置信度散点等）使用的随机数生成器"""
+        return spawn_streams(self._sequences()["display"], names=("display",))["display"]
+
+    def run(self, engine=None, **kwargs):
+        """无界面运行整个场景，返回处理引擎"""
+        if engine is None:
+            engine = self.engine(**kwargs)
+        engine.run(self.simulators(), self.ping_count)
+        return engine
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, values):
+        unknown = set(values) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"未知的场景参数: {', '.join(sorted(unknown))}")
+        return cls(**values)
+
+    @classmethod
+    def from_argv(cls, argv, **defaults):
+        """从界面程序的命令行中取出 ``--scenario 文件``、``--seed N`` 与 ``--sources N``，返回 (场景, 其余参数)"""
+        values = dict(defaults)
+        remaining = []
+        args = iter(argv)
+        for arg in args:
+            if arg == "--scenario":
+                with open(next(args), 'r', encoding='utf-8') as f:
+                    values.update(json.load(f))
+            elif arg == "--seed":
+                values["seed"] = int(next(args))
+            elif arg == "--sources":
+                values["sources"] = int(next(args))
+            else:
+                remaining.append(arg)
+        return cls.from_dict(values), remaining
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return filename
+
+    def __repr__(self):
+        return "Scenario(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS) + ")"
+
+
+def digest(engine):
+    """处理结果（水深网格与航迹）的SHA-256摘要，用于比较两次运行是否逐位相同"""
+    sha = hashlib.sha256()
+    sha.update(np.ascontiguousarray(engine.grid.values).tobytes())
+    sha.update(np.asarray(engine.track_x, dtype=float).tobytes())
+    sha.update(np.asarray(engine.track_y, dtype=float).tobytes())
+    sha.update(np.asarray(engine.history_depth, dtype=float).tobytes())
+    return sha.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行可复现的模拟测量场景")
+    parser.add_argument("scenario", nargs="?", default=None, help="场景JSON文件（缺省时使用命令行参数）")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--rate", type=float, default=None, help="数据包速率(ping/s)")
+    parser.add_argument("--beams", type=int, default=None, help="波束数")
+    parser.add_argument("--duration", type=float, default=None, help="时长(s)")
+    parser.add_argument("--model", default=None, choices=["terrain", "trench"], help="地形模型")
+    parser.add_argument("--sources", type=int, default=None, help="同时测量的数据源（探头/测量船）数")
+    parser.add_argument("--grid-size", type=int, default=100, help="水深网格尺寸")
+    parser.add_argument("--grid-workers", type=int, default=0, help="多进程网格化的工作进程数（0为单进程）")
+    parser.add_argument("-o", "--output", default=None, help="导出航迹CSV与水深网格")
+    args = parser.parse_args(argv)
+
+    scenario = Scenario.load(args.scenario) if args.scenario else Scenario()
+    for name in ("seed", "rate", "beams", "duration", "model", "sources"):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(scenario, name, value)
+
+    engine = scenario.run(grid_size=args.grid_size, grid_workers=args.grid_workers)
+    try:
+        print(json.dumps(scenario.to_dict(), ensure_ascii=False))
+        print(f"数据包: {engine.stats.pings}  覆盖率: {engine.stats.coverage:.1%}  摘要: {digest(engine)}")
+        if args.output:
+            engine.export(args.output)
+    finally:
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
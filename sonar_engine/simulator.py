@@ -0,0 +1,238 @@
+"""模拟多波束声呐数据源
+
+从界面线程中剥离出来的测量数据生成逻辑，每次调用 next_ping 返回一个数据包(dict)，
+字段与 DataGeneratorThread 发出的数据包一致，可在无界面环境下全速运行。
+
+波束噪声、异常点、设备状态变化、声速剖面扰动和船体姿态各用一个独立的 ``np.random.Generator``，
+由同一个种子经 ``SeedSequence.spawn`` 派生，给定种子时输出逐位可复现，且各随机流互不影响。
+"""
+
+import time
+
+import numpy as np
+
+from .crs import LocalTangentPlane
+from .georef import georeference
+
+# 海底地形特征 - 添加一些有趣的地形特征
+TERRAIN_FEATURES = [
+    {"type": "ridge", "x": 3.5, "y": 5.0, "height": 8, "width": 1.5},
+    {"type": "crater", "x": 7.0, "y": 3.0, "depth": 5, "radius": 1.0},
+    {"type": "seamount", "x": 2.0, "y": 8.0, "height": 10, "radius": 0.8}
+]
+
+# 模拟测区原点（纬度, 经度），模拟位置为以此为原点的站心坐标
+DEFAULT_ORIGIN = (30.0, 120.0)
+
+# 数据质量模式对应的噪声倍数
+QUALITY_NOISE_FACTOR = {
+    "高精度": 0.5,
+    "标准": 1.0,
+    "快速扫描": 2.0,
+}
+
+# 模拟器使用的随机流，新增随机流只能追加在末尾，以免改变已有随机流的序列
+STREAMS = ("beams", "anomalies", "status", "svp", "attitude")
+
+
+def spawn_streams(seed=None, names=STREAMS):
+    """由一个种子（整数或 SeedSequence，None 表示取系统熵）派生互相独立的随机数生成器"""
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return {name: np.random.default_rng(child) for name, child in zip(names, sequence.spawn(len(names)))}
+
+
+class PingSimulator:
+    """模拟声呐数据生成器
+
+    model="terrain" 为带山脊、环形坑、海底山等地形特征的模型（multibeam_sonar_up），
+    model="trench" 为带沟壑和随机异常点的模型（multibeam_sonar_upda）。
+    指定 rate(ping/s) 时数据包时间戳为 start_time + 序号/rate，否则为当前时间。
+    position_x/position_y 为坐标系 crs 中的平面坐标（x 向东、y 向北，缺省为以 DEFAULT_ORIGIN 为原点的
+    站心坐标），gps_lat/gps_lon 由平面坐标反算，两者一致；heading 为真航向。
+    船体横摇/纵摇按正弦摇摆叠加随机扰动模拟（幅值与周期见 ATTITUDE），随数据包输出 roll/pitch，
+    地形模型按航向与姿态归位后的波束落点取水深。
+    多探头/多船模拟时 source 为数据源名称（写入数据包的 source 字段），start_y 为测线起点的 y 坐标，
+    各数据源沿相互平行的测线航行。
+    """
+
+    # 姿态模拟参数：(幅值°, 周期s, 随机扰动标准差°)
+    ATTITUDE = {"roll": (2.0, 8.0, 0.1), "pitch": (1.0, 6.0, 0.05)}
+
+    def __init__(self, beam_count=64, noise_level=0.2, data_quality="高精度", model="terrain",
+                 swath_angle=150.0, seed=None, rate=None, start_time=0.0, crs=None, source=None, start_y=0.0):
+        self.beam_count = beam_count
+        self.noise_level = noise_level
+        self.data_quality = data_quality
+        self.model = model
+        self.swath_angle = swath_angle
+        self.rng = spawn_streams(seed)
+        self.rate = rate
+        self.start_time = start_time
+        self.ping_count = 0
+        self.source = source
+
+        # 声呐位置与航向
+        self.position_x = 0.0
+        self.position_y = start_y
+        self.heading = 0.0
+        self.roll = 0.0
+        self.pitch = 0.0
+        self._attitude_phase = {name: self.rng["attitude"].random() * 2 * np.pi for name in self.ATTITUDE}
+
+        # GPS数据（由平面坐标反算）
+        self.crs = crs if crs is not None else LocalTangentPlane(*DEFAULT_ORIGIN)
+        self.gps_lat, self.gps_lon = (float(v) for v in self.crs.inverse(self.position_x, self.position_y))
+
+    def set_params(self, noise=None, beams=None, quality=None):
+        """更新模拟参数"""
+        if noise is not None:
+            self.noise_level = noise
+        if beams is not None:
+            self.beam_count = beams
+        if quality is not None:
+            self.data_quality = quality
+
+    @property
+    def beam_angles(self):
+        half = self.swath_angle / 2
+        return np.linspace(-half, half, self.beam_count)
+
+    def next_ping(self):
+        """生成下一个数据包"""
+        if self.model == "trench":
+            dy = 0.05 * np.sin(self.position_x)
+        else:
+            dy = 0.05 * np.sin(self.position_x * 0.8)
+        dx = 0.1
+
+        # 模拟声呐移动
+        self.position_x += dx
+        self.position_y += dy
+
+        # 更新船舶航向（真航向，自北顺时针）
+        self.heading = (np.arctan2(dx, dy) * 180 / np.pi) % 360
+
+        # 更新船体姿态（按数据包序号计时，未指定速率时按每秒2个数据包）
+        elapsed = self.ping_count / (self.rate or 2.0)
+        for name, (amplitude, period, jitter) in self.ATTITUDE.items():
+            value = amplitude * np.sin(2 * np.pi * elapsed / period + self._attitude_phase[name])
+            setattr(self, name, float(value + self.rng["attitude"].normal(0, jitter)))
+
+        # 更新GPS位置
+        self.gps_lat, self.gps_lon = (float(v) for v in self.crs.inverse(self.position_x, self.position_y))
+
+        # 根据数据质量模式调整噪声
+        actual_noise = self.noise_level * QUALITY_NOISE_FACTOR.get(self.data_quality, 1.0)
+
+        beam_angles = self.beam_angles
+        if self.model == "trench":
+            beam_data = self._trench_beams(beam_angles)
+        else:
+            beam_data = self._terrain_beams(beam_angles, actual_noise)
+
+        if self.rate:
+            timestamp = self.start_time + self.ping_count / self.rate
+        else:
+            timestamp = time.time()
+        self.ping_count += 1
+
+        package = {
+            'timestamp': timestamp,
+            'position_x': self.position_x,
+            'position_y': self.position_y,
+            'heading': self.heading,
+            'roll': self.roll,
+            'pitch': self.pitch,
+            'gps_lat': self.gps_lat,
+            'gps_lon': self.gps_lon,
+            'beam_angles': beam_angles,
+            'beam_data': beam_data,
+            'quality': self.data_quality,
+            'noise_level': actual_noise
+        }
+        if self.source is not None:
+            package['source'] = self.source
+        return package
+
+    def _terrain_beams(self, beam_angles, noise):
+        """带地形特征的波束深度（按波束向量化计算）"""
+        base_depth = 20 + 5 * np.sin(self.position_x * 0.5) + 3 * np.cos(self.position_y * 0.4)
+
+        # 按航向与姿态计算各波束在海底的x,y位置
+        beam_x, beam_y, _ = georeference(self.position_x, self.position_y, self.heading, beam_angles,
+                                         np.full(len(beam_angles), base_depth), pitch=self.pitch, roll=self.roll)
+
+        depth = np.full(len(beam_angles), base_depth, dtype=float)
+
+        # 添加地形特征的影响
+        for feature in TERRAIN_FEATURES:
+            dx = beam_x - feature["x"]
+            dy = beam_y - feature["y"]
+            distance = np.sqrt(dx ** 2 + dy ** 2)
+
+            if feature["type"] == "ridge":
+                width = feature["width"]
+                inside = np.abs(dx) < width
+                depth -= np.where(inside, feature["height"] * np.exp(-(dx / width) ** 2), 0.0)
+
+            elif feature["type"] == "crater":
+                inside = distance < feature["radius"]
+                depth += np.where(inside, feature["depth"] * (1 - distance / feature["radius"]), 0.0)
+
+            elif feature["type"] == "seamount":
+                inside = distance < feature["radius"]
+                depth -= np.where(inside, feature["height"] * (1 - distance / feature["radius"]) ** 2, 0.0)
+
+        # 添加噪声并限制最小深度
+        depth += self.rng["beams"].normal(0, noise, len(beam_angles))
+        return np.maximum(depth, 5)
+
+    def _trench_beams(self, beam_angles):
+        """带沟壑和异常点的波束深度"""
+        beam_count = len(beam_angles)
+        base_depth = 20 + 5 * np.sin(self.position_x * 0.5) + 3 * np.cos(self.position_y * 0.5)
+        # 添加沟壑效果
+        trench_effect = 5 * np.exp(-0.1 * (beam_angles - 20 * np.sin(self.position_x * 0.2)) ** 2)
+        # 随机波动
+        noise = self.rng["beams"].random(beam_count) * 1.5
+
+        beam_data = base_depth + trench_effect + noise
+
+        # 随机添加一些"异常点"，模拟鱼群或障碍物
+        rng = self.rng["anomalies"]
+        if rng.random() > 0.9:
+            anomaly_pos = int(rng.random() * beam_count * 0.8 + 0.1 * beam_count)
+            anomaly_length = int(rng.random() * 5) + 2
+            start = max(0, anomaly_pos - anomaly_length // 2)
+            stop = min(beam_count, anomaly_pos + anomaly_length // 2)
+            beam_data[start:stop] -= rng.random(max(stop - start, 0)) * 5 + 2
+
+        return beam_data
+
+    def poll_status_change(self, device_status):
+        """随机产生设备状态变化，返回 (设备, 新状态) 或 None
+
+        device_status 为数据源当前的设备状态，trench 模型只在其中已有的设备之间切换，为空时返回 None。
+        """
+        rng = self.rng["status"]
+        if rng.random() <= 0.97:
+            return None
+
+        if self.model == "trench":
+            if not device_status:
+                return None
+            keys = list(device_status.keys())
+            device = keys[int(rng.random() * len(keys))]
+            status = "警告" if device_status[device] == "正常" else "正常"
+        else:
+            devices = ["电源", "传感器", "数据链路", "存储系统", "GPS"]
+            device = str(rng.choice(devices))
+            status = str(rng.choice(["正常", "警告", "错误"], p=[0.7, 0.2, 0.1]))
+        return device, status
+
+    def poll_svp_delta(self, size):
+        """随机产生声速剖面扰动，返回扰动数组或 None"""
+        rng = self.rng["svp"]
+        if rng.random() <= 0.95:
+            return None
+        return rng.random(size) * 2 - 1
@@ -0,0 +1,138 @@
+"""测量统计
+
+按数据包增量更新的统计量，航行距离等累计值不再每次对整条航迹求和；网格水深统计只按被更新的网格
+增量更新，不再每个数据包扫描整个网格。
+"""
+
+import numpy as np
+
+
+class SurveyStats:
+    """测量统计数据"""
+
+    def __init__(self, swath_angle=150.0):
+        self.swath_angle = swath_angle
+        self.reset()
+
+    def reset(self):
+        self.pings = 0
+        self.soundings = 0
+        self.distance = 0.0
+        self.min_depth = float('inf')
+        self.max_depth = 0.0
+        self.depth_sum = 0.0
+        self.grid_mean = 0.0
+        self.grid_min = 0.0
+        self.grid_max = 0.0
+        self.coverage = 0.0
+        self.grid_area = 0.0
+        # 上次统计时各网格的水深（扁平数组）、有效网格数与水深和，None 表示需要整体统计
+        self._grid_values = None
+        self._grid_count = 0
+        self._grid_sum = 0.0
+        # 各数据源（数据包 source 字段）的上一位置，航行距离为各数据源航迹长度之和
+        self._last_position = {}
+
+    def update_ping(self, package):
+        """根据新的数据包更新累计统计"""
+        beam_data = package['beam_data']
+        position = (package['position_x'], package['position_y'])
+        source = package.get('source')
+
+        self.pings += 1
+        self.soundings += len(beam_data)
+        self.min_depth = min(self.min_depth, float(np.min(beam_data)))
+        self.max_depth = max(self.max_depth, float(np.max(beam_data)))
+        self.depth_sum += float(np.mean(beam_data))
+
+        last = self._last_position.get(source)
+        if last is not None:
+            self.distance += float(np.hypot(position[0] - last[0], position[1] - last[1]))
+        self._last_position[source] = position
+
+    def set_track(self, track_x, track_y):
+        """根据整条航迹重新计算航行距离（加载历史数据时）"""
+        self.pings = len(track_x)
+        self.distance = 0.0
+        self._last_position = {}
+        if len(track_x) >= 2:
+            self.distance = float(np.sum(np.hypot(np.diff(track_x), np.diff(track_y))))
+        if len(track_x) > 0:
+            self._last_position[None] = (track_x[-1], track_y[-1])
+
+    def update_grid(self, grid):
+        """扫描整个网格，重新统计水深范围与覆盖（网格被整体替换后）"""
+        self._grid_values = np.array(grid.values, dtype=float).reshape(-1)
+        valid = self._grid_values[~np.isnan(self._grid_values)]
+        self._grid_count = len(valid)
+        self._grid_sum = float(np.sum(valid))
+        if len(valid) > 0:
+            self.grid_min = float(np.min(valid))
+            self.grid_max = float(np.max(valid))
+        self._update_grid_summary(grid)
+
+    def update_cells(self, grid, cells):
+        """按被更新网格的扁平索引 cells 增量更新水深范围与覆盖统计
+
+        只读取这些网格的新旧水深。最小（大）水深所在的网格变浅（深）时无法增量得到新的极值，
+        此时整体重新统计。
+        """
+        previous = self._grid_values
+        if previous is None or previous.size != grid.values.size:
+            self.update_grid(grid)
+            return
+        cells = np.unique(cells)
+        if len(cells) == 0:
+            return
+        old = previous[cells]
+        new = grid.values.reshape(-1)[cells]
+        previous[cells] = new
+
+        old_valid = ~np.isnan(old)
+        new_valid = ~np.isnan(new)
+        empty = self._grid_count == 0
+        self._grid_count += int(np.count_nonzero(new_valid)) - int(np.count_nonzero(old_valid))
+        self._grid_sum += float(np.sum(new[new_valid])) - float(np.sum(old[old_valid]))
+        if not np.any(new_valid):
+            self._update_grid_summary(grid)
+            return
+        new_min = float(np.min(new[new_valid]))
+        new_max = float(np.max(new[new_valid]))
+        if (not empty and (np.any(old == self.grid_min) and new_min > self.grid_min
+                           or np.any(old == self.grid_max) and new_max < self.grid_max)):
+            self.update_grid(grid)
+            return
+        self.grid_min = new_min if empty else min(self.grid_min, new_min)
+        self.grid_max = new_max if empty else max(self.grid_max, new_max)
+        self._update_grid_summary(grid)
+
+    def _update_grid_summary(self, grid):
+        if self._grid_count > 0:
+            self.grid_mean = self._grid_sum / self._grid_count
+        self.coverage = self._grid_count / grid.values.size
+        self.grid_area = self.coverage * grid.extent * grid.extent
+
+    @property
+    def avg_depth(self):
+        return self.depth_sum / self.pings if self.pings else 0.0
+
+    @property
+    def swath_area(self):
+        """按航迹长度与扇区开角估算的覆盖面积"""
+        return self.distance * 2 * (self.swath_angle / 2) * np.pi / 180
+
+    def as_dict(self):
+        return {
+            "pings": self.pings,
+            "soundings": self.soundings,
+            "distance": self.distance,
+            "avg_depth": self.avg_depth,
+            "min_depth": self.min_depth if self.pings else 0.0,
+            "max_depth": self.max_depth,
+            "grid_mean": self.grid_mean,
+            "grid_min": self.grid_min,
+            "grid_max": self.grid_max,
+            "coverage": self.coverage,
+            "grid_area": self.grid_area,
+            "swath_area": self.swath_area,
+        }
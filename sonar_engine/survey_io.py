@@ -0,0 +1,146 @@
+"""测量数据的保存与加载
+
+两种文件布局：
+
+* 原有布局：航迹保存为 ``name.csv``，水深网格保存为同名的 ``name_depth.npy``，
+  航迹与网格所用的坐标系（见 crs 模块）保存为 ``name_crs.txt``；
+* 压缩容器 ``name.svy``（见 container 模块）：航迹、水深网格、声速剖面与元数据保存在一个文件中。
+
+save_survey/load_survey 按扩展名选择布局。记录的水深网格与 DepthGrid 相同，网格 (0, 0) 单元的左下角
+位于坐标原点；原有布局不保存网格尺寸，按界面网格的边长 DEFAULT_GRID_EXTENT 除以网格数计算。
+"""
+
+import os
+
+import numpy as np
+
+from . import crs as crs_module
+from .container import CONTAINER_EXT, load_container, save_container
+
+DEFAULT_GRID_EXTENT = 20.0  # 界面记录的水深网格边长(m)，与 multibeam_sonar_up 的网格一致
+
+
+def is_container(filename):
+    """文件名是否为压缩容器（.svy）"""
+    return os.path.splitext(filename)[1].lower() == CONTAINER_EXT
+
+
+def depth_path(csv_path):
+    """航迹CSV对应的水深网格文件路径"""
+    return csv_path.replace('.csv', '_depth.npy')
+
+
+def crs_path(csv_path):
+    """航迹CSV对应的坐标系文件路径"""
+    return csv_path.replace('.csv', '_crs.txt')
+
+
+def read_crs(csv_path):
+    """读取航迹CSV对应的坐标系，没有坐标系文件时返回None"""
+    if not os.path.exists(crs_path(csv_path)):
+        return None
+    with open(crs_path(csv_path), 'r', encoding='utf-8') as f:
+        return crs_module.from_string(f.read())
+
+
+def save_survey(filename, track_x, track_y, depth_data, timestamps=None, gps_lat=None, gps_lon=None, crs=None,
+                cell_size=1.0, svp=None, pings=None, metadata=None):
+    """保存航迹CSV和水深网格（crs 不为None时同时保存坐标系），返回 (csv路径, 水深文件路径)
+
+    文件名为 .svy 时保存为压缩容器（另外保存网格单元大小、逐数据包的列 pings、声速剖面 svp 和元数据
+    metadata），返回的两个路径都是容器文件。原有布局不保存 pings。
+    """
+    if is_container(filename):
+        save_container(filename, track_x, track_y, depth_data, timestamps=timestamps, gps_lat=gps_lat,
+                       gps_lon=gps_lon, crs=crs, cell_size=cell_size, svp=svp, pings=pings, metadata=metadata)
+        return filename, filename
+
+    import pandas as pd
+
+    # 对齐数据长度
+    min_len = min(len(track_x), len(track_y))
+    columns = {
+        'track_x': list(track_x)[:min_len],
+        'track_y': list(track_y)[:min_len],
+    }
+    if gps_lat is not None and gps_lon is not None:
+        columns['gps_lat'] = list(gps_lat)[:min_len]
+        columns['gps_lon'] = list(gps_lon)[:min_len]
+    if timestamps is not None:
+        columns['timestamp'] = list(timestamps)[:min_len]
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    pd.DataFrame(columns).to_csv(filename, index=False)
+
+    depth_filename = depth_path(filename)
+    np.save(depth_filename, depth_data)
+
+    if crs is not None:
+        with open(crs_path(filename), 'w', encoding='utf-8') as f:
+            f.write(crs.to_string() + "\n")
+    return filename, depth_filename
+
+
+def grid_geometry(survey, extent=DEFAULT_GRID_EXTENT):
+    """记录的水深网格的 (左下角坐标, 网格尺寸)，没有保存网格尺寸时按边长 extent 计算"""
+    cell_size = survey['cell_size'] or extent / survey['depth_data'].shape[0]
+    return survey.get('grid_origin') or (0.0, 0.0), cell_size
+
+
+def load_survey(filename, crs=None):
+    """加载航迹CSV及其水深网格
+
+    兼容 ``track_x/track_y`` 与 ``x/y`` 两种列名；只有经纬度列（``gps_lat/gps_lon`` 或
+    ``lat/lon``）时按坐标系投影为平面坐标。坐标系依次取 ``_crs.txt`` 文件、crs 参数（缺省坐标系）、
+    测点所在的UTM投影带。返回包含 track_x、track_y、gps_lat、gps_lon、timestamp、depth（XYZ测点文件的
+    深度列，缺失时均为None）、depth_data（无网格文件时为None）、crs、cell_size、grid_origin、svp 和
+    metadata（只有容器文件保存网格单元大小与原点、声速剖面与元数据）的字典。
+    """
+    if is_container(filename):
+        survey = load_container(filename)
+        if survey['crs'] is None:
+            survey['crs'] = crs
+        return survey
+
+    import pandas as pd
+
+    df = pd.read_csv(filename)
+    crs = read_crs(filename) or crs
+
+    lat_col, lon_col = ('gps_lat', 'gps_lon') if 'gps_lat' in df.columns else ('lat', 'lon')
+    lat = df[lat_col].to_numpy(dtype=float) if lat_col in df.columns else None
+    lon = df[lon_col].to_numpy(dtype=float) if lon_col in df.columns else None
+
+    if 'track_x' in df.columns:
+        track_x, track_y = df['track_x'].to_numpy(dtype=float), df['track_y'].to_numpy(dtype=float)
+    elif 'x' in df.columns:
+        track_x, track_y = df['x'].to_numpy(dtype=float), df['y'].to_numpy(dtype=float)
+    elif lat is not None and lon is not None:
+        if crs is None:
+            crs = crs_module.auto_utm(lat, lon)
+        track_x, track_y = crs.forward(lat, lon)
+    else:
+        raise ValueError("文件格式不正确，需要包含'track_x'/'track_y'、'x'/'y'或经纬度列")
+
+    survey = {
+        'track_x': track_x,
+        'track_y': track_y,
+        'gps_lat': lat,
+        'gps_lon': lon,
+        'timestamp': df['timestamp'].to_numpy(dtype=float) if 'timestamp' in df.columns else None,
+        'depth': df['depth'].to_numpy(dtype=float) if 'depth' in df.columns else None,
+        'depth_data': None,
+        'crs': crs,
+        'cell_size': None,
+        'grid_origin': None,
+        'svp': None,
+        'metadata': {},
+    }
+
+    depth_filename = depth_path(filename)
+    if os.path.exists(depth_filename):
+        survey['depth_data'] = np.load(depth_filename)
+    return survey
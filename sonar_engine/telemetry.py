@@ -0,0 +1,148 @@
+"""主机与处理流程遥测
+
+TelemetrySampler 在后台线程中按固定间隔采样进程与系统的CPU、内存、磁盘和网络
+吞吐量，以及处理引擎的数据包吞吐量，结果保存在环形缓冲区中供界面图表读取。
+界面线程只读取缓冲区，不做任何系统调用。
+
+依赖 psutil（可选）；未安装时只提供进程CPU和数据包吞吐量，其余指标为NaN。
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from .ringbuffer import ArrayRingBuffer
+
+# 指标名称 → 单位
+METRICS = {
+    "time": "s",
+    "process_cpu": "%",       # 本进程CPU（按全部核心归一化）
+    "system_cpu": "%",
+    "process_rss": "MB",
+    "system_memory": "%",
+    "disk_read": "MB/s",
+    "disk_write": "MB/s",
+    "net_recv": "KB/s",
+    "net_sent": "KB/s",
+    "ping_rate": "ping/s",
+    "sounding_rate": "测点/s",
+}
+
+
+class TelemetrySampler(threading.Thread):
+    """后台遥测采样线程
+
+    interval 为采样间隔(s)，history 为每个指标保留的采样点数。
+    处理引擎的 "ping" 事件订阅 on_ping 以统计数据包吞吐量。
+    """
+
+    def __init__(self, interval=1.0, history=300):
+        super().__init__(name="TelemetrySampler", daemon=True)
+        self.interval = interval
+        self.history = history
+        self.series = {name: ArrayRingBuffer(history) for name in METRICS}
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._pings = 0
+        self._soundings = 0
+        self._cpu_count = os.cpu_count() or 1
+
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+        self._psutil = psutil
+        self._process = psutil.Process() if psutil is not None else None
+        self._previous = None
+
+    @property
+    def has_psutil(self):
+        return self._psutil is not None
+
+    def on_ping(self, package):
+        """处理引擎 "ping" 事件的订阅回调"""
+        with self._lock:
+            self._pings += 1
+            self._soundings += len(package['beam_data'])
+
+    # ------------------------------------------------------------------ 采样
+    def _counters(self):
+        """读取累计计数器"""
+        with self._lock:
+            counters = {"pings": self._pings, "soundings": self._soundings}
+        counters["wall"] = time.perf_counter()
+        times = os.times()
+        counters["cpu_time"] = times.user + times.system
+
+        if self._psutil is not None:
+            try:
+                io = self._process.io_counters()
+                counters["disk"] = (io.read_bytes, io.write_bytes)
+            except (AttributeError, self._psutil.Error):
+                # 部分平台不提供进程IO，退回整机磁盘IO
+                disk = self._psutil.disk_io_counters()
+                counters["disk"] = (disk.read_bytes, disk.write_bytes) if disk else (np.nan, np.nan)
+            net = self._psutil.net_io_counters()
+            counters["net"] = (net.bytes_recv, net.bytes_sent) if net else (np.nan, np.nan)
+        return counters
+
+    def sample(self):
+        """采样一次，返回本次各指标的值（第一次调用只建立基准，返回None）"""
+        current = self._counters()
+        previous, self._previous = self._previous, current
+        if previous is None:
+            if self._psutil is not None:
+                self._psutil.cpu_percent(None)
+            return None
+
+        elapsed = max(current["wall"] - previous["wall"], 1e-6)
+        values = dict.fromkeys(METRICS, np.nan)
+        values["time"] = time.time()
+        values["process_cpu"] = 100.0 * (current["cpu_time"] - previous["cpu_time"]) / elapsed / self._cpu_count
+        values["ping_rate"] = (current["pings"] - previous["pings"]) / elapsed
+        values["sounding_rate"] = (current["soundings"] - previous["soundings"]) / elapsed
+
+        if self._psutil is not None:
+            values["system_cpu"] = self._psutil.cpu_percent(None)
+            values["process_rss"] = self._process.memory_info().rss / 1024 ** 2
+            values["system_memory"] = self._psutil.virtual_memory().percent
+            values["disk_read"] = (current["disk"][0] - previous["disk"][0]) / elapsed / 1024 ** 2
+            values["disk_write"] = (current["disk"][1] - previous["disk"][1]) / elapsed / 1024 ** 2
+            values["net_recv"] = (current["net"][0] - previous["net"][0]) / elapsed / 1024
+            values["net_sent"] = (current["net"][1] - previous["net"][1]) / elapsed / 1024
+
+        with self._lock:
+            for name, value in values.items():
+                self.series[name].append(value)
+        return values
+
+    def run(self):
+        self.sample()
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+
+    # ------------------------------------------------------------------ 读取
+    def latest(self):
+        """最近一次采样的各指标值"""
+        with self._lock:
+            return {name: series.last for name, series in self.series.items()}
+
+    def values(self, name):
+        """指标的历史数据（按时间顺序）"""
+        with self._lock:
+            return self.series[name].values()
+
+    def window(self, *names):
+        """同一时刻读取多个指标，返回 (相对时间(s), {指标: 数据})"""
+        with self._lock:
+            times = self.series["time"].values()
+            data = {name: self.series[name].values() for name in names}
+        if len(times):
+            times = times - times[-1]
+        return times, data
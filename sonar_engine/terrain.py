@@ -0,0 +1,138 @@
+"""水深网格的派生地形图层：坡度、坡向、阴影浮雕与曲率
+
+四个图层与水深网格同尺寸，由高程 z=-水深 的 3×3 模板（Horn 方法）按瓦片向量化计算。实时测量中
+处理引擎把每个数据包更新的网格标记到所在瓦片（模板涉及相邻网格，边界上的网格同时标记相邻瓦片），
+显示前只重新计算被标记的瓦片，阴影浮雕等图层因此在采集过程中保持实时，而不必每次整幅计算。
+
+约定：网格行对应 y（向北），列对应 x（向东）；坡向为下坡方向，从北顺时针 0~360°；
+阴影浮雕为 0~1 的光照强度，太阳方位角从北顺时针；曲率为高程的拉普拉斯算子 (1/m)，正值为凹地。
+未探测的网格在各图层中为NaN；相邻网格未探测时按中心网格的高程处理。
+"""
+
+import numpy as np
+
+LAYER_NAMES = ("slope", "aspect", "hillshade", "curvature")
+STRIP_ROWS = 64  # 整幅计算时按行条分块，临时数组留在缓存中
+
+
+def terrain_stencil(block, cell_size=1.0, azimuth=315.0, altitude=45.0):
+    """对带一圈边缘（halo=1）的水深块计算各图层，返回 {图层名: (rows-2, cols-2) 数组}"""
+    z = -np.asarray(block, dtype=float)
+    center = z[1:-1, 1:-1]
+    has_gaps = np.isnan(z).any()
+
+    def neighbor(dr, dc):
+        rows, cols = z.shape
+        value = z[1 + dr:rows - 1 + dr, 1 + dc:cols - 1 + dc]
+        return np.where(np.isnan(value), center, value) if has_gaps else value
+
+    nw, n, ne = neighbor(1, -1), neighbor(1, 0), neighbor(1, 1)
+    w, e = neighbor(0, -1), neighbor(0, 1)
+    sw, s, se = neighbor(-1, -1), neighbor(-1, 0), neighbor(-1, 1)
+
+    grad_x = ((ne + 2 * e + se) - (nw + 2 * w + sw)) / (8 * cell_size)
+    grad_y = ((nw + 2 * n + ne) - (sw + 2 * s + se)) / (8 * cell_size)
+    gradient = np.hypot(grad_x, grad_y)
+
+    # 表面单位法向量 (-gx, -gy, 1)/|.| 与太阳方向的点积
+    sun_azimuth, sun_altitude = np.radians(azimuth), np.radians(altitude)
+    shade = (-grad_x * np.sin(sun_azimuth) * np.cos(sun_altitude)
+             - grad_y * np.cos(sun_azimuth) * np.cos(sun_altitude)
+             + np.sin(sun_altitude)) / np.sqrt(gradient ** 2 + 1)
+
+    return {
+        "slope": np.degrees(np.arctan(gradient)),
+        "aspect": np.degrees(np.arctan2(-grad_x, -grad_y)) % 360,
+        "hillshade": np.clip(shade, 0, 1),
+        "curvature": (n + s + e + w - 4 * center) / (cell_size * cell_size),
+    }
+
+
+def terrain_layers(values, cell_size=1.0, azimuth=315.0, altitude=45.0, out=None):
+    """整幅网格计算各图层（按行条分块），out 为预先分配的 {图层名: 数组} 时写入其中"""
+    values = np.asarray(values, dtype=float)
+    rows = values.shape[0]
+    if out is None:
+        out = {name: np.empty(values.shape) for name in LAYER_NAMES}
+    padded = np.pad(values, 1, mode='edge')
+    for row in range(0, rows, STRIP_ROWS):
+        stop = min(row + STRIP_ROWS, rows)
+        for name, layer in terrain_stencil(padded[row:stop + 2], cell_size, azimuth, altitude).items():
+            out[name][row:stop] = layer
+    return out
+
+
+class TerrainLayers:
+    """随水深网格增量更新的地形图层
+
+    grid 为 DepthGrid；tile_size 为重新计算的瓦片边长。mark(cells) 标记被更新的网格，
+    refresh() 重新计算被标记的瓦片，layer(name) 返回最新的图层。
+    """
+
+    def __init__(self, grid, tile_size=32, azimuth=315.0, altitude=45.0):
+        self.grid = grid
+        self.tile_size = max(3, int(tile_size))
+        self.azimuth = azimuth
+        self.altitude = altitude
+        self.layers = {}
+        self.invalidate()
+
+    def invalidate(self):
+        """网格被整体替换：下次刷新时整幅重新计算"""
+        rows, cols = self.grid.values.shape
+        size = self.tile_size
+        self.layers = {name: np.full((rows, cols), np.nan) for name in LAYER_NAMES}
+        self.dirty = np.ones(((rows + size - 1) // size, (cols + size - 1) // size), dtype=bool)
+
+    def mark(self, cells):
+        """标记被更新网格（扁平索引）所在的瓦片，模板涉及的相邻瓦片一并标记"""
+        cells = np.asarray(cells, dtype=np.int64)
+        if len(cells) == 0:
+            return
+        if self.layers["slope"].shape != self.grid.values.shape:
+            self.invalidate()
+            return
+        rows, cols = self.grid.values.shape
+        row, col = np.divmod(cells, cols)
+        size = self.tile_size
+        for dr in (-1, 1):
+            for dc in (-1, 1):
+                self.dirty[np.clip(row + dr, 0, rows - 1) // size, np.clip(col + dc, 0, cols - 1) // size] = True
+
+    def refresh(self):
+        """重新计算被标记的瓦片，返回被更新网格的扁平索引（整幅重新计算时为None）"""
+        values = self.grid.values
+        if self.layers["slope"].shape != values.shape:
+            self.invalidate()
+        tiles = np.argwhere(self.dirty)
+        if len(tiles) == 0:
+            return np.empty(0, dtype=np.int64)
+        self.dirty[:] = False
+        if len(tiles) * 2 > self.dirty.size:
+            # 大部分瓦片需要更新时整幅计算
+            terrain_layers(values, self.grid.cell_size, self.azimuth, self.altitude, out=self.layers)
+            return None
+
+        rows, cols = values.shape
+        size = self.tile_size
+        padded = None
+        updated = []
+        for tile_row, tile_col in tiles:
+            row0, col0 = tile_row * size, tile_col * size
+            row1, col1 = min(row0 + size, rows), min(col0 + size, cols)
+            if row0 == 0 or col0 == 0 or row1 == rows or col1 == cols:
+                # 网格边缘的瓦片用复制边缘值的方式补齐 halo
+                if padded is None:
+                    padded = np.pad(values, 1, mode='edge')
+                block = padded[row0:row1 + 2, col0:col1 + 2]
+            else:
+                block = values[row0 - 1:row1 + 1, col0 - 1:col1 + 1]
+            for name, layer in terrain_stencil(block, self.grid.cell_size, self.azimuth, self.altitude).items():
+                self.layers[name][row0:row1, col0:col1] = layer
+            updated.append((np.arange(row0, row1)[:, None] * cols + np.arange(col0, col1)).ravel())
+        return np.concatenate(updated)
+
+    def layer(self, name):
+        """最新的图层（先重新计算被标记的瓦片）"""
+        self.refresh()
+        return self.layers[name]
@@ -0,0 +1,14 @@
+"""显控界面公用组件
+
+放置多个界面脚本共用的Qt部件与后台线程，数据处理逻辑仍在 sonar_engine 中。
+"""
+
+from .depth_raster import DepthRaster
+from .diagnostics import DiagnosticsPanel
+from .images import ImageLoader, LazyImagePage, ThumbnailCache
+from .log_view import LogLevelFilter, LogTableModel, LogView
+from .pages import LazyPage
+from .tasks import BackgroundTask
+
+__all__ = ["BackgroundTask", "DepthRaster", "DiagnosticsPanel", "ImageLoader", "LazyImagePage", "LazyPage", "LogLevelFilter",
+           "LogTableModel", "LogView", "ThumbnailCache"]
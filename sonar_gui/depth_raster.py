@@ -0,0 +1,151 @@
+"""水深图的 RGBA 渲染缓存
+
+水深网格按预先计算的颜色查找表（LUT）着色为 uint8 RGBA 缓冲区，每个数据包只重新着色被更新的网格；
+色标范围只在新水深超出当前范围时扩展（此时整幅重新着色）。同一个缓冲区直接交给多个 ImageItem 显示，
+pyqtgraph 对无色阶的 uint8 RGBA 图像不再做缩放和查表，直接生成 QImage。
+
+ImageView 自带的直方图控件继续作为色标：拖动色阶范围或在色带上切换颜色表时重新着色，
+直方图本身只在整幅重新着色时更新。
+"""
+
+import numpy as np
+import pyqtgraph as pg
+
+LUT_SIZE = 256
+
+
+class DepthRaster:
+    """水深网格的 RGBA 渲染器，attach 的所有 ImageView 共用同一个缓冲区
+
+    levels 为初始色标范围 (浅, 深)；margin 为扩展色标时在数据范围两端留出的比例。
+    """
+
+    def __init__(self, colormap='viridis', levels=(0.0, 40.0), margin=0.1):
+        self.levels = (float(levels[0]), float(levels[1]))
+        self.margin = margin
+        self.rgba = None
+        self.values = None
+        self._fitted = False  # 色标是否已按实际数据确定
+        self.views = []
+        self._legends = []
+        self.set_colormap(colormap, render=False)
+
+    # ---------------------------------------------------------------- 显示
+    def attach(self, image_view):
+        """在 ImageView 中显示缓冲区，其直方图控件改为控制本渲染器的色阶与颜色表"""
+        histogram = image_view.ui.histogram
+        # 直方图连接到不显示的占位图像，避免它对 RGBA 缓冲区设置色阶或查找表
+        legend = pg.ImageItem()
+        histogram.setImageItem(legend)
+        histogram.gradient.setColorMap(self.colormap)
+        histogram.setLevels(*self.levels)
+        histogram.sigLevelChangeFinished.connect(lambda item: self.set_levels(*item.getLevels()))
+        histogram.gradient.sigGradientChangeFinished.connect(
+            lambda gradient: self.set_lut(gradient.getLookupTable(LUT_SIZE, alpha=True)))
+        image_view.getImageItem().setLevels(None)
+        self.views.append(image_view)
+        self._legends.append(legend)
+        if self.rgba is not None:
+            self._publish(full=True)
+
+    def _publish(self, full):
+        for view in self.views:
+            view.getImageItem().setImage(self.rgba, autoLevels=False)
+        if full:
+            for view, legend in zip(self.views, self._legends):
+                if self.values is not None and np.any(np.isfinite(self.values)):
+                    legend.setImage(self.values, autoLevels=False, levels=self.levels)
+                view.ui.histogram.setLevels(*self.levels)
+
+    # ---------------------------------------------------------------- 颜色
+    def set_colormap(self, name, render=True):
+        self.colormap = pg.colormap.get(name) if isinstance(name, str) else name
+        for view in self.views:
+            view.ui.histogram.gradient.setColorMap(self.colormap)
+        self.set_lut(self.colormap.getLookupTable(nPts=LUT_SIZE, alpha=True), render)
+
+    def set_lut(self, lut, render=True):
+        """设置查找表 (n, 4) uint8；最后追加一项全透明颜色用于未探测网格"""
+        lut = np.ascontiguousarray(lut, dtype=np.uint8)
+        table = np.zeros((len(lut) + 1, 4), dtype=np.uint8)
+        table[:-1] = lut
+        self._lut = table.view(np.uint32).reshape(-1)
+        if render and self.values is not None:
+            self.render()
+
+    def set_levels(self, shallow, deep):
+        """固定色标范围并整幅重新着色"""
+        levels = (float(shallow), float(deep))
+        if levels == self.levels:
+            return
+        self.levels = levels
+        self._fitted = True
+        if self.values is not None:
+            self.render()
+
+    def _colors(self, values):
+        """水深 → RGBA（以 uint32 表示），NaN 为透明"""
+        shallow, deep = self.levels
+        count = len(self._lut) - 1
+        scale = count / (deep - shallow) if deep > shallow else 0.0
+        with np.errstate(invalid='ignore'):
+            index = np.clip((values - shallow) * scale, 0, count - 1)
+        index = np.where(np.isnan(values), count, index).astype(np.intp)
+        return self._lut[index]
+
+    def _fit_levels(self, low, high):
+        """数据范围超出色标时扩展色标（两端留 margin），返回是否改变"""
+        shallow, deep = self.levels
+        if low >= shallow and high <= deep:
+            return False
+        low, high = min(low, shallow), max(high, deep)
+        pad = (high - low) * self.margin
+        self.levels = (low - pad if low < shallow else shallow, high + pad if high > deep else deep)
+        return True
+
+    def _set_data_levels(self, valid):
+        shallow, deep = float(valid.min()), float(valid.max())
+        self.levels = (shallow, max(deep, shallow + 1.0))
+        self._fitted = True
+
+    # ---------------------------------------------------------------- 更新
+    def render(self):
+        """整幅重新着色"""
+        values = self.values
+        if self.rgba is None or self.rgba.shape[:2] != values.shape:
+            self.rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+            self._pixels = self.rgba.view(np.uint32).reshape(-1)
+        self._pixels[:] = self._colors(values.reshape(-1))
+        self._publish(full=True)
+
+    def update(self, values, cells=None):
+        """更新显示：cells 为被更新网格的扁平索引，None 表示整个网格已替换
+
+        整个网格替换时色标按数据范围重新确定；增量更新时只在新值超出色标时扩展色标并整幅着色，
+        否则只着色 cells。返回是否整幅重新着色。
+        """
+        if cells is None or self.values is None or self.values.shape != np.shape(values):
+            self.values = values
+            valid = values[np.isfinite(values)]
+            if len(valid):
+                self._set_data_levels(valid)
+            self.render()
+            return True
+
+        self.values = values
+        cells = np.asarray(cells, dtype=np.intp)
+        if len(cells) == 0:
+            return False
+        changed = values.reshape(-1)[cells]
+        finite = changed[np.isfinite(changed)]
+        if len(finite) and not self._fitted:
+            # 第一批有效数据：色标改为其水深范围
+            self._set_data_levels(finite)
+            self.render()
+            return True
+        if len(finite) and self._fit_levels(float(finite.min()), float(finite.max())):
+            self.render()
+            return True
+        self._pixels[cells] = self._colors(changed)
+        self._publish(full=False)
+        return False
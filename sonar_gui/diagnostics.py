@@ -0,0 +1,101 @@
+"""处理流程耗时诊断面板"""
+
+import os
+import time
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout, QWidget)
+
+COLUMNS = [
+    ("阶段", None),
+    ("次数", "count"),
+    ("平均(ms)", "mean_ms"),
+    ("p50(ms)", "p50_ms"),
+    ("p95(ms)", "p95_ms"),
+    ("p99(ms)", "p99_ms"),
+    ("最大(ms)", "max_ms"),
+]
+
+
+class DiagnosticsPanel(QWidget):
+    """显示 StageTimers 中各阶段耗时分位数的表格
+
+    只在面板可见时按 refresh_interval(ms) 刷新，可重置统计或导出为JSON。
+    """
+
+    def __init__(self, timers, refresh_interval=1000, dump_dir="logs", parent=None):
+        super().__init__(parent)
+        self.timers = timers
+        self.dump_dir = dump_dir
+
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.summary_label = QLabel("尚无耗时记录")
+        button_layout.addWidget(self.summary_label)
+        button_layout.addStretch()
+
+        reset_button = QPushButton("重置统计")
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+
+        dump_button = QPushButton("导出JSON")
+        dump_button.clicked.connect(self.dump_json)
+        button_layout.addWidget(dump_button)
+        layout.addLayout(button_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(refresh_interval)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        snapshot = self.timers.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, summary) in enumerate(sorted(snapshot.items())):
+            for column, (_, key) in enumerate(COLUMNS):
+                if key is None:
+                    text = name
+                elif key == "count":
+                    text = str(summary[key])
+                else:
+                    text = f"{summary[key]:.3f}"
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+        if snapshot:
+            self.summary_label.setText(f"{len(snapshot)} 个阶段，更新于 {time.strftime('%H:%M:%S')}")
+
+    def reset(self):
+        self.timers.reset()
+        self.table.setRowCount(0)
+        self.summary_label.setText("尚无耗时记录")
+
+    def dump_json(self):
+        default = os.path.join(self.dump_dir, f"stage_latency_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        filename, _ = QFileDialog.getSaveFileName(self, "导出耗时统计", default, "JSON文件 (*.json)")
+        if not filename:
+            return
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.timers.dump_json(filename)
+        self.summary_label.setText(f"已导出: {filename}")
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
@@ -0,0 +1,128 @@
+"""图片预览页的延迟加载
+
+预览页在第一次显示时才扫描目录并创建布局，图片在后台线程中解码和缩放，
+缩放后的缩略图缓存在磁盘上，下次启动直接读取缓存，不再解码原图。
+
+后台线程只使用 QImage（QPixmap 只能在界面线程中创建），解码完成后通过信号
+交给界面线程转换为 QPixmap 显示。
+"""
+
+import hashlib
+import os
+
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from .pages import LazyPage
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "thumbnails")
+
+
+class ThumbnailCache:
+    """磁盘缩略图缓存
+
+    缓存键由原图路径、修改时间、文件大小和目标尺寸组成，原图被替换后自动失效。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def cache_path(self, path, size):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".png")
+
+    def load(self, path, size):
+        """返回缩放到 size 以内的 QImage，原图无法读取时返回空 QImage"""
+        try:
+            cached = self.cache_path(path, size)
+        except OSError:
+            return QImage()
+
+        if os.path.exists(cached):
+            image = QImage(cached)
+            if not image.isNull():
+                return image
+
+        image = QImage(path)
+        if image.isNull():
+            return image
+        image = image.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            image.save(cached, "PNG")
+        except OSError:
+            pass  # 缓存写入失败不影响显示
+        return image
+
+
+class ImageLoader(QThread):
+    """后台解码图片，逐张发出结果"""
+    imageLoaded = pyqtSignal(int, QImage)
+    imageFailed = pyqtSignal(int, str)
+
+    def __init__(self, requests, cache=None, parent=None):
+        super().__init__(parent)
+        self.requests = list(requests)  # [(path, (宽, 高)), ...]
+        self.cache = cache or ThumbnailCache()
+
+    def run(self):
+        for index, (path, size) in enumerate(self.requests):
+            if self.isInterruptionRequested():
+                return
+            image = self.cache.load(path, size)
+            if image.isNull():
+                self.imageFailed.emit(index, path)
+            else:
+                self.imageLoaded.emit(index, image)
+
+    def stop(self):
+        self.requestInterruption()
+        self.wait()
+
+
+class LazyImagePage(LazyPage):
+    """第一次显示时才构建的图片预览页
+
+    build(page) 负责创建页面布局，其中的图片通过 ``page.image_label(path, size)``
+    获得占位标签，构建完成后统一交给后台线程加载。
+    """
+
+    def __init__(self, build, cache=None, parent=None):
+        super().__init__(build, parent)
+        self._cache = cache
+        self._labels = []
+        self._requests = []
+        self._loader = None
+
+    def image_label(self, path, size=(800, 600)):
+        """创建图片占位标签，图片加载完成后自动显示"""
+        label = QLabel("加载中...")
+        label.setAlignment(Qt.AlignCenter)
+        label.setMinimumHeight(min(size[1], 200))
+        self._labels.append(label)
+        self._requests.append((path, size))
+        return label
+
+    def built(self):
+        if not self._requests:
+            return
+        self._loader = ImageLoader(self._requests, self._cache, self)
+        self._loader.imageLoaded.connect(self._on_image_loaded)
+        self._loader.imageFailed.connect(self._on_image_failed)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._loader.stop)
+        self._loader.start()
+
+    def _on_image_loaded(self, index, image):
+        label = self._labels[index]
+        label.setMinimumHeight(0)
+        label.setPixmap(QPixmap.fromImage(image))
+
+    def _on_image_failed(self, index, path):
+        label = self._labels[index]
+        label.setText(f"无法加载图片: {path}")
+        label.setStyleSheet("color: red")
@@ -0,0 +1,174 @@
+"""系统日志表格
+
+日志保存在 sonar_engine.eventlog.EventLog 的环形缓冲区中，LogTableModel 只按序号
+映射行号，不复制记录。新消息先写入缓冲区，由定时器批量通知视图插入行，被覆盖的
+最旧记录批量删除，因此每条消息的内存和界面开销都是常数。
+"""
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, QTimer
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QComboBox, QHBoxLayout, QHeaderView, QLabel, QTableView, QVBoxLayout, QWidget
+
+from sonar_engine.eventlog import EventLog
+
+LEVEL_COLORS = {
+    "信息": QColor("#00CCFF"),
+    "成功": QColor("#00FF00"),
+    "警告": QColor("#FFCC00"),
+    "错误": QColor("#FF0000"),
+}
+
+# (表头, LogRecord字段)
+DEFAULT_COLUMNS = [("时间", "time_text"), ("级别", "level"), ("事件", "message")]
+
+
+class LogTableModel(QAbstractTableModel):
+    """以 EventLog 为数据源的日志表格模型"""
+
+    def __init__(self, event_log=None, columns=None, flush_interval=200, parent=None):
+        super().__init__(parent)
+        self.log = event_log if event_log is not None else EventLog()
+        self.columns = list(columns or DEFAULT_COLUMNS)
+
+        # 视图已知的行：序号 [_first_seq, _first_seq + _rows)
+        self._first_seq = self.log.buffer.first_seq
+        self._rows = 0
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append(self, message, level="信息"):
+        """记录一条日志，视图在下一次批量刷新时更新"""
+        self.log.append(message, level)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """把缓冲区的变化一次性通知给视图"""
+        buffer = self.log.buffer
+
+        # 删除已被覆盖的最旧行
+        evicted = min(buffer.first_seq - self._first_seq, self._rows)
+        if evicted > 0:
+            self.beginRemoveRows(QModelIndex(), 0, evicted - 1)
+            self._first_seq += evicted
+            self._rows -= evicted
+            self.endRemoveRows()
+        if self._rows == 0:
+            self._first_seq = max(self._first_seq, buffer.first_seq)
+
+        # 批量插入新行
+        added = buffer.next_seq - (self._first_seq + self._rows)
+        if added > 0:
+            self.beginInsertRows(QModelIndex(), self._rows, self._rows + added - 1)
+            self._rows += added
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.log.buffer.clear()
+        self._first_seq = 0
+        self._rows = 0
+        self.endResetModel()
+
+    def record(self, row):
+        return self.log.buffer.get(self._first_seq + row)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.record(index.row())
+        if record is None:
+            return None  # 已被覆盖，下一次刷新时删除
+
+        if role == Qt.DisplayRole:
+            return getattr(record, self.columns[index.column()][1])
+        if role == Qt.ForegroundRole and self.columns[index.column()][1] != "time_text":
+            return LEVEL_COLORS.get(record.level)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return None
+
+
+class LogLevelFilter(QSortFilterProxyModel):
+    """按日志级别筛选"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.levels = None  # None 表示全部
+
+    def set_levels(self, levels):
+        self.levels = set(levels) if levels else None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.levels is None:
+            return True
+        record = self.sourceModel().record(source_row)
+        return record is not None and record.level in self.levels
+
+
+class LogView(QWidget):
+    """日志表格视图，可选级别筛选框，新消息到达时若已在底部则自动滚动"""
+
+    FILTERS = {
+        "全部": None,
+        "信息": ("信息", "成功"),
+        "警告及以上": ("警告", "错误"),
+        "错误": ("错误",),
+    }
+
+    def __init__(self, model, show_filter=True, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.proxy = LogLevelFilter(self)
+        self.proxy.setSourceModel(model)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        if show_filter:
+            filter_layout = QHBoxLayout()
+            filter_layout.addWidget(QLabel("级别:"))
+            self.level_combo = QComboBox()
+            self.level_combo.addItems(list(self.FILTERS))
+            self.level_combo.currentTextChanged.connect(
+                lambda name: self.proxy.set_levels(self.FILTERS[name]))
+            filter_layout.addWidget(self.level_combo)
+            filter_layout.addStretch()
+            layout.addLayout(filter_layout)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.verticalHeader().setVisible(False)
+        # 固定行高，避免逐行计算尺寸
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setWordWrap(False)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self._follow = True
+        self.proxy.rowsAboutToBeInserted.connect(self._remember_scroll)
+        self.proxy.rowsInserted.connect(self._scroll_if_following)
+
+    def _remember_scroll(self, *args):
+        bar = self.table.verticalScrollBar()
+        self._follow = bar.value() >= bar.maximum()
+
+    def _scroll_if_following(self, *args):
+        if self._follow:
+            self.table.scrollToBottom()
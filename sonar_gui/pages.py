@@ -0,0 +1,34 @@
+"""延迟构建的选项卡页面"""
+
+from PyQt5.QtWidgets import QWidget
+
+
+class LazyPage(QWidget):
+    """第一次显示时才调用 build(page) 构建内容的页面
+
+    用于包含matplotlib图表、图片等构建代价较高的选项卡，使主窗口启动时只构建
+    首先显示的页面。需要提前访问页面内部件时调用 ensure_built()。
+    """
+
+    def __init__(self, build, parent=None):
+        super().__init__(parent)
+        self._build = build
+        self._built = False
+
+    @property
+    def is_built(self):
+        return self._built
+
+    def ensure_built(self):
+        if self._built:
+            return
+        self._built = True
+        self._build(self)
+        self.built()
+
+    def built(self):
+        """构建完成后的钩子"""
+
+    def showEvent(self, event):
+        self.ensure_built()
+        super().showEvent(event)
@@ -0,0 +1,36 @@
+"""后台任务线程"""
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class BackgroundTask(QThread):
+    """在后台线程中运行 function(progress, cancelled)，进度与结果通过信号回到界面线程
+
+    function 通过 progress(完成量, 总量) 报告进度（总量未知时传None），并定期调用 cancelled()
+    检查是否已被取消；返回值由 succeeded 信号发出，异常信息由 failed 信号发出。
+    """
+    progressed = pyqtSignal(int, int)  # (完成量, 总量)，总量未知时为0
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, function, parent=None):
+        super().__init__(parent)
+        self.function = function
+
+    def run(self):
+        try:
+            result = self.function(self._report, self.isInterruptionRequested)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(result)
+
+    def _report(self, done, total=None):
+        self.progressed.emit(int(done), int(total or 0))
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def stop(self):
+        self.requestInterruption()
+        self.wait()